@@ -1,24 +1,46 @@
 # Root Cause Investigation System Agents
 # Import agents as they are created
+#
+# Agents are resolved lazily (PEP 562): `import agents` stays cheap and the
+# heavy modules (python-docx renderer, OpenAI client) load on first access.
 
-from .overview_agent import OverviewAgent
-from .assessment_agent import AssessmentAgent
-from .rootcause_agent_v2 import RootCauseAgentV2 as RootCauseAgent
-from .orchestrator import RootCauseOrchestrator
-from .skillbased_docx_agent import SkillBasedDocxAgent
+import importlib
+
+_LAZY = {
+    'OverviewAgent': ('.overview_agent', 'OverviewAgent'),
+    'AssessmentAgent': ('.assessment_agent', 'AssessmentAgent'),
+    'RootCauseAgent': ('.rootcause_agent_v2', 'RootCauseAgentV2'),
+    'RootCauseOrchestrator': ('.orchestrator', 'RootCauseOrchestrator'),
+    'InvestigationContext': ('.orchestrator', 'InvestigationContext'),
+    'SkillBasedDocxAgent': ('.skillbased_docx_agent', 'SkillBasedDocxAgent'),
+    'ActionPlanAgent': ('.actionplan_agent', 'ActionPlanAgent'),
+}
 
 # TODO: Add remaining agents
 # from .investigation_agent import InvestigationAgent
 # from .recommendation_agent import RecommendationAgent
-# from .actionplan_agent import ActionPlanAgent
 
 __all__ = [
     'OverviewAgent',
     'AssessmentAgent',
     'RootCauseAgent',
     'RootCauseOrchestrator',
+    'InvestigationContext',
     'SkillBasedDocxAgent',
+    'ActionPlanAgent',
     # 'InvestigationAgent',
     # 'RecommendationAgent',
-    # 'ActionPlanAgent',
 ]
+
+
+def __getattr__(name):
+    if name not in _LAZY:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    module_name, attr = _LAZY[name]
+    value = getattr(importlib.import_module(module_name, __name__), attr)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -3,12 +3,68 @@ Action Plan Agent - Part 4 of HSG245
 Generates action plan based on root cause analysis results
 """
 
-from openai import OpenAI
-from typing import Dict, List
+from shared.llm_client import create_openrouter_client
+from shared.prompt_cache import cacheable_messages
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
 from datetime import datetime, timedelta
+import contextvars
 import json
+import logging
 import os
-from .json_parser import extract_json_from_response, safe_json_parse
+import queue
+from shared.log import get_logger
+from shared.progress import emit
+from .json_parser import JsonArrayStream, extract_json_from_response, safe_json_parse
+
+logger = get_logger(__name__)
+
+CONTROL_TYPES = ("elimination", "substitution", "engineering", "administrative", "ppe")
+
+# Time horizons generated separately in "parallel" mode, each with its own
+# prompt, token budget and validation (default target date if the model's
+# date is unusable)
+HORIZONS = {
+    "immediate": {
+        "title": "IMMEDIATE ACTIONS (24-48 hours)",
+        "focus": ["Quick wins to prevent immediate recurrence", "Emergency safety measures",
+                  "Temporary controls", "Critical communication needs"],
+        "default_days": 2,
+        "max_tokens": 1200,
+    },
+    "short_term": {
+        "title": "SHORT-TERM ACTIONS (1-3 months)",
+        "focus": ["Process improvements", "Equipment modifications", "Procedure updates",
+                  "Training programs", "Documentation updates"],
+        "default_days": 60,
+        "max_tokens": 1200,
+    },
+    "long_term": {
+        "title": "LONG-TERM ACTIONS (3-12 months)",
+        "focus": ["System redesign", "Culture change initiatives", "Major equipment upgrades",
+                  "Strategic safety improvements", "Policy changes"],
+        "default_days": 180,
+        "max_tokens": 1200,
+    },
+}
+
+HORIZON_BASE_PROMPT = """
+You are a Health & Safety expert creating a Risk Control Action Plan following the HSG245 framework.
+
+The incident severity and its root, underlying and immediate causes are given in the user message.
+
+For EACH action, provide:
+- Clear, specific, actionable measure
+- Suggested responsible role (e.g., "Safety Manager", "Operations Director")
+- Realistic target date (use format: DD/MM/YYYY)
+
+Ensure actions follow the hierarchy of controls:
+1. Elimination
+2. Substitution
+3. Engineering controls
+4. Administrative controls
+5. PPE (last resort)
+"""
 
 
 class ActionPlanAgent:
@@ -26,38 +82,38 @@ class ActionPlanAgent:
     
     def __init__(self):
         """Initialize Action Plan Agent (Basitleştirilmiş)"""
-        api_key = os.getenv("OPENROUTER_API_KEY") or os.getenv("OPENAI_API_KEY")
-        self.client = OpenAI(
-            base_url="https://openrouter.ai/api/v1",
-            api_key=api_key
-        )
-        print(f"✅ Aksiyon Planı Ajanı başlatıldı.")
+        self.client = create_openrouter_client()
+        logger.info("Aksiyon Planı Ajanı başlatıldı")
     
-    def generate_action_plan(self, investigation_data: Dict) -> Dict:
+    def generate_action_plan(self, investigation_data: Dict, mode: Optional[str] = None,
+                             previous: Optional[Dict] = None) -> Dict:
         """
         Generate comprehensive action plan based on root cause analysis
         
         Args:
             investigation_data: Contains root_causes, severity, etc.
+            mode: "parallel" (one call per time horizon, concurrently) or
+                  "single" (one call for all horizons); default ACTIONPLAN_MODE
+                  or "parallel"
+            previous: Part 4 data of an earlier run for the same incident
+                      (parallel mode): measures of root causes that are still
+                      present are kept, only new root causes are planned
             
         Returns:
             Part 4 data with structured action plan
         """
-        print("\n" + "="*80)
-        print("💡 PART 4: ACTION PLAN - Generating Control Measures")
-        print("="*80)
+        logger.info("Part 4 action plan: generating control measures")
+        mode = (mode or os.getenv("ACTIONPLAN_MODE", "parallel")).lower()
         
         # ========================================
         # GUARD CLAUSE: Validate input data
         # ========================================
         if not investigation_data or not isinstance(investigation_data, dict):
-            print("\n⚠️  HATA: Araştırma verisi eksik veya geçersiz!")
-            print("⚠️  Varsayılan aksiyon planı devreye giriyor...")
+            logger.warning("Araştırma verisi eksik veya geçersiz; varsayılan aksiyon planı kullanılıyor")
             return self._generate_fallback_actions()
         
         if "root_causes" not in investigation_data:
-            print("\n⚠️  HATA: Kök neden verisi eksik!")
-            print("⚠️  Varsayılan aksiyon planı devreye giriyor...")
+            logger.warning("Kök neden verisi eksik; varsayılan aksiyon planı kullanılıyor")
             return self._generate_fallback_actions()
         
         # Extract data
@@ -68,27 +124,83 @@ class ActionPlanAgent:
         
         # Additional validation: Check if root_causes is actually populated
         if not root_causes or len(root_causes) == 0:
-            print("\n⚠️  HATA: Kök neden listesi boş!")
-            print("⚠️  Varsayılan aksiyon planı devreye giriyor...")
+            logger.warning("Kök neden listesi boş; varsayılan aksiyon planı kullanılıyor")
             return self._generate_fallback_actions()
         
         # Generate actions using AI
-        print("\n🤖 AI generating risk control measures...")
-        print(f"📊 Input: {len(root_causes)} root causes, {len(immediate_causes)} immediate causes")
-        
-        actions = self._generate_actions_with_ai(
-            root_causes, 
-            underlying_causes, 
-            immediate_causes,
-            severity
+        logger.debug(
+            "Generating risk control measures from %d root causes, %d immediate causes",
+            len(root_causes), len(immediate_causes),
         )
         
+        if mode == "single":
+            actions = self._generate_actions_with_ai(
+                root_causes, 
+                underlying_causes, 
+                immediate_causes,
+                severity
+            )
+        elif previous and previous.get("_root_causes") is not None:
+            actions = self._update_actions(previous, root_causes, underlying_causes, immediate_causes, severity)
+        else:
+            causes = self._format_causes_prompt(root_causes, underlying_causes, immediate_causes, severity)
+            actions = self._generate_actions_by_horizon(causes, root_causes=root_causes)
+        
         # Check if fallback was returned (already in Part 4 format)
         if isinstance(actions, dict) and "_fallback" in actions:
-            print("⚠️  Using fallback action plan structure")
+            logger.warning("Using fallback action plan structure")
             return actions
         
-        # Structure Part 4 data from AI-generated actions
+        return self._build_part4(actions, severity)
+    
+    def stream_action_plan(self, investigation_data: Dict) -> Iterator[Dict]:
+        """
+        Streaming variant of generate_action_plan (parallel mode).
+
+        Yields {"event": "measure", "data": <control measure>} as soon as each
+        measure has been generated and validated (horizons stream
+        concurrently, so events of different horizons interleave), then
+        {"event": "complete", "data": <Part 4 data>}.
+        """
+        logger.info("Part 4 action plan: streaming control measures")
+        data = investigation_data if isinstance(investigation_data, dict) else {}
+        root_causes = data.get("root_causes") or []
+        if not root_causes:
+            logger.warning("Kök neden listesi boş; varsayılan aksiyon planı kullanılıyor")
+            fallback = self._generate_fallback_actions()
+            for measure in fallback["control_measures"]:
+                yield {"event": "measure", "data": measure}
+            yield {"event": "complete", "data": fallback}
+            return
+
+        severity = data.get("severity", "Medium level")
+        causes = self._format_causes_prompt(
+            root_causes, data.get("underlying_causes", []), data.get("immediate_causes", []), severity
+        )
+        events: "queue.Queue[Tuple[str, Optional[Dict]]]" = queue.Queue()
+        result: Dict = {}
+
+        def run() -> None:
+            try:
+                result["actions"] = self._generate_actions_by_horizon(
+                    causes, on_measure=lambda measure: events.put(("measure", measure)),
+                    root_causes=root_causes
+                )
+            finally:
+                events.put(("done", None))
+
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            pool.submit(contextvars.copy_context().run, run)
+            while True:
+                kind, measure = events.get()
+                if kind == "done":
+                    break
+                yield {"event": "measure", "data": measure}
+
+        yield {"event": "complete", "data": self._build_part4(result.get("actions") or {}, severity)}
+    
+    def _build_part4(self, actions: Dict, severity: str) -> Dict:
+        """Structure Part 4 data from AI-generated actions"""
         part4_data = {
             "control_measures": actions.get("control_measures", []),
             "immediate_actions": actions.get("immediate", []),
@@ -99,33 +211,273 @@ class ActionPlanAgent:
             "priority_level": self._calculate_priority(severity),
             "generated_at": datetime.now().strftime("%d.%m.%y %H:%M")
         }
+        if actions.get("_fallback_horizons"):
+            part4_data["_fallback_horizons"] = actions["_fallback_horizons"]
+        if actions.get("_root_causes") is not None:
+            part4_data["_root_causes"] = actions["_root_causes"]
         
         self._print_summary(part4_data)
         
         return part4_data
     
-    def _generate_actions_with_ai(self, root_causes: List, underlying_causes: List, 
-                                   immediate_causes: List, severity: str) -> Dict:
-        """Generate action plan using google/gemini-2.5-flash"""
-        
-        # Prepare causes for prompt
-        root_causes_text = self._format_causes_list(root_causes)
-        underlying_causes_text = self._format_causes_list(underlying_causes)
-        immediate_causes_text = self._format_causes_list(immediate_causes)
-        
-        prompt = f"""
-You are a Health & Safety expert creating a comprehensive action plan following the HSG245 framework.
-
-INCIDENT SEVERITY: {severity}
+    # ─────────────────────────────────────────────────────────────────────────
+    # PARALLEL MODE — ONE CALL PER TIME HORIZON
+    # ─────────────────────────────────────────────────────────────────────────
+    
+    def _format_causes_prompt(self, root_causes: List, underlying_causes: List,
+                              immediate_causes: List, severity: str) -> str:
+        """Per-incident part of the prompt (user message)"""
+        return f"""INCIDENT SEVERITY: {severity}
 
 ROOT CAUSES IDENTIFIED:
-{root_causes_text}
+{self._format_causes_list(root_causes)}
 
 UNDERLYING CAUSES:
-{underlying_causes_text}
+{self._format_causes_list(underlying_causes)}
 
 IMMEDIATE CAUSES:
-{immediate_causes_text}
+{self._format_causes_list(immediate_causes)}"""
+    
+    def _generate_actions_by_horizon(self, causes: str,
+                                     on_measure: Optional[Callable[[Dict], None]] = None,
+                                     root_causes: Optional[List] = None) -> Dict:
+        """
+        Generate the three horizons concurrently and merge them into the
+        single-call result structure. A horizon that fails validation falls
+        back to its default measures; the other horizons are kept.
+        
+        Measures are attributed to the root cause they address ("root_cause",
+        the cause text) when `root_causes` is the list numbered in `causes`.
+        """
+        texts = [self._cause_text(c) for c in root_causes] if root_causes is not None else None
+        with ThreadPoolExecutor(max_workers=len(HORIZONS), thread_name_prefix="actionplan") as pool:
+            futures = {
+                horizon: pool.submit(
+                    contextvars.copy_context().run, self._generate_horizon, horizon, causes, on_measure, texts
+                )
+                for horizon in HORIZONS
+            }
+            results = {horizon: future.result() for horizon, future in futures.items()}
+        
+        measures, fallback_horizons = [], []
+        for horizon, (horizon_measures, fell_back) in results.items():
+            if fell_back:
+                fallback_horizons.append(horizon)
+            measures.extend(horizon_measures)
+        
+        actions = self._actions_from_measures(measures, fallback_horizons)
+        if texts is not None:
+            actions["_root_causes"] = texts
+        logger.info(
+            "Action plan generated: %s",
+            ", ".join(f"{h}={len(actions[h])}" for h in HORIZONS),
+        )
+        return actions
+    
+    def _actions_from_measures(self, measures: List[Dict], fallback_horizons: List[str]) -> Dict:
+        """Single-call result structure from a list of validated measures"""
+        actions = {"control_measures": list(measures), "responsible": {}, "deadlines": {},
+                   "_fallback_horizons": list(fallback_horizons)}
+        for horizon in HORIZONS:
+            actions[horizon] = [m["measure"] for m in measures if m["category"] == horizon]
+        for m in measures:
+            actions["responsible"][m["measure"]] = m["responsible"]
+            actions["deadlines"][m["measure"]] = m["target_date"]
+        return actions
+    
+    def _update_actions(self, previous: Dict, root_causes: List, underlying_causes: List,
+                        immediate_causes: List, severity: str) -> Dict:
+        """
+        Incremental re-plan after an edited investigation: measures of root
+        causes that are unchanged are reused, measures are generated only for
+        new root causes. Unattributed measures are kept only while no root
+        cause was removed.
+        """
+        texts = [self._cause_text(c) for c in root_causes]
+        previous_texts = previous.get("_root_causes") or []
+        changed = [c for c, text in zip(root_causes, texts) if text not in previous_texts]
+        removed = [text for text in previous_texts if text not in texts]
+        
+        kept = [
+            m for m in previous.get("control_measures", [])
+            if m.get("root_cause") in texts or (m.get("root_cause") is None and not removed)
+        ]
+        fallback_horizons = [
+            h for h in previous.get("_fallback_horizons", [])
+            if any(m["category"] == h for m in kept)
+        ]
+        logger.info("Action plan update: %d root causes unchanged (%d measures kept), %d new, %d removed",
+                    len(texts) - len(changed), len(kept), len(changed), len(removed))
+        for measure in kept:
+            emit("control_measure", **measure)
+        
+        measures = kept
+        if changed:
+            causes = self._format_causes_prompt(changed, underlying_causes, immediate_causes, severity)
+            new = self._generate_actions_by_horizon(causes, root_causes=changed)
+            measures = kept + new["control_measures"]
+            fallback_horizons += [h for h in new["_fallback_horizons"] if h not in fallback_horizons]
+        
+        actions = self._actions_from_measures(measures, fallback_horizons)
+        actions["_root_causes"] = texts
+        return actions
+    
+    def _generate_horizon(self, horizon: str, causes: str,
+                          on_measure: Optional[Callable[[Dict], None]] = None,
+                          cause_texts: Optional[List[str]] = None) -> Tuple[List[Dict], bool]:
+        """
+        Measures of one horizon: (measures, used_fallback).
+
+        Complete measures of a response cut off at max_tokens are kept, and so
+        are those already published when a stream fails midway; only if none
+        survive validation is the call retried once with twice the budget,
+        then the horizon's fallback measures are used.
+
+        With `cause_texts` (the root causes numbered in `causes`) each
+        measure's "root_cause" is resolved to the cause text before it is
+        published.
+        """
+        spec = HORIZONS[horizon]
+        focus = "\n".join(f"   - {item}" for item in spec["focus"])
+        instructions = f"""Generate ONLY {spec["title"]}:
+{focus}
+
+Return as JSON with this exact structure:
+{{
+    "control_measures": [
+        {{
+            "measure": "Specific action description",
+            "responsible": "Role/Position",
+            "target_date": "DD/MM/YYYY",
+            "category": "{horizon}",
+            "control_type": "elimination|substitution|engineering|administrative|ppe",
+            "root_cause": 1
+        }}
+    ]
+}}
+
+"root_cause" is the number of the ROOT CAUSE the action addresses.
+
+Generate 2-4 actions. Be specific and practical.
+
+Return ONLY valid JSON."""
+        messages = cacheable_messages([HORIZON_BASE_PROMPT, instructions], causes)
+        
+        published: List[Dict] = []
+        
+        def publish(measure: Dict) -> None:
+            if cause_texts is not None:
+                number = measure.get("root_cause")
+                if isinstance(number, int) and 1 <= number <= len(cause_texts):
+                    measure["root_cause"] = cause_texts[number - 1]
+                else:
+                    measure["root_cause"] = cause_texts[0] if len(cause_texts) == 1 else None
+            published.append(measure)
+            emit("control_measure", **measure)
+            if on_measure is not None:
+                on_measure(measure)
+        
+        max_tokens = spec["max_tokens"]
+        for attempt in range(2):
+            try:
+                if on_measure is not None and attempt == 0:
+                    measures, finish_reason = self._stream_items(messages, max_tokens, horizon, publish)
+                else:
+                    response = self.client.chat.completions.create(
+                        model="anthropic/claude-sonnet-4.5",
+                        messages=messages,
+                        temperature=0.0,
+                        max_tokens=max_tokens,
+                        extra_headers={"anthropic-version": "2023-06-01"}
+                    )
+                    finish_reason = response.choices[0].finish_reason
+                    # Incremental parse also recovers the complete items of a truncated response
+                    stream = JsonArrayStream("control_measures")
+                    stream.feed(response.choices[0].message.content or "")
+                    measures = [m for m in (self._validate_measure(i, horizon) for i in stream.items) if m]
+                    for measure in measures:
+                        publish(measure)
+            except Exception as e:
+                logger.warning("Action plan (%s) generation failed: %s", horizon, e)
+                # Measures already sent to listeners stay; a retry would publish a second set
+                measures, finish_reason = list(published), "error"
+            
+            if measures:
+                if finish_reason in ("length", "error"):
+                    logger.warning("Action plan (%s) incomplete (%s) at %d tokens; kept %d measures",
+                                   horizon, finish_reason, max_tokens, len(measures))
+                return measures, False
+            max_tokens *= 2
+        
+        logger.warning("Action plan (%s) unusable; using fallback measures", horizon)
+        measures = [
+            m for m in self._generate_fallback_actions()["control_measures"] if m["category"] == horizon
+        ]
+        for measure in measures:
+            publish(measure)
+        return measures, True
+    
+    def _stream_items(self, messages: List[Dict], max_tokens: int, horizon: str,
+                      on_measure: Callable[[Dict], None]) -> Tuple[List[Dict], Optional[str]]:
+        """Stream one horizon, reporting each measure when its JSON object closes."""
+        response = self.client.chat.completions.create(
+            model="anthropic/claude-sonnet-4.5",
+            messages=messages,
+            temperature=0.0,
+            max_tokens=max_tokens,
+            stream=True,
+            stream_options={"include_usage": True},  # final usage chunk: rate-limit refund, usage tracking
+            extra_headers={"anthropic-version": "2023-06-01"}
+        )
+        parser = JsonArrayStream("control_measures")
+        measures, finish_reason = [], None
+        for chunk in response:
+            if not chunk.choices:
+                continue
+            choice = chunk.choices[0]
+            finish_reason = choice.finish_reason or finish_reason
+            for item in parser.feed(choice.delta.content or ""):
+                measure = self._validate_measure(item, horizon)
+                if measure:
+                    measures.append(measure)
+                    on_measure(measure)
+        return measures, finish_reason
+    
+    def _validate_measure(self, item, horizon: str) -> Optional[Dict]:
+        """Normalized control measure of `horizon`, or None if unusable"""
+        if not isinstance(item, dict):
+            return None
+        measure = str(item.get("measure") or "").strip()
+        if not measure or (item.get("category") or horizon) != horizon:
+            return None
+        
+        control_type = str(item.get("control_type") or "").strip().lower()
+        target_date = str(item.get("target_date") or "").strip()
+        try:
+            datetime.strptime(target_date, "%d/%m/%Y")
+        except ValueError:
+            target_date = (datetime.now() + timedelta(days=HORIZONS[horizon]["default_days"])).strftime("%d/%m/%Y")
+        
+        root_cause = item.get("root_cause")
+        return {
+            "measure": measure,
+            "responsible": str(item.get("responsible") or "").strip() or "H&S Manager",
+            "target_date": target_date,
+            "category": horizon,
+            "control_type": control_type if control_type in CONTROL_TYPES else "administrative",
+            # Number in the prompt's root cause list; resolved to the cause text before publishing
+            "root_cause": root_cause if isinstance(root_cause, int) and not isinstance(root_cause, bool) else None,
+        }
+    
+    def _generate_actions_with_ai(self, root_causes: List, underlying_causes: List, 
+                                   immediate_causes: List, severity: str) -> Dict:
+        """Generate action plan using google/gemini-2.5-flash"""
+        
+        # Stable instructions and schema first (cached prefix), the incident's causes last
+        instructions = """
+You are a Health & Safety expert creating a comprehensive action plan following the HSG245 framework.
+
+The incident severity and its root, underlying and immediate causes are given in the user message.
 
 Generate a comprehensive Risk Control Action Plan with THREE time-based categories:
 
@@ -162,38 +514,34 @@ Ensure actions follow the hierarchy of controls:
 5. PPE (last resort)
 
 Return as JSON with this exact structure:
-{{
+{
     "control_measures": [
-        {{
+        {
             "measure": "Specific action description",
             "responsible": "Role/Position",
             "target_date": "DD/MM/YYYY",
             "category": "immediate|short_term|long_term",
             "control_type": "elimination|substitution|engineering|administrative|ppe"
-        }}
+        }
     ],
     "immediate": ["Action 1", "Action 2", ...],
     "short_term": ["Action 1", "Action 2", ...],
     "long_term": ["Action 1", "Action 2", ...],
-    "responsible": {{"action_name": "role"}},
-    "deadlines": {{"action_name": "DD/MM/YYYY"}}
-}}
+    "responsible": {"action_name": "role"},
+    "deadlines": {"action_name": "DD/MM/YYYY"}
+}
 
 Generate at least 2-3 actions per category. Be specific and practical.
 
 Return ONLY valid JSON.
 """
+        causes = self._format_causes_prompt(root_causes, underlying_causes, immediate_causes, severity)
         
         try:
             response = self.client.chat.completions.create(
                 model="anthropic/claude-sonnet-4.5",#actual model 
                 #model = "deepseek/deepseek-r1-0528:free" # test model rofesyonel Plan Yaz
-                messages=[
-                    {
-                        "role": "user", 
-                        "content": prompt
-                    }
-                ],
+                messages=cacheable_messages([instructions], causes),
                 temperature=0.0,
                 max_tokens=2000,
                 extra_headers={
@@ -212,17 +560,21 @@ Return ONLY valid JSON.
             
             # If parsing failed, use fallback
             if result is None or not result:
-                print("⚠️  Using fallback action plan")
+                logger.warning("Action plan response could not be parsed; using fallback")
                 return self._generate_fallback_actions()
             
-            print("✅ Action plan generated successfully")
+            logger.info("Action plan generated")
             return result
             
         except Exception as e:
-            print(f"⚠️  Error generating actions with AI: {e}")
+            logger.warning("Action plan generation failed: %s", e)
             # Fallback to default actions
             return self._generate_fallback_actions()
     
+    @staticmethod
+    def _cause_text(cause) -> str:
+        return cause.get('cause', str(cause)) if isinstance(cause, dict) else str(cause)
+    
     def _format_causes_list(self, causes: List) -> str:
         """Format causes list for prompt"""
         if not causes:
@@ -231,7 +583,7 @@ Return ONLY valid JSON.
         formatted = []
         for i, cause in enumerate(causes, 1):
             if isinstance(cause, dict):
-                cause_text = cause.get('cause', str(cause))
+                cause_text = self._cause_text(cause)
                 description = cause.get('description', '')
                 formatted.append(f"{i}. {cause_text}")
                 if description:
@@ -246,7 +598,7 @@ Return ONLY valid JSON.
         Generate basic fallback actions if AI fails or data is missing
         Returns Part 4 compatible structure
         """
-        print("\n🛡️  Generating fallback action plan...")
+        logger.debug("Generating fallback action plan")
         
         today = datetime.now()
         
@@ -329,7 +681,7 @@ Return ONLY valid JSON.
             "_fallback": True  # Flag to indicate this is fallback data
         }
         
-        print("✅ Fallback plan generated successfully")
+        logger.info("Fallback action plan generated")
         return part4_fallback
     
     def _calculate_priority(self, severity: str) -> str:
@@ -344,38 +696,42 @@ Return ONLY valid JSON.
             return "Low"
     
     def _print_summary(self, data: Dict):
-        """Print action plan summary"""
-        print("\n" + "-"*80)
-        print("📊 ACTION PLAN SUMMARY")
-        print("-"*80)
+        """Action plan summary (DEBUG only)"""
+        if not logger.isEnabledFor(logging.DEBUG):
+            return
+        lines = []
+        lines.append("\n" + "-"*80)
+        lines.append("📊 ACTION PLAN SUMMARY")
+        lines.append("-"*80)
         
-        print(f"\n🎯 Priority Level: {data['priority_level']}")
-        print(f"📅 Generated: {data['generated_at']}")
+        lines.append(f"\n🎯 Priority Level: {data['priority_level']}")
+        lines.append(f"📅 Generated: {data['generated_at']}")
         
         # Print control measures table
-        print("\n📋 CONTROL MEASURES:")
-        print("\n⚡ IMMEDIATE ACTIONS (24-48 hours):")
+        lines.append("\n📋 CONTROL MEASURES:")
+        lines.append("\n⚡ IMMEDIATE ACTIONS (24-48 hours):")
         immediate_count = sum(1 for m in data['control_measures'] if m['category'] == 'immediate')
-        print(f"   Total: {immediate_count} actions")
+        lines.append(f"   Total: {immediate_count} actions")
         for measure in data['control_measures']:
             if measure['category'] == 'immediate':
-                print(f"   • {measure['measure']}")
-                print(f"     └─ Responsible: {measure['responsible']} | Due: {measure['target_date']}")
+                lines.append(f"   • {measure['measure']}")
+                lines.append(f"     └─ Responsible: {measure['responsible']} | Due: {measure['target_date']}")
         
-        print("\n📅 SHORT-TERM ACTIONS (1-3 months):")
+        lines.append("\n📅 SHORT-TERM ACTIONS (1-3 months):")
         short_count = sum(1 for m in data['control_measures'] if m['category'] == 'short_term')
-        print(f"   Total: {short_count} actions")
+        lines.append(f"   Total: {short_count} actions")
         for measure in data['control_measures']:
             if measure['category'] == 'short_term':
-                print(f"   • {measure['measure']}")
-                print(f"     └─ Responsible: {measure['responsible']} | Due: {measure['target_date']}")
+                lines.append(f"   • {measure['measure']}")
+                lines.append(f"     └─ Responsible: {measure['responsible']} | Due: {measure['target_date']}")
         
-        print("\n🎯 LONG-TERM ACTIONS (3-12 months):")
+        lines.append("\n🎯 LONG-TERM ACTIONS (3-12 months):")
         long_count = sum(1 for m in data['control_measures'] if m['category'] == 'long_term')
-        print(f"   Total: {long_count} actions")
+        lines.append(f"   Total: {long_count} actions")
         for measure in data['control_measures']:
             if measure['category'] == 'long_term':
-                print(f"   • {measure['measure']}")
-                print(f"     └─ Responsible: {measure['responsible']} | Due: {measure['target_date']}")
+                lines.append(f"   • {measure['measure']}")
+                lines.append(f"     └─ Responsible: {measure['responsible']} | Due: {measure['target_date']}")
         
-        print("\n" + "="*80)
+        lines.append("\n" + "="*80)
+        logger.debug("\n".join(lines))
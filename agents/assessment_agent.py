@@ -3,13 +3,22 @@ Assessment Agent - Part 2 of HSG245
 Initial assessment and investigation level determination
 """
 
-from openai import OpenAI
+from shared.llm_client import create_openrouter_client
+from shared.prompt_cache import cacheable_messages
+from shared.micro_batch import get_micro_batcher
+from shared.fast_classifier import get_fast_path
+from shared.config import Config
+from shared.ids import new_id
 from datetime import datetime
 from typing import Dict, Optional
 import json
+import logging
 import os
+from shared.log import get_logger
 from .json_parser import extract_json_from_response, safe_json_parse
 
+logger = get_logger(__name__)
+
 
 class AssessmentAgent:
     """
@@ -28,12 +37,8 @@ class AssessmentAgent:
     
     def __init__(self):
         """Initialize Assessment Agent with OpenRouter"""
-        api_key = os.getenv("OPENROUTER_API_KEY") or os.getenv("OPENAI_API_KEY")
-        self.client = OpenAI(
-            base_url="https://openrouter.ai/api/v1",
-            api_key=api_key
-        )
-        print("✅ Assessment Agent initialized with OpenRouter")
+        self.client = create_openrouter_client()
+        logger.info("Assessment Agent initialized")
     
     def assess_incident(self, part1_data: Dict, incident_details: Dict = None) -> Dict:
         """
@@ -46,9 +51,7 @@ class AssessmentAgent:
         Returns:
             Structured Part 2 data
         """
-        print("\n" + "="*80)
-        print("📋 PART 2: INITIAL ASSESSMENT - Evaluating Incident")
-        print("="*80)
+        logger.info("Part 2 initial assessment: evaluating incident")
         
         # Prepare combined description
         description = self._prepare_description(part1_data, incident_details)
@@ -125,12 +128,13 @@ class AssessmentAgent:
         """
         Classify event type using AI
         Options: Accident, Ill health, Near-miss, Undesired circumstance
+
+        A confident local prediction skips the LLM call (shared/fast_classifier)
         """
-        print("\n🤖 AI classifying event type...")
+        logger.debug("Classifying event type")
         
-        prompt = f"""Classify this safety event:
-
-INCIDENT: {description}
+        # Stable instructions first (cached prefix), the incident text last
+        instructions = """Classify this safety event:
 
 Types:
 1. "Accident" - injury or damage occurred
@@ -139,28 +143,25 @@ Types:
 4. "Undesired circumstance" - unsafe condition
 
 Return ONLY the event type name."""
+        incident = f"INCIDENT: {description}"
 
-        try:
-            response = self.client.chat.completions.create(
+        def ask_llm() -> str:
+            # Batched with concurrent incidents' calls (shared/micro_batch)
+            return get_micro_batcher().complete(
+                self.client, instructions, incident,
                 model="anthropic/claude-sonnet-4.5",#actual model 
                 #model = "deepseek/deepseek-r1-0528:free" # test model 
-                temperature=0.0,
                 max_tokens=50,
-                messages=[
-                    {"role": "user", "content": prompt}
-                ],
-                extra_headers={
-                    "anthropic-version": "2023-06-01"  # Prompt caching
-                }
             )
-            
-            event_type = response.choices[0].message.content.strip()
+
+        try:
+            event_type = get_fast_path("event_type", Config.EVENT_TYPES).classify(description, ask_llm)
             event_type = event_type.replace('"', '').replace("'", "").strip()
-            print(f"✅ Event classified as: {event_type}")
+            logger.info("Event classified as: %s", event_type)
             
             return event_type
         except Exception as e:
-            print(f"⚠️  Classification error: {e}")
+            logger.warning("Event classification failed: %s", e)
             return "Accident"
     
     def _assess_severity(self, description: str, part1_data: Dict) -> str:
@@ -168,14 +169,11 @@ Return ONLY the event type name."""
         Assess severity level using AI
         Options: Fatal or major, Serious, Minor, Damage only
         """
-        print("\n🤖 AI assessing severity level...")
+        logger.debug("Assessing severity level")
         
         incident_type = part1_data.get("incident_type", "")
         
-        prompt = f"""Assess severity:
-
-INCIDENT: {description}
-Type: {incident_type}
+        instructions = """Assess severity:
 
 Levels:
 1. "Fatal or major" - death, major fracture, amputation
@@ -184,28 +182,21 @@ Levels:
 4. "Damage only" - no injury
 
 Return ONLY the severity level."""
+        incident = f"INCIDENT: {description}\nType: {incident_type}"
 
         try:
-            response = self.client.chat.completions.create(
+            severity = get_micro_batcher().complete(
+                self.client, instructions, incident,
                 model="anthropic/claude-sonnet-4.5", 
                 #model=deepseek/deepseek-r1-0528:free"  # test model 
-                temperature=0.0,
                 max_tokens=50,
-                messages=[
-                    {"role": "user", "content": prompt}
-                ],
-                extra_headers={
-                    "anthropic-version": "2023-06-01"  # Prompt caching
-                }
             )
-            
-            severity = response.choices[0].message.content.strip()
             severity = severity.replace('"', '').replace("'", "").strip()
-            print(f"✅ Severity assessed as: {severity}")
+            logger.info("Severity assessed as: %s", severity)
             
             return severity
         except Exception as e:
-            print(f"⚠️  Severity assessment error: {e}")
+            logger.warning("Severity assessment failed: %s", e)
             return "Minor"
     
     def _assess_riddor(self, description: str, part1_data: Dict, part2_data: Dict) -> Dict:
@@ -213,13 +204,9 @@ Return ONLY the severity level."""
         Determine if incident is RIDDOR reportable using AI
         RIDDOR = Reporting of Injuries, Diseases and Dangerous Occurrences Regulations
         """
-        print("\n🤖 AI assessing RIDDOR reportability...")
+        logger.debug("Assessing RIDDOR reportability")
         
-        prompt = f"""RIDDOR assessment:
-
-INCIDENT: {description}
-Event: {part2_data.get('type_of_event', '')}
-Severity: {part2_data.get('actual_potential_harm', '')}
+        instructions = """RIDDOR assessment:
 
 RIDDOR reportable if:
 - Death
@@ -228,26 +215,21 @@ RIDDOR reportable if:
 - Dangerous occurrence
 
 JSON format:
-{{"reportable": "Y" or "N", "reason": "brief explanation"}}
+{"reportable": "Y" or "N", "reason": "brief explanation"}
 
 Return ONLY JSON."""
+        incident = f"""INCIDENT: {description}
+Event: {part2_data.get('type_of_event', '')}
+Severity: {part2_data.get('actual_potential_harm', '')}"""
 
         try:
-            response = self.client.chat.completions.create(
+            result = get_micro_batcher().complete(
+                self.client, instructions, incident,
                 model="anthropic/claude-sonnet-4.5", # Yasal Durumu (RIDDOR) Değerlendir
                 #model="openai/gpt-4o-mini",  #test model
-                temperature=0.0,
                 max_tokens=200,
-                messages=[
-                    {"role": "user", "content": prompt}
-                ],
-                extra_headers={
-                    "anthropic-version": "2023-06-01"  # Prompt caching
-                }
             )
             
-            result = response.choices[0].message.content.strip()
-            
             # Use robust JSON parser
             riddor = safe_json_parse(
                 result, 
@@ -255,7 +237,7 @@ Return ONLY JSON."""
                 default={"reportable": "N", "reason": "Parse failed"}
             )
             
-            print(f"✅ RIDDOR: {riddor.get('reportable', 'N')} - {riddor.get('reason', '')}")
+            logger.info("RIDDOR: %s - %s", riddor.get('reportable', 'N'), riddor.get('reason', ''))
             
             return {
                 "reportable": riddor.get("reportable", "N"),
@@ -263,7 +245,7 @@ Return ONLY JSON."""
                 "reason": riddor.get("reason", "")
             }
         except Exception as e:
-            print(f"⚠️  RIDDOR assessment error: {e}")
+            logger.warning("RIDDOR assessment failed: %s", e)
             return {"reportable": "N", "date_reported": "", "reason": "Assessment failed"}
     
     def _determine_investigation_level(self, part1_data: Dict, part2_data: Dict, description: str) -> Dict:
@@ -271,16 +253,11 @@ Return ONLY JSON."""
         Determine investigation level, priority, and team composition using AI
         Levels: High level, Medium level, Low level, Basic
         """
-        print("\n🤖 AI determining investigation level...")
+        logger.debug("Determining investigation level")
         
-        prompt = f"""You are a health and safety investigation coordinator.
+        instructions = """You are a health and safety investigation coordinator.
 
-INCIDENT INFORMATION:
-{description}
-
-Event Type: {part2_data.get('type_of_event', '')}
-Severity: {part2_data.get('actual_potential_harm', '')}
-RIDDOR: {part2_data.get('riddor_reportable', '')}
+The incident information is given in the user message.
 
 Determine the investigation level based on:
 - High level: Fatality, major injury, high potential severity, multiple victims
@@ -299,24 +276,21 @@ Return a JSON with:
 - rationale: Brief explanation
 
 Return ONLY valid JSON."""
+        incident = f"""INCIDENT INFORMATION:
+{description}
+
+Event Type: {part2_data.get('type_of_event', '')}
+Severity: {part2_data.get('actual_potential_harm', '')}
+RIDDOR: {part2_data.get('riddor_reportable', '')}"""
 
         response = self.client.chat.completions.create(
                 model="anthropic/claude-sonnet-4.5", # 
                 #model="openai/gpt-4o-mini",  #test model 
             temperature=0.2,
-            messages=[
-                {
-                    "role": "system",
-                    "content": [
-                        {
-                            "type": "text",
-                            "text": "You are an investigation coordinator. Return only valid JSON.",
-                            "cache_control": {"type": "ephemeral"}  # Cache sistem promptu
-                        }
-                    ]
-                },
-                {"role": "user", "content": prompt}
-            ],
+            messages=cacheable_messages(
+                ["You are an investigation coordinator. Return only valid JSON.", instructions],
+                incident,
+            ),
             extra_headers={
                 "anthropic-version": "2023-06-01"  # Prompt caching
             }
@@ -336,35 +310,42 @@ Return ONLY valid JSON."""
             }
         )
         
-        print(f"✅ Investigation level: {assessment.get('level', 'Medium level')}")
-        print(f"   Priority: {assessment.get('priority', 'Medium')}")
-        print(f"   Team: {', '.join(assessment.get('team', ['H&S Officer']))}")
+        logger.info(
+            "Investigation level: %s (priority: %s, team: %s)",
+            assessment.get('level', 'Medium level'),
+            assessment.get('priority', 'Medium'),
+            ', '.join(assessment.get('team', ['H&S Officer'])),
+        )
         
         return assessment
     
     def _generate_accident_book_ref(self) -> str:
-        """Generate accident book reference number"""
-        return f"{datetime.now().strftime('%j')}/{datetime.now().strftime('%y')}"
+        """Generate unique accident book reference number (see shared/ids.py)"""
+        return new_id("AB")
     
     def _print_summary(self, part2_data: Dict):
-        """Print formatted summary of Part 2 data"""
-        print("\n" + "-"*80)
-        print("📊 PART 2 INITIAL ASSESSMENT SUMMARY")
-        print("-"*80)
-        print(f"Event Type:           {part2_data['type_of_event']}")
-        print(f"Severity:             {part2_data['actual_potential_harm']}")
-        print(f"RIDDOR Reportable:    {part2_data['riddor_reportable']}")
+        """Formatted summary of Part 2 data (DEBUG only)"""
+        if not logger.isEnabledFor(logging.DEBUG):
+            return
+        lines = []
+        lines.append("\n" + "-"*80)
+        lines.append("📊 PART 2 INITIAL ASSESSMENT SUMMARY")
+        lines.append("-"*80)
+        lines.append(f"Event Type:           {part2_data['type_of_event']}")
+        lines.append(f"Severity:             {part2_data['actual_potential_harm']}")
+        lines.append(f"RIDDOR Reportable:    {part2_data['riddor_reportable']}")
         if part2_data['riddor_reportable'] == 'Y':
-            print(f"RIDDOR Reported:      {part2_data['riddor_date_reported']}")
-        print(f"Accident Book:        {part2_data['accident_book_entry']}")
+            lines.append(f"RIDDOR Reported:      {part2_data['riddor_date_reported']}")
+        lines.append(f"Accident Book:        {part2_data['accident_book_entry']}")
         if part2_data['accident_book_entry'] == 'Y':
-            print(f"Book Reference:       {part2_data['accident_book_ref']}")
-        print(f"\n🔍 Investigation:")
-        print(f"Level:                {part2_data['investigation_level']}")
-        print(f"Priority:             {part2_data['priority']}")
-        print(f"Further Invest Req:   {part2_data['further_investigation_required']}")
+            lines.append(f"Book Reference:       {part2_data['accident_book_ref']}")
+        lines.append(f"\n🔍 Investigation:")
+        lines.append(f"Level:                {part2_data['investigation_level']}")
+        lines.append(f"Priority:             {part2_data['priority']}")
+        lines.append(f"Further Invest Req:   {part2_data['further_investigation_required']}")
         if part2_data.get('investigation_team'):
-            print(f"Team Members:         {', '.join(part2_data['investigation_team'])}")
-        print(f"\nAssessed by:          {part2_data['initial_assessment_by']}")
-        print(f"Assessment Date:      {part2_data['assessment_date']}")
-        print("-"*80)
+            lines.append(f"Team Members:         {', '.join(part2_data['investigation_team'])}")
+        lines.append(f"\nAssessed by:          {part2_data['initial_assessment_by']}")
+        lines.append(f"Assessment Date:      {part2_data['assessment_date']}")
+        lines.append("-"*80)
+        logger.debug("\n".join(lines))
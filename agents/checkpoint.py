@@ -0,0 +1,165 @@
+"""
+Investigation Checkpoints - resumable investigations
+=====================================================
+
+Every completed pipeline stage (Part 1, Part 2, incident summary, immediate
+causes, Part 3, DOCX) and every completed 5-Why branch is written to local
+disk, keyed by the incident ref_no:
+
+    outputs/checkpoints/<ref_no>/
+        manifest.json            payload hash, completed stages
+        stages/part1.json        one file per stage artifact
+        branches/branch_2.json   one file per completed 5-Why branch
+
+Re-running the same incident loads these artifacts and continues from the
+last completed step, so a failure in Part 3 branch 3 or in DOCX generation
+costs one step instead of the whole pipeline. If the incident payload
+changes, its checkpoints are discarded. The orchestrator clears the
+checkpoint once an investigation completes, so only interrupted runs
+resume and the directory does not grow with finished incidents.
+"""
+
+import hashlib
+import json
+import os
+import re
+import shutil
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from shared.log import get_logger
+
+logger = get_logger(__name__)
+
+
+def incident_payload_hash(incident_data: Dict) -> str:
+    """Stable hash of an incident payload (key order independent)."""
+    canonical = json.dumps(incident_data, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def _safe_name(value: str) -> str:
+    return re.sub(r"[^A-Za-z0-9._-]+", "_", value).strip("._") or "incident"
+
+
+def incident_key(incident_data: Dict) -> str:
+    """Stable incident key: ref_no when supplied, otherwise derived from the payload."""
+    ref_no = incident_data.get("ref_no")
+    if ref_no:
+        return _safe_name(str(ref_no))
+    return f"auto-{incident_payload_hash(incident_data)[:16]}"
+
+
+def _write_json_atomic(path: Path, data: Any) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, path)
+
+
+def _read_json(path: Path) -> Optional[Any]:
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+
+
+class InvestigationCheckpoint:
+    """Checkpoint directory of a single incident."""
+
+    def __init__(self, path: Path, key: str, payload_hash: str):
+        self.path = path
+        self.key = key
+        self.payload_hash = payload_hash
+        self._lock = threading.Lock()
+
+    @property
+    def manifest_path(self) -> Path:
+        return self.path / "manifest.json"
+
+    def _manifest(self) -> Dict:
+        return _read_json(self.manifest_path) or {
+            "key": self.key,
+            "payload_hash": self.payload_hash,
+            "completed_stages": [],
+        }
+
+    # ── Stage artifacts ─────────────────────────────────────────────────────
+
+    def load_artifacts(self) -> Dict[str, Any]:
+        """All saved stage artifacts, ready to seed the pipeline."""
+        artifacts = {}
+        for file in sorted((self.path / "stages").glob("*.json")):
+            data = _read_json(file)
+            if data is not None:
+                artifacts[file.stem] = data
+        # Report file must still exist to count as done
+        report = artifacts.get("docx_report")
+        if report and not Path(report).exists():
+            del artifacts["docx_report"]
+        return artifacts
+
+    def save_stage(self, stage: str, outputs: Dict[str, Any]) -> None:
+        """Persist the outputs of one completed stage."""
+        with self._lock:
+            for name, value in outputs.items():
+                _write_json_atomic(self.path / "stages" / f"{_safe_name(name)}.json", value)
+            manifest = self._manifest()
+            if stage not in manifest["completed_stages"]:
+                manifest["completed_stages"].append(stage)
+            manifest["updated_at"] = datetime.now().isoformat(timespec="seconds")
+            _write_json_atomic(self.manifest_path, manifest)
+
+    def completed_stages(self) -> List[str]:
+        return list(self._manifest()["completed_stages"])
+
+    # ── 5-Why branches (used by RootCauseAgentV2.run_5why_branches) ─────────
+
+    def load_branch(self, branch_number: int) -> Optional[Dict]:
+        return _read_json(self.path / "branches" / f"branch_{branch_number}.json")
+
+    def save_branch(self, branch_number: int, branch: Dict) -> None:
+        _write_json_atomic(self.path / "branches" / f"branch_{branch_number}.json", branch)
+
+    def clear(self) -> None:
+        shutil.rmtree(self.path, ignore_errors=True)
+
+
+class CheckpointStore:
+    """
+    Local-disk checkpoint store.
+
+    Args:
+        root: Directory holding one sub-directory per incident
+    """
+
+    def __init__(self, root: str = "outputs/checkpoints"):
+        self.root = Path(root)
+
+    def key_for(self, incident_data: Dict) -> str:
+        return incident_key(incident_data)
+
+    def open(self, incident_data: Dict, resume: bool = True) -> InvestigationCheckpoint:
+        """
+        Open (or start) the checkpoint for an incident.
+
+        Existing checkpoints are discarded when resume=False or when they
+        were written for a different payload under the same ref_no.
+        """
+        key = self.key_for(incident_data)
+        payload_hash = incident_payload_hash(incident_data)
+        checkpoint = InvestigationCheckpoint(self.root / key, key, payload_hash)
+
+        manifest = _read_json(checkpoint.manifest_path)
+        if manifest is not None:
+            if not resume:
+                logger.info("Checkpoint silindi (resume=False): %s", key)
+                checkpoint.clear()
+            elif manifest.get("payload_hash") != payload_hash:
+                logger.info("Olay verisi değişmiş, checkpoint silindi: %s", key)
+                checkpoint.clear()
+        return checkpoint
@@ -5,11 +5,21 @@ Claude generates and executes the PDF code itself
 """
 
 import os
+import sys
 import json
+import logging
 from pathlib import Path
 from datetime import datetime
-from typing import Dict, Optional
-from openai import OpenAI
+from typing import Dict, List, Optional
+from shared.llm_client import create_openrouter_client
+from shared.ids import new_id
+from shared.log import get_logger
+from shared.prompt_cache import cacheable_messages
+
+logger = get_logger(__name__)
+
+DEFAULT_SKILL_PATH = "/Users/selcuk/Downloads/SKILL.md"
+DEFAULT_PYTHON = "/opt/homebrew/bin/python3.10"
 
 
 class ClaudeSkillPDFAgent:
@@ -18,30 +28,39 @@ class ClaudeSkillPDFAgent:
     Claude reads the skill file and generates PDF code dynamically
     """
     
-    def __init__(self):
-        """Initialize Claude Opus 4 client"""
-        self.api_key = os.getenv("OPENROUTER_API_KEY")
+    def __init__(self, api_key: Optional[str] = None, skill_path: Optional[str] = None,
+                 output_dir: str = "outputs/reports"):
+        """
+        Initialize Claude Opus 4 client
+
+        Args:
+            api_key: OpenRouter key (default: OPENROUTER_API_KEY)
+            skill_path: SKILL.md location (default: PDF_SKILL_PATH)
+            output_dir: Directory for the PDFs and the generated script
+        """
+        self.api_key = api_key or os.getenv("OPENROUTER_API_KEY")
         if not self.api_key:
             raise ValueError("OPENROUTER_API_KEY not found in environment")
         
-        self.client = OpenAI(
-            base_url="https://openrouter.ai/api/v1",
-            api_key=self.api_key
-        )
+        self.client = create_openrouter_client(api_key=self.api_key)
         
         self.model = "anthropic/claude-sonnet-4.6"
-        self.output_dir = Path("outputs/reports")
+        self.output_dir = Path(output_dir)
         self.output_dir.mkdir(parents=True, exist_ok=True)
+        # Interpreter that runs the generated script (needs reportlab)
+        self.python = os.getenv("PDF_PYTHON") or (
+            DEFAULT_PYTHON if Path(DEFAULT_PYTHON).exists() else sys.executable
+        )
         
         # Load SKILL.md
-        self.skill_path = Path("/Users/selcuk/Downloads/SKILL.md")
+        self.skill_path = Path(skill_path or os.getenv("PDF_SKILL_PATH", DEFAULT_SKILL_PATH))
         if not self.skill_path.exists():
-            print("⚠️  SKILL.md not found at /Users/selcuk/Downloads/SKILL.md")
+            logger.warning("SKILL.md not found at %s", self.skill_path)
             self.skill_content = None
         else:
             with open(self.skill_path, 'r', encoding='utf-8') as f:
                 self.skill_content = f.read()
-            print(" SKILL.md loaded successfully")
+            logger.info("SKILL.md loaded")
     
     def generate_report(self, rca_data: Dict, output_filename: Optional[str] = None) -> str:
         """
@@ -55,10 +74,6 @@ class ClaudeSkillPDFAgent:
             Path to generated PDF file
         """
         
-        print("\n" + "="*80)
-        print(" CLAUDE OPUS 4 - SKILL-BASED PDF GENERATION")
-        print("="*80)
-        
         if not self.skill_content:
             raise ValueError("SKILL.md not loaded")
         
@@ -67,55 +82,47 @@ class ClaudeSkillPDFAgent:
         
         # Generate output filename
         if not output_filename:
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            output_filename = f"HSE_RCA_Report_{timestamp}.pdf"
+            output_filename = f"{new_id('HSE_RCA_Report')}.pdf"
         
         output_path = self.output_dir / output_filename
         
         # Prepare prompt for Claude
-        prompt = self._build_claude_prompt(hse_data, str(output_path))
+        messages = self._build_claude_messages(hse_data, str(output_path))
         
-        print(" Sending request to Claude Opus 4...")
-        print(f"RCA Data: {len(hse_data.get('five_whys', []))} 5-Why steps")
-        print(f" Output: {output_path}")
-        print(" Claude is generating and executing PDF code...")
+        logger.info(
+            "Skill-based PDF generation: %d 5-Why steps → %s",
+            len(hse_data.get('five_whys', [])), output_path,
+        )
         
         try:
             # Call Claude Opus 4
             response = self.client.chat.completions.create(
                 model=self.model,
-                messages=[
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
-                ],
+                messages=messages,
                 temperature=0.3,
                 max_tokens=32000  # Maximum for complete code
             )
             
             result = response.choices[0].message.content.strip()
             
-            print(" Claude Opus 4 response received")
-            print("\n" + "-"*80)
-            print(" CLAUDE'S RESPONSE:")
-            print("-"*80)
-            print(result[:500] + "..." if len(result) > 500 else result)
-            print("-"*80)
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(
+                    "Model response (%d chars):\n%s", len(result),
+                    result[:500] + "..." if len(result) > 500 else result,
+                )
             
             # Extract and execute Python code from Claude's response
             pdf_path = self._extract_and_execute_code(result, hse_data, str(output_path))
             
             if pdf_path and Path(pdf_path).exists():
-                print(f"\n PDF Generated Successfully!")
-                print(f" File: {pdf_path}")
+                logger.info("PDF generated: %s", pdf_path)
                 return str(pdf_path)
             else:
-                print(" PDF generation failed - no file created")
+                logger.error("PDF generation failed - no file created")
                 return None
                 
         except Exception as e:
-            print(f" Error: {e}")
+            logger.error("PDF generation error: %s", e)
             raise
     
     def _transform_to_hse_format(self, rca_data: Dict) -> Dict:
@@ -203,28 +210,24 @@ class ClaudeSkillPDFAgent:
             "total_root_causes": len(root_causes)
         }
     
-    def _build_claude_prompt(self, hse_data: Dict, output_path: str) -> str:
-        """Build prompt for Claude including SKILL.md and data"""
+    def _build_claude_messages(self, hse_data: Dict, output_path: str) -> List[Dict]:
+        """Build messages: SKILL.md and task as cached prefix, RCA data and output path last"""
         
         data_json = json.dumps(hse_data, ensure_ascii=False, indent=2)
         
-        prompt = f"""Sen bir HSE (Health, Safety, Environment) Root Cause Analysis rapor uzmanısın.
+        instructions = f"""Sen bir HSE (Health, Safety, Environment) Root Cause Analysis rapor uzmanısın.
 
 Aşağıda verilen SKILL.md dosyasını kullanarak profesyonel bir PDF raporu oluşturman gerekiyor.
+RCA verisi ve PDF'in kaydedileceği konum kullanıcı mesajında verilir.
 
 # SKILL.MD İÇERİĞİ:
 {self.skill_content}
 
-# RCA VERİSİ (JSON):
-```json
-{data_json}
-```
-
 # GÖREV:
 1. SKILL.md'deki tüm özellikleri kullanarak Python kodu yaz
 2. ReportLab kütüphanesi kullan
 3. Türkçe karakter desteği için UTF-8 encoding kullan
-4. PDF dosyasını şu konuma kaydet: {output_path}
+4. PDF dosyasını kullanıcı mesajındaki konuma kaydet
 5. Tüm renk paletini (HSEColors) kullan
 6. 5-Why zincirini görsel olarak çiz
 7. Risk matrisini (5x5) oluştur
@@ -240,7 +243,15 @@ Aşağıda verilen SKILL.md dosyasını kullanarak profesyonel bir PDF raporu ol
 
 Lütfen SKILL.md'deki yapıyı birebir uygula ve çalışır Python kodu üret."""
 
-        return prompt
+        data = f"""# RCA VERİSİ (JSON):
+```json
+{data_json}
+```
+
+# PDF KONUMU:
+{output_path}"""
+
+        return cacheable_messages([instructions], data)
     
     def _extract_and_execute_code(self, claude_response: str, hse_data: Dict, output_path: str) -> Optional[str]:
         """Extract Python code from Claude's response and execute it"""
@@ -262,29 +273,27 @@ Lütfen SKILL.md'deki yapıyı birebir uygula ve çalışır Python kodu üret."
                 code_blocks.extend(blocks)
         
         if not code_blocks:
-            print(" No Python code found in Claude's response")
-            print("\n Full response preview:")
-            print(claude_response[:2000])
+            logger.error("No Python code found in the model response")
+            logger.debug("Response preview:\n%s", claude_response[:2000])
             
             # Save full response for debugging
             debug_path = self.output_dir / "claude_response_debug.txt"
             with open(debug_path, 'w', encoding='utf-8') as f:
                 f.write(claude_response)
-            print(f"\n Full response saved to: {debug_path}")
+            logger.info("Full response saved to: %s", debug_path)
             return None
         
         # Use the first (or longest) code block
         code = max(code_blocks, key=len) if len(code_blocks) > 1 else code_blocks[0]
         
-        print(f"\n Extracted {len(code)} characters of Python code")
-        print(" Executing code...")
+        logger.debug("Extracted %d characters of Python code", len(code))
         
         # Save code to temporary file
         temp_code_path = self.output_dir / "temp_pdf_generator.py"
         with open(temp_code_path, 'w', encoding='utf-8') as f:
             f.write(code)
         
-        print(f"💾 Code saved to: {temp_code_path}")
+        logger.debug("Code saved to: %s", temp_code_path)
         
         # Save data to JSON file
         temp_data_path = self.output_dir / "temp_rca_data.json"
@@ -294,14 +303,14 @@ Lütfen SKILL.md'deki yapıyı birebir uygula ve çalışır Python kodu üret."
         # Execute the code using subprocess (more reliable than exec)
         import subprocess
         try:
-            print(" Running code via subprocess...")
             
             # Get absolute paths
             abs_code_path = temp_code_path.resolve()
             abs_output_path = Path(output_path).resolve()
             
+            # Data and output paths are also passed as arguments
             result = subprocess.run(
-                ["/opt/homebrew/bin/python3.10", str(abs_code_path)],
+                [self.python, str(abs_code_path), str(temp_data_path.resolve()), str(abs_output_path)],
                 capture_output=True,
                 text=True,
                 timeout=120,
@@ -309,24 +318,22 @@ Lütfen SKILL.md'deki yapıyı birebir uygula ve çalışır Python kodu üret."
             )
             
             if result.returncode == 0:
-                print(" Subprocess execution successful")
-                print(result.stdout)
+                logger.debug("Subprocess execution successful:\n%s", result.stdout)
                 
                 if Path(output_path).exists():
                     return output_path
                 else:
-                    print("  PDF file not found after execution")
+                    logger.error("PDF file not found after execution")
                     return None
             else:
-                print(f" Subprocess error: {result.stderr}")
-                print(f"Stdout: {result.stdout}")
+                logger.error("Subprocess error: %s\nStdout: %s", result.stderr, result.stdout)
                 return None
                 
         except subprocess.TimeoutExpired:
-            print(" Execution timeout (120s)")
+            logger.error("Execution timeout (120s)")
             return None
         except Exception as e:
-            print(f" Subprocess execution failed: {e}")
+            logger.error("Subprocess execution failed: %s", e)
             return None
 
 
@@ -10,6 +10,10 @@ import json
 import re
 from typing import Dict, Any, Optional
 
+from shared.log import get_logger
+
+logger = get_logger(__name__)
+
 
 def extract_json_from_response(response_text: str, default: Optional[Dict] = None) -> Dict[str, Any]:
     """
@@ -54,8 +58,8 @@ def extract_json_from_response(response_text: str, default: Optional[Dict] = Non
             try:
                 return json.loads(json_str)
             except json.JSONDecodeError as e:
-                print(f"⚠️  JSON parse error on extracted string: {e}")
-                print(f"📝 Extracted: {json_str[:200]}...")
+                logger.warning("JSON parse error on extracted string: %s", e)
+                logger.debug("Extracted: %s...", json_str[:200])
         
         # Strategy 2: Try parsing the entire response (fallback)
         try:
@@ -72,12 +76,12 @@ def extract_json_from_response(response_text: str, default: Optional[Dict] = Non
             except json.JSONDecodeError:
                 pass
         
-        print(f"❌ Could not extract valid JSON from response")
-        print(f"📄 Response preview: {text[:300]}...")
+        logger.error("Could not extract valid JSON from response")
+        logger.debug("Response preview: %s...", text[:300])
         return default
         
     except Exception as e:
-        print(f"❌ Unexpected error in JSON extraction: {e}")
+        logger.error("Unexpected error in JSON extraction: %s", e)
         return default
 
 
@@ -108,7 +112,7 @@ def extract_json_array_from_response(response_text: str, default: Optional[list]
             try:
                 return json.loads(json_str)
             except json.JSONDecodeError as e:
-                print(f"⚠️  JSON array parse error: {e}")
+                logger.warning("JSON array parse error: %s", e)
         
         # Fallback: try entire response
         try:
@@ -116,11 +120,11 @@ def extract_json_array_from_response(response_text: str, default: Optional[list]
         except json.JSONDecodeError:
             pass
         
-        print(f"❌ Could not extract valid JSON array from response")
+        logger.error("Could not extract valid JSON array from response")
         return default
         
     except Exception as e:
-        print(f"❌ Unexpected error in JSON array extraction: {e}")
+        logger.error("Unexpected error in JSON array extraction: %s", e)
         return default
 
 
@@ -142,12 +146,115 @@ def safe_json_parse(response_text: str,
     if default is None:
         default = {}
     
-    print(f"🔍 Parsing JSON from {context}...")
     result = extract_json_from_response(response_text, default)
     
     if result == default and result == {}:
-        print(f"⚠️  Warning: Using default/empty dict for {context}")
+        logger.warning("Using default/empty dict for %s", context)
     else:
-        print(f"✅ Successfully parsed JSON from {context}")
+        logger.debug("Parsed JSON from %s", context)
     
     return result
+
+
+class JsonArrayStream:
+    """
+    Incremental parser for a JSON array of objects arriving in chunks
+    (streamed model output).
+
+    feed() returns the objects of the array that were completed by the
+    new text, so each one can be used as soon as its closing brace
+    arrives instead of after the whole response.
+
+    Args:
+        key: Name of the array field to read (e.g. "control_measures");
+             None reads the first array in the text
+
+    Example:
+        >>> stream = JsonArrayStream("items")
+        >>> stream.feed('{"items": [{"a": 1}, {"a"')
+        [{'a': 1}]
+        >>> stream.feed(': 2}]}')
+        [{'a': 2}]
+    """
+
+    def __init__(self, key: Optional[str] = None):
+        self.key = key
+        self.items: list = []
+        self.done = False
+        self._buffer = ""
+        self._pos = 0
+        self._in_array = False
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._item_start: Optional[int] = None
+
+    def feed(self, text: str) -> list:
+        if self.done or not text:
+            return []
+        self._buffer += text
+        if not self._in_array and not self._find_array():
+            return []
+
+        completed = []
+        buffer = self._buffer
+        for i in range(self._pos, len(buffer)):
+            char = buffer[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                continue
+            if char == '"':
+                self._in_string = True
+            elif char in "{[":
+                if self._depth == 0 and char == "{":
+                    self._item_start = i
+                self._depth += 1
+            elif char in "}]":
+                if self._depth == 0:
+                    # End of the array itself
+                    self.done = True
+                    self._pos = i + 1
+                    break
+                self._depth -= 1
+                if self._depth == 0 and self._item_start is not None:
+                    item = self._parse_item(buffer[self._item_start:i + 1])
+                    self._item_start = None
+                    if item is not None:
+                        self.items.append(item)
+                        completed.append(item)
+        else:
+            self._pos = len(buffer)
+
+        # Drop consumed text, keeping an unfinished item
+        keep = self._item_start if self._item_start is not None else self._pos
+        self._buffer = buffer[keep:]
+        self._pos -= keep
+        if self._item_start is not None:
+            self._item_start = 0
+        return completed
+
+    def _find_array(self) -> bool:
+        if self.key is None:
+            start = self._buffer.find("[")
+        else:
+            match = re.search(r'"%s"\s*:\s*\[' % re.escape(self.key), self._buffer)
+            start = match.end() - 1 if match else -1
+        if start < 0:
+            return False
+        self._in_array = True
+        self._buffer = self._buffer[start + 1:]
+        self._pos = 0
+        return True
+
+    @staticmethod
+    def _parse_item(text: str) -> Optional[Dict[str, Any]]:
+        try:
+            return json.loads(text)
+        except json.JSONDecodeError as e:
+            logger.warning("Skipping malformed streamed item: %s", e)
+            return None
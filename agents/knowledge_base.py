@@ -3,6 +3,7 @@ HSG245 Knowledge Base - Basit Sözlük Yapısı
 RAG/Veritabanı gerektirmez. Doğrudan Python sözlüğü olarak tutulur. No model 
 """
 
+import re
 
 HSG245_TAXONOMY = {
     "immediate_causes_actions": """
@@ -224,3 +225,21 @@ def get_all_categories() -> str:
         HSG245_TAXONOMY['root_causes_personal'],
         HSG245_TAXONOMY['root_causes_organizational']
     ])
+
+
+def get_category_codes(category: str) -> dict:
+    """
+    Kategorideki alt kodlar ve standart başlıkları.
+    
+    Args:
+        category: 'A', 'B', 'C' veya 'D'
+    
+    Returns:
+        dict: {"D4.2": "<standart başlık>", ...}
+    """
+    codes = {}
+    for line in get_category_text(category).splitlines():
+        match = re.match(r"^([A-D]\d+\.\d+)\s+(.+)$", line.strip())
+        if match:
+            codes[match.group(1)] = match.group(2).strip()
+    return codes
@@ -7,16 +7,106 @@ DEĞİŞİKLİKLER (orijinal orchestrator.py'a göre):
   + __init__ içinde docx_agent başlatılıyor
   + run_investigation() sonunda DOCX raporu otomatik üretiliyor
   + investigation_data["docx_report"] alanı eklendi
+  + Durumsuz orchestrator: her çalıştırma InvestigationContext döndürür,
+    ajanlar süreç başına bir kez oluşturulup paylaşılır, run_many() eklendi
+  + SkillBasedDocxAgent (python-docx) ilk kullanımda import edilir
+  + Soruşturma önceliği: Part 2 değerlendirmesi (investigation_level /
+    priority) LLM kapasitesinde sıralamayı belirler (shared/priority.py)
+  + Part 3 varsayılan olarak tek akışlı aşama: doğrudan nedenler gelirken
+    5-Why dalları başlar (run_pipelined), dallar checkpoint'e yazılır
 """
 
-from typing import Dict, Optional
+import json
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional
 from .overview_agent import OverviewAgent
 from .assessment_agent import AssessmentAgent
 from .rootcause_agent_v2 import RootCauseAgentV2 as RootCauseAgent
+from .pipeline import PipelineError, PipelineScheduler, StageNode
+from .checkpoint import CheckpointStore, InvestigationCheckpoint, incident_key
+from shared.log import get_logger, log_context
+from shared.priority import priority_context, priority_from_assessment, set_priority
+from shared.progress import emit
 
-# ── YENİ IMPORT ────────────────────────────────────────────────────────────────
-from .skillbased_docx_agent import SkillBasedDocxAgent
-# ──────────────────────────────────────────────────────────────────────────────
+logger = get_logger(__name__)
+
+
+class InvestigationContext(dict):
+    """
+    Tek bir soruşturmanın çalışma durumu.
+
+    run_investigation() her çağrıda yeni bir context döndürür; orchestrator
+    örneği soruşturmalar arasında durum tutmaz. dict alt sınıfı olduğu için
+    eski kullanım (result["part1"], json.dump(result)) aynen çalışır.
+    """
+
+    def __init__(self, incident_data: Dict):
+        super().__init__(
+            part1=None,
+            part2=None,
+            part3_rca=None,
+            docx_report=None,
+            status="initialized",
+        )
+        self.incident_data = incident_data
+
+    @property
+    def ref_no(self) -> Optional[str]:
+        part1 = self.get("part1") or {}
+        return part1.get("ref_no") or self.incident_data.get("ref_no")
+
+    @property
+    def status(self) -> str:
+        return self["status"]
+
+    @property
+    def failed(self) -> bool:
+        return self["status"] == "error"
+
+    def export_to_json(self, filepath: str):
+        Path(filepath).parent.mkdir(parents=True, exist_ok=True)
+        with open(filepath, "w", encoding="utf-8") as f:
+            json.dump(self, f, indent=2, ensure_ascii=False)
+        logger.info("Soruşturma dışa aktarıldı: %s", filepath)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# PAYLAŞILAN AJANLAR — süreç başına bir kez oluşturulur
+# ─────────────────────────────────────────────────────────────────────────────
+
+_shared_agents: Optional[Dict] = None
+_shared_agents_lock = threading.Lock()
+
+
+def get_shared_agents() -> Dict:
+    """
+    Ajanları süreç içinde bir kez oluşturur ve sonraki tüm orchestrator
+    örnekleriyle paylaşır. Ajanlar soruşturma durumu tutmaz; OpenAI
+    istemcileri thread-safe olduğundan eşzamanlı kullanılabilir.
+    """
+    global _shared_agents
+    with _shared_agents_lock:
+        if _shared_agents is None:
+            agents = {
+                "overview": OverviewAgent(),
+                "assessment": AssessmentAgent(),
+                "rootcause": RootCauseAgent(),
+                "docx": None,
+            }
+            # ── DOCX Rapor Ajanı ──────────────────────────────────────────────
+            # OPENROUTER_API_KEY env var'dan otomatik okunur. python-docx ve
+            # büyük sistem promptu yalnızca burada (ilk kullanımda) yüklenir.
+            from .skillbased_docx_agent import SkillBasedDocxAgent
+            try:
+                agents["docx"] = SkillBasedDocxAgent()
+            except ValueError as e:
+                logger.warning("DOCX Agent devre dışı (OPENROUTER_API_KEY ayarlanınca etkinleşir): %s", e)
+            _shared_agents = agents
+        return _shared_agents
 
 
 class RootCauseOrchestrator:
@@ -27,146 +117,335 @@ class RootCauseOrchestrator:
     1. Overview Agent  → Part 1
     2. Assessment Agent → Part 2
     3. Root Cause Agent → Part 3 (JSON)
-    4. SkillBasedDocxAgent → DOCX Rapor  ← YENİ
+    4. SkillBasedDocxAgent → DOCX Rapor
+
+    Adımlar bir bağımlılık grafiği (agents.pipeline) olarak çalışır:
+    Part 1 sınıflandırması ile doğrudan neden tespiti eşzamanlıdır.
+
+    Orchestrator durumsuzdur: her soruşturmanın verisi döndürülen
+    InvestigationContext içindedir. Tek bir "sıcak" örnek ardışık veya
+    eşzamanlı (run_many) soruşturmalar için tekrar kullanılabilir.
+    Eski betikler için yalnızca son döndürülen context saklanır
+    (get_investigation_data / export_to_json).
     """
 
-    def __init__(self):
-        print("\n" + "=" * 80)
-        print("🚀 ROOT CAUSE INVESTIGATION SYSTEM BAŞLATILIYOR")
-        print("=" * 80)
+    # Tamamlanan aşama → context durumu
+    STAGE_STATUS = {
+        "part1": "part1_complete",
+        "part2": "part2_complete",
+        "part3": "part3_complete",
+    }
 
-        self.overview_agent = OverviewAgent()
-        self.assessment_agent = AssessmentAgent()
-        self.rootcause_agent = RootCauseAgent()
+    def __init__(
+        self,
+        agents: Optional[Dict] = None,
+        stage_workers: int = 4,
+        checkpoint_dir: Optional[str] = "outputs/checkpoints",
+    ):
+        """
+        Args:
+            agents: {"overview", "assessment", "rootcause", "docx"} ajanları.
+                    Verilmezse süreç genelinde paylaşılan ajanlar kullanılır.
+            stage_workers: Bir soruşturmada eşzamanlı çalışabilecek aşama sayısı
+            checkpoint_dir: Aşama/dal checkpoint dizini (None → kapalı)
+        """
+        agents = agents or get_shared_agents()
+        self.overview_agent = agents["overview"]
+        self.assessment_agent = agents["assessment"]
+        self.rootcause_agent = agents["rootcause"]
+        self.docx_agent = agents.get("docx")
+        self._docx_enabled = self.docx_agent is not None
+        self.stage_workers = stage_workers
+        self.checkpoints = CheckpointStore(checkpoint_dir) if checkpoint_dir else None
+        self._last_context: Optional[InvestigationContext] = None
+        logger.debug("Orchestrator hazır (docx: %s, aşama işçisi: %d)", self._docx_enabled, stage_workers)
 
-        # ── YENİ: DOCX Rapor Ajanı ────────────────────────────────────────────
-        # ANTHROPIC_API_KEY env var'dan otomatik okunur
-        # .env dosyanıza ekleyin: ANTHROPIC_API_KEY=sk-ant-...
-        try:
-            self.docx_agent = SkillBasedDocxAgent()
-            self._docx_enabled = True
-        except ValueError as e:
-            print(f"⚠️  DOCX Agent devre dışı: {e}")
-            print("   ANTHROPIC_API_KEY ayarlanınca otomatik etkinleşir.")
-            self._docx_enabled = False
-        # ──────────────────────────────────────────────────────────────────────
-
-        self.investigation_data = {
-            "part1": None,
-            "part2": None,
-            "part3_rca": None,
-            "docx_report": None,   # ← YENİ
-            "status": "initialized",
-        }
-
-        print("\n✅ Tüm ajanlar başlatıldı")
-        print("=" * 80)
-
-    def run_investigation(self, incident_data: Dict) -> Dict:
+    def build_investigation_graph(
+        self,
+        incident_data: Dict,
+        checkpoint: Optional[InvestigationCheckpoint] = None,
+    ) -> List[StageNode]:
+        """
+        HSG245 aşamalarını bağımlılık grafiği olarak kurar.
+
+            part1 ──► part2 ───────────┐
+            incident_summary ──► part3 ──► docx
+
+        Part 3, ROOTCAUSE_MODE=pipelined (varsayılan) iken tek aşamadır:
+        doğrudan nedenler akışla alınır ve 5-Why dalları nedenler geldikçe
+        başlar (RootCauseAgentV2.run_pipelined). ROOTCAUSE_MODE=sequential
+        doğrudan nedenleri ayrı bir aşama (immediate_causes) olarak önce
+        tamamlar. İki modda da tamamlanan dallar checkpoint'e yazılır.
+
+        Olay metni (description / investigation_details) yeterliyse özet ve
+        Part 3 Part 1/Part 2'yi beklemez. Metin yoksa özet, eski davranıştaki
+        gibi Part 1/Part 2 alanlarından birleştirilir.
+        """
+        investigation_details = incident_data.get("investigation_details")
+        has_text = self.rootcause_agent.find_incident_text(
+            incident_data, investigation_details
+        ) is not None
+
+        def part1(incident):
+            return {"part1": self.overview_agent.process_initial_report(incident)}
+
+        def part2(part1, incident):
+            return {"part2": self.assessment_agent.assess_incident(part1, incident)}
+
+        def incident_summary(incident, part1=None, part2=None):
+            return {"incident_summary": self.rootcause_agent._prepare_incident_summary(
+                part1 if part1 is not None else incident,
+                part2 or {},
+                investigation_details,
+            )}
+
+        def immediate_causes(incident_summary):
+            return {"immediate_causes": self.rootcause_agent.identify_immediate_causes(
+                incident_summary
+            )}
+
+        def part3(incident_summary, immediate_causes):
+            return {"part3_rca": self.rootcause_agent.run_5why_branches(
+                incident_summary, immediate_causes, branch_store=checkpoint
+            )}
+
+        def part3_pipelined(incident_summary):
+            return {"part3_rca": self.rootcause_agent.run_pipelined(
+                incident_summary, branch_store=checkpoint
+            )}
+
+        summary_inputs = ["incident"] if has_text else ["incident", "part1", "part2"]
+        nodes = [
+            StageNode("part1", part1, ["incident"], ["part1"]),
+            StageNode("part2", part2, ["part1", "incident"], ["part2"]),
+            StageNode("incident_summary", incident_summary, summary_inputs, ["incident_summary"]),
+        ]
+        if os.getenv("ROOTCAUSE_MODE", "pipelined").lower() == "pipelined":
+            nodes.append(StageNode("part3", part3_pipelined, ["incident_summary"], ["part3_rca"]))
+        else:
+            nodes += [
+                StageNode("immediate_causes", immediate_causes, ["incident_summary"], ["immediate_causes"]),
+                StageNode("part3", part3, ["incident_summary", "immediate_causes"], ["part3_rca"]),
+            ]
+
+        if self._docx_enabled:
+            def docx(part1, part2, part3_rca):
+                ref_no = part1.get("ref_no", "report")
+                return {"docx_report": self.docx_agent.generate_report(
+                    investigation_data={"part1": part1, "part2": part2, "part3_rca": part3_rca},
+                    output_path=f"outputs/{ref_no}_hse_report.docx",
+                )}
+            nodes.append(StageNode("docx", docx, ["part1", "part2", "part3_rca"], ["docx_report"]))
+
+        return nodes
+
+    def run_investigation(self, incident_data: Dict, resume: bool = True,
+                          priority: Optional[str] = None) -> InvestigationContext:
         """
         Tam soruşturma iş akışını çalıştırır.
+
+        Aşamalar DAG zamanlayıcısında çalışır; bağımsız aşamalar eşzamanlıdır.
+        Aşama süreleri ve kritik yol ctx["pipeline"] altında raporlanır.
+
+        Checkpoint açıksa tamamlanan her aşama ve 5-Why dalı diske yazılır;
+        yarım kalan (hata alan) olay tekrar çalıştırıldığında son tamamlanan
+        adımdan devam edilir. Başarıyla biten soruşturmanın checkpoint'i
+        silinir: aynı olayın tekrar çalıştırılması yeni bir soruşturmadır.
         
         Args:
             incident_data: Olay bilgileri
+            resume: False ise mevcut checkpoint silinip baştan başlanır
+            priority: Part 2 tamamlanana kadar LLM önceliği (critical/high/
+                      normal/low; toplu içe aktarma için "low"). Part 2
+                      sonrası öncelik değerlendirmeden belirlenir.
             
         Returns:
             Tam soruşturma sonuçları (DOCX rapor yolu dahil)
         """
-        print("\n" + "=" * 80)
-        print("🔬 SORUŞTURMA BAŞLIYOR")
-        print("=" * 80)
+        # Aşama thread'leri bağlamı kopyalar; tüm kayıtlar olay kimliğini,
+        # tüm LLM istekleri soruşturmanın önceliğini taşır
+        with log_context(incident_id=incident_key(incident_data)), priority_context(priority):
+            ctx = self._run_investigation(incident_data, resume)
+        self._last_context = ctx
+        return ctx
+
+    def _run_investigation(self, incident_data: Dict, resume: bool) -> InvestigationContext:
+        ctx = InvestigationContext(incident_data)
+        logger.info("Soruşturma başlıyor")
+
+        checkpoint = self.checkpoints.open(incident_data, resume=resume) if self.checkpoints else None
+        initial = {"incident": incident_data}
+        if checkpoint:
+            saved = checkpoint.load_artifacts()
+            if saved:
+                logger.info("Checkpoint bulundu (%s): %s", checkpoint.key, ", ".join(sorted(saved)))
+            initial.update(saved)
+            for key in ("part1", "part2", "part3_rca", "docx_report"):
+                if key in saved:
+                    ctx[key] = saved[key]
+            if "part2" in saved:
+                self._apply_priority(ctx, saved["part2"])
+
+        def on_complete(stage: str, outputs: Dict):
+            if checkpoint:
+                checkpoint.save_stage(stage, outputs)
+            for key in ("part1", "part2", "part3_rca", "docx_report"):
+                if key in outputs:
+                    ctx[key] = outputs[key]
+            if "part2" in outputs:
+                self._apply_priority(ctx, outputs["part2"])
+            if stage in self.STAGE_STATUS:
+                ctx["status"] = self.STAGE_STATUS[stage]
+            logger.info("Aşama tamamlandı: %s", stage)
+            emit("stage", stage=stage, status="completed")
+
+        def on_start(stage: str):
+            emit("stage", stage=stage, status="started")
+
+        scheduler = PipelineScheduler(
+            self.build_investigation_graph(incident_data, checkpoint),
+            max_workers=self.stage_workers,
+        )
 
         try:
-            # Adım 1: Part 1 — Genel Bakış
-            print("\n📌 ADIM 1/4: Genel Bakış (Part 1)")
-            print("-" * 80)
-            self.investigation_data["part1"] = self.overview_agent.process_initial_report(
-                incident_data
-            )
-            self.investigation_data["status"] = "part1_complete"
-
-            # Adım 2: Part 2 — Değerlendirme
-            print("\n📌 ADIM 2/4: Değerlendirme (Part 2)")
-            print("-" * 80)
-            self.investigation_data["part2"] = self.assessment_agent.assess_incident(
-                self.investigation_data["part1"], incident_data
-            )
-            self.investigation_data["status"] = "part2_complete"
-
-            # Adım 3: Part 3 — Kök Neden Analizi
-            print("\n📌 ADIM 3/4: Kök Neden Analizi (Part 3)")
-            print("-" * 80)
-            self.investigation_data["part3_rca"] = self.rootcause_agent.analyze_root_causes(
-                self.investigation_data["part1"],
-                self.investigation_data["part2"],
-                incident_data.get("investigation_details"),
-            )
-            self.investigation_data["status"] = "part3_complete"
-
-            # ── YENİ: Adım 4 — DOCX Rapor Üretimi ────────────────────────────
-            if self._docx_enabled:
-                print("\n📌 ADIM 4/4: DOCX Rapor Üretimi (Claude API)")
-                print("-" * 80)
-
-                ref_no = self.investigation_data["part1"].get("ref_no", "report")
-                output_path = f"outputs/{ref_no}_hse_report.docx"
-
-                report_path = self.docx_agent.generate_report(
-                    investigation_data=self.investigation_data,
-                    output_path=output_path,
-                )
-                self.investigation_data["docx_report"] = report_path
-                self.investigation_data["status"] = "investigation_complete"
-            else:
-                print("\n⚠️  ADIM 4/4: DOCX raporu atlandı (API key eksik)")
-                self.investigation_data["status"] = "investigation_complete_no_docx"
-            # ──────────────────────────────────────────────────────────────────
-
-            self._print_final_summary()
-            return self.investigation_data
-
-        except Exception as e:
-            print(f"\n❌ Soruşturma hatası: {e}")
-            self.investigation_data["status"] = "error"
-            self.investigation_data["error"] = str(e)
-            raise
-
-    def _print_final_summary(self):
-        print("\n" + "=" * 80)
-        print("✅ SORUŞTURMA TAMAMLANDI")
-        print("=" * 80)
-
-        p1 = self.investigation_data.get("part1", {})
-        p2 = self.investigation_data.get("part2", {})
-        p3 = self.investigation_data.get("part3_rca", {})
-
-        print(f"\n📋 Referans No:       {p1.get('ref_no', 'N/A')}")
-        print(f"📊 Olay Tipi:         {p1.get('incident_type', 'N/A')}")
-        print(f"⚠️  Şiddet:           {p2.get('actual_potential_harm', 'N/A')}")
-        print(f"🔍 Soruşturma Düzeyi: {p2.get('investigation_level', 'N/A')}")
-        print(f"📝 RIDDOR:            {p2.get('riddor_reportable', 'N/A')}")
+            run = scheduler.run(initial, on_complete=on_complete, on_start=on_start)
+        except PipelineError as e:
+            logger.error("Soruşturma hatası (%s): %s", e.node, e.error)
+            emit("stage", stage=e.node, status="failed", error=str(e.error))
+            if checkpoint:
+                logger.info("Tamamlanan adımlar kaydedildi; tekrar çalıştırınca devam eder (%s)", checkpoint.path)
+            ctx["status"] = "error"
+            ctx["error"] = str(e.error)
+            ctx["pipeline"] = e.run.summary()
+            e.error.investigation_context = ctx
+            raise e.error
+
+        ctx["pipeline"] = run.summary()
+        if checkpoint:
+            # Yalnızca yarım kalan soruşturmalar devam eder; dizin büyümez
+            checkpoint.clear()
+        if self._docx_enabled:
+            ctx["status"] = "investigation_complete"
+        else:
+            logger.warning("DOCX raporu atlandı (API key eksik)")
+            ctx["status"] = "investigation_complete_no_docx"
+
+        self._print_final_summary(ctx)
+        return ctx
+
+    @staticmethod
+    def _apply_priority(ctx: InvestigationContext, part2: Dict) -> None:
+        """Kalan aşamaların (5-Why, DOCX) LLM istekleri Part 2 önceliğiyle sıraya girer."""
+        level = priority_from_assessment(part2)
+        set_priority(level)
+        ctx["priority"] = level
+        logger.info("Soruşturma önceliği: %s (%s)", level, part2.get("investigation_level") or "-")
+
+    def run_many(
+        self,
+        incidents: Iterable[Dict],
+        concurrency: int = 4,
+        on_result: Optional[Callable[[InvestigationContext], None]] = None,
+        priority: Optional[str] = None,
+    ) -> List[InvestigationContext]:
+        """
+        Birden fazla olayı aynı (sıcak) ajanlarla eşzamanlı işler.
+
+        Hatalar yükseltilmez; başarısız olayın context'i status="error" ve
+        "error" alanıyla döner, diğer soruşturmalar devam eder.
+
+        Args:
+            incidents: Olay bilgileri listesi
+            concurrency: Aynı anda çalışan soruşturma sayısı
+            on_result: Her soruşturma biter bitmez (tamamlanma sırasıyla)
+                       çağrılır; sonuçları artımlı yazmak için
+            priority: Part 2 öncesi öncelik (bkz. run_investigation)
+
+        Returns:
+            Girdi sırasıyla InvestigationContext listesi
+        """
+        incidents = list(incidents)
+        logger.info("%d olay işleniyor (eşzamanlılık: %d)", len(incidents), concurrency)
+
+        def _run_one(incident_data: Dict) -> InvestigationContext:
+            try:
+                return self.run_investigation(incident_data, priority=priority)
+            except Exception as e:
+                return getattr(e, "investigation_context", None) or self._error_context(incident_data, e)
+
+        results: List[Optional[InvestigationContext]] = [None] * len(incidents)
+        with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+            futures = {pool.submit(_run_one, inc): i for i, inc in enumerate(incidents)}
+            for future in as_completed(futures):
+                ctx = future.result()
+                results[futures[future]] = ctx
+                if on_result:
+                    on_result(ctx)
+
+        failed = sum(1 for ctx in results if ctx.failed)
+        logger.info("Toplu işlem bitti: %d başarılı, %d hatalı", len(results) - failed, failed)
+        return results
+
+    @staticmethod
+    def _error_context(incident_data: Dict, error: Exception) -> InvestigationContext:
+        ctx = InvestigationContext(incident_data)
+        ctx["status"] = "error"
+        ctx["error"] = str(error)
+        return ctx
+
+    def _print_final_summary(self, ctx: InvestigationContext):
+        """Tek satır INFO özeti; ayrıntılı tablo yalnızca DEBUG seviyesinde"""
+        pipeline = ctx.get("pipeline") or {}
+        logger.info(
+            "Soruşturma tamamlandı: %s (%d kök neden, %.1fs)", ctx.get("status"),
+            len((ctx.get("part3_rca") or {}).get("final_root_causes", [])),
+            pipeline.get("wall_time", 0.0),
+        )
+        if not logger.isEnabledFor(logging.DEBUG):
+            return
+        lines = []
+        lines.append("\n" + "=" * 80)
+        lines.append("✅ SORUŞTURMA TAMAMLANDI")
+        lines.append("=" * 80)
+
+        p1 = ctx.get("part1") or {}
+        p2 = ctx.get("part2") or {}
+        p3 = ctx.get("part3_rca") or {}
+
+        lines.append(f"\n📋 Referans No:       {p1.get('ref_no', 'N/A')}")
+        lines.append(f"📊 Olay Tipi:         {p1.get('incident_type', 'N/A')}")
+        lines.append(f"⚠️  Şiddet:           {p2.get('actual_potential_harm', 'N/A')}")
+        lines.append(f"🔍 Soruşturma Düzeyi: {p2.get('investigation_level', 'N/A')}")
+        lines.append(f"📝 RIDDOR:            {p2.get('riddor_reportable', 'N/A')}")
 
         branches = p3.get("analysis_branches", [])
         root_causes = p3.get("final_root_causes", [])
-        print(f"\n🎯 Analiz Dalı Sayısı: {len(branches)}")
-        print(f"   Kök Neden Sayısı:   {len(root_causes)}")
+        lines.append(f"\n🎯 Analiz Dalı Sayısı: {len(branches)}")
+        lines.append(f"   Kök Neden Sayısı:   {len(root_causes)}")
 
-        docx = self.investigation_data.get("docx_report")
+        docx = ctx.get("docx_report")
         if docx:
-            print(f"\n📄 DOCX Raporu:       {docx}")
+            lines.append(f"\n📄 DOCX Raporu:       {docx}")
         else:
-            print("\n📄 DOCX Raporu:       Üretilmedi (ANTHROPIC_API_KEY eksik)")
+            lines.append("\n📄 DOCX Raporu:       Üretilmedi (OPENROUTER_API_KEY eksik)")
 
-        print(f"\n✅ Durum: {self.investigation_data.get('status', 'Bilinmiyor')}")
-        print("=" * 80)
+        pipeline = ctx.get("pipeline")
+        if pipeline:
+            lines.append(f"\n⏱️  Toplam süre:        {pipeline['wall_time']:.1f}s "
+                         f"(aşamalar toplamı {pipeline['sum_of_stages']:.1f}s)")
+            lines.append(f"   Kritik yol:        {' → '.join(pipeline['critical_path'])}")
 
-    def get_investigation_data(self) -> Dict:
-        return self.investigation_data
+        lines.append(f"\n✅ Durum: {ctx.get('status', 'Bilinmiyor')}")
+        lines.append("=" * 80)
+        logger.debug("\n".join(lines))
 
-    def export_to_json(self, filepath: str):
-        import json
-        from pathlib import Path
-        Path(filepath).parent.mkdir(parents=True, exist_ok=True)
-        with open(filepath, "w", encoding="utf-8") as f:
-            json.dump(self.investigation_data, f, indent=2, ensure_ascii=False)
-        print(f"\n💾 Soruşturma dışa aktarıldı: {filepath}")
+    def get_investigation_data(self) -> Optional[InvestigationContext]:
+        """Son tamamlanan soruşturmanın context'i (eski API uyumluluğu)"""
+        return self._last_context
+
+    def export_to_json(self, filepath: str, context: Optional[InvestigationContext] = None):
+        """Context'i (verilmezse son soruşturmayı) JSON olarak kaydet"""
+        context = context if context is not None else self._last_context
+        if context is None:
+            raise ValueError("Dışa aktarılacak soruşturma yok; önce run_investigation çalıştırın")
+        context.export_to_json(filepath)
@@ -3,13 +3,22 @@ Overview Agent - Part 1 of HSG245
 Collects initial incident information
 """
 
-from openai import OpenAI
+from shared.llm_client import create_openrouter_client
+from shared.prompt_cache import cacheable_messages
+from shared.micro_batch import get_micro_batcher
+from shared.fast_classifier import get_fast_path
+from shared.config import Config
+from shared.ids import new_id
 from datetime import datetime
 from typing import Dict, Optional
 import json
+import logging
 import os
+from shared.log import get_logger
 from .json_parser import extract_json_from_response, safe_json_parse
 
+logger = get_logger(__name__)
+
 
 class OverviewAgent:
     """
@@ -27,12 +36,8 @@ class OverviewAgent:
     
     def __init__(self):
         """Initialize Overview Agent with OpenRouter"""
-        api_key = os.getenv("OPENROUTER_API_KEY") or os.getenv("OPENAI_API_KEY")
-        self.client = OpenAI(
-            base_url="https://openrouter.ai/api/v1",
-            api_key=api_key
-        )
-        print("✅ Overview Agent initialized with OpenRouter")
+        self.client = create_openrouter_client()
+        logger.info("Overview Agent initialized")
     
     def process_initial_report(self, incident_data: Dict) -> Dict:
         """
@@ -44,13 +49,11 @@ class OverviewAgent:
         Returns:
             Structured Part 1 data
         """
-        print("\n" + "="*80)
-        print("📋 PART 1: OVERVIEW - Processing Initial Report")
-        print("="*80)
+        logger.info("Part 1 overview: processing initial report")
         
         # Extract basic information
         part1_data = {
-            "ref_no": incident_data.get("ref_no", self._generate_ref_no()),
+            "ref_no": incident_data.get("ref_no") or self._generate_ref_no(),
             "reported_by": incident_data.get("reported_by", ""),
             "date_time": incident_data.get("date_time", datetime.now().strftime("%d.%m.%y %I:%M%p")),
             "incident_type": "",
@@ -80,27 +83,26 @@ class OverviewAgent:
         return part1_data
     
     def _generate_ref_no(self) -> str:
-        """Generate unique reference number"""
-        return f"INC-{datetime.now().strftime('%Y%m%d-%H%M%S')}"
+        """Generate unique reference number (INC-YYYYMMDD-HHMMSS-<suffix>, see shared/ids.py)"""
+        return new_id("INC")
     
     def _extract_brief_details(self, description: str) -> Dict:
         """
         Use AI to extract What, Where, When, Who, Emergency measures from description
         """
-        print("\n🤖 AI extracting brief details...")
+        logger.debug("Extracting brief details")
         
-        prompt = f"""Extract incident information as JSON.
-
-INCIDENT: {description}
+        # Stable instructions first (cached prefix), the incident text last
+        instructions = """Extract incident information as JSON.
 
 JSON format:
-{{
+{
   "what": "brief summary",
   "where": "location",
   "when": "date/time",
   "who": "people involved",
   "emergency_measures": "actions taken"
-}}
+}
 
 Return ONLY the JSON object. No explanations, no markdown, just pure JSON."""
 
@@ -110,9 +112,7 @@ Return ONLY the JSON object. No explanations, no markdown, just pure JSON."""
                 #model="openai/gpt-4o-mini",  #test model  # Veriyi Hızlıca Topla
                 temperature=0.0,
                 max_tokens=500,
-                messages=[
-                    {"role": "user", "content": prompt}
-                ],
+                messages=cacheable_messages([instructions], f"INCIDENT: {description}"),
                 extra_headers={
                     "anthropic-version": "2023-06-01"  # Prompt caching desteği
                 }
@@ -133,11 +133,11 @@ Return ONLY the JSON object. No explanations, no markdown, just pure JSON."""
                 }
             )
             
-            print("✅ Brief details extracted successfully")
+            logger.debug("Brief details extracted")
             return details
         except Exception as e:
-            print(f"⚠️  Extraction error: {e}")
-            print(f"Raw response: {result if 'result' in locals() else 'No response'}")
+            logger.warning("Brief details extraction failed: %s", e)
+            logger.debug("Raw response: %s", result if 'result' in locals() else 'No response')
             return {
                 "what": description[:200],
                 "where": "",
@@ -150,60 +150,60 @@ Return ONLY the JSON object. No explanations, no markdown, just pure JSON."""
         """
         Classify incident type using AI
         Options: Ill health, Minor injury, Serious injury, Major injury
+
+        A confident local prediction skips the LLM call (shared/fast_classifier)
         """
-        print("\n🤖 AI classifying incident type...")
+        logger.debug("Classifying incident type")
         
-        prompt = f"""Classify this incident into ONE category:
+        instructions = """Classify this incident into ONE category:
 1. "Ill health" - disease or health condition
 2. "Minor injury" - first aid only
 3. "Serious injury" - medical attention needed
 4. "Major injury" - severe injury
 
-INCIDENT: {description}
-
 Return ONLY the category name (e.g., "Minor injury"), nothing else."""
 
-        try:
-            response = self.client.chat.completions.create(
-                model="anthropic/claude-sonnet-4.5", # Yasal Durumu (RIDDOR) Değerlendir
+        def ask_llm() -> str:
+            # Batched with concurrent incidents' classifications (shared/micro_batch)
+            return get_micro_batcher().complete(
+                self.client, instructions, f"INCIDENT: {description}",
+                model="anthropic/claude-sonnet-4.5",
                 #model="openai/gpt-4o-mini",  #test model,   # Veriyi Hızlıca Topla
-                temperature=0.0,
                 max_tokens=50,
-                messages=[
-                    {"role": "user", "content": prompt}
-                ],
-                extra_headers={
-                    "anthropic-version": "2023-06-01"  # Prompt caching desteği
-                }
             )
-            
-            incident_type = response.choices[0].message.content.strip()
+
+        try:
+            incident_type = get_fast_path("incident_type", Config.INCIDENT_TYPES).classify(description, ask_llm)
             # Clean any quotes or extra text
             incident_type = incident_type.replace('"', '').replace("'", "").strip()
-            print(f"✅ Incident classified as: {incident_type}")
+            logger.info("Incident classified as: %s", incident_type)
             
             return incident_type
         except Exception as e:
-            print(f"⚠️  Classification error: {e}")
+            logger.warning("Incident classification failed: %s", e)
             return "Minor injury"
         
         return incident_type
     
     def _print_summary(self, part1_data: Dict):
-        """Print formatted summary of Part 1 data"""
-        print("\n" + "-"*80)
-        print("📊 PART 1 OVERVIEW SUMMARY")
-        print("-"*80)
-        print(f"Ref No:          {part1_data['ref_no']}")
-        print(f"Reported by:     {part1_data['reported_by']}")
-        print(f"Date/Time:       {part1_data['date_time']}")
-        print(f"Incident Type:   {part1_data['incident_type']}")
-        print(f"\n📝 Brief Details:")
-        print(f"  What:          {part1_data['brief_details']['what']}")
-        print(f"  Where:         {part1_data['brief_details']['where']}")
-        print(f"  When:          {part1_data['brief_details']['when']}")
-        print(f"  Who:           {part1_data['brief_details']['who']}")
-        print(f"  Emergency:     {part1_data['brief_details']['emergency_measures']}")
-        print(f"\nForwarded to:    {part1_data['forwarded_to']}")
-        print(f"Forwarded at:    {part1_data['forwarded_date_time']}")
-        print("-"*80)
+        """Formatted summary of Part 1 data (DEBUG only)"""
+        if not logger.isEnabledFor(logging.DEBUG):
+            return
+        lines = []
+        lines.append("\n" + "-"*80)
+        lines.append("📊 PART 1 OVERVIEW SUMMARY")
+        lines.append("-"*80)
+        lines.append(f"Ref No:          {part1_data['ref_no']}")
+        lines.append(f"Reported by:     {part1_data['reported_by']}")
+        lines.append(f"Date/Time:       {part1_data['date_time']}")
+        lines.append(f"Incident Type:   {part1_data['incident_type']}")
+        lines.append(f"\n📝 Brief Details:")
+        lines.append(f"  What:          {part1_data['brief_details']['what']}")
+        lines.append(f"  Where:         {part1_data['brief_details']['where']}")
+        lines.append(f"  When:          {part1_data['brief_details']['when']}")
+        lines.append(f"  Who:           {part1_data['brief_details']['who']}")
+        lines.append(f"  Emergency:     {part1_data['brief_details']['emergency_measures']}")
+        lines.append(f"\nForwarded to:    {part1_data['forwarded_to']}")
+        lines.append(f"Forwarded at:    {part1_data['forwarded_date_time']}")
+        lines.append("-"*80)
+        logger.debug("\n".join(lines))
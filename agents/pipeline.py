@@ -0,0 +1,261 @@
+"""
+Pipeline Scheduler - DAG execution of HSG245 stages
+====================================================
+
+Each stage is a StageNode with declared inputs and outputs (artifact names).
+PipelineScheduler runs every node as soon as all of its inputs exist, so
+independent stages (e.g. Part 1 classification and immediate-cause
+identification) run concurrently. Per-node timings are recorded and the
+critical path is reported, so the investigation latency is the longest
+dependency chain instead of the sum of all stages.
+
+Usage:
+    nodes = [
+        StageNode("part1", lambda incident: {"part1": ...}, ["incident"], ["part1"]),
+        StageNode("part2", lambda part1, incident: {"part2": ...}, ["part1", "incident"], ["part2"]),
+    ]
+    run = PipelineScheduler(nodes).run({"incident": incident_data})
+    run.results["part2"], run.timings["part1"]["duration"], run.critical_path
+"""
+
+import contextvars
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, List, Optional
+
+
+class StageNode:
+    """
+    One pipeline stage.
+
+    Args:
+        name: Unique node name
+        func: Called with the declared inputs as keyword arguments. Returns a
+              dict with every declared output
+        inputs: Artifact names the node consumes
+        outputs: Artifact names the node produces
+    """
+
+    def __init__(self, name: str, func: Callable[..., Any],
+                 inputs: List[str], outputs: List[str]):
+        if not outputs:
+            raise ValueError(f"Stage '{name}' must declare at least one output")
+        self.name = name
+        self.func = func
+        self.inputs = list(inputs)
+        self.outputs = list(outputs)
+
+    def __repr__(self) -> str:
+        return f"StageNode({self.name!r}, inputs={self.inputs}, outputs={self.outputs})"
+
+
+class PipelineError(RuntimeError):
+    """A stage raised; `run` holds the partial PipelineRun, `node` the failing stage."""
+
+    def __init__(self, node: str, error: Exception, run: "PipelineRun"):
+        super().__init__(f"Stage '{node}' failed: {error}")
+        self.node = node
+        self.error = error
+        self.run = run
+
+
+class PipelineRun:
+    """Results and timing of one scheduler run."""
+
+    def __init__(self):
+        self.results: Dict[str, Any] = {}
+        self.timings: Dict[str, Dict[str, float]] = {}
+        self.skipped: List[str] = []
+        self.wall_time: float = 0.0
+        self.critical_path: List[str] = []
+        self.critical_path_time: float = 0.0
+
+    @property
+    def sum_of_stages(self) -> float:
+        return sum(t["duration"] for t in self.timings.values())
+
+    def summary(self) -> Dict[str, Any]:
+        """JSON-friendly timing summary."""
+        return {
+            "wall_time": round(self.wall_time, 3),
+            "sum_of_stages": round(self.sum_of_stages, 3),
+            "critical_path": self.critical_path,
+            "critical_path_time": round(self.critical_path_time, 3),
+            "skipped": self.skipped,
+            "stages": {
+                name: {k: round(v, 3) for k, v in t.items()}
+                for name, t in self.timings.items()
+            },
+        }
+
+
+class PipelineScheduler:
+    """
+    Runs a DAG of StageNodes on a thread pool.
+
+    Nodes whose outputs are all supplied in the initial artifacts are
+    skipped (useful for resuming from saved results).
+    """
+
+    def __init__(self, nodes: List[StageNode], max_workers: int = 4):
+        self.nodes = {}
+        producers: Dict[str, str] = {}
+        for node in nodes:
+            if node.name in self.nodes:
+                raise ValueError(f"Duplicate stage name: {node.name}")
+            for out in node.outputs:
+                if out in producers:
+                    raise ValueError(
+                        f"Artifact '{out}' produced by both '{producers[out]}' and '{node.name}'"
+                    )
+                producers[out] = node.name
+            self.nodes[node.name] = node
+        self.producers = producers
+        self.max_workers = max_workers
+        self.order = self._topological_order()
+
+    def _topological_order(self) -> List[str]:
+        deps = {name: self._dependencies(node) for name, node in self.nodes.items()}
+        order, done = [], set()
+        while len(order) < len(self.nodes):
+            ready = [n for n in self.nodes if n not in done and deps[n] <= done]
+            if not ready:
+                cyclic = sorted(set(self.nodes) - done)
+                raise ValueError(f"Pipeline has a dependency cycle among: {cyclic}")
+            for name in ready:
+                order.append(name)
+                done.add(name)
+        return order
+
+    def _dependencies(self, node: StageNode) -> set:
+        return {self.producers[i] for i in node.inputs if i in self.producers}
+
+    def run(
+        self,
+        initial: Dict[str, Any],
+        on_complete: Optional[Callable[[str, Dict[str, Any]], None]] = None,
+        on_start: Optional[Callable[[str], None]] = None,
+    ) -> PipelineRun:
+        """
+        Execute the pipeline.
+
+        Args:
+            initial: Artifacts available before any stage runs
+            on_complete: Called as on_complete(node_name, outputs) from the
+                         scheduling thread after each stage finishes
+            on_start: Called as on_start(node_name) from the scheduling
+                      thread when a stage is submitted
+
+        Returns:
+            PipelineRun with every artifact, per-node timings and critical path
+
+        Raises:
+            PipelineError: A stage raised. Already-running stages are allowed to
+                           finish; no new stages are started.
+        """
+        run = PipelineRun()
+        run.results.update(initial)
+        missing = [
+            (node.name, i) for node in self.nodes.values()
+            for i in node.inputs if i not in self.producers and i not in initial
+        ]
+        if missing:
+            raise ValueError(f"Inputs with no producer and no initial value: {missing}")
+
+        pending = []
+        for name in self.order:
+            if all(out in initial for out in self.nodes[name].outputs):
+                run.skipped.append(name)
+            else:
+                pending.append(name)
+
+        t0 = time.perf_counter()
+        running = {}
+        failure: Optional[PipelineError] = None
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            while pending or running:
+                if failure is None:
+                    for name in list(pending):
+                        node = self.nodes[name]
+                        if all(i in run.results for i in node.inputs):
+                            pending.remove(name)
+                            kwargs = {i: run.results[i] for i in node.inputs}
+                            ctx = contextvars.copy_context()
+                            future = pool.submit(ctx.run, self._timed_call, node, kwargs, t0)
+                            running[future] = name
+                            if on_start:
+                                on_start(name)
+                if not running:
+                    break
+
+                finished, _ = wait(list(running), return_when=FIRST_COMPLETED)
+                for future in finished:
+                    name = running.pop(future)
+                    try:
+                        outputs, start, end = future.result()
+                    except _StageFailure as e:
+                        run.timings[name] = {"start": e.start, "end": e.end,
+                                             "duration": e.end - e.start}
+                        if failure is None:
+                            failure = PipelineError(name, e.error, run)
+                        continue
+                    run.timings[name] = {"start": start, "end": end, "duration": end - start}
+                    run.results.update(outputs)
+                    if on_complete:
+                        on_complete(name, outputs)
+
+        run.wall_time = time.perf_counter() - t0
+        self._compute_critical_path(run)
+        if failure is not None:
+            raise failure
+        return run
+
+    @staticmethod
+    def _timed_call(node: StageNode, kwargs: Dict[str, Any], t0: float):
+        start = time.perf_counter() - t0
+        try:
+            result = PipelineScheduler._normalize_outputs(node, node.func(**kwargs))
+        except Exception as e:
+            raise _StageFailure(e, start, time.perf_counter() - t0)
+        return result, start, time.perf_counter() - t0
+
+    @staticmethod
+    def _normalize_outputs(node: StageNode, result: Any) -> Dict[str, Any]:
+        if not isinstance(result, dict):
+            raise TypeError(f"Stage '{node.name}' must return a dict of {node.outputs}")
+        missing = [o for o in node.outputs if o not in result]
+        if missing:
+            raise KeyError(f"Stage '{node.name}' did not produce {missing}")
+        return {o: result[o] for o in node.outputs}
+
+    def _compute_critical_path(self, run: PipelineRun) -> None:
+        """Longest chain of executed stages by duration."""
+        finish: Dict[str, float] = {}
+        prev: Dict[str, Optional[str]] = {}
+        for name in self.order:
+            if name not in run.timings:
+                continue
+            best, best_dep = 0.0, None
+            for dep in self._dependencies(self.nodes[name]):
+                if dep in finish and finish[dep] > best:
+                    best, best_dep = finish[dep], dep
+            finish[name] = best + run.timings[name]["duration"]
+            prev[name] = best_dep
+        if not finish:
+            return
+        tail = max(finish, key=finish.get)
+        run.critical_path_time = finish[tail]
+        path = []
+        while tail is not None:
+            path.append(tail)
+            tail = prev[tail]
+        run.critical_path = list(reversed(path))
+
+
+class _StageFailure(Exception):
+    def __init__(self, error: Exception, start: float, end: float):
+        super().__init__(str(error))
+        self.error = error
+        self.start = start
+        self.end = end
@@ -30,30 +30,128 @@ V2.1 → V2.2 (Incident Summary Fix):
   - Öncelik sırası: description > full_description > how_happened > alanlar
   - "description" anahtarı artık okunuyor (test dosyası {"description": ...} gönderiyor)
   - Model artık gerçek olay metnini görüyor, kafadan senaryo üretmiyor
+
+V2.2 → V2.3 (Pipeline Adımları):
+  - analyze_root_causes → identify_immediate_causes + run_5why_branches
+  - Adımlar orchestrator DAG'ında ayrı düğümler olarak çalıştırılabilir
+
+V2.3 → V2.4 (Prompt Önbelleği):
+  - Taksonomi, kurallar ve şema sabit, önbelleğe alınan sistem önekine taşındı
+  - Olay raporu ve dala özgü değerler (yasak kodlar) kullanıcı mesajında
+
+V2.4 → V2.5 (Artımlı Yeniden İnceleme):
+  - Olay özetinin hash'i rca_data["incident_summary_hash"] olarak saklanıyor
+  - analyze_root_causes(previous=...) : özet aynıysa doğrudan nedenler ve
+    tüm dallar önceki analizden alınır (LLM çağrısı yok)
+  - Özet değiştiyse doğrudan nedenler yeniden belirlenir; kodu önceki
+    analizde bulunan doğrudan nedenin 5-Why dalı yeniden kullanılır,
+    yalnızca yeni/değişen doğrudan nedenler için 5-Why çalıştırılır
+
+V2.5 → V2.6 (Boru Hattı / Pipelined):
+  - Doğrudan neden çağrısı akışla (stream) alınıyor; her neden nesnesi
+    kapanınca 5-Why dalı hemen başlatılıyor (Adım 1 ve 2 örtüşür)
+  - Dallar eşzamanlı çalıştığından yasak kod listesi o ana kadar biten
+    dallarla sınırlı; sonda aynı kök neden kodunu seçen dal yasak
+    kodlarla bir kez yeniden çalıştırılıyor (post-hoc tekilleştirme)
+  - ROOTCAUSE_MODE=sequential eski sıralı akışı kullanır
+
+V2.6 → V2.7 (Model Kademesi / Cascade):
+  - 5-Why zinciri önce hızlı modelle (FIVE_WHY_FAST_MODEL) deneniyor
+  - validate_5why_chain yerel olarak doğruluyor: en az 4 why, C/D
+    taksonomisinde olan kök neden kodu, yasak kodlarda değil, jenerik
+    olmayan açıklama; yalnızca geçemeyen dallar Opus'a yükseltiliyor
+  - Yükseltme oranı ve tahmini süre kazancı rca_data["cascade"] altında
+  - Kademe isteğe bağlı: FIVE_WHY_MODE=cascade ile açılır; varsayılan
+    (direct) her dalı doğrudan Opus ile çalıştırır
+
+V2.7 → V2.8 (Benzer Geçmiş Olaylar):
+  - RCA_SIMILAR_INCIDENTS=k ile doğrudan neden isteğine, geçmiş
+    soruşturma indeksinden (shared/incident_index.py) en benzer k olayın
+    özeti ve A/B/C/D kodları referans olarak ekleniyor (varsayılan 0 = kapalı)
+  - Liste kullanıcı mesajında; önbelleğe alınan sistem öneki değişmiyor
 ─────────────────────────────────────────────
 """
 
-from openai import OpenAI
-from typing import Dict, List, Optional
+from shared.llm_client import create_openrouter_client
+from shared.incident_index import get_incident_index
+from shared.prompt_cache import cacheable_messages
+from shared.log import get_logger, log_context
+from shared.progress import emit
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterator, List, Optional
+import contextvars
+import hashlib
+import logging
 import os
+import threading
+import time
 
 # Try different import paths for knowledge_base
 try:
-    from knowledge_base import HSG245_TAXONOMY, get_category_text
+    from knowledge_base import HSG245_TAXONOMY, get_category_codes, get_category_text
 except ImportError:
     try:
-        from agents.knowledge_base import HSG245_TAXONOMY, get_category_text
+        from agents.knowledge_base import HSG245_TAXONOMY, get_category_codes, get_category_text
     except ImportError:
-        from .knowledge_base import HSG245_TAXONOMY, get_category_text
+        from .knowledge_base import HSG245_TAXONOMY, get_category_codes, get_category_text
 
 # Import robust JSON parser
 try:
-    from .json_parser import extract_json_from_response, safe_json_parse
+    from .json_parser import JsonArrayStream, extract_json_from_response, safe_json_parse
 except ImportError:
     try:
-        from json_parser import extract_json_from_response, safe_json_parse
+        from json_parser import JsonArrayStream, extract_json_from_response, safe_json_parse
     except ImportError:
-        from agents.json_parser import extract_json_from_response, safe_json_parse
+        from agents.json_parser import JsonArrayStream, extract_json_from_response, safe_json_parse
+
+logger = get_logger(__name__)
+
+FIVE_WHY_MODEL = "anthropic/claude-opus-4.6"
+FIVE_WHY_FAST_MODEL = os.getenv("FIVE_WHY_FAST_MODEL", "anthropic/claude-haiku-4.5")
+# Doğrudan neden isteminin üst sınırı (akışta bu sayıdan sonra yanıt kapatılır)
+MAX_IMMEDIATE_CAUSES = 3
+
+# Her kazaya uyan, olaya özgü olmayan kök neden ifadeleri
+GENERIC_ROOT_PHRASES = (
+    "risk değerlendirmesi eksik", "risk değerlendirmesi yapılmamış", "risk değerlendirmesi yetersiz",
+    "eğitim eksik", "eğitim yetersiz", "yetersiz eğitim", "insan hatası", "dikkatsizlik",
+)
+MIN_ROOT_CAUSE_WORDS = 6
+
+
+def validate_5why_chain(chain: Dict, used_root_codes: Optional[List[str]] = None) -> List[str]:
+    """
+    5-Why zincirinin yerel doğrulaması; geçemediği kuralları döndürür
+    (boş liste → geçerli). Cascade modunda hızlı model sonucunun kabulü
+    bu kontrole bağlıdır.
+    """
+    problems = []
+    whys = [w for w in (chain.get("whys") or []) if isinstance(w, dict) and str(w.get("answer_tr") or "").strip()]
+    if len(whys) < 4:
+        problems.append("whys")
+
+    root = chain.get("root_cause") or {}
+    code = str(root.get("code") or "").strip()
+    valid_codes = {**get_category_codes("C"), **get_category_codes("D")}
+    if code not in valid_codes:
+        problems.append("root_code")
+    elif code in (used_root_codes or []):
+        problems.append("banned_code")
+
+    cause = " ".join(str(root.get("cause_tr") or "").split())
+    lowered = cause.lower()
+    if (len(cause.split()) < MIN_ROOT_CAUSE_WORDS
+            or lowered == valid_codes.get(code, "").lower()
+            or (any(p in lowered for p in GENERIC_ROOT_PHRASES)
+                and len(cause.split()) < 2 * MIN_ROOT_CAUSE_WORDS)):
+        problems.append("generic_text")
+    return problems
+
+
+def incident_summary_hash(incident_summary: str) -> str:
+    """Olay özetinin hash'i (artımlı yeniden incelemede değişiklik tespiti)"""
+    normalized = " ".join((incident_summary or "").split())
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
 
 
 class RootCauseAgentV2:
@@ -62,13 +160,14 @@ class RootCauseAgentV2:
     A/B → 5-Why → C/D yapısı
     """
 
+    # Opus 5-Why zincir süresinin hareketli ortalaması (kademe kazanç tahmini);
+    # eşzamanlı dal thread'leri güncellediğinden kilitle yazılır
+    _strong_latency: Optional[float] = None
+    _strong_latency_lock = threading.Lock()
+
     def __init__(self):
-        api_key = os.getenv("OPENROUTER_API_KEY") or os.getenv("OPENAI_API_KEY")
-        self.client = OpenAI(
-            base_url="https://openrouter.ai/api/v1",
-            api_key=api_key
-        )
-        print("✅ Kök Neden Ajanı V2 başlatıldı (knowledge_base)")
+        self.client = create_openrouter_client()
+        logger.info("Kök Neden Ajanı V2 başlatıldı (knowledge_base)")
 
     # ─────────────────────────────────────────────────────────────────────────
     # ANA GİRİŞ NOKTASI
@@ -78,78 +177,348 @@ class RootCauseAgentV2:
         self,
         part1_data: Dict,
         part2_data: Dict,
-        investigation_data: Dict = None
+        investigation_data: Dict = None,
+        previous: Optional[Dict] = None,
+        mode: Optional[str] = None
     ) -> Dict:
-        """Tam hiyerarşik kök neden analizi"""
+        """
+        Tam hiyerarşik kök neden analizi
+
+        Args:
+            previous: Aynı olayın önceki rca_data'sı (artımlı yeniden inceleme).
+                      Olay özeti değişmediyse analiz aynen yeniden kullanılır;
+                      değiştiyse yalnızca değişen doğrudan nedenlerin dalları
+                      yeniden çalıştırılır.
+            mode: "pipelined" (5-Why dalları doğrudan nedenler akarken başlar)
+                  veya "sequential"; varsayılan ROOTCAUSE_MODE veya "pipelined"
+        """
+        mode = (mode or os.getenv("ROOTCAUSE_MODE", "pipelined")).lower()
 
-        print("\n" + "=" * 80)
-        print("🔴 BÖLÜM 3: HİYERARŞİK KÖK NEDEN ANALİZİ")
-        print("=" * 80)
+        logger.info("Bölüm 3: hiyerarşik kök neden analizi")
 
         incident_summary = self._prepare_incident_summary(
             part1_data, part2_data, investigation_data
         )
-        print(f"\n📋 OLAY ÖZETİ (ilk 300 karakter):\n{incident_summary[:300]}...\n")
-
-        rca_data = {
-            "incident_summary": incident_summary,
-            "analysis_branches": [],
-            "final_root_causes": [],
-            "analysis_method": "HSG245 Hierarchical 5-Why (A/B → C/D)"
-        }
+        logger.debug("Olay özeti (ilk 300 karakter):\n%s...", incident_summary[:300])
+
+        if (previous and previous.get("analysis_branches")
+                and previous.get("incident_summary_hash") == incident_summary_hash(incident_summary)):
+            logger.info("Olay özeti değişmedi; önceki doğrudan nedenler kullanılıyor")
+            immediate_causes = [b["immediate_cause"] for b in previous["analysis_branches"]]
+            self._emit_immediate_causes(immediate_causes)
+        elif mode == "pipelined":
+            return self.run_pipelined(incident_summary, previous=previous)
+        else:
+            immediate_causes = self.identify_immediate_causes(incident_summary)
+        return self.run_5why_branches(incident_summary, immediate_causes, previous=previous)
 
-        # ADIM 1: Immediate Causes
-        print("\n🔍 ADIM 1: Doğrudan Nedenleri Belirleme (A/B Kategorileri)")
-        print("-" * 80)
+    def identify_immediate_causes(self, incident_summary: str) -> List[Dict]:
+        """
+        ADIM 1 — Sadece olay metnine dayanır; Part 1/Part 2 sonucuna ihtiyaç
+        duymaz (pipeline'da Part 1/2 ile eşzamanlı çalışabilir).
+        """
+        logger.info("Adım 1: doğrudan nedenler belirleniyor (A/B kategorileri)")
         immediate_causes = self._identify_immediate_causes_with_codes(incident_summary)
 
         if not immediate_causes:
-            print("❌ Doğrudan neden bulunamadı!")
-            return rca_data
+            logger.error("Doğrudan neden bulunamadı")
+        else:
+            logger.info("%d doğrudan neden belirlendi", len(immediate_causes))
+        self._emit_immediate_causes(immediate_causes)
+        return immediate_causes
 
-        print(f"✅ {len(immediate_causes)} doğrudan neden belirlendi\n")
+    @staticmethod
+    def _emit_immediate_causes(immediate_causes: List[Dict]) -> None:
+        for idx, cause in enumerate(immediate_causes, 1):
+            emit("immediate_cause", index=idx, code=cause.get("code"),
+                 title=cause.get("standard_title_tr"), cause=cause.get("cause_tr"))
+
+    def run_5why_branches(
+        self,
+        incident_summary: str,
+        immediate_causes: List[Dict],
+        branch_store=None,
+        previous: Optional[Dict] = None
+    ) -> Dict:
+        """
+        ADIM 2 — Her doğrudan neden için 5-Why dalı; tam rca_data döndürür.
+
+        Args:
+            branch_store: load_branch(n)/save_branch(n, branch) sağlayan
+                          checkpoint (örn. agents.checkpoint). Tamamlanmış
+                          dallar tekrar hesaplanmaz.
+            previous: Önceki rca_data; doğrudan neden kodu önceki analizde
+                      bulunan dallar yeniden kullanılır (rca_data["reused_branches"]).
+        """
+
+        rca_data = self._new_rca_data(incident_summary)
+
+        if not immediate_causes:
+            return rca_data
 
         # ADIM 2: 5-Why zinciri
-        print("\n🔗 ADIM 2: 5-Why Analizi (Her Dal için)")
-        print("-" * 80)
+        logger.info("Adım 2: 5-Why analizi (%d dal)", len(immediate_causes))
 
-        used_root_codes: List[str] = []
+        reusable = self._reusable_branches(previous, immediate_causes)
+        if reusable:
+            logger.info("%d/%d dal önceki analizden yeniden kullanılacak",
+                        len(reusable), len(immediate_causes))
 
-        for idx, immediate_cause in enumerate(immediate_causes, 1):
-            print(f"\n{'=' * 80}")
-            print(f"⚡ DAL {idx}: {immediate_cause.get('category_type', '???')}")
-            print(f"📌 Doğrudan Neden [{immediate_cause.get('code', '???')}]:")
-            print(f"   {immediate_cause.get('cause_tr', '')}")
-            print(f"{'=' * 80}\n")
-
-            chain = self._perform_5why_chain(
-                immediate_cause,
-                incident_summary,
-                used_root_codes=used_root_codes
-            )
+        # Yeniden kullanılan dalların kök nedenleri yeni dallarda tekrar seçilmesin
+        used_root_codes: List[str] = [
+            b["root_cause"]["code"] for b in reusable.values() if b["root_cause"].get("code")
+        ]
 
-            root_code = chain.get("root_cause", {}).get("code")
-            if root_code:
+        for idx, immediate_cause in enumerate(immediate_causes, 1):
+            with log_context(branch_id=f"{idx}-{immediate_cause.get('code', '?')}"):
+                logger.info(
+                    "Dal %d: %s [%s] %s", idx,
+                    immediate_cause.get('category_type', '???'),
+                    immediate_cause.get('code', '???'),
+                    immediate_cause.get('cause_tr', ''),
+                )
+
+                reused = idx in reusable
+                branch = branch_store.load_branch(idx) if branch_store and not reused else None
+                resumed = bool(branch and branch.get("immediate_cause") == immediate_cause)
+                if reused:
+                    branch = dict(reusable[idx], branch_number=idx)
+                    resumed = True
+                    rca_data["reused_branches"].append(idx)
+                    logger.info("Dal %d: doğrudan neden değişmedi, önceki 5-Why dalı kullanıldı", idx)
+                    if branch_store:
+                        branch_store.save_branch(idx, branch)
+                elif resumed:
+                    logger.info("Dal %d checkpoint'ten yüklendi", idx)
+                else:
+                    branch = self._run_branch(idx, immediate_cause, incident_summary, used_root_codes)
+                    if branch_store:
+                        branch_store.save_branch(idx, branch)
+
+                self._print_branch_tree(branch)
+
+            self._emit_branch(idx, branch, resumed=resumed)
+
+            root_code = branch["root_cause"].get("code")
+            if root_code and not reused:
                 used_root_codes.append(root_code)
 
-            branch = {
-                "branch_number": idx,
-                "immediate_cause": immediate_cause,
-                "why_chain": chain.get("whys", []),
-                "root_cause": chain.get("root_cause", {})
-            }
             rca_data["analysis_branches"].append(branch)
-            rca_data["final_root_causes"].append(chain.get("root_cause", {}))
+            rca_data["final_root_causes"].append(branch["root_cause"])
+
+        logger.info("Tüm dallar tamamlandı")
+
+        rca_data["cascade"] = self._cascade_summary(rca_data)
+        rca_data["final_report_tr"] = self._generate_hierarchical_report(rca_data)
+        return rca_data
 
-            self._print_branch_tree(branch)
+    def run_pipelined(self, incident_summary: str, previous: Optional[Dict] = None,
+                      branch_store=None) -> Dict:
+        """
+        ADIM 1 + 2 örtüşmeli — doğrudan nedenler akışla alınır, her neden
+        tamamlanınca 5-Why dalı hemen bir işçi thread'inde başlar.
+
+        Eşzamanlı dallar birbirinin kök nedenini bilmeden başlayabilir; sonda
+        başka dalda seçilmiş kök neden kodunu seçen dal, diğer kodlar yasak
+        olarak bir kez yeniden çalıştırılır (branch_complete, revised=True).
+
+        Args:
+            branch_store: run_5why_branches'teki gibi checkpoint. Doğrudan
+                          nedenler yeniden akıtıldığından metin değişebilir;
+                          aynı sıradaki dal, doğrudan neden kodu aynıysa
+                          checkpoint'ten yüklenir.
+        """
+        rca_data = self._new_rca_data(incident_summary)
+        logger.info("Adım 1+2: doğrudan nedenler akışla alınıyor, 5-Why dalları hazır oldukça başlıyor")
+
+        available = self._previous_branches_by_code(previous)
+        branches: Dict[int, Dict] = {}
+        futures = {}
+        used_root_codes: List[str] = []
+        lock = threading.Lock()
+
+        def run_branch(idx: int, immediate_cause: Dict) -> Dict:
+            with log_context(branch_id=f"{idx}-{immediate_cause.get('code', '?')}"):
+                logger.info("Dal %d: [%s] %s", idx, immediate_cause.get('code', '???'),
+                            immediate_cause.get('cause_tr', ''))
+                with lock:
+                    banned = list(used_root_codes)
+                branch = self._run_branch(idx, immediate_cause, incident_summary, banned)
+                if branch_store:
+                    branch_store.save_branch(idx, branch)
+                self._print_branch_tree(branch)
+            with lock:
+                if branch["root_cause"].get("code"):
+                    used_root_codes.append(branch["root_cause"]["code"])
+            self._emit_branch(idx, branch)
+            return branch
+
+        workers = int(os.getenv("ROOTCAUSE_BRANCH_WORKERS", "3"))
+        with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="5why") as pool:
+            for idx, immediate_cause in enumerate(self._stream_immediate_causes(incident_summary), 1):
+                emit("immediate_cause", index=idx, code=immediate_cause.get("code"),
+                     title=immediate_cause.get("standard_title_tr"), cause=immediate_cause.get("cause_tr"))
+                candidates = available.get(immediate_cause.get("code"))
+                saved = branch_store.load_branch(idx) if branch_store and not candidates else None
+                if saved and (saved.get("immediate_cause") or {}).get("code") != immediate_cause.get("code"):
+                    saved = None
+                if candidates or saved:
+                    if candidates:
+                        branches[idx] = dict(candidates.pop(0), branch_number=idx)
+                        rca_data["reused_branches"].append(idx)
+                        logger.info("Dal %d: doğrudan neden değişmedi, önceki 5-Why dalı kullanıldı", idx)
+                        if branch_store:
+                            branch_store.save_branch(idx, branches[idx])
+                    else:
+                        branches[idx] = saved
+                        logger.info("Dal %d checkpoint'ten yüklendi", idx)
+                    with lock:
+                        if branches[idx]["root_cause"].get("code"):
+                            used_root_codes.append(branches[idx]["root_cause"]["code"])
+                    self._emit_branch(idx, branches[idx], resumed=True)
+                else:
+                    logger.info("Doğrudan neden %d alındı; 5-Why dalı başlatılıyor", idx)
+                    futures[idx] = pool.submit(contextvars.copy_context().run, run_branch, idx, immediate_cause)
+            for idx, future in futures.items():
+                branches[idx] = future.result()
+
+        if not branches:
+            logger.error("Doğrudan neden bulunamadı")
+            return rca_data
 
-        print("\n" + "=" * 80)
-        print("✅ TÜM DALLAR TAMAMLANDI!")
-        print("=" * 80)
+        self._dedupe_root_causes(incident_summary, branches, rca_data["reused_branches"], branch_store)
+        logger.info("Tüm dallar tamamlandı (%d dal)", len(branches))
 
+        for idx in sorted(branches):
+            rca_data["analysis_branches"].append(branches[idx])
+            rca_data["final_root_causes"].append(branches[idx]["root_cause"])
+        rca_data["cascade"] = self._cascade_summary(rca_data)
         rca_data["final_report_tr"] = self._generate_hierarchical_report(rca_data)
         return rca_data
 
+    def _dedupe_root_causes(self, incident_summary: str, branches: Dict[int, Dict], reused: List[int],
+                            branch_store=None) -> None:
+        """Aynı kök neden kodunu seçen sonraki dalı diğer kodlar yasak olarak yeniden çalıştırır"""
+        seen = {branches[i]["root_cause"].get("code") for i in reused}
+        for idx in sorted(i for i in branches if i not in reused):
+            code = branches[idx]["root_cause"].get("code")
+            if code and code in seen:
+                immediate_cause = branches[idx]["immediate_cause"]
+                banned = [b["root_cause"]["code"] for i, b in branches.items()
+                          if i != idx and b["root_cause"].get("code")]
+                with log_context(branch_id=f"{idx}-{immediate_cause.get('code', '?')}"):
+                    logger.info("Dal %d: kök neden %s başka dalda da seçildi; yasak kodlarla yeniden çalıştırılıyor",
+                                idx, code)
+                    branches[idx] = self._run_branch(idx, immediate_cause, incident_summary, banned)
+                    if branch_store:
+                        branch_store.save_branch(idx, branches[idx])
+                    self._print_branch_tree(branches[idx])
+                self._emit_branch(idx, branches[idx], revised=True)
+                code = branches[idx]["root_cause"].get("code")
+            if code:
+                seen.add(code)
+
+    def _run_branch(self, idx: int, immediate_cause: Dict, incident_summary: str,
+                    used_root_codes: List[str]) -> Dict:
+        chain = self._perform_5why_chain(
+            immediate_cause,
+            incident_summary,
+            used_root_codes=used_root_codes
+        )
+        branch = {
+            "branch_number": idx,
+            "immediate_cause": immediate_cause,
+            "why_chain": chain.get("whys", []),
+            "root_cause": chain.get("root_cause", {})
+        }
+        if chain.get("_cascade"):
+            branch["cascade"] = chain["_cascade"]
+        return branch
+
+    def _cascade_summary(self, rca_data: Dict) -> Optional[Dict]:
+        """
+        Olay başına kademe istatistiği: yükseltme oranı ve tahmini süre
+        kazancı (kabul edilen dallarda Opus ortalama süresi - hızlı model
+        süresi, yükseltilen dallarda boşa giden hızlı model süresi).
+        """
+        reused = set(rca_data.get("reused_branches", []))
+        runs = [b["cascade"] for b in rca_data["analysis_branches"]
+                if b.get("cascade") and b["branch_number"] not in reused]
+        if not runs or not any(r["mode"] == "cascade" for r in runs):
+            return None
+
+        escalated = [r for r in runs if r["escalated"]]
+        reasons: Dict[str, int] = {}
+        for run in escalated:
+            for reason in run["reasons"]:
+                reasons[reason] = reasons.get(reason, 0) + 1
+
+        saved_s = None
+        with self._strong_latency_lock:
+            strong_latency = self._strong_latency
+        if strong_latency is not None:
+            saved_s = sum(strong_latency - r["fast_s"] for r in runs if not r["escalated"])
+            saved_s -= sum(r["fast_s"] for r in escalated)
+            saved_s = round(saved_s, 2)
+
+        summary = {
+            "branches": len(runs),
+            "fast_accepted": len(runs) - len(escalated),
+            "escalated": len(escalated),
+            "escalation_rate": round(len(escalated) / len(runs), 3),
+            "escalation_reasons": reasons,
+            "fast_s": round(sum(r["fast_s"] or 0 for r in runs), 2),
+            "strong_s": round(sum(r["strong_s"] or 0 for r in runs), 2),
+            "estimated_saving_s": saved_s,
+        }
+        logger.info("5-Why kademesi: %d/%d dal yükseltildi, tahmini kazanç %s sn",
+                    summary["escalated"], summary["branches"], saved_s)
+        return summary
+
+    @staticmethod
+    def _emit_branch(idx: int, branch: Dict, resumed: bool = False, revised: bool = False) -> None:
+        root = branch["root_cause"]
+        emit("branch_complete", branch=idx, immediate_code=branch["immediate_cause"].get("code"),
+             root_code=root.get("code"), root_title=root.get("standard_title_tr"),
+             root_cause=root.get("cause_tr"), whys=len(branch["why_chain"]), resumed=resumed,
+             revised=revised)
+
+    @staticmethod
+    def _new_rca_data(incident_summary: str) -> Dict:
+        return {
+            "incident_summary": incident_summary,
+            "incident_summary_hash": incident_summary_hash(incident_summary),
+            "analysis_branches": [],
+            "final_root_causes": [],
+            "reused_branches": [],
+            "analysis_method": "HSG245 Hierarchical 5-Why (A/B → C/D)"
+        }
+
+    @staticmethod
+    def _previous_branches_by_code(previous: Optional[Dict]) -> Dict[str, List[Dict]]:
+        available: Dict[str, List[Dict]] = {}
+        for branch in (previous or {}).get("analysis_branches", []):
+            code = (branch.get("immediate_cause") or {}).get("code")
+            if code and branch.get("root_cause"):
+                available.setdefault(code, []).append(branch)
+        return available
+
+    @classmethod
+    def _reusable_branches(cls, previous: Optional[Dict], immediate_causes: List[Dict]) -> Dict[int, Dict]:
+        """
+        Dal numarası → önceki analizin aynı doğrudan neden koduna sahip dalı.
+
+        Doğrudan neden taksonomi koduyla eşlenir (model metni her çalıştırmada
+        farklı ifade edebilir); her önceki dal en fazla bir kez kullanılır.
+        """
+        available = cls._previous_branches_by_code(previous)
+        reusable = {}
+        for idx, cause in enumerate(immediate_causes, 1):
+            candidates = available.get(cause.get("code"))
+            if candidates:
+                reusable[idx] = candidates.pop(0)
+        return reusable
+
     # ─────────────────────────────────────────────────────────────────────────
     # ADIM 1 — DOĞRUDAN NEDENLER (A / B KATEGORİLERİ)
     # ─────────────────────────────────────────────────────────────────────────
@@ -157,23 +526,89 @@ class RootCauseAgentV2:
     def _identify_immediate_causes_with_codes(self, incident_summary: str) -> List[Dict]:
         """A/B kategorilerinden immediate causes bul"""
 
+        response = self.client.chat.completions.create(
+            model="anthropic/claude-sonnet-4.5",
+            temperature=0.4,
+            messages=self._immediate_cause_messages(incident_summary),
+            extra_headers={"anthropic-version": "2023-06-01"}
+        )
+
+        result = response.choices[0].message.content.strip()
+        data = safe_json_parse(
+            result,
+            context="Immediate Causes Identification",
+            default={"causes": []}
+        )
+        causes = data.get("causes", [])
+
+        for cause in causes:
+            self._log_immediate_cause(cause)
+
+        return causes
+
+    def _stream_immediate_causes(self, incident_summary: str) -> Iterator[Dict]:
+        """
+        Aynı çağrı akışla: her doğrudan neden nesnesi JSON'da kapanır kapanmaz
+        üretilir. En fazla MAX_IMMEDIATE_CAUSES neden alınır; sınıra ulaşınca
+        yanıtın geri kalanı beklenmeden bağlantı kapatılır.
+        """
+        response = self.client.chat.completions.create(
+            model="anthropic/claude-sonnet-4.5",
+            temperature=0.4,
+            messages=self._immediate_cause_messages(incident_summary),
+            stream=True,
+            stream_options={"include_usage": True},  # final usage chunk: rate-limit refund, usage tracking
+            extra_headers={"anthropic-version": "2023-06-01"}
+        )
+        parser = JsonArrayStream("causes")
+        count = 0
+        try:
+            for chunk in response:
+                if not chunk.choices:
+                    continue
+                for cause in parser.feed(chunk.choices[0].delta.content or ""):
+                    if not isinstance(cause, dict):
+                        continue
+                    self._log_immediate_cause(cause)
+                    count += 1
+                    yield cause
+                    if count >= MAX_IMMEDIATE_CAUSES:
+                        logger.debug("%d doğrudan neden alındı; akışın geri kalanı okunmuyor", count)
+                        return
+        finally:
+            close = getattr(response, "close", None)
+            if close is not None:
+                close()
+
+    @staticmethod
+    def _log_immediate_cause(cause: Dict) -> None:
+        code           = cause.get('code', '???')
+        standard_title = cause.get('standard_title_tr', '')
+        cause_desc     = cause.get('cause_tr', '')
+        if standard_title:
+            logger.debug("[%s] %s: %s", code, standard_title, cause_desc)
+        else:
+            logger.debug("[%s] %s", code, cause_desc)
+
+    def _immediate_cause_messages(self, incident_summary: str) -> List[Dict]:
         rag_context_a = get_category_text('A')
         rag_context_b = get_category_text('B')
 
-        prompt = f"""Sen uzman bir İSG Müfettişisin. Görevin, aşağıdaki iş kazası / çevre olayı raporunu
+        # Sabit önek (talimat, A/B listeleri, kurallar, şema) her olayda aynıdır ve
+        # önbelleğe alınır; olay raporu en sonda, kullanıcı mesajında gelir.
+        instructions = f"""Sen uzman bir İSG Müfettişisin. Görevin, kullanıcının vereceği iş kazası / çevre olayı raporunu
 analiz etmek ve HSG245 standardına göre "Doğrudan Nedenleri" (Immediate Causes) belirlemektir.
 
 GİRDİLER:
 
-OLAY RAPORU (TAMAMI):
-{incident_summary}
-
 REFERANS LİSTESİ A (DAVRANIŞSAL KODLAR):
 {rag_context_a}
 
 REFERANS LİSTESİ B (KOŞULLAR KODLARI):
 {rag_context_b}
 
+OLAY RAPORU (TAMAMI): kullanıcı mesajında verilir.
+
 ─────────────────────────────────────────────
 KRİTİK KURALLAR:
 ─────────────────────────────────────────────
@@ -226,47 +661,45 @@ BEKLENEN ÇIKTI (JSON ŞEMASI):
 }}
 """
 
-        response = self.client.chat.completions.create(
-            model="anthropic/claude-sonnet-4.5",
-            temperature=0.4,
-            messages=[
-                {
-                    "role": "system",
-                    "content": [
-                        {
-                            "type": "text",
-                            "text": (
-                                "Sen HSG245 uzmanısın. Sadece JSON döndür, Türkçe içerik kullan. "
-                                "Raporda olmayan senaryoları ASLA ekleme. "
-                                "Genel/jenerik kodlardan kaçın; olaya özgü, spesifik kodları seç."
-                            ),
-                            "cache_control": {"type": "ephemeral"}
-                        }
-                    ]
-                },
-                {"role": "user", "content": prompt}
+        return cacheable_messages(
+            [
+                "Sen HSG245 uzmanısın. Sadece JSON döndür, Türkçe içerik kullan. "
+                "Raporda olmayan senaryoları ASLA ekleme. "
+                "Genel/jenerik kodlardan kaçın; olaya özgü, spesifik kodları seç.",
+                instructions,
             ],
-            extra_headers={"anthropic-version": "2023-06-01"}
-        )
-
-        result = response.choices[0].message.content.strip()
-        data = safe_json_parse(
-            result,
-            context="Immediate Causes Identification",
-            default={"causes": []}
+            f"OLAY RAPORU (TAMAMI):\n{incident_summary}" + self._similar_incidents_block(incident_summary),
         )
-        causes = data.get("causes", [])
-
-        for cause in causes:
-            code           = cause.get('code', '???')
-            standard_title = cause.get('standard_title_tr', '')
-            cause_desc     = cause.get('cause_tr', '')
-            if standard_title:
-                print(f"  [{code}] {standard_title}: {cause_desc}")
-            else:
-                print(f"  [{code}] {cause_desc}")
 
-        return causes
+    @staticmethod
+    def _similar_incidents_block(incident_summary: str) -> str:
+        """
+        Geçmiş soruşturmalardan en benzer RCA_SIMILAR_INCIDENTS olay (varsayılan
+        0 = kapalı). Kanıt değil, yalnızca kod seçimine referans olarak verilir.
+        """
+        k = int(os.getenv("RCA_SIMILAR_INCIDENTS", "0") or 0)
+        if k <= 0:
+            return ""
+        try:
+            matches = get_incident_index().search(incident_summary, k=k)
+        except Exception as e:
+            logger.warning("Benzer olay araması başarısız: %s", e)
+            return ""
+        if not matches:
+            return ""
+        logger.debug("Benzer geçmiş olaylar: %s", ", ".join(m["id"] for m in matches))
+        lines = [
+            "",
+            "",
+            "BENZER GEÇMİŞ OLAYLAR (yalnızca referans; bu olayın kanıtı DEĞİLDİR —",
+            "bir kodu ancak yukarıdaki raporda dayanağı varsa kullan):",
+        ]
+        for n, match in enumerate(matches, 1):
+            summary = " ".join(match["summary"].split())[:240]
+            lines.append(f"{n}. {summary}")
+            lines.append(f"   Doğrudan nedenler: {', '.join(match['immediate_codes']) or '-'} · "
+                         f"Kök nedenler: {', '.join(match['root_codes']) or '-'}")
+        return "\n".join(lines)
 
     # ─────────────────────────────────────────────────────────────────────────
     # ADIM 2 — 5-WHY ZİNCİRİ
@@ -296,15 +729,12 @@ BEKLENEN ÇIKTI (JSON ŞEMASI):
                 + "\nFarklı, daha spesifik bir kod bul."
             )
         else:
-            banned_codes_str = "Henüz kullanılmış kod yok."
-
-        prompt = f"""Sen İSG kök neden uzmanısın. 5-Why analizi yapıyorsun.
-
-OLAY RAPORU (TAMAMI):
-{incident_summary}
+            banned_codes_str = "YASAK KODLAR: Henüz kullanılmış kod yok."
 
-DOĞRUDAN NEDEN [{code}]:
-{cause_tr}
+        # Sabit önek: görev, C/D listeleri, kurallar ve şema (tüm dallarda ve
+        # olaylarda aynı). Olay raporu, doğrudan neden ve önceki dallarda
+        # kullanılan kodlar değişken kısımdır ve kullanıcı mesajına gider.
+        instructions = f"""Sen İSG kök neden uzmanısın. 5-Why analizi yapıyorsun.
 
 C KATEGORİSİ (KİŞİSEL FAKTÖRLER - ROOT CAUSES):
 {rag_context_c}
@@ -312,6 +742,8 @@ C KATEGORİSİ (KİŞİSEL FAKTÖRLER - ROOT CAUSES):
 D KATEGORİSİ (ORGANİZASYONEL FAKTÖRLER - ROOT CAUSES):
 {rag_context_d}
 
+OLAY RAPORU (TAMAMI), DOĞRUDAN NEDEN ve YASAK KODLAR kullanıcı mesajında verilir.
+
 ─────────────────────────────────────────────
 GÖREV:
 ─────────────────────────────────────────────
@@ -329,7 +761,9 @@ A) SADECE RAPORDA YAZANLARA DAYAN
    Raporda geçmeyen ekipman, kişi, sistem veya senaryo EKLEME.
    Her "neden" sorusu ve cevabı rapordaki gerçek bulgulara dayanmalı.
 
-B) {banned_codes_str}
+B) YASAK KODLAR
+   Kullanıcı mesajındaki YASAK KODLAR önceki dallarda zaten seçildi;
+   bunları ROOT CAUSE olarak SEÇME.
 
 C) SPESİFİKLİK KURALI
    "Risk değerlendirmesi eksikliği" (D1.x), "eğitim eksikliği" (D2.x) gibi
@@ -362,43 +796,63 @@ DÖNDÜR (JSON ŞEMASI):
 
 KRİTİK: Tüm içerik %100 TÜRKÇE. Geçerli JSON döndür. Markdown etiketi kullanma."""
 
-        response = self.client.chat.completions.create(
-            model="anthropic/claude-opus-4.6",
-            temperature=0.6,
-            messages=[
-                {
-                    "role": "system",
-                    "content": [
-                        {
-                            "type": "text",
-                            "text": (
-                                "Sen 5-Why uzmanısın. Sadece JSON, Türkçe içerik. "
-                                "Her kaza için özgün, spesifik kök nedenler üret. "
-                                "Raporda olmayan senaryoları ASLA ekleme. "
-                                "Jenerik/genel kodlardan kaçın."
-                            ),
-                            "cache_control": {"type": "ephemeral"}
-                        }
-                    ]
-                },
-                {"role": "user", "content": prompt}
+        branch_input = f"""OLAY RAPORU (TAMAMI):
+{incident_summary}
+
+DOĞRUDAN NEDEN [{code}]:
+{cause_tr}
+
+{banned_codes_str}"""
+
+        messages = cacheable_messages(
+            [
+                "Sen 5-Why uzmanısın. Sadece JSON, Türkçe içerik. "
+                "Her kaza için özgün, spesifik kök nedenler üret. "
+                "Raporda olmayan senaryoları ASLA ekleme. "
+                "Jenerik/genel kodlardan kaçın.",
+                instructions,
             ],
-            extra_headers={"anthropic-version": "2023-06-01"}
+            branch_input,
         )
 
-        result = response.choices[0].message.content.strip()
-        chain = safe_json_parse(
-            result,
-            context=f"5-Why Chain for {code}",
-            default={"whys": [], "root_cause": {}}
-        )
+        # Kademe: önce hızlı model; yerel doğrulamayı geçemezse Opus
+        mode = os.getenv("FIVE_WHY_MODE", "direct").lower()
+        cascade = {"mode": mode, "model": FIVE_WHY_MODEL, "escalated": False,
+                   "reasons": [], "fast_s": None, "strong_s": None}
+        chain = None
+        if mode == "cascade":
+            started = time.perf_counter()
+            try:
+                chain = self._request_5why_chain(FIVE_WHY_FAST_MODEL, messages, code)
+                cascade["reasons"] = validate_5why_chain(chain, used_root_codes)
+            except Exception as e:
+                logger.warning("Hızlı model 5-Why çağrısı başarısız: %s", e)
+                cascade["reasons"] = ["error"]
+            cascade["fast_s"] = round(time.perf_counter() - started, 3)
+            if cascade["reasons"]:
+                logger.info("Hızlı model zinciri geçersiz (%s); Opus'a yükseltiliyor",
+                            ", ".join(cascade["reasons"]))
+                cascade["escalated"] = True
+                chain = None
+            else:
+                cascade["model"] = FIVE_WHY_FAST_MODEL
+
+        if chain is None:
+            started = time.perf_counter()
+            chain = self._request_5why_chain(FIVE_WHY_MODEL, messages, code)
+            cascade["strong_s"] = round(time.perf_counter() - started, 3)
+            with self._strong_latency_lock:
+                if self._strong_latency is None:
+                    self._strong_latency = cascade["strong_s"]
+                else:
+                    self._strong_latency = 0.8 * self._strong_latency + 0.2 * cascade["strong_s"]
+        chain["_cascade"] = cascade
 
         for why in chain.get("whys", []):
             level    = why.get("level", "?")
             question = why.get("question_tr", "")
             answer   = why.get("answer_tr", "")
-            print(f"  ❓ Neden {level}? {question}")
-            print(f"     → {answer}\n")
+            logger.debug("Neden %s? %s → %s", level, question, answer)
 
         root            = chain.get("root_cause", {})
         root_code       = root.get('code', '???')
@@ -407,24 +861,43 @@ KRİTİK: Tüm içerik %100 TÜRKÇE. Geçerli JSON döndür. Markdown etiketi k
         root_explanation = root.get('explanation_tr', '')
 
         if root_standard:
-            print(f"  🎯 KÖK NEDEN [{root_code}] {root_standard}: {root_cause_desc}")
+            logger.info("Kök neden [%s] %s: %s", root_code, root_standard, root_cause_desc)
         else:
-            print(f"  🎯 KÖK NEDEN [{root_code}]: {root_cause_desc}")
-        print(f"     ({root_explanation})\n")
+            logger.info("Kök neden [%s]: %s", root_code, root_cause_desc)
+        logger.debug("Kök neden açıklaması: %s", root_explanation)
 
         return chain
 
+    def _request_5why_chain(self, model: str, messages: List[Dict], code: str) -> Dict:
+        response = self.client.chat.completions.create(
+            model=model,
+            temperature=0.6,
+            messages=messages,
+            extra_headers={"anthropic-version": "2023-06-01"}
+        )
+
+        result = response.choices[0].message.content.strip()
+        return safe_json_parse(
+            result,
+            context=f"5-Why Chain for {code} ({model})",
+            default={"whys": [], "root_cause": {}}
+        )
+
     # ─────────────────────────────────────────────────────────────────────────
     # YARDIMCI — DAL AĞACI
     # ─────────────────────────────────────────────────────────────────────────
 
     def _print_branch_tree(self, branch: Dict):
+        """Dal ağacı (yalnızca DEBUG seviyesinde üretilir)"""
+        if not logger.isEnabledFor(logging.DEBUG):
+            return
+        lines = []
         immediate = branch["immediate_cause"]
         whys      = branch.get("why_chain", [])
         root      = branch.get("root_cause", {})
 
-        print(f"\n🌳 DAL AĞACI #{branch['branch_number']}:")
-        print("│")
+        lines.append(f"\n🌳 DAL AĞACI #{branch['branch_number']}:")
+        lines.append("│")
 
         imm_code     = immediate.get('code', '')
         imm_standard = immediate.get('standard_title_tr', '')
@@ -432,20 +905,20 @@ KRİTİK: Tüm içerik %100 TÜRKÇE. Geçerli JSON döndür. Markdown etiketi k
         imm_evidence = immediate.get('evidence_tr', '')
 
         if imm_standard:
-            print(f"├── 📌 DOĞRUDAN NEDEN [{imm_code}] {imm_standard}")
-            print(f"│      └── {imm_cause}")
+            lines.append(f"├── 📌 DOĞRUDAN NEDEN [{imm_code}] {imm_standard}")
+            lines.append(f"│      └── {imm_cause}")
         else:
-            print(f"├── 📌 DOĞRUDAN NEDEN [{imm_code}]")
-            print(f"│      └── {imm_cause}")
+            lines.append(f"├── 📌 DOĞRUDAN NEDEN [{imm_code}]")
+            lines.append(f"│      └── {imm_cause}")
 
         if imm_evidence:
-            print(f"│      📎 Kanıt: {imm_evidence}")
-        print("│")
+            lines.append(f"│      📎 Kanıt: {imm_evidence}")
+        lines.append("│")
 
         for idx, why in enumerate(whys, 1):
-            print(f"├── ❓ Neden {idx}? {why.get('question_tr', '')}")
-            print(f"│      └── {why.get('answer_tr', '')}")
-            print("│")
+            lines.append(f"├── ❓ Neden {idx}? {why.get('question_tr', '')}")
+            lines.append(f"│      └── {why.get('answer_tr', '')}")
+            lines.append("│")
 
         root_code        = root.get('code', '')
         root_standard    = root.get('standard_title_tr', '')
@@ -453,14 +926,15 @@ KRİTİK: Tüm içerik %100 TÜRKÇE. Geçerli JSON döndür. Markdown etiketi k
         root_explanation = root.get('explanation_tr', '')
 
         if root_standard:
-            print(f"└── 🎯 KÖK NEDEN [{root_code}] {root_standard}")
-            print(f"       └── {root_cause}")
+            lines.append(f"└── 🎯 KÖK NEDEN [{root_code}] {root_standard}")
+            lines.append(f"       └── {root_cause}")
         else:
-            print(f"└── 🎯 KÖK NEDEN [{root_code}]")
-            print(f"       └── {root_cause}")
+            lines.append(f"└── 🎯 KÖK NEDEN [{root_code}]")
+            lines.append(f"       └── {root_cause}")
 
         if root_explanation:
-            print(f"       💡 {root_explanation}")
+            lines.append(f"       💡 {root_explanation}")
+        logger.debug("\n".join(lines))
 
     # ─────────────────────────────────────────────────────────────────────────
     # YARDIMCI — HİYERARŞİK RAPOR
@@ -537,31 +1011,15 @@ KRİTİK: Tüm içerik %100 TÜRKÇE. Geçerli JSON döndür. Markdown etiketi k
     # KRİTİK DÜZELTME — OLAY ÖZETİ HAZIRLA
     # ─────────────────────────────────────────────────────────────────────────
 
-    def _prepare_incident_summary(
+    def find_incident_text(
         self,
         part1_data: Dict,
-        part2_data: Dict,
         investigation_data: Dict = None
-    ) -> str:
+    ) -> Optional[str]:
         """
-        Olay özetini hazırla.
-
-        ÖNCELİK SIRASI (V2.2 düzeltmesi):
-        1. investigation_data["description"]        ← test dosyası bunu gönderiyor
-        2. investigation_data["full_description"]
-        3. investigation_data["incident_description"]
-        4. investigation_data["raw_text"]
-        5. investigation_data["how_happened"]
-        6. part1_data["incident_description"]
-        7. part1_data["full_description"]
-        8. part1_data["raw_text"]
-        9. Fallback: part1_data + part2_data alanlarını birleştir
-
-        SORUN GEÇMİŞİ:
-        Eski kod sadece "how_happened" anahtarını arıyordu.
-        Test dosyası {"description": INCIDENT_DESCRIPTION} gönderiyor.
-        "description" anahtarı hiç okunmadığı için model gerçek olayı
-        görmüyor, kafasından senaryo üretiyordu.
+        Olayın tam metnini bulur (_prepare_incident_summary öncelik sırası 1-8).
+        Bulunamazsa None döner; bu durumda özet Part 1/Part 2 alanlarından
+        birleştirilmek zorundadır.
         """
 
         # ── 1. investigation_data içindeki tam metin alanları ──────────────
@@ -575,8 +1033,8 @@ KRİTİK: Tüm içerik %100 TÜRKÇE. Geçerli JSON döndür. Markdown etiketi k
             ]:
                 val = investigation_data.get(key)
                 if val and isinstance(val, str) and len(val.strip()) > 50:
-                    print(f"  ✅ Olay özeti kaynağı: investigation_data['{key}'] "
-                          f"({len(val)} karakter)")
+                    logger.debug("Olay özeti kaynağı: investigation_data['%s'] (%d karakter)",
+                                 key, len(val))
                     return val.strip()
 
         # ── 2. part1_data içindeki tam metin alanları ──────────────────────
@@ -589,12 +1047,45 @@ KRİTİK: Tüm içerik %100 TÜRKÇE. Geçerli JSON döndür. Markdown etiketi k
             ]:
                 val = part1_data.get(key)
                 if val and isinstance(val, str) and len(val.strip()) > 50:
-                    print(f"  ✅ Olay özeti kaynağı: part1_data['{key}'] "
-                          f"({len(val)} karakter)")
+                    logger.debug("Olay özeti kaynağı: part1_data['%s'] (%d karakter)",
+                                 key, len(val))
                     return val.strip()
 
+        return None
+
+    def _prepare_incident_summary(
+        self,
+        part1_data: Dict,
+        part2_data: Dict,
+        investigation_data: Dict = None
+    ) -> str:
+        """
+        Olay özetini hazırla.
+
+        ÖNCELİK SIRASI (V2.2 düzeltmesi):
+        1. investigation_data["description"]        ← test dosyası bunu gönderiyor
+        2. investigation_data["full_description"]
+        3. investigation_data["incident_description"]
+        4. investigation_data["raw_text"]
+        5. investigation_data["how_happened"]
+        6. part1_data["incident_description"]
+        7. part1_data["full_description"]
+        8. part1_data["raw_text"]
+        9. Fallback: part1_data + part2_data alanlarını birleştir
+
+        SORUN GEÇMİŞİ:
+        Eski kod sadece "how_happened" anahtarını arıyordu.
+        Test dosyası {"description": INCIDENT_DESCRIPTION} gönderiyor.
+        "description" anahtarı hiç okunmadığı için model gerçek olayı
+        görmüyor, kafasından senaryo üretiyordu.
+        """
+
+        text = self.find_incident_text(part1_data, investigation_data)
+        if text:
+            return text
+
         # ── 3. Fallback: alanları birleştir ────────────────────────────────
-        print("  ⚠️  Tam metin bulunamadı, alanlar birleştiriliyor (fallback)")
+        logger.warning("Tam metin bulunamadı, alanlar birleştiriliyor (fallback)")
         summary_parts = []
 
         if part1_data and isinstance(part1_data, dict):
@@ -12,14 +12,15 @@ AVANTAJLAR:
   - HSE renk şeması: koyu mavi, kırmızı, turuncu, yeşil kutular/tablolar
 
 GEREKSİNİMLER:
-  pip install requests python-docx
+  pip install openai python-docx
 
 ORTAM DEĞİŞKENLERİ:
   OPENROUTER_API_KEY = "sk-or-v1-..."
 """
 
-import requests
+import hashlib
 import json
+import logging
 import os
 import sys
 import re
@@ -28,9 +29,21 @@ from typing import Dict, List, Optional, Any
 from pathlib import Path
 from datetime import datetime
 from dotenv import load_dotenv
+from openai import OpenAIError
+
+try:
+    from shared.llm_client import create_openrouter_client
+except ImportError:
+    # Modül doğrudan çalıştırıldığında (python agents/skillbased_docx_agent.py)
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+    from shared.llm_client import create_openrouter_client
+from shared.log import get_logger
+from shared.progress import emit
 
 load_dotenv()
 
+logger = get_logger(__name__)
+
 # python-docx imports
 from docx import Document
 from docx.shared import Pt, Cm, RGBColor, Inches
@@ -274,6 +287,55 @@ KURALLAR:
 """
 
 
+# ─────────────────────────────────────────────────────────────────────────────
+# İÇERİK SIDECAR (Claude içeriği rapor yanında saklanır)
+# ─────────────────────────────────────────────────────────────────────────────
+# outputs/INC-..._hse_report.docx  →  outputs/INC-..._hse_report.content.json
+# Sidecar, girdi payload hash'i ile anahtarlanır: aynı ham veri için rapor
+# yeniden üretilirken Claude tekrar çağrılmaz; font/yerleşim değişikliklerinde
+# render_from_content() ile LLM'siz yeniden render edilir.
+CONTENT_SIDECAR_SUFFIX = ".content.json"
+
+
+def compute_payload_hash(raw_data: Dict) -> str:
+    """Ham payload için kararlı SHA-256 hash (anahtar sırasından bağımsız)."""
+    canonical = json.dumps(raw_data, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def content_sidecar_path(output_path: str) -> Path:
+    """Rapor yolundan (.docx/.html) içerik sidecar yolunu türetir."""
+    path = Path(output_path)
+    return path.with_name(path.stem + CONTENT_SIDECAR_SUFFIX)
+
+
+def report_path_for_sidecar(sidecar_path: str) -> Path:
+    """Sidecar yolundan DOCX rapor yolunu türetir."""
+    path = Path(sidecar_path)
+    return path.with_name(path.name[: -len(CONTENT_SIDECAR_SUFFIX)] + ".docx")
+
+
+def load_content_sidecar(sidecar_path: str) -> Optional[Dict]:
+    """Sidecar dosyasını okur; yoksa veya bozuksa None döner."""
+    path = Path(sidecar_path)
+    if not path.exists():
+        return None
+    try:
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, json.JSONDecodeError) as e:
+        logger.warning("İçerik sidecar okunamadı (%s): %s", path, e)
+        return None
+    if not isinstance(data, dict) or not isinstance(data.get("content"), dict):
+        return None
+    return data
+
+
+def _is_minimal_content(content: Dict) -> bool:
+    """API/parse hatasında dönen tek-kapaklı yedek içerik mi?"""
+    return set(content.keys()) <= {"cover"}
+
+
 # ─────────────────────────────────────────────────────────────────────────────
 # DOCX YARDIMCI FONKSİYONLARI
 # ─────────────────────────────────────────────────────────────────────────────
@@ -827,49 +889,103 @@ class SkillBasedDocxAgent:
         )
     """
 
-    def __init__(self, api_key: Optional[str] = None):
+    def __init__(self, api_key: Optional[str] = None, offline: bool = False):
+        """
+        Args:
+            api_key: OpenRouter anahtarı (varsayılan: OPENROUTER_API_KEY)
+            offline: True ise anahtar gerekmez; sadece render_from_content()
+                     kullanılabilir (ağ erişimi yok)
+        """
         load_dotenv()
         key = api_key or os.getenv("OPENROUTER_API_KEY")
-        if not key:
+        if not key and not offline:
             raise ValueError("OPENROUTER_API_KEY bulunamadı! .env dosyasına ekleyin.")
         self.api_key = key
+        self.offline = offline
         self.model = "anthropic/claude-sonnet-4.5"
-        self.api_url = "https://openrouter.ai/api/v1/chat/completions"
-        print(f"✅ SkillBasedDocxAgent V2 hazır (OpenRouter {self.model})")
+        self.client = None if offline else create_openrouter_client(api_key=key)
+        mode = "offline render" if offline else f"OpenRouter {self.model}"
+        logger.info("SkillBasedDocxAgent V2 hazır (%s)", mode)
 
     def generate_report(
         self,
         investigation_data: Dict,
         output_path: str = "outputs/hse_report.docx",
         timeout_seconds: int = 600,
+        reuse_content: bool = True,
     ) -> str:
         """
         Investigation data'dan kapsamlı DOCX rapor üretir.
 
+        Claude'un ürettiği içerik JSON'u raporun yanına
+        (<rapor>.content.json) payload hash'i ile birlikte kaydedilir.
+
         Args:
             investigation_data: part1, part2, part3_rca içeren tam pipeline verisi
             output_path: Çıktı dosyası yolu
             timeout_seconds: API timeout (saniye)
+            reuse_content: Aynı payload hash'ine sahip sidecar varsa Claude
+                           çağrılmadan o içerik kullanılır
 
         Returns:
             Oluşturulan DOCX dosyasının tam yolu
         """
-        print("\n" + "=" * 70)
-        print("📄 DOCX RAPOR ÜRETME V2 (Claude + python-docx)")
-        print("=" * 70)
+        logger.info("DOCX rapor üretimi başlıyor: %s", output_path)
 
         raw_data = self._build_raw_payload(investigation_data)
         char_count = len(json.dumps(raw_data, ensure_ascii=False))
-        print(f"✅ Ham veri hazır ({char_count} karakter)")
+        payload_hash = compute_payload_hash(raw_data)
+        logger.debug("Ham veri hazır (%d karakter, hash %s)", char_count, payload_hash[:12])
+
+        sidecar = content_sidecar_path(output_path)
+        cached = load_content_sidecar(str(sidecar)) if reuse_content else None
+        if cached and cached.get("payload_hash") == payload_hash:
+            logger.info("Kayıtlı içerik kullanılıyor (LLM çağrılmadı): %s", sidecar)
+            emit("report", step="content_reused")
+            content = cached["content"]
+        else:
+            if self.offline:
+                raise RuntimeError(
+                    "Offline modda içerik üretilemez; render_from_content() kullanın."
+                )
+            logger.debug("LLM'e içerik isteği gönderiliyor")
+            emit("report", step="content_requested")
+            start = time.time()
+            content = self._generate_content_with_claude(raw_data, timeout_seconds)
+            elapsed = time.time() - start
+            out_chars = len(json.dumps(content, ensure_ascii=False))
+            logger.info("İçerik alındı (%.1fs, %d karakter)", elapsed, out_chars)
+            emit("report", step="content_ready")
+
+            if _is_minimal_content(content):
+                logger.warning("Yedek içerik sidecar'a kaydedilmedi (sonraki çalıştırmada yeniden denenecek)")
+            else:
+                self._save_content_sidecar(sidecar, content, payload_hash, output_path)
+
+        return self.render_from_content(content, output_path)
+
+    def render_from_content(self, content, output_path: Optional[str] = None) -> str:
+        """
+        Kayıtlı içerik JSON'undan DOCX + HTML üretir. LLM/ağ çağrısı yapmaz.
 
-        print("\n🤖 Claude API'ye içerik isteği gönderiliyor...")
-        start = time.time()
-        content = self._generate_content_with_claude(raw_data)
-        elapsed = time.time() - start
-        out_chars = len(json.dumps(content, ensure_ascii=False))
-        print(f"✅ İçerik alındı ({elapsed:.1f}s, {out_chars} karakter)")
+        Args:
+            content: İçerik dict'i veya .content.json sidecar dosya yolu
+            output_path: DOCX çıktı yolu (sidecar verildiyse varsayılan: sidecar'ın yanı)
+
+        Returns:
+            Oluşturulan DOCX dosyasının tam yolu
+        """
+        if not isinstance(content, dict):
+            sidecar_path = str(content)
+            sidecar = load_content_sidecar(sidecar_path)
+            if sidecar is None:
+                raise ValueError(f"Geçerli içerik sidecar'ı değil: {sidecar_path}")
+            content = sidecar["content"]
+            if output_path is None:
+                output_path = str(report_path_for_sidecar(sidecar_path))
+        if output_path is None:
+            raise ValueError("output_path gerekli (içerik dict olarak verildiğinde)")
 
-        print("\n📝 DOCX oluşturuluyor (python-docx)...")
         output_file = Path(output_path)
         output_file.parent.mkdir(parents=True, exist_ok=True)
         self._build_docx(content, str(output_file.resolve()))
@@ -878,22 +994,35 @@ class SkillBasedDocxAgent:
             raise RuntimeError(f"DOCX oluşturulamadı: {output_file}")
 
         size_kb = output_file.stat().st_size / 1024
-        print(f"\n✅ DOCX başarıyla oluşturuldu!")
-        print(f"📄 Dosya : {output_file.resolve()}")
-        print(f"📊 Boyut : {size_kb:.1f} KB")
         
         # HTML rapor da üret
         html_path = str(output_file).replace('.docx', '.html')
-        print(f"\n📝 HTML raporu oluşturuluyor...")
         self._build_html(content, html_path)
         html_size_kb = Path(html_path).stat().st_size / 1024
-        print(f"✅ HTML başarıyla oluşturuldu!")
-        print(f"📄 Dosya : {html_path}")
-        print(f"📊 Boyut : {html_size_kb:.1f} KB")
-        
-        print("=" * 70)
+        logger.info(
+            "Rapor oluşturuldu: %s (%.1f KB), %s (%.1f KB)",
+            output_file.resolve(), size_kb, html_path, html_size_kb,
+        )
+        emit("report", step="rendered", path=str(output_file.resolve()))
         return str(output_file.resolve())
 
+    def _save_content_sidecar(self, sidecar: Path, content: Dict,
+                              payload_hash: str, output_path: str) -> None:
+        """Claude içeriğini payload hash'i ile rapor yanına kaydeder."""
+        sidecar.parent.mkdir(parents=True, exist_ok=True)
+        record = {
+            "payload_hash": payload_hash,
+            "model": self.model,
+            "generated_at": datetime.now().isoformat(timespec="seconds"),
+            "report": Path(output_path).name,
+            "content": content,
+        }
+        tmp = sidecar.with_name(sidecar.name + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(record, f, ensure_ascii=False, indent=2)
+        os.replace(tmp, sidecar)
+        logger.debug("İçerik kaydedildi: %s", sidecar)
+
     def _build_raw_payload(self, data: Dict) -> Dict:
         if "part3_rca" in data:
             return {
@@ -905,7 +1034,7 @@ class SkillBasedDocxAgent:
             return {"part1": {}, "part2": {}, "part3_rca": data}
         return data
 
-    def _generate_content_with_claude(self, raw_data: Dict) -> Dict:
+    def _generate_content_with_claude(self, raw_data: Dict, timeout_seconds: int = 600) -> Dict:
         user_msg = (
             "Aşağıdaki HSG245 kök neden analizi ham verisini kullanarak "
             "profesyonel HSE raporu içeriğini üret.\n\n"
@@ -916,64 +1045,54 @@ class SkillBasedDocxAgent:
         )
 
         headers = {
-            "Authorization": f"Bearer {self.api_key}",
-            "Content-Type": "application/json",
             "HTTP-Referer": "https://github.com/hse-rca-system",
             "X-Title": "HSE RCA DOCX Generator",
             "anthropic-version": "2023-06-01"  # Prompt caching için gerekli
         }
 
         # Anthropic Prompt Caching - sistem promptu cache'le (maliyeti %90 düşürür)
-        payload = {
-            "model": self.model,
-            "messages": [
-                {
-                    "role": "system", 
-                    "content": [
-                        {
-                            "type": "text",
-                            "text": CONTENT_SYSTEM_PROMPT,
-                            "cache_control": {"type": "ephemeral"}  # Bu promptu 5 dakika cache'le
-                        }
-                    ]
-                },
-                {"role": "user", "content": user_msg}
-            ],
-            "max_tokens": 32000,
-            "temperature": 0.3,
-            "stream": False  # Non-streaming daha hızlı ve güvenilir
-        }
+        messages = [
+            {
+                "role": "system", 
+                "content": [
+                    {
+                        "type": "text",
+                        "text": CONTENT_SYSTEM_PROMPT,
+                        "cache_control": {"type": "ephemeral"}  # Bu promptu 5 dakika cache'le
+                    }
+                ]
+            },
+            {"role": "user", "content": user_msg}
+        ]
 
-        print("-" * 50)
-        
         try:
-            response = requests.post(
-                self.api_url,
-                headers=headers,
-                json=payload,
-                timeout=600
+            response = self.client.chat.completions.create(
+                model=self.model,
+                messages=messages,
+                max_tokens=32000,
+                temperature=0.3,
+                stream=False,  # Non-streaming daha hızlı ve güvenilir
+                extra_headers=headers,
+                timeout=timeout_seconds,
             )
-            response.raise_for_status()
-            
-            result = response.json()
             
-            if 'choices' in result and len(result['choices']) > 0:
-                full_text = result['choices'][0].get('message', {}).get('content', '')
+            if response.choices:
+                full_text = response.choices[0].message.content or ''
                 
-                # İçeriği ekrana yazdır (debug için)
-                print(full_text[:500] + "..." if len(full_text) > 500 else full_text)
-                print(f"\n📊 Toplam karakter: {len(full_text)}")
-                print("-" * 50)
+                # Yanıt önizlemesi yalnızca DEBUG seviyesinde
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug(
+                        "LLM yanıtı (%d karakter):\n%s", len(full_text),
+                        full_text[:500] + "..." if len(full_text) > 500 else full_text,
+                    )
                 
                 return self._parse_json_response(full_text)
             else:
-                print(f"\n❌ Geçersiz API yanıtı: {result}")
-                print("-" * 50)
+                logger.error("Geçersiz API yanıtı: %s", response)
                 return {"cover": {"title": "KÖK NEDEN ANALİZİ RAPORU"}}
             
-        except requests.exceptions.RequestException as e:
-            print(f"\n❌ OpenRouter API hatası: {e}")
-            print("-" * 50)
+        except OpenAIError as e:
+            logger.error("OpenRouter API hatası: %s", e)
             return {"cover": {"title": "KÖK NEDEN ANALİZİ RAPORU"}}
 
     def _parse_json_response(self, text: str) -> Dict:
@@ -995,7 +1114,7 @@ class SkillBasedDocxAgent:
                 return json.loads(text[start:end + 1])
             except json.JSONDecodeError:
                 pass
-        print("⚠️  JSON parse başarısız, minimal içerik kullanılıyor...")
+        logger.warning("JSON parse başarısız, minimal içerik kullanılıyor")
         return {"cover": {"title": "KOK NEDEN ANALİZİ RAPORU"}}
 
     def _build_docx(self, content: Dict, output_path: str) -> None:
@@ -1022,7 +1141,7 @@ class SkillBasedDocxAgent:
         _build_signature_page(doc)
 
         doc.save(output_path)
-        print(f"✅ Dosya kaydedildi: {output_path}")
+        logger.debug("Dosya kaydedildi: %s", output_path)
 
     def _build_html(self, content: Dict, output_path: str) -> None:
         """Düzenlenebilir HTML rapor oluşturur."""
@@ -0,0 +1,105 @@
+"""
+Lazy agent registry for the API
+===============================
+
+Agents are imported and constructed on first use instead of at startup,
+so the process answers health checks as soon as uvicorn is up; the agent
+modules (OpenAI client, knowledge base, prompts) load with the first
+request that needs them, or in the background when API_PRELOAD_AGENTS=1.
+
+Construction is thread-safe and happens once per agent. A failed import
+or constructor is remembered and reported by status(); the handler gets
+None and answers 503, as before.
+"""
+
+import importlib
+import importlib.util
+import os
+import threading
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from shared.log import get_logger
+
+logger = get_logger("api.agents")
+
+AGENT_SPECS: Dict[str, Tuple[str, str]] = {
+    "overview": ("agents.overview_agent", "OverviewAgent"),
+    "assessment": ("agents.assessment_agent", "AssessmentAgent"),
+    "rootcause": ("agents.rootcause_agent_v2", "RootCauseAgentV2"),
+    "actionplan": ("agents.actionplan_agent", "ActionPlanAgent"),
+    "pdf_generator": ("agents.claude_skill_pdf_agent", "ClaudeSkillPDFAgent"),
+}
+
+# Reported by /health but not part of its verdict (PDF export also needs
+# SKILL.md and reportlab, which the investigation itself does not)
+OPTIONAL_AGENTS = frozenset({"pdf_generator"})
+
+
+def api_key_configured() -> bool:
+    return bool(os.getenv("OPENROUTER_API_KEY") or os.getenv("OPENAI_API_KEY"))
+
+
+class LazyAgents:
+    """
+    Agents constructed on first get().
+
+    Args:
+        specs: name → (module, class); defaults to the HSG245 agents
+    """
+
+    def __init__(self, specs: Optional[Dict[str, Tuple[str, str]]] = None):
+        self.specs = dict(specs or AGENT_SPECS)
+        self._agents: Dict[str, Any] = {}
+        self._errors: Dict[str, str] = {}
+        self._found: Dict[str, bool] = {}
+        self._locks = {name: threading.Lock() for name in self.specs}
+
+    def get(self, name: str) -> Optional[Any]:
+        """The agent, constructing it if needed; None if it cannot be built."""
+        agent = self._agents.get(name)
+        if agent is not None:
+            return agent
+        if name in self._errors or not api_key_configured():
+            return None
+        with self._locks[name]:
+            if name in self._agents:
+                return self._agents[name]
+            if name in self._errors:
+                return None
+            module_name, class_name = self.specs[name]
+            try:
+                agent_class = getattr(importlib.import_module(module_name), class_name)
+                agent = agent_class()
+            except Exception as e:
+                self._errors[name] = f"{type(e).__name__}: {e}"
+                logger.warning("%s agent unavailable: %s", name, self._errors[name])
+                return None
+            self._agents[name] = agent
+            return agent
+
+    def status(self, name: str) -> str:
+        """active (built) | lazy (built on first use) | not_initialized"""
+        if name in self._agents:
+            return "active"
+        if name in self._errors or not api_key_configured():
+            return "not_initialized"
+        return "lazy" if self._importable(name) else "not_initialized"
+
+    def _importable(self, name: str) -> bool:
+        # Cached: /health is polled often and the module set does not change
+        if name not in self._found:
+            try:
+                self._found[name] = importlib.util.find_spec(self.specs[name][0]) is not None
+            except ImportError:
+                self._found[name] = False
+        return self._found[name]
+
+    def errors(self) -> Dict[str, str]:
+        return dict(self._errors)
+
+    def preload(self, names: Optional[Iterable[str]] = None) -> None:
+        """Construct agents ahead of the first request (e.g. in a worker thread)."""
+        for name in names or self.specs:
+            if self.status(name) == "lazy":
+                self.get(name)
+        logger.info("Agents preloaded: %s", ", ".join(sorted(self._agents)) or "none")
@@ -2,12 +2,15 @@
 FastAPI Backend for HSE Investigation System
 Connects admin panel with AI agents
 """
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, JSONResponse, StreamingResponse
 from pydantic import BaseModel
+import asyncio
+import json
 import sys
 import os
+import re
 from datetime import datetime
 from pathlib import Path
 from dotenv import load_dotenv
@@ -18,11 +21,18 @@ load_dotenv()
 # Add parent directory to import agents and shared
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from agents.overview_agent import OverviewAgent
-from agents.assessment_agent import AssessmentAgent
-from agents.rootcause_agent_v2 import RootCauseAgentV2 as RootCauseAgent
-from agents.actionplan_agent import ActionPlanAgent
-from agents.pdf_report_agent import PDFReportAgent
+# Agents are imported and built on first use (api/agent_registry.py), so
+# startup and /health do not wait for the OpenAI client, prompts or renderers
+from api.agent_registry import OPTIONAL_AGENTS, LazyAgents, api_key_configured
+from api.monitoring import LoopMonitor, SlowCallMiddleware
+from shared.dedup import get_duplicate_detector
+from shared.ids import new_id
+from shared.incident_index import get_incident_index
+from shared.log import get_logger, log_context
+from shared.priority import get_priority_gate, priority_context, priority_from_assessment
+from shared.progress import get_broker, track_stage
+
+logger = get_logger("api")
 
 app = FastAPI(
     title="HSE Investigation API",
@@ -43,53 +53,50 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Initialize agents with error handling
-overview_agent = None
-assessment_agent = None
-rootcause_agent = None
-actionplan_agent = None
-pdf_agent = None
+# Event-loop lag probe + slow-call detector (GET /api/v1/metrics)
+loop_monitor = LoopMonitor.from_env()
+app.add_middleware(SlowCallMiddleware, monitor=loop_monitor)
+
+_INCIDENT_PATH = re.compile(r"^/api/v1/incidents/([^/]+)")
+
+@app.middleware("http")
+async def incident_log_context(request, call_next):
+    """
+    Tag agent logs of /incidents/{incident_id}/... requests with the incident id,
+    and queue their LLM requests at the priority of the incident's Part 2 assessment
+    """
+    match = _INCIDENT_PATH.match(request.url.path)
+    incident = incidents_db.get(match.group(1)) if match else None
+    priority = priority_from_assessment(incident.get("part2")) if isinstance(incident, dict) else None
+    with log_context(incident_id=match.group(1) if match else None), priority_context(priority):
+        return await call_next(request)
+
+# Agents are constructed lazily on first use (errors are reported by /health)
+agent_registry = LazyAgents()
+
+async def _get_agent(name: str):
+    """agent_registry.get in a worker thread: the first use imports and builds the agent"""
+    return await asyncio.to_thread(agent_registry.get, name)
 
 @app.on_event("startup")
 async def startup_event():
-    """Initialize agents on startup"""
-    global overview_agent, assessment_agent, rootcause_agent, actionplan_agent, pdf_agent
-    
-    print("🚀 Starting HSE Investigation API...")
-    print(f"📊 OpenRouter API Key configured: {bool(os.getenv('OPENROUTER_API_KEY'))}")
+    """Start monitoring; agents are built on first use"""
+    logger.info("Starting HSE Investigation API")
+    loop_monitor.register_routes(app)
+    loop_monitor.start()
     
     # Verify API key is set
-    api_key = os.getenv("OPENROUTER_API_KEY") or os.getenv("OPENAI_API_KEY")
-    if not api_key:
-        print("⚠️  WARNING: No API key found in environment variables!")
-        print("⚠️  Set OPENROUTER_API_KEY in .env file")
+    if not api_key_configured():
+        logger.warning("No API key found in environment variables; set OPENROUTER_API_KEY in .env file")
         return
     
-    try:
-        # Initialize agents WITHOUT config parameter (they read from .env internally)
-        overview_agent = OverviewAgent()
-        print("✅ Overview Agent initialized")
-        
-        assessment_agent = AssessmentAgent()
-        print("✅ Assessment Agent initialized")
-        
-        rootcause_agent = RootCauseAgent()
-        print("✅ Root Cause Agent initialized (DeepSeek V3 + Claude 3.5 Sonnet)")
-        
-        actionplan_agent = ActionPlanAgent()
-        print("✅ Action Plan Agent initialized")
-        
-        pdf_agent = PDFReportAgent()
-        print("✅ PDF Report Agent initialized")
-        
-        print("🎉 All agents ready!")
-        print(f"🔑 Using API Key: {api_key[:20]}...{api_key[-10:]}")
-    except Exception as e:
-        print(f"❌ Error initializing agents: {e}")
-        import traceback
-        traceback.print_exc()
-        # Don't crash - let healthcheck show the error
-        pass
+    # Optional warm-up off the event loop, so the first request skips agent construction
+    if os.getenv("API_PRELOAD_AGENTS", "").lower() in ("1", "true", "yes"):
+        asyncio.get_running_loop().run_in_executor(None, agent_registry.preload)
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    await loop_monitor.stop()
 
 # In-memory storage (replace with database in production)
 incidents_db = {}
@@ -174,6 +181,7 @@ class IncidentCreate(BaseModel):
     forwarded_to: str = ""
     date_time: str = None
     event_category: str = ""
+    clone_duplicate: bool = False  # Reuse the analysis of a near-duplicate incident instead of running the agents
 
 class AssessmentData(BaseModel):
     incident_id: str
@@ -207,7 +215,9 @@ async def root():
         "status": "healthy",
         "endpoints": [
             "/api/v1/incidents",
-            "/api/v1/health"
+            "/api/v1/similar-incidents",
+            "/api/v1/health",
+            "/api/v1/metrics"
         ]
     }
 
@@ -216,8 +226,30 @@ async def create_incident(incident: IncidentCreate):
     """
     Part 1: Create new incident and process with Overview Agent
     Returns incident ID and Part 1 data
+
+    Earlier incidents with a nearly identical description are returned as
+    "duplicates" and the best one is linked as "duplicate_of". With
+    clone_duplicate the new incident copies its analysis (no LLM calls);
+    while that incident has no analysis yet the new one is created normally.
     """
+    duplicates = _find_duplicates(incident.description)
+    source = incidents_db[duplicates[0]["incident_id"]] if duplicates else None
+    if (source is not None and incident.clone_duplicate
+            and any(source.get(part) is not None for part in _CLONED_PARTS)):
+        incident_id = new_id("INC")
+        part1_data = dict(source["part1"], ref_no=incident_id, reported_by=incident.reported_by,
+                          date_time=incident.date_time or source["part1"].get("date_time"))
+        _store_incident(incident_id, part1_data, incident.description, duplicates)
+        cloned = _clone_analysis(incident_id, source["id"])
+        return IncidentResponse(
+            success=True,
+            data={"incident_id": incident_id, "part1": part1_data, "duplicates": duplicates,
+                  "cloned_from": source["id"], "cloned_parts": cloned},
+            message=f"Duplicate of {source['id']}; analysis cloned"
+        )
+
     # Check if agents are initialized
+    overview_agent = await _get_agent("overview")
     if overview_agent is None:
         raise HTTPException(
             status_code=503,
@@ -234,37 +266,99 @@ async def create_incident(incident: IncidentCreate):
             "event_category": incident.event_category
         }
         
-        # Process with Overview Agent
-        part1_data = overview_agent.process_initial_report(incident_data)
+        # Process with Overview Agent (worker thread: event streams keep flowing)
+        part1_data = await asyncio.to_thread(overview_agent.process_initial_report, incident_data)
         
-        # Store in database
+        # Store in database (never over an existing incident)
         incident_id = part1_data["ref_no"]
-        incidents_db[incident_id] = {
-            "id": incident_id,
-            "part1": part1_data,
-            "part2": None,
-            "part3": None,
-            "part4": None,
-            "created_at": datetime.now().isoformat(),
-            "status": "created"
-        }
+        if incident_id in incidents_db:
+            raise HTTPException(status_code=409, detail=f"Incident {incident_id} already exists")
+        _store_incident(incident_id, part1_data, incident.description, duplicates)
         
         return IncidentResponse(
             success=True,
-            data={"incident_id": incident_id, "part1": part1_data},
-            message="Incident created successfully"
+            data={"incident_id": incident_id, "part1": part1_data, "duplicates": duplicates},
+            message=(f"Incident created successfully (possible duplicate of {duplicates[0]['incident_id']})"
+                     if duplicates else "Incident created successfully")
         )
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=500, 
             detail=f"Error creating incident: {str(e)}"
         )
 
+def _find_duplicates(description: str) -> list:
+    """Stored incidents whose description is a near-duplicate (most similar first)"""
+    detector = get_duplicate_detector()
+    if not detector.enabled:
+        return []
+    return [
+        {"incident_id": doc_id, "similarity": round(score, 2), "status": incidents_db[doc_id]["status"]}
+        for doc_id, score in detector.find(description)
+        if doc_id in incidents_db
+    ]
+
+def _store_incident(incident_id: str, part1_data: dict, description: str, duplicates: list) -> None:
+    incidents_db[incident_id] = {
+        "id": incident_id,
+        "part1": part1_data,
+        "part2": None,
+        "part3": None,
+        "part4": None,
+        "description": description,
+        "duplicate_of": duplicates[0]["incident_id"] if duplicates else None,
+        "created_at": datetime.now().isoformat(),
+        "status": "created"
+    }
+    get_duplicate_detector().add(incident_id, description)
+    if duplicates:
+        logger.info("Incident %s looks like a duplicate of %s (similarity %.2f)",
+                    incident_id, duplicates[0]["incident_id"], duplicates[0]["similarity"])
+
+# Cloned part → status it leaves the incident in (later parts win)
+_CLONED_PARTS = {"part2": "assessed", "part3": "investigated", "part3_rca": "investigated", "part4": "completed"}
+
+def _clone_analysis(incident_id: str, source_id: str) -> list:
+    """Copy the analysis parts available on source_id; returns the copied part names"""
+    source = incidents_db[source_id]
+    target = incidents_db[incident_id]
+    cloned = [part for part in _CLONED_PARTS if source.get(part) is not None]
+    for part in cloned:
+        target[part] = json.loads(json.dumps(source[part]))
+    for part in cloned:
+        target["status"] = _CLONED_PARTS[part]
+    target["cloned_from"] = source_id
+    return cloned
+
+@app.post("/api/v1/incidents/{incident_id}/clone-analysis")
+async def clone_analysis(incident_id: str, source_id: str = None):
+    """
+    Reuse the analysis (Parts 2-4) of another incident, by default the
+    near-duplicate found at creation, instead of investigating again
+    """
+    if incident_id not in incidents_db:
+        raise HTTPException(status_code=404, detail="Incident not found")
+    
+    source_id = source_id or incidents_db[incident_id].get("duplicate_of")
+    if not source_id:
+        raise HTTPException(status_code=400, detail="No source incident given and no duplicate was detected")
+    if source_id not in incidents_db or source_id == incident_id:
+        raise HTTPException(status_code=404, detail=f"Source incident {source_id} not found")
+    
+    cloned = _clone_analysis(incident_id, source_id)
+    if not cloned:
+        raise HTTPException(status_code=409, detail=f"Incident {source_id} has no analysis to clone yet")
+    return {"success": True, "data": {"incident_id": incident_id, "cloned_from": source_id,
+                                      "cloned_parts": cloned, "status": incidents_db[incident_id]["status"]}}
+
 @app.post("/api/v1/incidents/{incident_id}/assessment")
 async def add_assessment(incident_id: str, assessment: AssessmentData):
     """
     Part 2: Add assessment with Assessment Agent
     """
+    assessment_agent = await _get_agent("assessment")
     if assessment_agent is None:
         raise HTTPException(
             status_code=503,
@@ -277,15 +371,20 @@ async def add_assessment(incident_id: str, assessment: AssessmentData):
     try:
         incident = incidents_db[incident_id]
         
-        # Process with Assessment Agent
-        part2_data = assessment_agent.assess_incident(
-            incident["part1"],
-            {
-                "event_type": assessment.event_type,
-                "actual_harm": assessment.actual_harm,
-                "riddor_reportable": assessment.riddor_reportable
-            }
-        )
+        def run_assessment() -> dict:
+            # Process with Assessment Agent
+            with track_stage("part2"):
+                return assessment_agent.assess_incident(
+                    incident["part1"],
+                    {
+                        "event_type": assessment.event_type,
+                        "actual_harm": assessment.actual_harm,
+                        "riddor_reportable": assessment.riddor_reportable
+                    }
+                )
+        
+        # Worker thread: the event loop keeps serving other requests and event streams
+        part2_data = await asyncio.to_thread(run_assessment)
         
         # Update database
         incidents_db[incident_id]["part2"] = part2_data
@@ -299,11 +398,22 @@ async def add_assessment(incident_id: str, assessment: AssessmentData):
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/api/v1/incidents/{incident_id}/investigate")
-async def investigate_incident(incident_id: str, investigation: InvestigationData):
+async def investigate_incident(incident_id: str, investigation: InvestigationData,
+                              background: bool = False, incremental: bool = True):
     """
     Part 3: Full investigation with Root Cause Agent
     NOTE: Can work standalone with just incident description for testing
+    
+    Re-investigating an incident is incremental: an unchanged incident
+    summary reuses the previous analysis, otherwise only the 5-Why branches
+    of new/changed immediate causes are re-run (?incremental=false starts
+    from scratch)
+    
+    With ?background=true the request returns 202 at once; immediate causes,
+    completed 5-Why branches and the result stage are streamed from
+    GET /api/v1/incidents/{incident_id}/events
     """
+    rootcause_agent = await _get_agent("rootcause")
     if rootcause_agent is None:
         raise HTTPException(
             status_code=503,
@@ -339,28 +449,48 @@ async def investigate_incident(incident_id: str, investigation: InvestigationDat
     else:
         part2_data = part2_raw
     
+    def run_investigation() -> dict:
+        with track_stage("part3"):
+            # Process with Root Cause Agent (V2 format)
+            part3_raw = rootcause_agent.analyze_root_causes(
+                part1_data,
+                part2_data,
+                {
+                    "location": investigation.location,
+                    "who_involved": investigation.who_involved,
+                    "how_happened": investigation.how_happened,
+                    "activities": investigation.activities,
+                    "working_conditions": investigation.working_conditions,
+                    "safety_procedures": investigation.safety_procedures,
+                    "injuries": investigation.injuries
+                },
+                previous=incident.get("part3_rca") if incremental else None
+            )
+            
+            # Transform V2 format to frontend-compatible format
+            part3_data = transform_v2_to_frontend(part3_raw)
+            
+            # Update database (raw V2 result kept for the next re-investigation)
+            incidents_db[incident_id]["part3_rca"] = part3_raw
+            incidents_db[incident_id]["part3"] = part3_data
+            incidents_db[incident_id]["status"] = "investigated"
+            _index_investigation(incident_id)
+            return part3_data
+    
+    if background:
+        # Progress and result via GET /api/v1/incidents/{incident_id}/events
+        incidents_db[incident_id]["status"] = "investigating"
+        task = asyncio.create_task(_investigate_in_background(incident_id, run_investigation))
+        background_tasks.add(task)
+        task.add_done_callback(background_tasks.discard)
+        return JSONResponse(status_code=202, content={
+            "success": True,
+            "data": {"status": "investigating", "events": f"/api/v1/incidents/{incident_id}/events"}
+        })
+    
     try:
-        # Process with Root Cause Agent (V2 format)
-        part3_raw = rootcause_agent.analyze_root_causes(
-            part1_data,
-            part2_data,
-            {
-                "location": investigation.location,
-                "who_involved": investigation.who_involved,
-                "how_happened": investigation.how_happened,
-                "activities": investigation.activities,
-                "working_conditions": investigation.working_conditions,
-                "safety_procedures": investigation.safety_procedures,
-                "injuries": investigation.injuries
-            }
-        )
-        
-        # Transform V2 format to frontend-compatible format
-        part3_data = transform_v2_to_frontend(part3_raw)
-        
-        # Update database
-        incidents_db[incident_id]["part3"] = part3_data
-        incidents_db[incident_id]["status"] = "investigated"
+        # Worker thread: the event loop keeps serving other requests and event streams
+        part3_data = await asyncio.to_thread(run_investigation)
         
         return {
             "success": True,
@@ -369,14 +499,69 @@ async def investigate_incident(incident_id: str, investigation: InvestigationDat
     except Exception as e:
         import traceback
         error_details = f"{str(e)}\n\nTraceback:\n{traceback.format_exc()}"
-        print(f"❌ Part 3 ERROR: {error_details}")
+        logger.error("Part 3 error: %s", error_details)
         raise HTTPException(status_code=500, detail=error_details)
 
+# Investigations started with ?background=true (references keep the tasks alive)
+background_tasks = set()
+
+async def _investigate_in_background(incident_id: str, run_investigation) -> None:
+    try:
+        await asyncio.to_thread(run_investigation)
+    except Exception as e:
+        logger.exception("Part 3 error (background): %s", e)
+        incidents_db[incident_id]["status"] = "investigation_failed"
+        incidents_db[incident_id]["error"] = str(e)
+
+def _index_investigation(incident_id: str) -> None:
+    """Add the investigation to the similar-incident index (failures only logged)"""
+    incident = incidents_db[incident_id]
+    try:
+        get_incident_index().add_investigation(
+            {"part1": incident.get("part1"), "part2": incident.get("part2"),
+             "part3_rca": incident.get("part3_rca")},
+            doc_id=incident_id,
+        )
+    except Exception as e:
+        logger.warning("Could not index investigation %s: %s", incident_id, e)
+
+@app.get("/api/v1/incidents/{incident_id}/similar")
+async def similar_incidents(incident_id: str, k: int = 5):
+    """
+    Past investigations most similar to this incident (BM25 over incident
+    summaries and A/B/C/D codes); uses the Part 3 analysis when available,
+    otherwise the Part 1 details
+    """
+    if incident_id not in incidents_db:
+        raise HTTPException(status_code=404, detail="Incident not found")
+    
+    incident = incidents_db[incident_id]
+    rca = incident.get("part3_rca") or {}
+    part1 = incident.get("part1") or {}
+    text = rca.get("incident_summary") or " ".join(
+        str(v) for v in [part1.get("description"), *(part1.get("brief_details") or {}).values()] if v
+    )
+    codes = [(b.get("immediate_cause") or {}).get("code") for b in rca.get("analysis_branches") or []]
+    codes += [c.get("code") for c in rca.get("final_root_causes") or []]
+    
+    matches = get_incident_index().search(text, codes=codes, k=max(1, min(k, 50)), exclude=[incident_id])
+    return {"success": True, "data": {"incident_id": incident_id, "similar": matches}}
+
+@app.get("/api/v1/similar-incidents")
+async def search_similar_incidents(q: str, k: int = 5):
+    """Past investigations most similar to a free-text incident description"""
+    matches = get_incident_index().search(q, k=max(1, min(k, 50)))
+    return {"success": True, "data": {"query": q, "similar": matches}}
+
 @app.post("/api/v1/incidents/{incident_id}/actionplan")
-async def generate_action_plan(incident_id: str):
+async def generate_action_plan(incident_id: str, incremental: bool = True):
     """
     Part 4: Generate action plan with ActionPlan Agent
+    
+    After a re-investigation only the new root causes are planned; measures
+    of unchanged root causes are kept (?incremental=false regenerates all)
     """
+    actionplan_agent = await _get_agent("actionplan")
     if actionplan_agent is None:
         raise HTTPException(
             status_code=503,
@@ -392,13 +577,16 @@ async def generate_action_plan(incident_id: str):
         raise HTTPException(status_code=400, detail="Investigation not completed")
     
     try:
-        # Process with ActionPlan Agent
-        part4_data = actionplan_agent.generate_action_plan({
-            "root_causes": incident["part3"]["root_causes"],
-            "underlying_causes": incident["part3"]["underlying_causes"],
-            "immediate_causes": incident["part3"]["immediate_causes"],
-            "severity": incident["part2"]["investigation_level"]
-        })
+        def run_action_plan() -> dict:
+            # Process with ActionPlan Agent
+            with track_stage("part4"):
+                return actionplan_agent.generate_action_plan(
+                    _actionplan_input(incident),
+                    previous=incident.get("part4") if incremental else None
+                )
+        
+        # Worker thread: the event loop keeps serving other requests and event streams
+        part4_data = await asyncio.to_thread(run_action_plan)
         
         # Update database
         incidents_db[incident_id]["part4"] = part4_data
@@ -411,6 +599,108 @@ async def generate_action_plan(incident_id: str):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/api/v1/incidents/{incident_id}/actionplan/stream")
+async def stream_action_plan(incident_id: str):
+    """
+    Part 4 as Server-Sent Events: a "measure" event per control measure as
+    it is generated, then "complete" with the Part 4 data (also stored)
+    """
+    actionplan_agent = await _get_agent("actionplan")
+    if actionplan_agent is None:
+        raise HTTPException(
+            status_code=503,
+            detail="Service not ready. Action Plan Agent not initialized. Please check OPENROUTER_API_KEY environment variable."
+        )
+    
+    if incident_id not in incidents_db:
+        raise HTTPException(status_code=404, detail="Incident not found")
+    
+    incident = incidents_db[incident_id]
+    
+    if not incident["part3"]:
+        raise HTTPException(status_code=400, detail="Investigation not completed")
+    
+    def events():
+        # Sync generator: Starlette iterates it in a worker thread
+        try:
+            for event in actionplan_agent.stream_action_plan(_actionplan_input(incident)):
+                if event["event"] == "complete":
+                    incidents_db[incident_id]["part4"] = event["data"]
+                    incidents_db[incident_id]["status"] = "completed"
+                yield _sse(event["event"], event["data"])
+        except Exception as e:
+            logger.error("Part 4 stream error: %s", e)
+            yield _sse("error", {"detail": str(e)})
+    
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+def _actionplan_input(incident: dict) -> dict:
+    return {
+        "root_causes": incident["part3"]["root_causes"],
+        "underlying_causes": incident["part3"]["underlying_causes"],
+        "immediate_causes": incident["part3"]["immediate_causes"],
+        "severity": incident["part2"]["investigation_level"]
+    }
+
+def _sse(event: str, data, event_id=None) -> str:
+    head = f"id: {event_id}\n" if event_id is not None else ""
+    return f"{head}event: {event}\ndata: {json.dumps(data, ensure_ascii=False, default=str)}\n\n"
+
+# Seconds between keep-alive comments on idle event streams (proxies drop silent connections)
+SSE_KEEPALIVE_S = float(os.getenv("SSE_KEEPALIVE_S", "15"))
+
+@app.get("/api/v1/incidents/{incident_id}/events")
+async def incident_events(incident_id: str, request: Request, until: str = None):
+    """
+    Server-Sent Events of an incident: stage transitions, immediate causes,
+    completed 5-Why branches, report build steps and control measures as
+    they happen (see shared/progress.py). Earlier events are replayed first;
+    reconnecting clients resume after their Last-Event-ID.
+    
+    ?until=<stage> closes the stream once that stage has completed or failed
+    """
+    if incident_id not in incidents_db:
+        raise HTTPException(status_code=404, detail="Incident not found")
+    
+    last_event_id = request.headers.get("last-event-id", "")
+    loop = asyncio.get_running_loop()
+    events: asyncio.Queue = asyncio.Queue()
+    
+    def deliver(record):
+        # Called from agent threads
+        loop.call_soon_threadsafe(events.put_nowait, record)
+    
+    broker = get_broker()
+    backlog = broker.subscribe(incident_id, deliver,
+                               after=int(last_event_id) if last_event_id.isdigit() else None)
+    
+    def finished(record) -> bool:
+        data = record["data"]
+        return (until is not None and record["event"] == "stage" and data.get("stage") == until
+                and data.get("status") in ("completed", "failed"))
+    
+    async def stream():
+        try:
+            for record in backlog:
+                yield _sse(record["event"], record, record["id"])
+                if finished(record):
+                    return
+            while True:
+                try:
+                    record = await asyncio.wait_for(events.get(), timeout=SSE_KEEPALIVE_S)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield _sse(record["event"], record, record["id"])
+                if finished(record):
+                    return
+        finally:
+            broker.unsubscribe(incident_id, deliver)
+    
+    return StreamingResponse(stream(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
 @app.get("/api/v1/incidents/{incident_id}")
 async def get_incident(incident_id: str):
     """
@@ -438,15 +728,11 @@ async def list_incidents():
 @app.get("/api/v1/health")
 async def health_check():
     """Health check endpoint - Railway uses this"""
-    agents_status = {
-        "overview": "active" if overview_agent else "not_initialized",
-        "assessment": "active" if assessment_agent else "not_initialized",
-        "rootcause": "active" if rootcause_agent else "not_initialized",
-        "actionplan": "active" if actionplan_agent else "not_initialized",
-        "pdf_generator": "active" if pdf_agent else "not_initialized"
-    }
+    # "lazy": importable, constructed on first request (health never builds agents)
+    agents_status = {name: agent_registry.status(name) for name in agent_registry.specs}
     
-    all_agents_ready = all(status == "active" for status in agents_status.values())
+    all_agents_ready = all(status in ("active", "lazy") for name, status in agents_status.items()
+                           if name not in OPTIONAL_AGENTS)
     
     # Check for API key
     api_key = os.getenv("OPENROUTER_API_KEY") or os.getenv("OPENAI_API_KEY")
@@ -454,12 +740,33 @@ async def health_check():
     return {
         "status": "healthy" if all_agents_ready else "degraded",
         "agents": agents_status,
+        "agent_errors": agent_registry.errors(),
         "api_key_configured": bool(api_key),
         "api_key_source": "OPENROUTER_API_KEY" if os.getenv("OPENROUTER_API_KEY") else "OPENAI_API_KEY" if os.getenv("OPENAI_API_KEY") else "none",
         "incidents_count": len(incidents_db),
         "timestamp": datetime.now().isoformat()
     }
 
+@app.get("/api/v1/metrics")
+async def metrics():
+    """Event-loop lag, slow calls (with blocking stacks), per-route latency and LLM token/cache usage"""
+    from shared.llm_usage import get_usage_tracker
+    from shared.micro_batch import get_micro_batcher
+    from shared.llm_client import get_global_rate_limiter
+    from shared.single_flight import get_single_flight
+    from shared.fast_classifier import fast_path_stats
+    limiter = get_global_rate_limiter()
+    return {
+        "success": True,
+        "data": {**loop_monitor.snapshot(), "llm_usage": get_usage_tracker().snapshot(),
+                 "llm_micro_batch": get_micro_batcher().snapshot(),
+                 "llm_single_flight": get_single_flight().snapshot(),
+                 "llm_priority": get_priority_gate().snapshot(),
+                 "llm_rate_limit": limiter.stats() if limiter else None,
+                 "fast_classifier": fast_path_stats()},
+        "timestamp": datetime.now().isoformat()
+    }
+
 @app.post("/api/v1/reports/generate")
 async def generate_pdf_report(request: PDFGenerateRequest):
     """
@@ -470,6 +777,13 @@ async def generate_pdf_report(request: PDFGenerateRequest):
     if incident_id not in incidents_db:
         raise HTTPException(status_code=404, detail="Incident not found")
     
+    pdf_agent = await _get_agent("pdf_generator")
+    if pdf_agent is None:
+        raise HTTPException(
+            status_code=503,
+            detail="Service not ready. PDF Report Agent not available."
+        )
+    
     incident = incidents_db[incident_id]
     
     if incident["status"] != "completed":
@@ -479,26 +793,13 @@ async def generate_pdf_report(request: PDFGenerateRequest):
         )
     
     try:
-        # Prepare complete investigation data for PDF
-        investigation_data = {
-            "ref_no": incident_id,
-            "part1": incident["part1"],
-            "part2": incident["part2"],
-            "part3": incident["part3"],
-            "part4": {
-                "actions": [
-                    {
-                        "measure": m["measure"],
-                        "responsible": m["responsible"],
-                        "target_date": m["target_date"]
-                    }
-                    for m in incident["part4"]["control_measures"]
-                ]
-            }
-        }
-        
-        # Generate PDF using PDF Report Agent
-        filepath = pdf_agent.generate_report(investigation_data)
+        # Generate PDF from the V2 root cause analysis (ClaudeSkillPDFAgent)
+        rca_data = incident.get("part3_rca") or (incident.get("part3") or {}).get("_v2_raw") or {}
+        filepath = await asyncio.to_thread(
+            pdf_agent.generate_report, rca_data, output_filename=f"HSG245_Report_{incident_id}.pdf"
+        )
+        if not filepath:
+            raise RuntimeError("PDF was not created")
         
         # Return file response
         return FileResponse(
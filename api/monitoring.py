@@ -0,0 +1,285 @@
+"""
+Event-loop monitoring for the API
+=================================
+
+The API handlers are `async def` but call the agents synchronously, so a
+single LLM call or DOCX build holds the event loop and every other request
+(health checks included) waits behind it. This module makes that visible:
+
+- LoopMonitor: a probe task on the event loop measures scheduling lag
+  continuously. A watchdog thread notices when the probe's heartbeat
+  stops; at that moment it snapshots the loop thread's stack, so the
+  blocking code (handler → agent entry point → ... → socket read) is
+  captured while it is still running.
+- SlowCallMiddleware: ASGI middleware keeping per-route request latency,
+  reported next to the loop time each route held (from the stalls).
+
+Stalls longer than the threshold are logged (logger "hse.api.monitoring")
+and, together with lag percentiles, exposed via GET /api/v1/metrics.
+
+Environment:
+    API_SLOW_CALL_MS     Loop hold time reported as a slow call (default 100)
+    API_LAG_PROBE_MS     Probe interval (default 50)
+"""
+
+import asyncio
+import os
+import sys
+import threading
+import time
+from collections import defaultdict, deque
+from datetime import datetime
+from typing import Any, Deque, Dict, Optional
+
+from shared.log import get_logger
+
+logger = get_logger("api.monitoring")
+
+# Frames under this directory are the project's own code
+_PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _percentiles(samples) -> Dict[str, Optional[float]]:
+    ordered = sorted(samples)
+    if not ordered:
+        return {"p50": None, "p95": None, "p99": None, "max": None}
+
+    def pick(q: float) -> float:
+        return round(ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))], 4)
+
+    return {"p50": pick(0.50), "p95": pick(0.95), "p99": pick(0.99), "max": round(ordered[-1], 4)}
+
+
+def _frame_name(frame) -> str:
+    code = frame.f_code
+    module = frame.f_globals.get("__name__", "?")
+    return f"{module}.{getattr(code, 'co_qualname', code.co_name)}"
+
+
+def _route_label(route) -> str:
+    methods = ",".join(sorted(getattr(route, "methods", None) or []))
+    return f"{methods} {route.path}".strip()
+
+
+class LoopMonitor:
+    """
+    Event-loop lag probe plus blocked-loop watchdog.
+
+    Args:
+        interval: Probe interval in seconds
+        slow_threshold: Loop hold time (s) reported as a slow call
+        history: Number of lag samples kept for percentiles
+        max_events: Number of recent slow calls kept (with stacks)
+    """
+
+    def __init__(self, interval: float = 0.05, slow_threshold: float = 0.1,
+                 history: int = 2048, max_events: int = 50):
+        self.interval = interval
+        self.slow_threshold = slow_threshold
+        self.lag: Deque[float] = deque(maxlen=history)
+        self.events: Deque[Dict[str, Any]] = deque(maxlen=max_events)
+        self.slow_calls = 0
+        self.blocked_by_route: Dict[str, float] = defaultdict(float)
+        self.slow_by_route: Dict[str, int] = defaultdict(int)
+        self.routes: Dict[str, Dict[str, Any]] = {}
+        self._history = history
+        self._route_codes: Dict[Any, str] = {}
+        self._heartbeat = time.perf_counter()
+        self._loop_thread_id: Optional[int] = None
+        self._stall: Optional[Dict[str, Any]] = None
+        self._lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    @classmethod
+    def from_env(cls) -> "LoopMonitor":
+        return cls(
+            interval=float(os.getenv("API_LAG_PROBE_MS", "50")) / 1000,
+            slow_threshold=float(os.getenv("API_SLOW_CALL_MS", "100")) / 1000,
+        )
+
+    def register_routes(self, app) -> None:
+        """Map handler code objects to route labels for stack attribution."""
+        for route in getattr(app, "routes", []):
+            endpoint = getattr(route, "endpoint", None)
+            code = getattr(endpoint, "__code__", None)
+            if code is not None and hasattr(route, "path"):
+                self._route_codes[code] = _route_label(route)
+
+    # ─────────────────────────────────────────────────────────────
+    # Lifecycle
+    # ─────────────────────────────────────────────────────────────
+
+    def start(self) -> None:
+        """Start probe and watchdog; call from within the running loop."""
+        if self._task is not None:
+            return
+        self._loop_thread_id = threading.get_ident()
+        self._heartbeat = time.perf_counter()
+        self._stop.clear()
+        self._task = asyncio.get_running_loop().create_task(self._probe())
+        self._watchdog = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._watchdog.start()
+
+    async def stop(self) -> None:
+        self._stop.set()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._watchdog is not None:
+            self._watchdog.join(timeout=1)
+            self._watchdog = None
+
+    async def _probe(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            now = time.perf_counter()
+            # Measured from the previous heartbeat, so time the loop was held
+            # before this probe got scheduled (e.g. at startup) counts as well
+            lag = max(0.0, now - self._heartbeat - self.interval)
+            self.lag.append(lag)
+            self._heartbeat = now
+            with self._lock:
+                stall, self._stall = self._stall, None
+            if stall is not None:
+                self._finish_stall(stall, lag)
+
+    # ─────────────────────────────────────────────────────────────
+    # Watchdog (runs in its own thread)
+    # ─────────────────────────────────────────────────────────────
+
+    def _watch(self) -> None:
+        poll = max(self.interval / 2, 0.005)
+        while not self._stop.wait(poll):
+            silent = time.perf_counter() - self._heartbeat - self.interval
+            if silent < self.slow_threshold:
+                continue
+            with self._lock:
+                if self._stall is not None:
+                    continue
+                frame = sys._current_frames().get(self._loop_thread_id)
+                if frame is None:
+                    continue
+                self._stall = self._describe(frame)
+
+    def _describe(self, frame) -> Dict[str, Any]:
+        """Route, agent entry point and stack of the code holding the loop."""
+        frames = []
+        while frame is not None:
+            frames.append(frame)
+            frame = frame.f_back
+        frames.reverse()  # outermost first
+
+        route, entry_point = None, None
+        for i, f in enumerate(frames):
+            if f.f_code in self._route_codes:
+                route = self._route_codes[f.f_code]
+                if i + 1 < len(frames):
+                    entry_point = _frame_name(frames[i + 1])
+                break
+
+        stack = [
+            f"{f.f_code.co_filename}:{f.f_lineno} in {getattr(f.f_code, 'co_qualname', f.f_code.co_name)}"
+            for f in frames
+        ]
+        blocking = next(
+            (_frame_name(f) for f in reversed(frames)
+             if f.f_code.co_filename.startswith(_PROJECT_ROOT) and "site-packages" not in f.f_code.co_filename),
+            None,
+        )
+        return {
+            "route": route,
+            "entry_point": entry_point,
+            "blocking_frame": blocking,
+            "stack": stack,
+            "detected_at": datetime.now().isoformat(timespec="milliseconds"),
+        }
+
+    def _finish_stall(self, stall: Dict[str, Any], blocked_s: float) -> None:
+        stall["blocked_s"] = round(blocked_s, 4)
+        route = stall["route"] or "(outside handlers)"
+        self.slow_calls += 1
+        self.slow_by_route[route] += 1
+        self.blocked_by_route[route] += blocked_s
+        self.events.append(stall)
+        logger.warning(
+            "Event loop blocked for %.3fs by %s (entry point: %s)\n%s",
+            blocked_s, route, stall["entry_point"] or "-", "\n".join(stall["stack"][-15:]),
+        )
+
+    # ─────────────────────────────────────────────────────────────
+    # Metrics
+    # ─────────────────────────────────────────────────────────────
+
+    def record_request(self, label: str, elapsed: float, status: int) -> None:
+        stats = self.routes.get(label)
+        if stats is None:
+            stats = self.routes[label] = {"requests": 0, "errors": 0, "latency": deque(maxlen=self._history)}
+        stats["requests"] += 1
+        stats["errors"] += 1 if status >= 500 else 0
+        stats["latency"].append(elapsed)
+
+    def snapshot(self, recent: int = 10) -> Dict[str, Any]:
+        lag = list(self.lag)
+        routes = {}
+        for label, stats in sorted(self.routes.items()):
+            routes[label] = {
+                "requests": stats["requests"],
+                "server_errors": stats["errors"],
+                "latency_s": _percentiles(stats["latency"]),
+                "loop_blocked_s": round(self.blocked_by_route.get(label, 0.0), 4),
+                "slow_calls": self.slow_by_route.get(label, 0),
+            }
+        return {
+            "event_loop": {
+                "probe_interval_s": self.interval,
+                "samples": len(lag),
+                "current_lag_s": round(lag[-1], 4) if lag else None,
+                "lag_s": _percentiles(lag),
+            },
+            "slow_calls": {
+                "threshold_s": self.slow_threshold,
+                "total": self.slow_calls,
+                "by_route": dict(self.slow_by_route),
+                "recent": list(self.events)[-recent:],
+            },
+            "routes": routes,
+        }
+
+
+class SlowCallMiddleware:
+    """
+    ASGI middleware recording per-route request latency on the monitor.
+
+    Routes are labelled by their template ("POST /api/v1/incidents/{incident_id}/assessment"),
+    not the raw path, so incident ids do not explode the metric keys.
+    """
+
+    def __init__(self, app, monitor: LoopMonitor):
+        self.app = app
+        self.monitor = monitor
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = {"code": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            label = _route_label(route) if route is not None else "(unmatched)"
+            self.monitor.record_request(label, time.perf_counter() - start, status["code"])
@@ -0,0 +1,321 @@
+"""
+API load generator
+==================
+
+Drives realistic multi-stage incident flows against the FastAPI service:
+
+    create → assessment → investigate → actionplan → report
+
+Flows arrive as an open-loop Poisson process at --rate flows/s for
+--duration seconds (seeded, so runs are repeatable), independent of how
+fast the server answers; a slow server therefore builds up in-flight
+flows exactly like production traffic would. A probe pings
+/api/v1/health every --probe-interval seconds; since the health handler
+does no work, its latency is the time the request waited for the server's
+event loop (event-loop lag).
+
+By default the API runs in-process with the mock LLM backend
+(benchmarks.llm_fixtures); --url targets a deployed instance instead
+(e.g. one Railway replica) to plan capacity per instance.
+
+Reported per endpoint: p50/p95/p99 latency, error rate, status codes;
+plus flow completion rate, peak in-flight flows, incident-id collisions
+and event-loop lag percentiles. When the target serves /api/v1/metrics,
+its own lag and slow-call report is included under "server".
+
+Usage:
+    python -m benchmarks.api_load --rate 2 --duration 30
+    python -m benchmarks.api_load --rate 0.5 --duration 60 --steps create assessment investigate
+    python -m benchmarks.api_load --url https://my-api.up.railway.app --rate 0.2 --duration 120
+"""
+
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import httpx
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.run import RESULTS_DIR, load_fixtures, quiet, serve_api
+from benchmarks.llm_fixtures import mock_llm
+
+FLOW_STEPS = ("create", "assessment", "investigate", "actionplan", "report")
+
+
+def percentiles(samples: List[float]) -> Dict[str, Optional[float]]:
+    if not samples:
+        return {"p50": None, "p95": None, "p99": None, "max": None, "n": 0}
+    ordered = sorted(samples)
+
+    def pick(q: float) -> float:
+        return round(ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))], 4)
+
+    return {"p50": pick(0.50), "p95": pick(0.95), "p99": pick(0.99),
+            "max": round(ordered[-1], 4), "n": len(ordered)}
+
+
+class LoadStats:
+    """Per-endpoint latencies and status codes, flow outcomes and lag samples."""
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.statuses: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+        self.lag: List[float] = []
+        self.flows_started = 0
+        self.flows_completed = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.id_collisions = 0
+        self.active_ids: Dict[str, int] = defaultdict(int)
+
+    def record(self, step: str, status: str, elapsed: float) -> None:
+        self.latencies[step].append(elapsed)
+        self.statuses[step][status] += 1
+
+    def summary(self, elapsed: float) -> Dict:
+        endpoints = {}
+        for step in FLOW_STEPS:
+            if step not in self.statuses:
+                continue
+            codes = dict(self.statuses[step])
+            total = sum(codes.values())
+            errors = sum(n for code, n in codes.items() if not code.startswith("2"))
+            endpoints[step] = {
+                "latency_s": percentiles(self.latencies[step]),
+                "requests": total,
+                "error_rate": round(errors / total, 4) if total else 0.0,
+                "status_codes": codes,
+            }
+        return {
+            "elapsed_s": round(elapsed, 2),
+            "flows": {
+                "started": self.flows_started,
+                "completed": self.flows_completed,
+                "completion_rate": round(self.flows_completed / self.flows_started, 4)
+                if self.flows_started else 0.0,
+                "throughput_per_min": round(self.flows_completed / elapsed * 60, 3) if elapsed else None,
+                "max_in_flight": self.max_in_flight,
+                "id_collisions": self.id_collisions,
+            },
+            "endpoints": endpoints,
+            "event_loop_lag_s": percentiles(self.lag),
+        }
+
+
+async def _call(client: httpx.AsyncClient, stats: LoadStats, step: str,
+                method: str, path: str, **kwargs) -> Optional[httpx.Response]:
+    start = time.perf_counter()
+    try:
+        response = await client.request(method, path, **kwargs)
+    except httpx.HTTPError as e:
+        stats.record(step, type(e).__name__, time.perf_counter() - start)
+        return None
+    stats.record(step, str(response.status_code), time.perf_counter() - start)
+    return response if response.is_success else None
+
+
+async def run_flow(client: httpx.AsyncClient, stats: LoadStats, incident: Dict,
+                   steps: List[str], flow_no: int) -> bool:
+    """One incident through the selected steps; stops at the first failure."""
+    response = await _call(client, stats, "create", "POST", "/api/v1/incidents/create", json={
+        "reported_by": f"load-{flow_no}",
+        "description": incident["description"],
+    })
+    if response is None:
+        return False
+    incident_id = response.json()["data"]["incident_id"]
+    stats.active_ids[incident_id] += 1
+    if stats.active_ids[incident_id] > 1:
+        # Another in-flight flow got the same ref_no: their records overwrite each other
+        stats.id_collisions += 1
+
+    try:
+        for step in steps[1:]:
+            if step == "assessment":
+                response = await _call(client, stats, step, "POST",
+                                       f"/api/v1/incidents/{incident_id}/assessment", json={
+                    "incident_id": incident_id, "event_type": "Accident",
+                    "actual_harm": "Serious", "riddor_reportable": "Y",
+                })
+            elif step == "investigate":
+                response = await _call(client, stats, step, "POST",
+                                       f"/api/v1/incidents/{incident_id}/investigate", json={
+                    "incident_id": incident_id, "how_happened": incident["description"],
+                })
+            elif step == "actionplan":
+                response = await _call(client, stats, step, "POST",
+                                       f"/api/v1/incidents/{incident_id}/actionplan")
+            elif step == "report":
+                response = await _call(client, stats, step, "POST", "/api/v1/reports/generate",
+                                       json={"incident_id": incident_id})
+            if response is None:
+                return False
+        return True
+    finally:
+        stats.active_ids[incident_id] -= 1
+
+
+async def lag_probe(client: httpx.AsyncClient, stats: LoadStats,
+                    interval: float, stop: asyncio.Event) -> None:
+    while not stop.is_set():
+        start = time.perf_counter()
+        with contextlib.suppress(httpx.HTTPError):
+            await client.get("/api/v1/health")
+            stats.lag.append(time.perf_counter() - start)
+        with contextlib.suppress(asyncio.TimeoutError):
+            await asyncio.wait_for(stop.wait(), timeout=interval)
+
+
+async def run_load(base_url: str, fixtures: Dict[str, Dict], rate: float, duration: float,
+                   steps: List[str], seed: int = 0, probe_interval: float = 0.25,
+                   drain_timeout: float = 600.0) -> Dict:
+    """Open-loop Poisson arrivals of incident flows; returns the summary dict."""
+    rng = random.Random(seed)
+    incidents = list(fixtures.values())
+    stats = LoadStats()
+    stop = asyncio.Event()
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=100)
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=drain_timeout, limits=limits) as client, \
+            httpx.AsyncClient(base_url=base_url, timeout=30) as probe_client:
+        probe = asyncio.create_task(lag_probe(probe_client, stats, probe_interval, stop))
+
+        async def flow(n: int) -> None:
+            stats.flows_started += 1
+            stats.in_flight += 1
+            stats.max_in_flight = max(stats.max_in_flight, stats.in_flight)
+            try:
+                if await run_flow(client, stats, incidents[n % len(incidents)], steps, n):
+                    stats.flows_completed += 1
+            finally:
+                stats.in_flight -= 1
+
+        start = time.perf_counter()
+        tasks, n = [], 0
+        next_arrival = rng.expovariate(rate)
+        while next_arrival < duration:
+            await asyncio.sleep(max(0.0, next_arrival - (time.perf_counter() - start)))
+            tasks.append(asyncio.create_task(flow(n)))
+            n += 1
+            next_arrival += rng.expovariate(rate)
+
+        if tasks:
+            done, pending = await asyncio.wait(tasks, timeout=drain_timeout)
+            for task in pending:
+                task.cancel()
+        elapsed = time.perf_counter() - start
+        stop.set()
+        await probe
+
+        # Server-side view (api/monitoring.py): loop lag and the calls that blocked it
+        server = None
+        with contextlib.suppress(httpx.HTTPError, ValueError):
+            response = await probe_client.get("/api/v1/metrics")
+            if response.is_success:
+                server = response.json().get("data")
+
+    summary = stats.summary(elapsed)
+    summary["server"] = server
+    return summary
+
+
+def print_summary(summary: Dict) -> None:
+    flows = summary["flows"]
+    print("\n" + "=" * 80)
+    print("📊 LOAD TEST SUMMARY")
+    print("=" * 80)
+    print(f"Flows:        {flows['completed']}/{flows['started']} completed "
+          f"({flows['throughput_per_min']} /min), peak in flight {flows['max_in_flight']}, "
+          f"id collisions {flows['id_collisions']}")
+    print(f"\n{'endpoint':<13}{'n':>6}{'p50':>9}{'p95':>9}{'p99':>9}{'errors':>9}  status")
+    for step, data in summary["endpoints"].items():
+        lat = data["latency_s"]
+        fmt = lambda v: f"{v:.3f}" if v is not None else "-"
+        print(f"{step:<13}{data['requests']:>6}{fmt(lat['p50']):>9}{fmt(lat['p95']):>9}"
+              f"{fmt(lat['p99']):>9}{data['error_rate']:>9.1%}  {data['status_codes']}")
+    lag = summary["event_loop_lag_s"]
+    if lag["n"]:
+        print(f"\nEvent-loop lag: p50 {lag['p50']:.3f}s · p95 {lag['p95']:.3f}s · "
+              f"p99 {lag['p99']:.3f}s · max {lag['max']:.3f}s ({lag['n']} probes)")
+    server = summary.get("server")
+    if server:
+        server_lag = server["event_loop"]["lag_s"]
+        slow = server["slow_calls"]
+        print(f"Server loop lag: p95 {server_lag['p95']}s · max {server_lag['max']}s; "
+              f"{slow['total']} slow calls (>{slow['threshold_s']}s) {slow['by_route']}")
+    print("=" * 80)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Load-test the HSE Investigation API with incident flows.")
+    parser.add_argument("--url", help="Target API base URL (default: in-process API with the mock LLM)")
+    parser.add_argument("--rate", type=float, default=1.0, help="Flow arrivals per second (default: 1)")
+    parser.add_argument("--duration", type=float, default=30.0, help="Arrival window in seconds (default: 30)")
+    parser.add_argument("--steps", nargs="+", choices=FLOW_STEPS, default=list(FLOW_STEPS),
+                        help="Flow steps, in order, starting with create")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--probe-interval", type=float, default=0.25, help="Health probe interval (s)")
+    parser.add_argument("--latency", default="recorded", help="Mock LLM latency distribution")
+    parser.add_argument("--latency-scale", type=float, default=0.02, help="Multiply mock LLM latencies")
+    parser.add_argument("--cassette", action="append", help="Replay recorded cassette(s) instead of the fixtures")
+    parser.add_argument("--verbose", action="store_true", help="Show agent/server output")
+    parser.add_argument("--output", help="Result file (default: benchmarks/results/load_<timestamp>.json)")
+    args = parser.parse_args(argv)
+
+    steps = [s for s in FLOW_STEPS if s in args.steps]
+    if steps[0] != "create":
+        parser.error("flows must start with 'create'")
+    fixtures = load_fixtures()
+
+    print(f"🚦 {args.rate} flows/s for {args.duration:.0f}s: {' → '.join(steps)}")
+    if args.url:
+        summary = asyncio.run(run_load(args.url.rstrip("/"), fixtures, args.rate, args.duration,
+                                       steps, args.seed, args.probe_interval))
+        mock_stats = None
+    else:
+        cwd = os.getcwd()
+        with tempfile.TemporaryDirectory(prefix="hse-load-") as workdir:
+            # Incidents and reports written by the API go to the temp dir
+            os.chdir(workdir)
+            try:
+                with mock_llm(args.latency, args.latency_scale, args.seed, args.cassette) as server, \
+                        serve_api(args.verbose) as base_url, quiet(not args.verbose):
+                    summary = asyncio.run(run_load(base_url, fixtures, args.rate, args.duration,
+                                                   steps, args.seed, args.probe_interval))
+                    mock_stats = dict(server.stats)
+            finally:
+                os.chdir(cwd)
+
+    summary["meta"] = {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "target": args.url or "in-process (mock LLM)",
+        "rate": args.rate, "duration": args.duration, "steps": steps, "seed": args.seed,
+        "latency": None if args.url else args.latency,
+        "latency_scale": None if args.url else args.latency_scale,
+        "mock_llm": mock_stats,
+    }
+    print_summary(summary)
+
+    output = Path(args.output) if args.output else (
+        RESULTS_DIR / f"load_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    )
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(summary, f, ensure_ascii=False, indent=2)
+    print(f"💾 Results: {output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
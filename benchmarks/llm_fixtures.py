@@ -0,0 +1,287 @@
+"""
+Benchmark LLM fixtures
+======================
+
+A synthetic cassette with one recorded exchange per agent prompt template
+(Part 1 extraction/classification, Part 2 assessments, immediate causes,
+5-Why chain, action plan, DOCX content). Each recorded request holds the
+template text of its prompt, so tools/mock_llm_server matches the agents'
+real requests to it for any incident (nearest match) and every stage gets
+a structurally valid response, as it would from the live model.
+
+Recorded cassettes from real runs (shared/llm_recorder) can be passed to
+the benchmark instead with --cassette.
+"""
+
+import json
+import os
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+
+from agents.knowledge_base import get_category_text
+from agents.skillbased_docx_agent import CONTENT_SYSTEM_PROMPT
+from shared.micro_batch import BATCH_PREAMBLE
+from tools.mock_llm_server import CassetteLibrary, LatencyModel, MockLLMServer
+
+SONNET = "anthropic/claude-sonnet-4.5"
+OPUS = "anthropic/claude-opus-4.6"
+
+
+# Classification prompts: recorded both as single calls and in their
+# micro-batched form (shared/micro_batch)
+CLASSIFY_INCIDENT = (
+    'Classify this incident into ONE category: 1. "Ill health" - disease or health condition '
+    '2. "Minor injury" - first aid only 3. "Serious injury" - medical attention needed '
+    '4. "Major injury" - severe injury INCIDENT: Return ONLY the category name '
+    '(e.g., "Minor injury"), nothing else.'
+)
+
+CLASSIFY_EVENT = (
+    'Classify this safety event: INCIDENT: Types: 1. "Accident" - injury or damage occurred '
+    '2. "Ill health" - work-related illness 3. "Near-miss" - could have caused injury '
+    '4. "Undesired circumstance" - unsafe condition Return ONLY the event type name.'
+)
+
+ASSESS_SEVERITY = (
+    'Assess severity: INCIDENT: Type: Levels: 1. "Fatal or major" - death, major fracture, '
+    'amputation 2. "Serious" - medical treatment, hospitalization 3. "Minor" - first aid only '
+    '4. "Damage only" - no injury Return ONLY the severity level.'
+)
+
+ASSESS_RIDDOR = (
+    "RIDDOR assessment: INCIDENT: Event: Severity: RIDDOR reportable if: - Death - Major "
+    "fracture, amputation, crush injury, serious burns - Over 7 days absence - Dangerous "
+    'occurrence JSON format: {"reportable": "Y" or "N", "reason": "brief explanation"} '
+    "Return ONLY JSON."
+)
+
+RIDDOR_ANSWER = {"reportable": "Y", "reason": "Ölümlü/ağır yaralanmalı tehlikeli olay"}
+
+# ClaudeSkillPDFAgent: a short SKILL.md and the reportlab script the model
+# answers with (reads the data JSON and writes the PDF given as arguments)
+PDF_SKILL = """# HSE RCA PDF
+HSEColors palette, 5-Why chain, 5x5 risk matrix, KPI boxes, corrective actions table (ReportLab)."""
+
+PDF_SCRIPT = '''```python
+import json
+import sys
+
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import getSampleStyleSheet
+from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+
+data_path, output_path = sys.argv[1], sys.argv[2]
+with open(data_path, encoding="utf-8") as f:
+    data = json.load(f)
+
+styles = getSampleStyleSheet()
+story = [Paragraph(data["incident_title"], styles["Title"]), Spacer(1, 12),
+         Paragraph(data["description"], styles["BodyText"]), Spacer(1, 12)]
+whys = [["#", "Soru", "Cevap"]] + [[w["why"], Paragraph(w["question"], styles["BodyText"]),
+                                    Paragraph(w["answer"], styles["BodyText"])] for w in data["five_whys"]]
+actions = [["ID", "Faaliyet", "Öncelik"]] + [[a["id"], Paragraph(a["description"], styles["BodyText"]),
+                                            a["priority"]] for a in data["corrective_actions"]]
+for rows in (whys, actions):
+    table = Table(rows, colWidths=[40, 220, 220])
+    table.setStyle(TableStyle([("BACKGROUND", (0, 0), (-1, 0), colors.HexColor("#1F4E79")),
+                               ("TEXTCOLOR", (0, 0), (-1, 0), colors.white),
+                               ("GRID", (0, 0), (-1, -1), 0.5, colors.grey)]))
+    story += [table, Spacer(1, 12)]
+SimpleDocTemplate(output_path, pagesize=A4).build(story)
+```'''
+
+
+def _completion(model: str, content: str, prompt_tokens: int = 1000) -> Dict:
+    completion_tokens = max(1, len(content) // 4)
+    return {
+        "id": "gen-bench",
+        "object": "chat.completion",
+        "created": 0,
+        "model": model,
+        "choices": [{"index": 0, "finish_reason": "stop",
+                     "message": {"role": "assistant", "content": content}}],
+        "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                  "total_tokens": prompt_tokens + completion_tokens},
+    }
+
+
+def _interaction(model: str, template: str, content, duration_s: float) -> Dict:
+    if not isinstance(content, str):
+        content = json.dumps(content, ensure_ascii=False)
+    return {
+        "request": {"model": model, "messages": [{"role": "user", "content": template}]},
+        "status": 200,
+        "duration_s": duration_s,
+        "response": _completion(model, content),
+    }
+
+
+def _batched(model: str, template: str, answer, duration_s: float, max_items: int = 16) -> Dict:
+    """Micro-batched form of a classification prompt (shared/micro_batch), answering every item id."""
+    results = {"results": [{"id": i, "answer": answer} for i in range(1, max_items + 1)]}
+    return _interaction(model, f"{BATCH_PREAMBLE} {template} ITEM 1: ITEM 2:", results, duration_s)
+
+
+def docx_report_content() -> Dict:
+    """The example report JSON embedded in the DOCX agent's system prompt."""
+    text = CONTENT_SYSTEM_PROMPT[CONTENT_SYSTEM_PROMPT.index("{"):CONTENT_SYSTEM_PROMPT.index("KURALLAR")]
+    return json.loads(text[:text.rindex("}") + 1])
+
+
+def build_cassette() -> List[Dict]:
+    """Synthetic interactions covering every agent prompt template."""
+    return [
+        # ── Part 1 ──────────────────────────────────────────────────────────
+        _interaction(SONNET, (
+            "Extract incident information as JSON. INCIDENT: JSON format: what brief summary "
+            "where location when date/time who people involved emergency_measures actions taken "
+            "Return ONLY the JSON object. No explanations, no markdown, just pure JSON."
+        ), {
+            "what": "Proses hattında basınçlı ekipman arızası sonucu kimyasal salınım ve yangın",
+            "where": "Üretim tesisi proses alanı",
+            "when": "Olay günü, vardiya sırasında",
+            "who": "Saha operatörleri ve bakım personeli",
+            "emergency_measures": "Alan tahliye edildi, acil müdahale ekibi çağrıldı",
+        }, 1.8),
+        _interaction(SONNET, CLASSIFY_INCIDENT, "Major injury", 0.6),
+        _batched(SONNET, CLASSIFY_INCIDENT, "Major injury", 0.6),
+        # ── Part 2 ──────────────────────────────────────────────────────────
+        _interaction(SONNET, CLASSIFY_EVENT, "Accident", 0.6),
+        _batched(SONNET, CLASSIFY_EVENT, "Accident", 0.6),
+        _interaction(SONNET, ASSESS_SEVERITY, "Fatal or major", 0.6),
+        _batched(SONNET, ASSESS_SEVERITY, "Fatal or major", 0.6),
+        _interaction(SONNET, ASSESS_RIDDOR, RIDDOR_ANSWER, 0.9),
+        _batched(SONNET, ASSESS_RIDDOR, RIDDOR_ANSWER, 0.9),
+        _interaction(SONNET, (
+            "You are an investigation coordinator. Return only valid JSON. You are a health and "
+            "safety investigation coordinator. INCIDENT INFORMATION: Event Type: Severity: RIDDOR: "
+            "Determine the investigation level based on: - High level: Fatality, major injury, high "
+            "potential severity, multiple victims - Medium level: Serious injury, RIDDOR reportable, "
+            "significant risk - Low level: Minor injury, limited impact - Basic: Near-miss, minor "
+            "incident Also determine: - Priority: High, Medium, or Low - Investigation team: List of "
+            'roles needed (e.g., ["H&S Officer", "Line Manager", "Technical Expert"]) Return a JSON '
+            "with: - level: Investigation level - priority - team: Array of team member roles - "
+            "rationale: Brief explanation Return ONLY valid JSON."
+        ), {
+            "level": "High level",
+            "priority": "High",
+            "team": ["H&S Officer", "Process Safety Engineer", "Line Manager", "Maintenance Lead"],
+            "rationale": "Fatality and multiple injuries",
+        }, 1.5),
+        # ── Part 3 ──────────────────────────────────────────────────────────
+        _interaction(SONNET, (
+            "Sen HSG245 uzmanısın. Sadece JSON döndür, Türkçe içerik kullan. Raporda olmayan "
+            "senaryoları ASLA ekleme. Genel/jenerik kodlardan kaçın; olaya özgü, spesifik kodları seç. "
+            "Sen uzman bir İSG Müfettişisin. Görevin, aşağıdaki iş kazası / çevre olayı raporunu "
+            'analiz etmek ve HSG245 standardına göre "Doğrudan Nedenleri" (Immediate Causes) '
+            "belirlemektir. GİRDİLER: OLAY RAPORU (TAMAMI): REFERANS LİSTESİ A (DAVRANIŞSAL KODLAR): "
+            + get_category_text("A") + " REFERANS LİSTESİ B (KOŞULLAR KODLARI): " + get_category_text("B")
+            + " KRİTİK KURALLAR: SADECE RAPORDA YAZANLARI KULLAN FİLTRELEME LİMİT ÇEŞİTLİLİK "
+            "SPESİFİKLİK FORMAT ALAN TANIMLARI: code standard_title_tr category_type cause_tr "
+            "evidence_tr BEKLENEN ÇIKTI (JSON ŞEMASI): causes"
+        ), {"causes": [
+            {"code": "A2.3", "standard_title_tr": "Arızası bilinen ekipman/araç kullanımı",
+             "category_type": "DAVRANIŞSAL",
+             "cause_tr": "Bilinen arızaya rağmen hat devreye alındı",
+             "evidence_tr": "Raporda arızanın önceden bildirildiği belirtiliyor"},
+            {"code": "B1.4", "standard_title_tr": "Uyarı/alarm sistemlerinin etkisiz olması",
+             "category_type": "KOŞUL",
+             "cause_tr": "Basınç alarmı operatörü zamanında uyarmadı",
+             "evidence_tr": "Alarmın çalmadığı raporda yer alıyor"},
+            {"code": "B2.1", "standard_title_tr": "Ekipman arızası",
+             "category_type": "KOŞUL",
+             "cause_tr": "Basınçlı hat elemanı çalışma sırasında hasar gördü",
+             "evidence_tr": "Ekipmanın olay anında ayrıldığı raporlanmış"},
+        ]}, 6.0),
+        _interaction(OPUS, (
+            "Sen 5-Why uzmanısın. Sadece JSON, Türkçe içerik. Her kaza için özgün, spesifik kök "
+            "nedenler üret. Sen İSG kök neden uzmanısın. 5-Why analizi yapıyorsun. OLAY RAPORU "
+            "(TAMAMI): DOĞRUDAN NEDEN: C KATEGORİSİ (KİŞİSEL FAKTÖRLER - ROOT CAUSES): "
+            + get_category_text("C") + " D KATEGORİSİ (ORGANİZASYONEL FAKTÖRLER - ROOT CAUSES): "
+            + get_category_text("D") + " GÖREV: Bu doğrudan neden için mantıksal bir 5-Why zinciri kur"
+        ), {
+            "whys": [
+                {"level": 1, "question_tr": "Neden ekipman arızalandı?",
+                 "answer_tr": "Periyodik muayene aralığı aşılmıştı"},
+                {"level": 2, "question_tr": "Neden muayene aralığı aşıldı?",
+                 "answer_tr": "Bakım planı üretim programına göre ertelendi"},
+                {"level": 3, "question_tr": "Neden bakım ertelendi?",
+                 "answer_tr": "Erteleme için risk değerlendirmesi yapılmadı"},
+                {"level": 4, "question_tr": "Neden risk değerlendirmesi yapılmadı?",
+                 "answer_tr": "Değişiklik yönetimi prosedürü bakım ertelemeyi kapsamıyordu"},
+            ],
+            "root_cause": {
+                "code": "D4.2",
+                "standard_title_tr": "Değişiklik yönetimi eksikliği",
+                "category_type": "ORGANİZASYONEL",
+                "cause_tr": "Bakım ertelemeleri değişiklik yönetimi kapsamında değerlendirilmiyor",
+                "explanation_tr": "Zincirin 3. ve 4. adımları sistemik MOC boşluğunu gösteriyor",
+            },
+        }, 12.0),
+        # ── Part 4 ──────────────────────────────────────────────────────────
+        _interaction(SONNET, (
+            "You are a Health & Safety expert creating a comprehensive action plan following the "
+            "HSG245 framework. INCIDENT SEVERITY: ROOT CAUSES IDENTIFIED: UNDERLYING CAUSES: "
+            "IMMEDIATE CAUSES: Generate a comprehensive Risk Control Action Plan with THREE "
+            "time-based categories: IMMEDIATE ACTIONS (24-48 hours) SHORT-TERM ACTIONS (1-3 months) "
+            "LONG-TERM ACTIONS (3-12 months) hierarchy of controls Elimination Substitution "
+            "Engineering controls Administrative controls PPE control_measures measure responsible "
+            "target_date category control_type immediate short_term long_term deadlines"
+        ), {
+            "control_measures": [
+                {"measure": "Arızalı hat elemanlarının değiştirilmesi", "responsible": "Maintenance Manager",
+                 "target_date": "01/03/2026", "category": "immediate", "control_type": "engineering"},
+                {"measure": "Bakım erteleme için MOC zorunluluğu", "responsible": "Process Safety Manager",
+                 "target_date": "01/05/2026", "category": "short_term", "control_type": "administrative"},
+                {"measure": "Alarm sisteminin yeniden tasarımı", "responsible": "Engineering Director",
+                 "target_date": "01/12/2026", "category": "long_term", "control_type": "engineering"},
+            ],
+            "immediate": ["Arızalı hat elemanlarının değiştirilmesi"],
+            "short_term": ["Bakım erteleme için MOC zorunluluğu"],
+            "long_term": ["Alarm sisteminin yeniden tasarımı"],
+            "responsible": {"Arızalı hat elemanlarının değiştirilmesi": "Maintenance Manager"},
+            "deadlines": {"Arızalı hat elemanlarının değiştirilmesi": "01/03/2026"},
+        }, 8.0),
+        # ── PDF (ClaudeSkillPDFAgent) ───────────────────────────────────────
+        # Instant answer: the render benchmark times the script, not the model
+        _interaction("anthropic/claude-sonnet-4.6", (
+            "Sen bir HSE (Health, Safety, Environment) Root Cause Analysis rapor uzmanısın. "
+            "Aşağıda verilen SKILL.md dosyasını kullanarak profesyonel bir PDF raporu oluşturman "
+            "gerekiyor. # SKILL.MD İÇERİĞİ: " + PDF_SKILL + " # GÖREV: ReportLab 5-Why zincirini "
+            "Risk matrisini KPI özet kutularını Düzeltici faaliyetler tablosunu # RCA VERİSİ (JSON): "
+            "incident_id incident_title five_whys corrective_actions risk_assessment # PDF KONUMU:"
+        ), PDF_SCRIPT, 0.0),
+        # ── DOCX içerik ─────────────────────────────────────────────────────
+        _interaction(SONNET, CONTENT_SYSTEM_PROMPT + (
+            " Aşağıdaki HSG245 kök neden analizi ham verisini kullanarak profesyonel HSE raporu "
+            "içeriğini üret. Ham Veri: SADECE JSON döndür. Başka hiçbir şey yazma."
+        ), docx_report_content(), 45.0),
+    ]
+
+
+@contextmanager
+def mock_llm(
+    latency: str = "recorded",
+    latency_scale: float = 1.0,
+    seed: Optional[int] = 0,
+    cassettes: Optional[List[str]] = None,
+) -> Iterator[MockLLMServer]:
+    """
+    Run the stand-in server and point every agent client at it for the
+    duration of the block (OPENROUTER_BASE_URL / OPENROUTER_API_KEY).
+    """
+    library = CassetteLibrary.from_paths(cassettes) if cassettes else CassetteLibrary(build_cassette())
+    server = MockLLMServer(library, latency=LatencyModel(latency, seed=seed, scale=latency_scale))
+    saved = {k: os.environ.get(k) for k in ("OPENROUTER_BASE_URL", "OPENROUTER_API_KEY")}
+    os.environ["OPENROUTER_BASE_URL"] = server.base_url
+    os.environ["OPENROUTER_API_KEY"] = "bench-key"
+    try:
+        with server:
+            yield server
+    finally:
+        for key, value in saved.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
@@ -0,0 +1,493 @@
+"""
+HSG245 pipeline benchmarks
+==========================
+
+End-to-end benchmarks against the local stand-in LLM (tools/mock_llm_server),
+so numbers are reproducible and cost nothing:
+
+    pipeline   Part 1-4 stage latency, critical path and total time per
+               incident for the KMCO explosion, Shell Perdido and chemical
+               spill scenarios (benchmarks/fixtures/)
+    parse      JSON extraction time on large model outputs (fenced, with
+               surrounding prose, raw) for both parsers in the repo
+    render     DOCX, HTML and PDF render time of a full report
+    api        FastAPI throughput/latency under N concurrent clients
+    memory     peak RSS after each section
+
+Model latency comes from the cassette's recorded durations (or any
+--latency distribution), multiplied by --latency-scale so a full run takes
+seconds instead of minutes. Results are written as JSON; --compare prints
+per-metric deltas against an earlier result file so regressions show up
+between commits.
+
+Usage:
+    python -m benchmarks.run
+    python -m benchmarks.run --only pipeline parse --repeats 5
+    python -m benchmarks.run --clients 1 8 32 --latency fixed:0.5 --latency-scale 0.1
+    python -m benchmarks.run --compare benchmarks/results/<previous>.json
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import logging
+import os
+import platform
+import resource
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from agents.actionplan_agent import ActionPlanAgent
+from agents.assessment_agent import AssessmentAgent
+from agents.claude_skill_pdf_agent import ClaudeSkillPDFAgent
+from agents.json_parser import safe_json_parse
+from agents.orchestrator import RootCauseOrchestrator
+from agents.overview_agent import OverviewAgent
+from agents.rootcause_agent_v2 import RootCauseAgentV2
+from agents.skillbased_docx_agent import CONTENT_SIDECAR_SUFFIX, SkillBasedDocxAgent
+from benchmarks.llm_fixtures import PDF_SKILL, build_cassette, docx_report_content, mock_llm
+from shared.llm_usage import get_usage_tracker
+from shared.micro_batch import get_micro_batcher
+from shared.log import ROOT_LOGGER
+
+FIXTURES_DIR = Path(__file__).resolve().parent / "fixtures"
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+SECTIONS = ("pipeline", "parse", "render", "api")
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Helpers
+# ─────────────────────────────────────────────────────────────────────────────
+
+def load_fixtures(names: Optional[List[str]] = None) -> Dict[str, Dict]:
+    fixtures = {}
+    for path in sorted(FIXTURES_DIR.glob("*.json")):
+        if names and path.stem not in names:
+            continue
+        with open(path, encoding="utf-8") as f:
+            fixtures[path.stem] = json.load(f)
+    return fixtures
+
+
+def peak_rss_mb() -> float:
+    """Process high-water-mark RSS (ru_maxrss is KiB on Linux, bytes on macOS)."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    ordered = sorted(samples)
+    p95 = ordered[min(len(ordered) - 1, int(round(0.95 * (len(ordered) - 1))))]
+    return {
+        "median": round(statistics.median(ordered), 6),
+        "p95": round(p95, 6),
+        "min": round(ordered[0], 6),
+        "max": round(ordered[-1], 6),
+        "n": len(ordered),
+    }
+
+
+def timed(func: Callable[[], Any], repeats: int) -> List[float]:
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+@contextlib.contextmanager
+def quiet(enabled: bool = True):
+    """Silence the agents' progress output (prints and INFO logs) while measuring."""
+    if not enabled:
+        yield
+        return
+    hse_logger = logging.getLogger(ROOT_LOGGER)
+    level = hse_logger.level
+    hse_logger.setLevel(max(level, logging.WARNING))
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            yield
+    finally:
+        hse_logger.setLevel(level)
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+            capture_output=True, text=True, timeout=10,
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def sample_rca() -> Dict:
+    """Part 3 output built from the benchmark cassette (3 branches)."""
+    cassette = build_cassette()
+    by_model = {i["request"]["model"]: i for i in cassette}
+    causes = next(
+        json.loads(i["response"]["choices"][0]["message"]["content"])["causes"]
+        for i in cassette if "REFERANS LİSTESİ A" in i["request"]["messages"][0]["content"]
+    )
+    chain = json.loads(by_model["anthropic/claude-opus-4.6"]["response"]["choices"][0]["message"]["content"])
+    branches = [
+        {"branch_number": n, "immediate_cause": cause,
+         "why_chain": chain["whys"], "root_cause": chain["root_cause"]}
+        for n, cause in enumerate(causes, 1)
+    ]
+    return {
+        "incident_summary": "Benchmark",
+        "analysis_branches": branches,
+        "final_root_causes": [b["root_cause"] for b in branches],
+        "analysis_method": "HSG245 Hierarchical 5-Why (A/B → C/D)",
+    }
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Sections
+# ─────────────────────────────────────────────────────────────────────────────
+
+def bench_pipeline(fixtures: Dict[str, Dict], repeats: int, verbose: bool = False) -> Dict:
+    """Part 1-3 + DOCX through the orchestrator, then Part 4, per fixture."""
+    with quiet(not verbose):
+        orchestrator = RootCauseOrchestrator(agents={
+            "overview": OverviewAgent(),
+            "assessment": AssessmentAgent(),
+            "rootcause": RootCauseAgentV2(),
+            "docx": SkillBasedDocxAgent(),
+        }, checkpoint_dir=None)
+        actionplan = ActionPlanAgent()
+
+    results = {}
+    for name, incident in fixtures.items():
+        stage_samples: Dict[str, List[float]] = {}
+        totals, walls, critical = [], [], []
+        for _ in range(repeats):
+            # Fresh report content every run (no sidecar reuse)
+            for sidecar in Path("outputs").glob(f"*{CONTENT_SIDECAR_SUFFIX}"):
+                sidecar.unlink()
+            start = time.perf_counter()
+            with quiet(not verbose):
+                ctx = orchestrator.run_investigation(incident)
+                rca = ctx["part3_rca"]
+                part4_start = time.perf_counter()
+                actionplan.generate_action_plan({
+                    "root_causes": rca.get("final_root_causes", []),
+                    "underlying_causes": [],
+                    "immediate_causes": [b["immediate_cause"] for b in rca.get("analysis_branches", [])],
+                    "severity": (ctx.get("part2") or {}).get("investigation_level", "Medium level"),
+                })
+                part4_time = time.perf_counter() - part4_start
+            totals.append(time.perf_counter() - start)
+
+            pipeline = ctx["pipeline"]
+            walls.append(pipeline["wall_time"])
+            critical = pipeline["critical_path"]
+            for stage, timing in pipeline["stages"].items():
+                stage_samples.setdefault(stage, []).append(timing["duration"])
+            stage_samples.setdefault("part4", []).append(part4_time)
+
+        results[name] = {
+            "total_s": summarize(totals),
+            "pipeline_wall_s": summarize(walls),
+            "stages_s": {stage: summarize(s) for stage, s in stage_samples.items()},
+            "critical_path": critical,
+            "branches": len(ctx["part3_rca"].get("analysis_branches", [])),
+        }
+        print(f"   {name}: total {results[name]['total_s']['median']:.2f}s "
+              f"(pipeline {results[name]['pipeline_wall_s']['median']:.2f}s)")
+    return results
+
+
+def _large_output(branch_copies: int) -> Dict:
+    content = docx_report_content()
+    content["branches"] = content["branches"] * branch_copies
+    content["corrective_actions"] = content["corrective_actions"] * branch_copies
+    return content
+
+
+def bench_parse(repeats: int) -> Dict:
+    """JSON extraction from large model responses."""
+    with quiet():
+        docx_parser = SkillBasedDocxAgent(offline=True)._parse_json_response
+    results = {}
+    for label, copies in (("small", 1), ("large", 200)):
+        raw = json.dumps(_large_output(copies), ensure_ascii=False, indent=2)
+        variants = {
+            "raw": raw,
+            "fenced": f"```json\n{raw}\n```",
+            "prose": f"İşte rapor içeriği:\n\n{raw}\n\nUmarım yardımcı olur.",
+        }
+        size_mb = len(raw.encode("utf-8")) / 1e6
+        for variant, text in variants.items():
+            for parser_name, parse in (
+                ("safe_json_parse", lambda t: safe_json_parse(t, context="benchmark", default={})),
+                ("docx_parse_json_response", docx_parser),
+            ):
+                with quiet():
+                    samples = timed(lambda: parse(text), repeats)
+                stats = summarize(samples)
+                stats["mb_per_s"] = round(size_mb / stats["median"], 2) if stats["median"] else None
+                results[f"{label}/{variant}/{parser_name}"] = stats
+        results[f"{label}/size_mb"] = round(size_mb, 3)
+    return results
+
+
+def bench_render(repeats: int, workdir: Path) -> Dict:
+    """DOCX and HTML from report content, PDF from Part 3 data."""
+    with quiet():
+        agent = SkillBasedDocxAgent(offline=True)
+    content = docx_report_content()
+    docx_path = str(workdir / "bench_report.docx")
+    html_path = str(workdir / "bench_report.html")
+
+    with quiet():
+        results = {
+            "docx_s": summarize(timed(lambda: agent._build_docx(content, docx_path), repeats)),
+            "html_s": summarize(timed(lambda: agent._build_html(content, html_path), repeats)),
+        }
+    results["docx_bytes"] = os.path.getsize(docx_path)
+    results["html_bytes"] = os.path.getsize(html_path)
+
+    # PDF through the agent's own entry point; the mock LLM answers with a
+    # reportlab script at once, so this is script generation + execution
+    skill_path = workdir / "SKILL.md"
+    skill_path.write_text(PDF_SKILL, encoding="utf-8")
+    with quiet():
+        pdf_agent = ClaudeSkillPDFAgent(skill_path=str(skill_path), output_dir=str(workdir))
+        rca = sample_rca()
+        pdf_runs = timed(lambda: pdf_agent.generate_report(rca, "bench_report.pdf"), repeats)
+    pdf_path = workdir / "bench_report.pdf"
+    if not pdf_path.exists():
+        results["pdf_s"] = {"skipped": "PDF script failed (is reportlab installed for PDF_PYTHON?)"}
+        return results
+    results["pdf_s"] = summarize(pdf_runs)
+    results["pdf_bytes"] = os.path.getsize(pdf_path)
+    return results
+
+
+@contextlib.contextmanager
+def serve_api(verbose: bool = False):
+    """Run api.main:app with uvicorn in a background thread."""
+    import uvicorn
+    with quiet(not verbose):
+        from api.main import app
+
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    with quiet(not verbose):
+        thread.start()
+        deadline = time.monotonic() + 30
+        while not server.started:
+            if time.monotonic() > deadline or not thread.is_alive():
+                raise RuntimeError("API server did not start")
+            time.sleep(0.05)
+    try:
+        yield f"http://127.0.0.1:{port}"
+    finally:
+        server.should_exit = True
+        thread.join(timeout=10)
+
+
+def bench_api(fixtures: Dict[str, Dict], clients: List[int], requests_per_client: int,
+              verbose: bool = False) -> Dict:
+    """POST /incidents/create (Part 1 via the mock LLM) under N concurrent clients."""
+    import httpx
+
+    descriptions = [f["description"] for f in fixtures.values()]
+    results = {}
+    with serve_api(verbose) as base_url:
+        for n in clients:
+            latencies, errors = [], 0
+            lock = threading.Lock()
+
+            def client(worker: int) -> None:
+                nonlocal errors
+                with httpx.Client(base_url=base_url, timeout=300) as http:
+                    for i in range(requests_per_client):
+                        body = {
+                            "reported_by": f"bench-{worker}",
+                            "description": descriptions[(worker + i) % len(descriptions)],
+                        }
+                        start = time.perf_counter()
+                        try:
+                            response = http.post("/api/v1/incidents/create", json=body)
+                            ok = response.status_code == 200
+                        except httpx.HTTPError:
+                            ok = False
+                        elapsed = time.perf_counter() - start
+                        with lock:
+                            latencies.append(elapsed)
+                            errors += 0 if ok else 1
+
+            start = time.perf_counter()
+            with quiet(not verbose):
+                with ThreadPoolExecutor(max_workers=n) as pool:
+                    list(pool.map(client, range(n)))
+            wall = time.perf_counter() - start
+
+            results[f"clients_{n}"] = {
+                "requests": len(latencies),
+                "errors": errors,
+                "throughput_rps": round(len(latencies) / wall, 3) if wall else None,
+                "latency_s": summarize(latencies),
+            }
+            print(f"   {n:>3} clients: {results[f'clients_{n}']['throughput_rps']} req/s, "
+                  f"p95 {results[f'clients_{n}']['latency_s']['p95']:.2f}s, {errors} errors")
+    return results
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Comparison
+# ─────────────────────────────────────────────────────────────────────────────
+
+def _flatten(data: Any, prefix: str = "") -> Dict[str, float]:
+    flat = {}
+    if isinstance(data, dict):
+        for key, value in data.items():
+            flat.update(_flatten(value, f"{prefix}.{key}" if prefix else key))
+    elif isinstance(data, (int, float)) and not isinstance(data, bool):
+        flat[prefix] = float(data)
+    return flat
+
+
+def compare(current: Dict, baseline: Dict, threshold: float = 0.10) -> List[str]:
+    """
+    Print per-metric deltas of time (median/p95) metrics and return the ones
+    that got slower by more than `threshold`.
+    """
+    now = _flatten(current.get("results", {}))
+    before = _flatten(baseline.get("results", {}))
+    regressions = []
+    print(f"\n📊 Compared with {baseline.get('meta', {}).get('commit') or 'baseline'}:")
+    for key in sorted(now.keys() & before.keys()):
+        if not key.endswith((".median", ".p95")) or before[key] <= 0:
+            continue
+        change = (now[key] - before[key]) / before[key]
+        marker = ""
+        if change > threshold:
+            marker = "  ⚠️  REGRESSION"
+            regressions.append(key)
+        elif change < -threshold:
+            marker = "  ✅ faster"
+        print(f"   {key:<60} {before[key]:>10.4f} → {now[key]:>10.4f} ({change:+.1%}){marker}")
+    return regressions
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# CLI
+# ─────────────────────────────────────────────────────────────────────────────
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the HSG245 pipeline against a local mock LLM.")
+    parser.add_argument("--only", nargs="+", choices=SECTIONS, help="Run only these sections")
+    parser.add_argument("--fixtures", nargs="+", help="Fixture names (default: all in benchmarks/fixtures)")
+    parser.add_argument("--repeats", type=int, default=3, help="Repetitions per measurement (default: 3)")
+    parser.add_argument("--latency", default="recorded", help="Mock LLM latency distribution (see tools.mock_llm_server)")
+    parser.add_argument("--latency-scale", type=float, default=0.02,
+                        help="Multiply mock LLM latencies (default: 0.02)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--cassette", nargs="+", help="Replay recorded cassettes instead of the synthetic one")
+    parser.add_argument("--clients", nargs="+", type=int, default=[1, 4, 16],
+                        help="Concurrent API clients to test (default: 1 4 16)")
+    parser.add_argument("--requests-per-client", type=int, default=4)
+    parser.add_argument("--output", help="Result file (default: benchmarks/results/<timestamp>_<commit>.json)")
+    parser.add_argument("--compare", help="Earlier result file to diff against")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Regression threshold (default: 0.10)")
+    parser.add_argument("--fail-on-regression", action="store_true", help="Exit 1 if any metric regressed")
+    parser.add_argument("--verbose", action="store_true", help="Keep agent output")
+    args = parser.parse_args(argv)
+
+    sections = args.only or SECTIONS
+    fixtures = load_fixtures(args.fixtures)
+    commit = git_commit()
+    report: Dict[str, Any] = {
+        "meta": {
+            "commit": commit,
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "latency": args.latency,
+            "latency_scale": args.latency_scale,
+            "seed": args.seed,
+            "repeats": args.repeats,
+            "fixtures": list(fixtures),
+        },
+        "results": {},
+        "peak_rss_mb": {},
+        "llm_usage": {},
+        "llm_micro_batch": {},
+    }
+
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix="hse-bench-") as workdir:
+        # Reports and outputs/ of the pipeline go to the temp dir
+        os.chdir(workdir)
+        try:
+            with mock_llm(args.latency, args.latency_scale, args.seed, args.cassette) as server:
+                for section in sections:
+                    print(f"\n⏱️  {section}")
+                    get_usage_tracker().reset()
+                    get_micro_batcher().reset()
+                    if section == "pipeline":
+                        result = bench_pipeline(fixtures, args.repeats, args.verbose)
+                    elif section == "parse":
+                        result = bench_parse(max(args.repeats, 5))
+                    elif section == "render":
+                        result = bench_render(args.repeats, Path(workdir))
+                    else:
+                        result = bench_api(fixtures, args.clients, args.requests_per_client, args.verbose)
+                    report["results"][section] = result
+                    report["peak_rss_mb"][section] = peak_rss_mb()
+                    usage = get_usage_tracker().snapshot()
+                    if usage["models"]:
+                        report["llm_usage"][section] = usage
+                        print(f"   LLM prompt cache hit ratio: {usage['total']['cache_hit_ratio']:.0%} "
+                              f"({usage['total']['cached_tokens']}/{usage['total']['prompt_tokens']} tokens)")
+                    batching = get_micro_batcher().snapshot()
+                    if batching["batches"]:
+                        report["llm_micro_batch"][section] = batching
+                        print(f"   Micro-batching: {batching['calls']} small calls in "
+                              f"{batching['requests']} requests ({batching['fallbacks']} fallbacks)")
+                report["meta"]["mock_llm"] = dict(server.stats)
+        finally:
+            os.chdir(cwd)
+
+    output = Path(args.output) if args.output else (
+        RESULTS_DIR / f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{commit or 'nogit'}.json"
+    )
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\n💾 Results: {output}")
+    print(f"   Peak RSS: {report['peak_rss_mb']}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            regressions = compare(report, json.load(f), args.threshold)
+        if regressions and args.fail_on_regression:
+            print(f"\n❌ {len(regressions)} metric(s) regressed by more than {args.threshold:.0%}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
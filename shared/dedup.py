@@ -0,0 +1,158 @@
+"""
+Near-duplicate incident detection
+=================================
+
+The same event is often reported several times (different witnesses, a
+resubmitted form), and every copy used to run the full Part 1-4 LLM
+pipeline. DuplicateDetector finds earlier incidents whose description is
+nearly the same text, before any LLM call:
+
+    detector = get_duplicate_detector()
+    detector.find("Forklift rafa çarptı, koli düştü")   # [("INC-...", 0.91)]
+    detector.add("INC-...", description)
+
+Descriptions are normalised (case, dotted/dotless i, punctuation,
+whitespace) and cut into 5-character shingles. A 64-value MinHash
+signature estimates the Jaccard similarity of two shingle sets, and
+locality-sensitive hashing (16 bands of 4 rows) turns lookup into a few
+dict hits: pairs above ~0.5 similarity share a band with high probability,
+and only those candidates are compared against the threshold.
+
+Environment:
+    DEDUP_THRESHOLD   estimated Jaccard similarity that counts as a
+                      duplicate (default 0.7; 0 disables detection)
+"""
+
+import hashlib
+import os
+import random
+import re
+import struct
+import threading
+from typing import Dict, List, Optional, Set, Tuple
+
+DEFAULT_THRESHOLD = 0.7
+SHINGLE = 5
+NUM_PERM = 64
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+
+_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+# Fixed seed: signatures are comparable across processes and restarts
+_rng = random.Random(245)
+_PERMUTATIONS = [(_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(NUM_PERM)]
+_NON_WORD = re.compile(r"[\W_]+", re.UNICODE)
+
+
+def normalize(text: str) -> str:
+    text = (text or "").replace("İ", "i").lower().replace("ı", "i")
+    return _NON_WORD.sub(" ", text).strip()
+
+
+def shingles(text: str) -> Set[int]:
+    """32-bit hashes of the 5-character shingles of the normalised text."""
+    text = normalize(text)
+    if len(text) <= SHINGLE:
+        grams = {text} if text else set()
+    else:
+        grams = {text[i:i + SHINGLE] for i in range(len(text) - SHINGLE + 1)}
+    return {struct.unpack("<I", hashlib.blake2b(g.encode("utf-8"), digest_size=4).digest())[0] for g in grams}
+
+
+def signature(text: str) -> Optional[Tuple[int, ...]]:
+    """MinHash signature of the text (None for empty text)."""
+    hashes = shingles(text)
+    if not hashes:
+        return None
+    return tuple(min(((a * h + b) % _PRIME) & _MAX_HASH for h in hashes) for a, b in _PERMUTATIONS)
+
+
+def similarity(sig_a: Tuple[int, ...], sig_b: Tuple[int, ...]) -> float:
+    """Estimated Jaccard similarity of two signatures."""
+    return sum(1 for a, b in zip(sig_a, sig_b) if a == b) / NUM_PERM
+
+
+class DuplicateDetector:
+    """
+    Args:
+        threshold: estimated similarity at or above which an incident is a duplicate
+    """
+
+    def __init__(self, threshold: float = DEFAULT_THRESHOLD):
+        self.threshold = threshold
+        self._signatures: Dict[str, Tuple[int, ...]] = {}
+        self._buckets: Dict[Tuple[int, int], Set[str]] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "DuplicateDetector":
+        return cls(threshold=float(os.getenv("DEDUP_THRESHOLD", DEFAULT_THRESHOLD)))
+
+    def __len__(self) -> int:
+        return len(self._signatures)
+
+    @property
+    def enabled(self) -> bool:
+        return self.threshold > 0
+
+    def add(self, doc_id: str, text: str) -> None:
+        """Register (or replace) an incident description."""
+        sig = signature(text)
+        with self._lock:
+            self._remove(doc_id)
+            if sig is None:
+                return
+            self._signatures[doc_id] = sig
+            for band in self._bands(sig):
+                self._buckets.setdefault(band, set()).add(doc_id)
+
+    def remove(self, doc_id: str) -> None:
+        with self._lock:
+            self._remove(doc_id)
+
+    def find(self, text: str, threshold: Optional[float] = None,
+             exclude: Tuple[str, ...] = ()) -> List[Tuple[str, float]]:
+        """Registered incidents similar to `text`, most similar first: [(id, similarity)]."""
+        threshold = self.threshold if threshold is None else threshold
+        sig = signature(text)
+        if sig is None or threshold <= 0:
+            return []
+        with self._lock:
+            candidates = set()
+            for band in self._bands(sig):
+                candidates |= self._buckets.get(band, set())
+            matches = [(doc_id, similarity(sig, self._signatures[doc_id]))
+                       for doc_id in candidates if doc_id not in exclude]
+        return sorted((m for m in matches if m[1] >= threshold), key=lambda m: (-m[1], m[0]))
+
+    # ─────────────────────────────────────────────────────────────────────────
+
+    @staticmethod
+    def _bands(sig: Tuple[int, ...]):
+        return [(i, hash(sig[i * ROWS:(i + 1) * ROWS])) for i in range(BANDS)]
+
+    def _remove(self, doc_id: str) -> None:
+        sig = self._signatures.pop(doc_id, None)
+        if sig is None:
+            return
+        for band in self._bands(sig):
+            bucket = self._buckets.get(band)
+            if bucket is not None:
+                bucket.discard(doc_id)
+                if not bucket:
+                    del self._buckets[band]
+
+
+_detector: Optional[DuplicateDetector] = None
+_detector_lock = threading.Lock()
+
+
+def get_duplicate_detector() -> DuplicateDetector:
+    """Process-wide detector configured from DEDUP_THRESHOLD."""
+    global _detector
+    if _detector is None:
+        with _detector_lock:
+            if _detector is None:
+                _detector = DuplicateDetector.from_env()
+    return _detector
@@ -0,0 +1,313 @@
+"""
+Local fast path for fixed-label classifications
+===============================================
+
+OverviewAgent._classify_incident_type and AssessmentAgent._classify_event_type
+spend a full LLM round trip choosing one of four fixed labels. FastPath puts
+a small local model in front of them:
+
+    label = get_fast_path("incident_type", Config.INCIDENT_TYPES).classify(
+        description, lambda: <LLM call>)
+
+    confident local prediction  → returned at once, no LLM call
+    otherwise                   → the LLM answers; its label is logged as
+                                  training data and compared with the local
+                                  prediction (accuracy tracking)
+
+The model is a linear softmax classifier over keyword features (stemmed
+words and word pairs, see shared/incident_index.tokenize). It is trained
+offline from the logged LLM labels by tools/train_classifiers.py, which
+also picks the confidence threshold that reaches the target accuracy on
+held-out labels.
+
+Confident predictions are still checked against the LLM at the audit rate,
+and the fast path suspends itself (everything goes to the LLM) while the
+audited agreement of the last 200 checks is below FAST_CLASSIFIER_MIN_ACCURACY.
+
+Files in FAST_CLASSIFIER_DIR:
+    <name>.model.json     trained model (written by tools/train_classifiers.py)
+    <name>.labels.jsonl   LLM-labelled history: {"text", "label"} per line
+
+Environment:
+    FAST_CLASSIFIER_DIR            enables the fast path (unset: LLM only,
+                                   nothing logged), e.g. outputs/classifiers
+    FAST_CLASSIFIER_AUDIT_RATE     share of confident predictions also sent
+                                   to the LLM (default 0.05)
+    FAST_CLASSIFIER_MIN_ACCURACY   audited agreement below which the fast
+                                   path is suspended (default 0.9)
+"""
+
+import json
+import math
+import os
+import random
+import threading
+from collections import deque
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from .incident_index import tokenize
+from .log import get_logger
+
+logger = get_logger("fast_classifier")
+
+DEFAULT_THRESHOLD = 0.9
+DEFAULT_AUDIT_RATE = 0.05
+DEFAULT_MIN_ACCURACY = 0.9
+AUDIT_WINDOW = 200
+MIN_AUDITED = 20
+
+
+def features(text: str) -> List[str]:
+    """Keyword features: stemmed words and adjacent word pairs."""
+    words = tokenize(text)
+    return words + [f"{a}_{b}" for a, b in zip(words, words[1:])]
+
+
+def match_label(answer: str, labels: Sequence[str]) -> Optional[str]:
+    """The label an LLM answer names (case/quote-insensitive), None if it names none."""
+    answer = (answer or "").replace('"', "").replace("'", "").strip().lower()
+    for label in labels:
+        if answer == label.lower():
+            return label
+    found = [label for label in labels if label.lower() in answer]
+    return found[0] if len(found) == 1 else None
+
+
+class LinearClassifier:
+    """
+    Multinomial logistic regression over sparse keyword features.
+
+    Args:
+        labels: the fixed label set
+        threshold: confidence at or above which a prediction is trusted
+    """
+
+    def __init__(self, labels: Sequence[str], threshold: float = DEFAULT_THRESHOLD):
+        self.labels = list(labels)
+        self.threshold = threshold
+        self.weights: Dict[str, Dict[str, float]] = {label: {} for label in self.labels}
+        self.bias: Dict[str, float] = {label: 0.0 for label in self.labels}
+        self.metrics: Dict = {}
+
+    def predict_proba(self, text: str) -> Dict[str, float]:
+        return self._proba(features(text))
+
+    def predict(self, text: str) -> Tuple[str, float]:
+        """(most likely label, its probability)."""
+        proba = self.predict_proba(text)
+        label = max(proba, key=proba.get)
+        return label, proba[label]
+
+    def fit(self, examples: Sequence[Tuple[str, str]], epochs: int = 20,
+            learning_rate: float = 0.3, l2: float = 1e-4, seed: int = 0) -> "LinearClassifier":
+        """SGD on (text, label) examples; labels outside the label set are skipped."""
+        data = [(features(text), label) for text, label in examples if label in self.weights]
+        rng = random.Random(seed)
+        for epoch in range(epochs):
+            rng.shuffle(data)
+            rate = learning_rate / (1 + epoch)
+            for feats, target in data:
+                proba = self._proba(feats)
+                for label in self.labels:
+                    grad = proba[label] - (1.0 if label == target else 0.0)
+                    weights = self.weights[label]
+                    for f in feats:
+                        w = weights.get(f, 0.0)
+                        weights[f] = w - rate * (grad + l2 * w)
+                    self.bias[label] -= rate * grad
+        return self
+
+    def calibrate(self, examples: Sequence[Tuple[str, str]], target_accuracy: float) -> Dict:
+        """
+        Lowest threshold whose confident predictions on held-out `examples`
+        reach target_accuracy; sets it and returns the held-out metrics.
+        """
+        scored = sorted(((conf, label == gold) for gold, (label, conf)
+                         in ((gold, self.predict(text)) for text, gold in examples)
+                         if gold in self.weights), reverse=True)
+        threshold, coverage, accuracy, correct = 1.01, 0.0, None, 0
+        for n, (conf, ok) in enumerate(scored, 1):
+            correct += ok
+            if correct / n >= target_accuracy and (n == len(scored) or scored[n][0] < conf):
+                threshold, coverage, accuracy = conf, n / len(scored), correct / n
+        self.threshold = threshold
+        self.metrics = {
+            "holdout": len(scored),
+            "accuracy_all": round(sum(ok for _, ok in scored) / len(scored), 3) if scored else None,
+            "threshold": round(threshold, 4),
+            "coverage": round(coverage, 3),
+            "accuracy_confident": round(accuracy, 3) if accuracy is not None else None,
+        }
+        return self.metrics
+
+    def to_dict(self) -> Dict:
+        return {"labels": self.labels, "threshold": self.threshold, "bias": self.bias,
+                "weights": {label: {f: round(w, 5) for f, w in weights.items() if abs(w) > 1e-4}
+                            for label, weights in self.weights.items()},
+                "metrics": self.metrics}
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "LinearClassifier":
+        model = cls(data["labels"], threshold=data.get("threshold", DEFAULT_THRESHOLD))
+        model.bias.update(data.get("bias", {}))
+        for label, weights in (data.get("weights") or {}).items():
+            model.weights.setdefault(label, {}).update(weights)
+        model.metrics = data.get("metrics", {})
+        return model
+
+    # ─────────────────────────────────────────────────────────────────────────
+
+    def _proba(self, feats: List[str]) -> Dict[str, float]:
+        scores = {label: self.bias[label] + sum(self.weights[label].get(f, 0.0) for f in feats)
+                  for label in self.labels}
+        top = max(scores.values())
+        exp = {label: math.exp(score - top) for label, score in scores.items()}
+        total = sum(exp.values())
+        return {label: value / total for label, value in exp.items()}
+
+
+class FastPath:
+    """
+    Args:
+        name: classification name (file prefix), e.g. "incident_type"
+        labels: the fixed label set
+        directory: model/labels directory (None: always the LLM, nothing logged)
+        audit_rate: share of confident predictions also checked against the LLM
+        min_accuracy: audited agreement below which the fast path is suspended
+    """
+
+    def __init__(self, name: str, labels: Sequence[str], directory: Optional[str] = None,
+                 audit_rate: float = DEFAULT_AUDIT_RATE, min_accuracy: float = DEFAULT_MIN_ACCURACY):
+        self.name = name
+        self.labels = list(labels)
+        self.directory = Path(directory) if directory else None
+        self.audit_rate = audit_rate
+        self.min_accuracy = min_accuracy
+        self.model: Optional[LinearClassifier] = None
+        self._lock = threading.Lock()
+        self._random = random.Random()
+        self._audits: deque = deque(maxlen=AUDIT_WINDOW)
+        self._counts = {"requests": 0, "local": 0, "llm": 0, "compared": 0, "agreed": 0}
+        self.reload()
+
+    @property
+    def model_path(self) -> Optional[Path]:
+        return self.directory / f"{self.name}.model.json" if self.directory else None
+
+    @property
+    def labels_path(self) -> Optional[Path]:
+        return self.directory / f"{self.name}.labels.jsonl" if self.directory else None
+
+    def reload(self) -> None:
+        """(Re)load the trained model, e.g. after tools/train_classifiers.py ran."""
+        path = self.model_path
+        if path is None or not path.exists():
+            return
+        try:
+            model = LinearClassifier.from_dict(json.loads(path.read_text(encoding="utf-8")))
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning("Could not load classifier %s: %s", path, e)
+            return
+        with self._lock:
+            self.model = model
+            self._audits.clear()
+        logger.info("Classifier %s loaded (threshold %.3f)", self.name, model.threshold)
+
+    @property
+    def suspended(self) -> bool:
+        """Recent audits disagree with the LLM too often."""
+        audits = self._audits
+        return len(audits) >= MIN_AUDITED and sum(audits) / len(audits) < self.min_accuracy
+
+    def classify(self, text: str, llm: Callable[[], str]) -> str:
+        """Label of `text`: the local model's if confident, otherwise the label llm()'s answer names."""
+        model = self.model
+        prediction, confidence = model.predict(text) if model else (None, 0.0)
+        confident = prediction is not None and confidence >= model.threshold
+        with self._lock:
+            self._counts["requests"] += 1
+            audit = confident and (self.suspended or self._random.random() < self.audit_rate)
+            if confident and not audit:
+                self._counts["local"] += 1
+                logger.debug("%s: %s (local, %.2f)", self.name, prediction, confidence)
+                return prediction
+
+        answer = llm()
+        label = match_label(answer, self.labels)
+        with self._lock:
+            self._counts["llm"] += 1
+            if prediction is not None and label is not None:
+                self._counts["compared"] += 1
+                self._counts["agreed"] += prediction == label
+                if confident:
+                    self._audits.append(prediction == label)
+        if label is not None:
+            self._log_label(text, label)
+        # Canonical label on both paths; an answer naming no label is passed through
+        return label or answer
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            counts = dict(self._counts)
+            audits = list(self._audits)
+        return {
+            **counts,
+            "local_rate": round(counts["local"] / counts["requests"], 3) if counts["requests"] else 0.0,
+            # Agreement with the LLM on every compared call / on audited confident predictions
+            "accuracy": round(counts["agreed"] / counts["compared"], 3) if counts["compared"] else None,
+            "audited": len(audits),
+            "audited_accuracy": round(sum(audits) / len(audits), 3) if audits else None,
+            "suspended": self.suspended,
+            "model": (self.model.metrics or {"threshold": self.model.threshold}) if self.model else None,
+        }
+
+    def _log_label(self, text: str, label: str) -> None:
+        path = self.labels_path
+        if path is None:
+            return
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with open(path, "a", encoding="utf-8") as f:
+                f.write(json.dumps({"text": text, "label": label}, ensure_ascii=False) + "\n")
+        except OSError as e:
+            logger.warning("Could not log %s label: %s", self.name, e)
+
+
+def read_labels(path: Path) -> List[Tuple[str, str]]:
+    """(text, label) examples of a labels JSONL file."""
+    examples = []
+    if path.exists():
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                    examples.append((record["text"], record["label"]))
+                except (ValueError, KeyError):
+                    continue
+    return examples
+
+
+_fast_paths: Dict[str, FastPath] = {}
+_fast_paths_lock = threading.Lock()
+
+
+def get_fast_path(name: str, labels: Iterable[str]) -> FastPath:
+    """Process-wide fast path for a classification, configured from the environment."""
+    fast_path = _fast_paths.get(name)
+    if fast_path is None:
+        with _fast_paths_lock:
+            fast_path = _fast_paths.get(name)
+            if fast_path is None:
+                fast_path = _fast_paths[name] = FastPath(
+                    name, list(labels),
+                    directory=os.getenv("FAST_CLASSIFIER_DIR") or None,
+                    audit_rate=float(os.getenv("FAST_CLASSIFIER_AUDIT_RATE", DEFAULT_AUDIT_RATE)),
+                    min_accuracy=float(os.getenv("FAST_CLASSIFIER_MIN_ACCURACY", DEFAULT_MIN_ACCURACY)),
+                )
+    return fast_path
+
+
+def fast_path_stats() -> Dict[str, Dict]:
+    """snapshot() of every fast path created so far."""
+    return {name: fast_path.snapshot() for name, fast_path in list(_fast_paths.items())}
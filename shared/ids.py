@@ -0,0 +1,75 @@
+"""
+Reference numbers
+=================
+
+Incident ref_nos used to be INC-%Y%m%d-%H%M%S, so two incidents created in
+the same second got the same id and the second overwrote the first. new_id()
+keeps the readable timestamp and appends a fixed-width Crockford base32
+suffix that makes it unique:
+
+    INC-20261019-143015-0F3K9Z2AB
+        date     time   └ millisecond · per-process sequence · node
+
+    millisecond  10 bits  position inside the second
+    sequence     12 bits  4096 ids per millisecond per process (then the
+                          next millisecond is used)
+    node         22 bits  process id, or HSE_NODE_ID on multi-host setups
+
+Ids of one process are strictly increasing, also when the clock steps back,
+and all ids sort by creation time as plain strings (to the millisecond
+across processes). The date and time are UTC, so the order also holds
+across DST changes and between hosts in different time zones. Processes running at the same time on one host have
+different pids, so workers never collide.
+"""
+
+import os
+import threading
+import time
+from datetime import datetime, timezone
+
+_ALPHABET = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"  # Crockford base32
+_SEQ_BITS = 12
+_NODE_BITS = 22
+_SUFFIX_LEN = 9  # 10 + 12 + 22 = 44 bits
+
+_lock = threading.Lock()
+_last_ms = 0
+_seq = 0
+_pid = None
+
+
+def _node() -> int:
+    node = os.getenv("HSE_NODE_ID")
+    return (int(node) if node else os.getpid()) & ((1 << _NODE_BITS) - 1)
+
+
+def _encode(value: int, length: int) -> str:
+    chars = []
+    for _ in range(length):
+        value, digit = divmod(value, 32)
+        chars.append(_ALPHABET[digit])
+    return "".join(reversed(chars))
+
+
+def _next_timestamp() -> tuple:
+    """(millisecond timestamp, sequence) after the previous id of this process."""
+    global _last_ms, _seq, _pid
+    with _lock:
+        if _pid != os.getpid():  # forked worker: own sequence
+            _pid, _last_ms, _seq = os.getpid(), 0, 0
+        now = time.time_ns() // 1_000_000
+        if now > _last_ms:
+            _last_ms, _seq = now, 0
+        else:
+            _seq += 1
+            if _seq >> _SEQ_BITS:
+                _last_ms, _seq = _last_ms + 1, 0
+        return _last_ms, _seq
+
+
+def new_id(prefix: str = "INC") -> str:
+    """Unique, time-sortable, human-readable id: PREFIX-YYYYMMDD-HHMMSS-XXXXXXXXX (UTC)."""
+    ms, seq = _next_timestamp()
+    stamp = datetime.fromtimestamp(ms / 1000, timezone.utc).strftime("%Y%m%d-%H%M%S")
+    suffix = (((ms % 1000) << _SEQ_BITS | seq) << _NODE_BITS) | _node()
+    return f"{prefix}-{stamp}-{_encode(suffix, _SUFFIX_LEN)}"
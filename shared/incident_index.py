@@ -0,0 +1,329 @@
+"""
+Similar-incident index over past investigations
+===============================================
+
+Every new investigation used to start cold, although past RCAs
+(outputs/*.json, API investigations, batch results) often describe the
+same hazards. IncidentIndex is a local BM25 index over the incident
+summaries and the A/B (immediate) and C/D (root) cause codes of completed
+investigations:
+
+    index = get_incident_index()
+    index.add_investigation({"part1": ..., "part2": ..., "part3_rca": ...})
+    index.search("Bakım sırasında vana açık bırakıldı ...", codes=["B2.1"], k=5)
+
+Terms are lower-cased words (dotted/dotless i folded) cut to a 7-character
+prefix (a cheap stemmer for Turkish suffixes) plus "#A3.2" / "#A3" tokens
+for codes, which weigh more than words. A lookup scores only the query's most selective terms
+against their postings, so it stays in the milliseconds for ~100k
+incidents.
+
+Persistence is an append-only JSONL file (one line per added or replaced
+incident, with its term counts so loading does not re-tokenize). Lines
+appended by other workers are picked up before each lookup. Appends and
+compact() hold an exclusive lock on "<file>.lock" so a compaction cannot
+drop another worker's line, and a worker whose file was replaced by a
+compaction (new inode) re-reads it from the start.
+
+Environment:
+    INCIDENT_INDEX_PATH   index file (default outputs/incident_index.jsonl)
+"""
+
+import heapq
+import json
+import math
+import os
+import re
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows: single-worker deployments only
+    fcntl = None
+
+from .log import get_logger
+
+logger = get_logger("incident_index")
+
+DEFAULT_INDEX_PATH = "outputs/incident_index.jsonl"
+
+# BM25
+K1 = 1.2
+B = 0.75
+CODE_WEIGHT = 3
+# Query terms scored per lookup (highest idf first)
+MAX_QUERY_TERMS = 32
+# Postings scanned before the remaining (common) terms only rescore the best candidates
+POSTING_BUDGET = 20000
+MAX_CANDIDATES = 1000
+
+_STEM = 7
+_WORD = re.compile(r"[^\W\d_]{3,}", re.UNICODE)
+_CODE = re.compile(r"\b([A-D]\d{1,2})\.(\d{1,2})\b")
+_STOPWORDS = frozenset("""
+ve ile için bir bu şu olan olarak gibi daha çok her da de ki ama veya ancak sonra önce sırasında
+tarafından üzerine nedeniyle olay olayı olayın the and for with was were that this from into
+""".split())
+
+
+def tokenize(text: str) -> List[str]:
+    """Word terms of free text (lower-cased, stop words removed, prefix-stemmed)."""
+    # "İ".lower() is "i" + combining dot and "I" is dotless in Turkish: fold both to "i"
+    text = (text or "").replace("İ", "i").lower().replace("ı", "i")
+    return [w[:_STEM] for w in _WORD.findall(text) if w not in _STOPWORDS]
+
+
+def code_terms(codes: Iterable[str]) -> List[str]:
+    """"#A3.2" and its group "#A3" for each HSG245 code."""
+    terms = []
+    for code in codes:
+        match = _CODE.search(str(code or "").upper())
+        if match:
+            terms += [f"#{match.group(1)}.{match.group(2)}", f"#{match.group(1)}"]
+    return terms
+
+
+def investigation_document(data: Dict) -> Optional[Dict[str, Any]]:
+    """
+    Index document of an investigation: a full result ({"part1", "part2",
+    "part3_rca"}) or a bare RCA ({"incident_summary", "analysis_branches", ...}).
+    None if it holds no analysis.
+    """
+    if not isinstance(data, dict):
+        return None
+    rca = data.get("part3_rca") if isinstance(data.get("part3_rca"), dict) else data
+    part1 = data.get("part1") if isinstance(data.get("part1"), dict) else {}
+    part2 = data.get("part2") if isinstance(data.get("part2"), dict) else {}
+    branches = [b for b in rca.get("analysis_branches") or [] if isinstance(b, dict)]
+    roots = [c for c in rca.get("final_root_causes") or [] if isinstance(c, dict)]
+    summary = rca.get("incident_summary") or (part1.get("brief_details") or {}).get("what") or ""
+    if not summary or not (branches or roots):
+        return None
+    return {
+        "summary": summary,
+        "immediate_codes": [(b.get("immediate_cause") or {}).get("code") for b in branches
+                            if (b.get("immediate_cause") or {}).get("code")],
+        "root_codes": [c["code"] for c in roots if c.get("code")],
+        "meta": {
+            "ref_no": part1.get("ref_no") or data.get("ref_no"),
+            "incident_type": part1.get("incident_type"),
+            "investigation_level": part2.get("investigation_level"),
+            "root_causes": [{"code": c.get("code"), "title": c.get("standard_title_tr"),
+                             "cause": c.get("cause_tr")} for c in roots],
+        },
+    }
+
+
+class IncidentIndex:
+    """
+    Args:
+        path: JSONL file the index is loaded from and appended to (None: memory only)
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = Path(path) if path else None
+        self._docs: Dict[str, Dict[str, Any]] = {}
+        self._postings: Dict[str, Dict[str, int]] = {}
+        self._lengths: Dict[str, int] = {}
+        self._total_length = 0
+        self._offset = 0
+        self._inode: Optional[int] = None
+        self._lock = threading.RLock()
+        if self.path:
+            self.refresh()
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def __contains__(self, doc_id: str) -> bool:
+        return doc_id in self._docs
+
+    def add(self, doc_id: str, summary: str, immediate_codes: Iterable[str] = (),
+            root_codes: Iterable[str] = (), meta: Optional[Dict] = None) -> None:
+        """Insert (or replace) an incident and append it to the index file."""
+        immediate_codes, root_codes = list(immediate_codes), list(root_codes)
+        terms = Counter(tokenize(summary))
+        for term in code_terms(immediate_codes + root_codes):
+            terms[term] += CODE_WEIGHT
+        record = {"id": str(doc_id), "summary": summary[:500], "immediate_codes": immediate_codes,
+                  "root_codes": root_codes, "meta": meta or {}, "terms": dict(terms)}
+        with self._lock:
+            if not self.path:
+                self._insert(record)
+                return
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with self._file_lock():
+                # Catch up first, so the offset ends right before our own line
+                self.refresh()
+                self._insert(record)
+                line = json.dumps(record, ensure_ascii=False) + "\n"
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(line)
+                    inode = os.fstat(f.fileno()).st_ino
+                if self._inode is None:
+                    self._inode = inode  # created by this append
+                # Our own line is already indexed
+                size = self.path.stat().st_size
+                if inode == self._inode and self._offset == size - len(line.encode("utf-8")):
+                    self._offset = size
+
+    def add_investigation(self, data: Dict, doc_id: Optional[str] = None) -> Optional[str]:
+        """Index a completed investigation; returns its id (None if it holds no analysis)."""
+        doc = investigation_document(data)
+        doc_id = doc_id or (doc or {}).get("meta", {}).get("ref_no")
+        if doc is None or not doc_id:
+            return None
+        self.add(doc_id, doc["summary"], doc["immediate_codes"], doc["root_codes"], doc["meta"])
+        return doc_id
+
+    def search(self, text: str = "", codes: Iterable[str] = (), k: int = 5,
+               exclude: Iterable[str] = ()) -> List[Dict[str, Any]]:
+        """The k most similar incidents: [{id, score, summary, immediate_codes, root_codes, meta}]."""
+        self.refresh()
+        query = Counter(tokenize(text))
+        for term in code_terms(codes):
+            query[term] += CODE_WEIGHT
+        exclude = set(exclude)
+
+        with self._lock:
+            n = len(self._docs)
+            if not n or not query:
+                return []
+            avg_length = self._total_length / n
+            weighted = []
+            for term, qtf in query.items():
+                postings = self._postings.get(term)
+                if postings:
+                    idf = math.log(1 + (n - len(postings) + 0.5) / (len(postings) + 0.5))
+                    weighted.append((idf, qtf, postings))
+
+            # Selective terms first: their postings pick the candidates, the
+            # common ones (e.g. "#A3", frequent words) only rescore those
+            weighted = heapq.nlargest(MAX_QUERY_TERMS, weighted, key=lambda w: w[0])
+            lengths = self._lengths
+            k1b, bk = K1 * (1 - B), K1 * B / avg_length
+            scores: Dict[str, float] = {}
+            scanned, cut = 0, len(weighted)
+            for i, (idf, qtf, postings) in enumerate(weighted):
+                if i and scanned + len(postings) > POSTING_BUDGET:
+                    cut = i
+                    break
+                scanned += len(postings)
+                weight = qtf * idf * (K1 + 1)
+                for doc_id, tf in postings.items():
+                    scores[doc_id] = scores.get(doc_id, 0.0) + weight * tf / (tf + k1b + bk * lengths[doc_id])
+            if cut < len(weighted):
+                scores = dict(heapq.nlargest(MAX_CANDIDATES, scores.items(), key=lambda item: item[1]))
+                for idf, qtf, postings in weighted[cut:]:
+                    weight = qtf * idf * (K1 + 1)
+                    for doc_id in scores:
+                        tf = postings.get(doc_id)
+                        if tf:
+                            scores[doc_id] += weight * tf / (tf + k1b + bk * lengths[doc_id])
+
+            best = heapq.nlargest(k + len(exclude), scores.items(), key=lambda item: item[1])
+            results = []
+            for doc_id, score in best:
+                if doc_id in exclude:
+                    continue
+                doc = self._docs[doc_id]
+                results.append({"id": doc_id, "score": round(score, 3), "summary": doc["summary"],
+                                "immediate_codes": doc["immediate_codes"], "root_codes": doc["root_codes"],
+                                "meta": doc["meta"]})
+            return results[:k]
+
+    def refresh(self) -> int:
+        """Index lines appended to the file since the last read (e.g. by other workers)."""
+        if not self.path or not self.path.exists():
+            return 0
+        with self._lock:
+            stat = self.path.stat()
+            if stat.st_ino == self._inode and stat.st_size == self._offset:
+                return 0
+            added = 0
+            with open(self.path, "rb") as f:
+                opened = os.fstat(f.fileno())
+                if opened.st_ino != self._inode or opened.st_size < self._offset:
+                    # Replaced by another worker's compact(): its lines are a superset of ours
+                    self._inode, self._offset = opened.st_ino, 0
+                f.seek(self._offset)
+                for raw in f:
+                    if not raw.endswith(b"\n"):
+                        break  # partially written line; read it next time
+                    self._offset += len(raw)
+                    try:
+                        self._insert(json.loads(raw))
+                        added += 1
+                    except (ValueError, KeyError) as e:
+                        logger.warning("Skipping unreadable index line: %s", e)
+            return added
+
+    def compact(self) -> None:
+        """Rewrite the file with one line per incident (drops replaced versions)."""
+        if not self.path:
+            return
+        with self._lock, self._file_lock():
+            self.refresh()
+            tmp = self.path.with_suffix(".tmp")
+            with open(tmp, "w", encoding="utf-8") as f:
+                for doc in self._docs.values():
+                    f.write(json.dumps(doc, ensure_ascii=False) + "\n")
+            os.replace(tmp, self.path)
+            stat = self.path.stat()
+            self._inode, self._offset = stat.st_ino, stat.st_size
+
+    @contextmanager
+    def _file_lock(self) -> Iterator[None]:
+        """Exclusive lock shared by every worker appending to or compacting the file."""
+        if fcntl is None:
+            yield
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path.with_name(self.path.name + ".lock"), "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    # ─────────────────────────────────────────────────────────────────────────
+
+    def _insert(self, record: Dict[str, Any]) -> None:
+        doc_id = record["id"]
+        self._remove(doc_id)
+        terms = record["terms"]
+        self._docs[doc_id] = record
+        self._lengths[doc_id] = sum(terms.values())
+        self._total_length += self._lengths[doc_id]
+        for term, tf in terms.items():
+            self._postings.setdefault(term, {})[doc_id] = tf
+
+    def _remove(self, doc_id: str) -> None:
+        old = self._docs.pop(doc_id, None)
+        if old is None:
+            return
+        self._total_length -= self._lengths.pop(doc_id)
+        for term in old["terms"]:
+            postings = self._postings.get(term)
+            if postings is not None:
+                postings.pop(doc_id, None)
+                if not postings:
+                    del self._postings[term]
+
+
+_index: Optional[IncidentIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_incident_index() -> IncidentIndex:
+    """Process-wide index at INCIDENT_INDEX_PATH (loaded on first use)."""
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = IncidentIndex(os.getenv("INCIDENT_INDEX_PATH", DEFAULT_INDEX_PATH))
+    return _index
@@ -0,0 +1,191 @@
+"""
+OpenRouter LLM Client Factory
+Single place where agents get their OpenAI-compatible client
+
+Every client created here sends its HTTP requests through LLMTransport,
+which runs the registered middlewares (rate limiting, recording, ...)
+around each outbound request. Middlewares are process-global, so a limit
+installed once applies to every agent and thread.
+
+The rate limiter always sits right inside single-flight, the usage tracker
+and the priority gate, whether it was installed from the environment or by
+set_global_rate_limit() before the first client: coalesced duplicates use
+no budget and requests take their budget in priority order.
+
+Environment:
+    OPENROUTER_API_KEY   API key (falls back to OPENAI_API_KEY)
+    OPENROUTER_BASE_URL  Override the endpoint, e.g. a local stand-in server
+                         (python -m tools.mock_llm_server)
+    LLM_RECORD_CASSETTE  Record every request/response to this cassette file
+                         (see shared/llm_recorder.py)
+    LLM_USAGE_TRACKING   0 disables token / prompt-cache accounting
+                         (see shared/llm_usage.py; on by default)
+    LLM_SINGLE_FLIGHT    0 disables coalescing of identical concurrent
+                         requests (see shared/single_flight.py; on by default)
+    LLM_RPM / LLM_TPM    Per-model request / token budgets shared by the
+                         workers of the host (see shared/rate_limit.py)
+    LLM_MAX_CONCURRENCY  LLM requests in flight per process, admitted by
+                         investigation priority (see shared/priority.py;
+                         default 32, 0 disables)
+"""
+
+import os
+import threading
+from typing import Callable, Dict, List, Optional
+
+import httpx
+from openai import DefaultHttpxClient, OpenAI
+
+DEFAULT_BASE_URL = "https://openrouter.ai/api/v1"
+
+# middleware(request, call_next) -> response
+Middleware = Callable[[httpx.Request, Callable[[httpx.Request], httpx.Response]], httpx.Response]
+
+_middlewares: List[Middleware] = []
+_middlewares_lock = threading.Lock()
+_env_middlewares_installed = False
+# Single-flight, usage tracker, priority gate: always outside the rate limiter
+_outer_middlewares: List[Middleware] = []
+
+
+def get_base_url() -> str:
+    return os.getenv("OPENROUTER_BASE_URL", DEFAULT_BASE_URL).rstrip("/")
+
+
+def get_api_key() -> Optional[str]:
+    return os.getenv("OPENROUTER_API_KEY") or os.getenv("OPENAI_API_KEY")
+
+
+def add_middleware(middleware: Middleware) -> Middleware:
+    """Register a middleware for all LLM requests (outermost first)."""
+    with _middlewares_lock:
+        _middlewares.append(middleware)
+    return middleware
+
+
+def remove_middleware(middleware: Middleware) -> None:
+    with _middlewares_lock:
+        if middleware in _middlewares:
+            _middlewares.remove(middleware)
+
+
+class LLMTransport(httpx.BaseTransport):
+    """httpx transport that runs the registered middlewares around each request."""
+
+    def __init__(self, inner: Optional[httpx.BaseTransport] = None):
+        self._inner = inner or httpx.HTTPTransport()
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        with _middlewares_lock:
+            chain = list(_middlewares)
+
+        def call(index: int, req: httpx.Request) -> httpx.Response:
+            if index == len(chain):
+                return self._inner.handle_request(req)
+            return chain[index](req, lambda r: call(index + 1, r))
+
+        return call(0, request)
+
+    def close(self) -> None:
+        self._inner.close()
+
+
+def _install_env_middlewares() -> None:
+    """Middlewares requested through the environment, installed once per process."""
+    global _env_middlewares_installed, _rate_limiter
+    with _middlewares_lock:
+        if _env_middlewares_installed:
+            return
+        _env_middlewares_installed = True
+    outer = []
+    # Ahead of the usage tracker, so duplicates served from another
+    # request's response are not counted as spent tokens
+    if os.getenv("LLM_SINGLE_FLIGHT", "1").lower() not in ("0", "false", "no"):
+        from .single_flight import get_single_flight
+        outer.append(get_single_flight())
+    if os.getenv("LLM_USAGE_TRACKING", "1").lower() not in ("0", "false", "no"):
+        from .llm_usage import get_usage_tracker
+        outer.append(get_usage_tracker())
+    if os.getenv("LLM_MAX_CONCURRENCY", "32") not in ("0", ""):
+        from .priority import get_priority_gate
+        outer.append(get_priority_gate())
+    for middleware in outer:
+        add_middleware(middleware)
+    with _middlewares_lock:
+        _outer_middlewares.extend(outer)
+        # A limiter set before the first client (batch CLI) moves inside them
+        _place_rate_limiter()
+    if _rate_limiter is None:
+        from .rate_limit import TokenBucketLimiter
+        limiter = TokenBucketLimiter.from_env()
+        if limiter is not None:
+            with _middlewares_lock:
+                _rate_limiter = limiter
+                _place_rate_limiter()
+    cassette = os.getenv("LLM_RECORD_CASSETTE")
+    if cassette:
+        from .llm_recorder import start_recording
+        start_recording(cassette)
+
+
+def create_openrouter_client(api_key: Optional[str] = None, **kwargs) -> OpenAI:
+    """
+    Create an OpenAI client pointed at OpenRouter (or OPENROUTER_BASE_URL)
+    whose requests pass through the registered middlewares.
+    """
+    _install_env_middlewares()
+    return OpenAI(
+        base_url=get_base_url(),
+        api_key=api_key or get_api_key(),
+        http_client=DefaultHttpxClient(transport=LLMTransport()),
+        **kwargs
+    )
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Global request rate limit
+# ─────────────────────────────────────────────────────────────────────────────
+
+_rate_limiter = None
+
+
+def _place_rate_limiter() -> None:
+    """Put the rate limiter right after the outer middlewares (caller holds the lock)."""
+    if _rate_limiter is None:
+        return
+    if _rate_limiter in _middlewares:
+        _middlewares.remove(_rate_limiter)
+    index = max((i + 1 for i, m in enumerate(_middlewares) if m in _outer_middlewares), default=0)
+    _middlewares.insert(index, _rate_limiter)
+
+
+def set_global_rate_limit(requests_per_minute: Optional[float] = None,
+                          tokens_per_minute: Optional[float] = None,
+                          limits: Optional[Dict] = None,
+                          db_path: Optional[str] = None):
+    """
+    Install (or with no budget, remove) the process-wide LLM rate limit.
+
+    requests_per_minute / tokens_per_minute apply to every model, `limits`
+    ({model: (rpm, tpm)}) overrides them per model. With `db_path` the
+    budgets are shared with the other workers using the same file
+    (see shared/rate_limit.py).
+    """
+    global _rate_limiter
+    from .rate_limit import TokenBucketLimiter
+
+    if _rate_limiter is not None:
+        remove_middleware(_rate_limiter)
+        _rate_limiter = None
+    budgets = dict(limits or {})
+    if requests_per_minute or tokens_per_minute:
+        budgets["*"] = (requests_per_minute, tokens_per_minute)
+    if any(rpm or tpm for rpm, tpm in budgets.values()):
+        with _middlewares_lock:
+            _rate_limiter = TokenBucketLimiter(budgets, db_path=db_path)
+            _place_rate_limiter()
+    return _rate_limiter
+
+
+def get_global_rate_limiter():
+    return _rate_limiter
@@ -0,0 +1,198 @@
+"""
+LLM Cassettes - record/replay of agent LLM traffic
+===================================================
+
+CassetteRecorder is an llm_client middleware that appends every LLM
+request/response pair made by the agents to a cassette file (JSONL, one
+interaction per line). tools/mock_llm_server replays cassettes through an
+OpenAI-compatible endpoint, so the whole pipeline can run offline.
+
+Cassette line:
+    {"key": <request hash>, "path": "/chat/completions",
+     "request": {...body...}, "status": 200,
+     "response": {...body...}                  # JSON responses
+     "response_text": "...", "content_type": "text/event-stream"  # streams
+     "duration_s": 4.21, "recorded_at": "..."}
+
+Only request/response bodies are stored; headers (API key) are not.
+Streamed (text/event-stream) responses reach the client chunk by chunk as
+usual and are written once the client closes the stream, so duration_s is
+the full stream time.
+
+Recording from a real run:
+    LLM_RECORD_CASSETTE=cassettes/kmco.jsonl python tests/test_kmco_patlama.py
+"""
+
+import hashlib
+import json
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+import httpx
+
+# Body fields that do not change what the model returns
+_VOLATILE_FIELDS = ("stream_options", "user")
+
+
+def request_key(body: Dict[str, Any]) -> str:
+    """Stable hash of a request body (key order independent)."""
+    canonical = {k: v for k, v in body.items() if k not in _VOLATILE_FIELDS}
+    encoded = json.dumps(canonical, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+def request_text(body: Dict[str, Any]) -> str:
+    """Flattened message text of a chat request (for similarity matching)."""
+    parts = []
+    for message in body.get("messages") or []:
+        content = message.get("content")
+        if isinstance(content, list):
+            content = " ".join(c.get("text", "") for c in content if isinstance(c, dict))
+        parts.append(f"{message.get('role', '')}: {content or ''}")
+    return "\n".join(parts)
+
+
+def read_cassette(path: str) -> List[Dict[str, Any]]:
+    """All interactions of one cassette file (a broken last line is ignored)."""
+    interactions = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            try:
+                interactions.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue
+    return interactions
+
+
+def iter_cassettes(paths: Iterable[str]) -> Iterator[Dict[str, Any]]:
+    """Interactions from cassette files and directories of *.jsonl cassettes."""
+    for item in paths:
+        path = Path(item)
+        files = sorted(path.rglob("*.jsonl")) if path.is_dir() else [path]
+        for file in files:
+            yield from read_cassette(str(file))
+
+
+class _TeeStream(httpx.SyncByteStream):
+    """Passes the raw chunks through and hands the collected bytes to on_close."""
+
+    def __init__(self, inner, on_close):
+        self._inner = inner
+        self._on_close = on_close
+        self._chunks: List[bytes] = []
+        self._closed = False
+
+    def __iter__(self) -> Iterator[bytes]:
+        for chunk in self._inner:
+            self._chunks.append(chunk)
+            yield chunk
+
+    def close(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        try:
+            if hasattr(self._inner, "close"):
+                self._inner.close()
+        finally:
+            self._on_close(b"".join(self._chunks))
+
+
+class CassetteRecorder:
+    """
+    Middleware that records every LLM exchange to a cassette file.
+
+    Args:
+        path: Cassette file (appended to; created if missing)
+    """
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self.recorded = 0
+
+    def __call__(self, request: httpx.Request, call_next) -> httpx.Response:
+        start = time.perf_counter()
+        response = call_next(request)
+
+        if "text/event-stream" in response.headers.get("content-type", ""):
+            # Streams pass through chunk by chunk and are written when closed
+            def on_close(raw: bytes) -> None:
+                content = httpx.Response(200, headers=response.headers, content=raw).read()
+                self._record(request, response, content, time.perf_counter() - start)
+
+            return httpx.Response(
+                status_code=response.status_code,
+                headers=response.headers,
+                stream=_TeeStream(response.stream, on_close),
+                request=request,
+                extensions=response.extensions,
+            )
+
+        content = response.read()
+        self._record(request, response, content, time.perf_counter() - start)
+
+        # The body has been consumed (and decoded); hand the client a fresh copy
+        headers = [
+            (k, v) for k, v in response.headers.items()
+            if k.lower() not in ("content-encoding", "content-length", "transfer-encoding")
+        ]
+        return httpx.Response(
+            status_code=response.status_code,
+            headers=headers,
+            content=content,
+            request=request,
+            extensions=response.extensions,
+        )
+
+    def _record(self, request: httpx.Request, response: httpx.Response,
+                content: bytes, duration: float) -> None:
+        try:
+            body = json.loads(request.content or b"{}")
+        except ValueError:
+            body = {}
+        record: Dict[str, Any] = {
+            "key": request_key(body),
+            "path": request.url.path,
+            "request": body,
+            "status": response.status_code,
+            "duration_s": round(duration, 3),
+            "recorded_at": datetime.now().isoformat(timespec="seconds"),
+        }
+        content_type = response.headers.get("content-type", "")
+        if "json" in content_type:
+            try:
+                record["response"] = json.loads(content)
+            except ValueError:
+                record["response_text"] = content.decode("utf-8", "replace")
+        else:
+            record["response_text"] = content.decode("utf-8", "replace")
+            record["content_type"] = content_type
+        self._append(record)
+
+    def _append(self, record: Dict[str, Any]) -> None:
+        line = json.dumps(record, ensure_ascii=False, default=str)
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+            self.recorded += 1
+
+
+def start_recording(path: str) -> CassetteRecorder:
+    """Record all LLM traffic of this process to `path` until stop_recording()."""
+    from .llm_client import add_middleware
+    recorder = CassetteRecorder(path)
+    add_middleware(recorder)
+    return recorder
+
+
+def stop_recording(recorder: Optional[CassetteRecorder]) -> None:
+    from .llm_client import remove_middleware
+    if recorder is not None:
+        remove_middleware(recorder)
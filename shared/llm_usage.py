@@ -0,0 +1,163 @@
+"""
+LLM token usage and prompt-cache accounting
+===========================================
+
+UsageTracker is an llm_client middleware that reads the `usage` block of
+every chat completion (JSON responses, and the final chunk of streamed
+ones) and keeps per-model totals of prompt, completion, cache-read and
+cache-write tokens. The cache hit ratio (cached / prompt tokens) shows
+whether the stable prompt prefixes of shared/prompt_cache are actually
+being reused by the provider.
+
+Usage formats understood:
+    OpenAI / OpenRouter   usage.prompt_tokens_details.cached_tokens
+                          (+ cache_write_tokens on OpenRouter)
+    Anthropic             usage.cache_read_input_tokens / cache_creation_input_tokens
+
+The tracker is installed for every client created by
+create_openrouter_client (disable with LLM_USAGE_TRACKING=0); read it with
+get_usage_tracker().snapshot().
+"""
+
+import json
+import threading
+from collections import defaultdict
+from typing import Any, Dict, Iterator, Optional
+
+import httpx
+
+from .log import get_logger
+
+logger = get_logger("llm.usage")
+
+_COUNTERS = ("requests", "prompt_tokens", "completion_tokens", "cached_tokens", "cache_write_tokens")
+
+
+def normalize_usage(usage: Optional[Dict[str, Any]]) -> Dict[str, int]:
+    """prompt/completion/cached/cache_write token counts of one usage block."""
+    usage = usage or {}
+    details = usage.get("prompt_tokens_details") or {}
+    if "input_tokens" in usage:
+        # Anthropic: input_tokens excludes the cached part
+        cached = usage.get("cache_read_input_tokens") or 0
+        written = usage.get("cache_creation_input_tokens") or 0
+        prompt = (usage.get("input_tokens") or 0) + cached + written
+        completion = usage.get("output_tokens") or 0
+    else:
+        cached = details.get("cached_tokens") or usage.get("cache_read_input_tokens") or 0
+        written = details.get("cache_write_tokens") or usage.get("cache_creation_input_tokens") or 0
+        prompt = usage.get("prompt_tokens") or 0
+        completion = usage.get("completion_tokens") or 0
+    return {
+        "prompt_tokens": int(prompt),
+        "completion_tokens": int(completion),
+        "cached_tokens": int(cached),
+        "cache_write_tokens": int(written),
+    }
+
+
+def sse_usage(text: str) -> Optional[Dict[str, Any]]:
+    """The last stream chunk that carries a usage block."""
+    for line in reversed(text.splitlines()):
+        if not line.startswith("data:") or "usage" not in line:
+            continue
+        try:
+            chunk = json.loads(line[5:].strip())
+        except ValueError:
+            continue
+        if chunk.get("usage"):
+            return chunk
+    return None
+
+
+class StreamTee(httpx.SyncByteStream):
+    """Passes a streamed body through and reports its usage chunk on close."""
+
+    # Usage arrives in the last chunk; keeping the tail is enough
+    _TAIL = 16384
+
+    def __init__(self, inner, on_close):
+        self._inner = inner
+        self._on_close = on_close
+        self._tail = b""
+
+    def __iter__(self) -> Iterator[bytes]:
+        for chunk in self._inner:
+            self._tail = (self._tail + chunk)[-self._TAIL:]
+            yield chunk
+
+    def close(self) -> None:
+        try:
+            self._inner.close()
+        finally:
+            self._on_close(self._tail.decode("utf-8", "replace"))
+
+
+class UsageTracker:
+    """Middleware keeping per-model token and prompt-cache totals."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._models: Dict[str, Dict[str, int]] = defaultdict(lambda: dict.fromkeys(_COUNTERS, 0))
+
+    def __call__(self, request: httpx.Request, call_next) -> httpx.Response:
+        response = call_next(request)
+        if response.status_code != 200:
+            return response
+        content_type = response.headers.get("content-type", "")
+        if "event-stream" in content_type:
+            if not response.headers.get("content-encoding"):
+                response.stream = StreamTee(response.stream, self._record_stream)
+            return response
+        if "json" in content_type:
+            try:
+                payload = json.loads(response.read())
+            except ValueError:
+                return response
+            if isinstance(payload, dict) and payload.get("usage"):
+                self.record(payload.get("model") or "unknown", payload["usage"])
+        return response
+
+    def _record_stream(self, tail: str) -> None:
+        chunk = sse_usage(tail)
+        if chunk is not None:
+            self.record(chunk.get("model") or "unknown", chunk["usage"])
+
+    def record(self, model: str, usage: Dict[str, Any]) -> Dict[str, int]:
+        counts = normalize_usage(usage)
+        with self._lock:
+            totals = self._models[model]
+            totals["requests"] += 1
+            for key, value in counts.items():
+                totals[key] += value
+        logger.debug(
+            "%s: prompt=%d cached=%d cache_write=%d completion=%d",
+            model, counts["prompt_tokens"], counts["cached_tokens"],
+            counts["cache_write_tokens"], counts["completion_tokens"],
+        )
+        return counts
+
+    def reset(self) -> None:
+        with self._lock:
+            self._models.clear()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Totals per model and overall, with the cache hit ratio."""
+        with self._lock:
+            models = {model: dict(totals) for model, totals in self._models.items()}
+        overall = dict.fromkeys(_COUNTERS, 0)
+        for totals in models.values():
+            for key in _COUNTERS:
+                overall[key] += totals[key]
+        for totals in list(models.values()) + [overall]:
+            prompt = totals["prompt_tokens"]
+            totals["cache_hit_ratio"] = round(totals["cached_tokens"] / prompt, 4) if prompt else 0.0
+        return {"models": models, "total": overall}
+
+
+_tracker = UsageTracker()
+
+
+def get_usage_tracker() -> UsageTracker:
+    """The process-wide tracker installed by create_openrouter_client."""
+    return _tracker
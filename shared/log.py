@@ -0,0 +1,178 @@
+"""
+Structured logging
+==================
+
+Leveled logging for the agents, the orchestrator and the API, replacing
+the print-based progress output.
+
+- Records are handed to a QueueHandler; a single QueueListener thread
+  formats and writes them, so agent threads never block on console I/O.
+- Every record carries the incident and 5-Why branch of the code that
+  emitted it (contextvars; set with log_context()), so interleaved output
+  of concurrent investigations can be told apart and filtered.
+- Verbose console output (branch trees, summaries, model response
+  previews) is logged at DEBUG and built only when DEBUG is enabled.
+
+Environment:
+    HSE_LOG_LEVEL    DEBUG | INFO | WARNING | ... (default INFO)
+    HSE_LOG_FORMAT   text | json (default text)
+    HSE_DEBUG        1 → DEBUG level (verbose trees and previews)
+
+Usage:
+    from shared.log import get_logger, log_context
+
+    logger = get_logger(__name__)
+    with log_context(incident_id="INC-20250101-120000"):
+        logger.info("Part 1 complete", extra={"stage": "part1"})
+"""
+
+import atexit
+import contextlib
+import contextvars
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import threading
+from datetime import datetime
+from typing import Iterator, Optional
+
+ROOT_LOGGER = "hse"
+
+incident_id_var: contextvars.ContextVar = contextvars.ContextVar("hse_incident_id", default=None)
+branch_id_var: contextvars.ContextVar = contextvars.ContextVar("hse_branch_id", default=None)
+
+# Attributes every LogRecord has; anything else came in via extra=
+_RESERVED = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {
+    "message", "asctime", "incident_id", "branch_id",
+}
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_configure_lock = threading.Lock()
+
+
+@contextlib.contextmanager
+def log_context(incident_id: Optional[str] = None, branch_id: Optional[str] = None) -> Iterator[None]:
+    """Tag all records emitted inside the block (and stage threads it spawns)."""
+    tokens = []
+    if incident_id is not None:
+        tokens.append((incident_id_var, incident_id_var.set(str(incident_id))))
+    if branch_id is not None:
+        tokens.append((branch_id_var, branch_id_var.set(str(branch_id))))
+    try:
+        yield
+    finally:
+        for var, token in reversed(tokens):
+            var.reset(token)
+
+
+class ContextFilter(logging.Filter):
+    """Stamps incident/branch ids on the record in the emitting thread."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.incident_id = incident_id_var.get()
+        record.branch_id = branch_id_var.get()
+        return True
+
+
+class TextFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        tags = " ".join(
+            f"{key}={value}" for key, value in (
+                ("incident", getattr(record, "incident_id", None)),
+                ("branch", getattr(record, "branch_id", None)),
+            ) if value
+        )
+        head = f"{self.formatTime(record, '%H:%M:%S')} {record.levelname:<7} {record.name}"
+        text = f"{head} [{tags}] {record.getMessage()}" if tags else f"{head} {record.getMessage()}"
+        if record.exc_info:
+            text += "\n" + self.formatException(record.exc_info)
+        return text
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line; extra= fields are kept as top-level keys."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for key in ("incident_id", "branch_id"):
+            if getattr(record, key, None):
+                entry[key] = getattr(record, key)
+        for key, value in record.__dict__.items():
+            if key not in _RESERVED and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+def configure_logging(level: Optional[str] = None, fmt: Optional[str] = None,
+                      stream=None, force: bool = False) -> logging.Logger:
+    """
+    Attach the queue handler to the "hse" logger (idempotent).
+
+    Args:
+        level: Log level (default: HSE_LOG_LEVEL, or DEBUG when HSE_DEBUG is set)
+        fmt: "text" or "json" (default: HSE_LOG_FORMAT)
+        stream: Output stream of the listener (default: stderr)
+        force: Reconfigure even if already configured
+    """
+    global _listener
+    root = logging.getLogger(ROOT_LOGGER)
+    with _configure_lock:
+        if _listener is not None and not force:
+            return root
+        if _listener is not None:
+            _listener.stop()
+            for handler in list(root.handlers):
+                root.removeHandler(handler)
+
+        if level is None:
+            debug = os.getenv("HSE_DEBUG", "").lower() in ("1", "true", "yes")
+            level = "DEBUG" if debug else os.getenv("HSE_LOG_LEVEL", "INFO")
+        fmt = (fmt or os.getenv("HSE_LOG_FORMAT", "text")).lower()
+
+        output = logging.StreamHandler(stream or sys.stderr)
+        output.setFormatter(JsonFormatter() if fmt == "json" else TextFormatter())
+
+        records: queue.Queue = queue.Queue(-1)
+        queue_handler = logging.handlers.QueueHandler(records)
+        queue_handler.addFilter(ContextFilter())
+
+        root.addHandler(queue_handler)
+        root.setLevel(level.upper() if isinstance(level, str) else level)
+        root.propagate = False
+
+        _listener = logging.handlers.QueueListener(records, output, respect_handler_level=True)
+        _listener.start()
+    return root
+
+
+def shutdown_logging() -> None:
+    """Flush queued records (registered with atexit)."""
+    global _listener
+    with _configure_lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
+            root = logging.getLogger(ROOT_LOGGER)
+            for handler in list(root.handlers):
+                root.removeHandler(handler)
+
+
+atexit.register(shutdown_logging)
+
+
+def get_logger(name: str) -> logging.Logger:
+    """Logger under the "hse" hierarchy; configures logging on first use."""
+    if _listener is None:
+        configure_logging()
+    return logging.getLogger(f"{ROOT_LOGGER}.{name}")
+
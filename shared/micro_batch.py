@@ -0,0 +1,241 @@
+"""
+Cross-incident micro-batching of small LLM calls
+================================================
+
+Classification-style calls (incident type, event type, severity, RIDDOR)
+are tiny: a few hundred prompt tokens and at most a couple hundred
+completion tokens. Under bulk load every concurrent investigation issues
+its own, so the request count - and rate-limit pressure - grows with the
+number of incidents rather than the amount of work.
+
+MicroBatcher collects such calls for a few milliseconds. Calls with the
+same instructions and model that arrive within the window are sent as one
+multi-item prompt:
+
+    system  BATCH_PREAMBLE + the task's own instructions   (cacheable prefix)
+    user    ITEM 1: <input> ... ITEM n: <input>
+    reply   {"results": [{"id": 1, "answer": ...}, ...]}
+
+and each caller gets the answer for its item as if it had made the call
+alone. The shared request runs at the most urgent priority among its
+items (shared/priority.py) and is logged under incident "batch", not
+under the incident of whichever caller happened to send it. An item missing from the reply, or a batch call that fails or
+cannot be parsed, falls back to the caller's own single-item call. A
+window with a single item is sent as the ordinary single-item request.
+
+    from shared.micro_batch import get_micro_batcher
+    text = get_micro_batcher().complete(self.client, instructions, incident,
+                                        model="anthropic/claude-sonnet-4.5", max_tokens=50)
+
+Configuration: LLM_MICRO_BATCH_WINDOW_MS (default 10; 0 disables),
+LLM_MICRO_BATCH_MAX (items per batch, default 16).
+"""
+
+import contextvars
+import json
+import os
+import re
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from .log import get_logger, log_context
+from .priority import current_priority, priority_context, priority_rank
+from .prompt_cache import cacheable_messages
+
+logger = get_logger("llm.batch")
+
+BATCH_PREAMBLE = """You will receive several independent items, each labelled "ITEM <id>:".
+Apply the task below to EACH item separately; items do not influence each other.
+
+Return ONLY JSON of this form, one entry per item:
+{"results": [{"id": <id>, "answer": <the answer for that item, exactly as the task asks for it>}]}
+
+TASK:"""
+
+# Completion tokens of the JSON envelope per item
+_ENVELOPE_TOKENS = 20
+# Log context incident id of batched requests (they serve several incidents)
+BATCH_INCIDENT_ID = "batch"
+
+
+class _Pending:
+    def __init__(self, item: str, max_tokens: int):
+        self.item = item
+        self.max_tokens = max_tokens
+        # Priority of the caller's investigation, captured in its own thread
+        self.priority = current_priority()
+        self.done = threading.Event()
+        self.result: Optional[str] = None
+
+
+class _Batch:
+    def __init__(self):
+        self.items: List[_Pending] = []
+        self.full = threading.Event()
+
+
+class MicroBatcher:
+    """
+    Args:
+        window_ms: How long the first call of a batch waits for others
+        max_batch: Items per batch (a full batch is sent immediately)
+    """
+
+    def __init__(self, window_ms: float = 10.0, max_batch: int = 16):
+        self.window_s = window_ms / 1000.0
+        self.max_batch = max(1, max_batch)
+        self._open: Dict[Tuple[str, str, float], _Batch] = {}
+        self._lock = threading.Lock()
+        self._stats = {"calls": 0, "requests": 0, "batches": 0, "batched_items": 0, "fallbacks": 0}
+
+    @classmethod
+    def from_env(cls) -> "MicroBatcher":
+        return cls(
+            window_ms=float(os.getenv("LLM_MICRO_BATCH_WINDOW_MS", "10")),
+            max_batch=int(os.getenv("LLM_MICRO_BATCH_MAX", "16")),
+        )
+
+    def complete(self, client, instructions: str, item: str, model: str,
+                 max_tokens: int = 50, temperature: float = 0.0) -> str:
+        """
+        Content of the completion for `instructions` + `item`, batched with
+        concurrent calls of the same task. Errors of the single-item call
+        propagate to the caller as they would without batching.
+        """
+        self._count("calls")
+        if self.window_s <= 0 or self.max_batch == 1:
+            return self._single(client, instructions, item, model, max_tokens, temperature)
+
+        key = (model, instructions, temperature)
+        pending = _Pending(item, max_tokens)
+        with self._lock:
+            batch = self._open.get(key)
+            leader = batch is None
+            if leader:
+                batch = self._open[key] = _Batch()
+            batch.items.append(pending)
+            if len(batch.items) >= self.max_batch:
+                del self._open[key]
+                batch.full.set()
+
+        if leader:
+            batch.full.wait(self.window_s)
+            with self._lock:
+                if self._open.get(key) is batch:
+                    del self._open[key]
+            if len(batch.items) == 1:
+                return self._single(client, instructions, item, model, max_tokens, temperature)
+            try:
+                self._send(client, batch.items, instructions, model, temperature)
+            finally:
+                for other in batch.items:
+                    other.done.set()
+        else:
+            pending.done.wait()
+
+        if pending.result is None:
+            self._count("fallbacks")
+            return self._single(client, instructions, item, model, max_tokens, temperature)
+        return pending.result
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+        stats["saved_requests"] = stats["calls"] - stats["requests"]
+        return stats
+
+    def reset(self) -> None:
+        with self._lock:
+            for key in self._stats:
+                self._stats[key] = 0
+
+    # ─────────────────────────────────────────────────────────────────────────
+
+    def _count(self, key: str, n: int = 1) -> None:
+        with self._lock:
+            self._stats[key] += n
+
+    def _single(self, client, instructions: str, item: str, model: str,
+                max_tokens: int, temperature: float) -> str:
+        self._count("requests")
+        response = client.chat.completions.create(
+            model=model,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            messages=cacheable_messages([instructions], item),
+            extra_headers={"anthropic-version": "2023-06-01"}
+        )
+        return response.choices[0].message.content.strip()
+
+    def _send(self, client, items: List[_Pending], instructions: str, model: str,
+              temperature: float) -> None:
+        """One request for all items; sets the result of every item found in the reply."""
+        level = min((p.priority for p in items), key=priority_rank)
+
+        def send() -> None:
+            # Fresh context: none of the leader's incident/branch tags or priority
+            with log_context(incident_id=BATCH_INCIDENT_ID), priority_context(level):
+                self._send_batch(client, items, instructions, model, temperature)
+
+        contextvars.Context().run(send)
+
+    def _send_batch(self, client, items: List[_Pending], instructions: str, model: str,
+                    temperature: float) -> None:
+        self._count("requests")
+        self._count("batches")
+        body = "\n\n".join(f"ITEM {i}:\n{p.item}" for i, p in enumerate(items, 1))
+        try:
+            response = client.chat.completions.create(
+                model=model,
+                temperature=temperature,
+                max_tokens=sum(p.max_tokens + _ENVELOPE_TOKENS for p in items),
+                messages=cacheable_messages([BATCH_PREAMBLE, instructions], body),
+                extra_headers={"anthropic-version": "2023-06-01"}
+            )
+            answers = self._parse(response.choices[0].message.content or "")
+        except Exception as e:
+            logger.warning("Batched call of %d items failed; items fall back to single calls: %s",
+                           len(items), e)
+            return
+
+        for i, pending in enumerate(items, 1):
+            answer = answers.get(i)
+            if answer is None:
+                continue
+            pending.result = answer if isinstance(answer, str) else json.dumps(answer, ensure_ascii=False)
+        answered = sum(p.result is not None for p in items)
+        self._count("batched_items", answered)
+        logger.debug("Batched %d items in one request (%d answered)", len(items), answered)
+
+    @staticmethod
+    def _parse(content: str) -> Dict[int, Any]:
+        """id → answer of a batched reply (markdown fences and surrounding text tolerated)."""
+        match = re.search(r"\{.*\}", content, re.DOTALL)
+        try:
+            data = json.loads(match.group(0)) if match else {}
+        except json.JSONDecodeError:
+            logger.warning("Unparseable batched reply: %s...", content[:200])
+            data = {}
+        answers = {}
+        for entry in (data.get("results") if isinstance(data, dict) else None) or []:
+            if not isinstance(entry, dict) or entry.get("answer") in (None, ""):
+                continue
+            try:
+                answers[int(entry.get("id"))] = entry["answer"]
+            except (TypeError, ValueError):
+                continue
+        return answers
+
+
+_batcher: Optional[MicroBatcher] = None
+_batcher_lock = threading.Lock()
+
+
+def get_micro_batcher() -> MicroBatcher:
+    """Process-wide batcher (configured from the environment on first use)."""
+    global _batcher
+    if _batcher is None:
+        with _batcher_lock:
+            if _batcher is None:
+                _batcher = MicroBatcher.from_env()
+    return _batcher
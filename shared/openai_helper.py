@@ -9,8 +9,12 @@ from openai import OpenAI
 from dotenv import load_dotenv
 import json
 
+from .log import get_logger
+
 load_dotenv()
 
+logger = get_logger(__name__)
+
 
 class OpenAIClient:
     """
@@ -43,9 +47,7 @@ class OpenAIClient:
         self.temperature = temperature
         self.max_tokens = max_tokens
         
-        print(f"✅ OpenAI Client initialized")
-        print(f"🤖 Model: {self.model}")
-        print(f"🌡️  Temperature: {self.temperature}")
+        logger.info("OpenAI client initialized (model: %s, temperature: %s)", self.model, self.temperature)
     
     def chat_completion(
         self,
@@ -125,8 +127,8 @@ class OpenAIClient:
         try:
             return json.loads(response_text)
         except json.JSONDecodeError as e:
-            print(f"⚠️  JSON parsing error: {e}")
-            print(f"Raw response: {response_text}")
+            logger.warning("JSON parsing error: %s", e)
+            logger.debug("Raw response: %s", response_text)
             return {"error": "Failed to parse JSON", "raw_response": response_text}
     
     def simple_prompt(
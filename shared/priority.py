@@ -0,0 +1,215 @@
+"""
+Severity-aware priority for LLM capacity
+========================================
+
+Part 2 grades every incident (investigation_level / priority), but without
+this module all investigations compete equally for LLM capacity, so a
+backlog import can hold up an urgent fatality investigation. The priority
+of the current investigation travels with the log context, and every LLM
+request is admitted in priority order:
+
+    critical   High level investigations (fatality / major injury)
+    high       High priority, Medium level
+    normal     not assessed yet (default)
+    low        Low level / Basic, and bulk imports until Part 2 says otherwise
+
+Waiting requests are ordered by virtual arrival time, arrival + rank × aging
+(LLM_PRIORITY_AGING_S, default 30s per rank): a critical request overtakes
+queued low ones, but a low request that has waited 3 × aging is served
+before any newcomer, so nothing starves.
+
+PriorityGate caps the LLM requests in flight per process
+(LLM_MAX_CONCURRENCY, default 32) and keeps a slice of them
+(LLM_CRITICAL_RESERVED, default 4) for critical investigations only. The
+rate limiter queue (shared/rate_limit.py) uses the same ordering, across
+workers.
+
+    with priority_context("low"):           # orchestrator / API
+        ...
+        set_priority(priority_from_assessment(part2))   # once Part 2 is known
+"""
+
+import contextlib
+import contextvars
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from typing import Any, Deque, Dict, Iterator, List, Optional
+
+import httpx
+
+from .log import get_logger
+
+logger = get_logger("llm.priority")
+
+PRIORITY_LEVELS = ("critical", "high", "normal", "low")
+DEFAULT_PRIORITY = "normal"
+PRIORITY_AGING_S = float(os.getenv("LLM_PRIORITY_AGING_S", "30"))
+
+
+class _Priority:
+    """Mutable holder, so a level set in one stage thread is seen by its siblings."""
+
+    def __init__(self, level: str):
+        self.level = level
+
+
+priority_var: contextvars.ContextVar = contextvars.ContextVar("hse_priority", default=None)
+
+
+def normalize_priority(level: Optional[str]) -> str:
+    level = (level or "").strip().lower()
+    return level if level in PRIORITY_LEVELS else DEFAULT_PRIORITY
+
+
+def priority_rank(level: Optional[str]) -> int:
+    return PRIORITY_LEVELS.index(normalize_priority(level))
+
+
+def virtual_time(arrival: float, level: Optional[str], aging_s: float = PRIORITY_AGING_S) -> float:
+    """Ordering key of a waiting request: lower is served first."""
+    return arrival + priority_rank(level) * aging_s
+
+
+def priority_from_assessment(part2: Optional[Dict]) -> str:
+    """Scheduling priority of a Part 2 assessment."""
+    part2 = part2 or {}
+    level = str(part2.get("investigation_level") or "").lower()
+    priority = str(part2.get("priority") or "").lower()
+    if level.startswith("high"):
+        return "critical"
+    if priority == "high" or level.startswith("medium"):
+        return "high"
+    if priority == "low" or level.startswith(("low", "basic")):
+        return "low"
+    return DEFAULT_PRIORITY
+
+
+@contextlib.contextmanager
+def priority_context(level: Optional[str] = None) -> Iterator[None]:
+    """Run the block (and stage threads it spawns) at `level`."""
+    token = priority_var.set(_Priority(normalize_priority(level)))
+    try:
+        yield
+    finally:
+        priority_var.reset(token)
+
+
+def set_priority(level: Optional[str]) -> None:
+    """Change the level of the current priority context (no-op outside one)."""
+    holder = priority_var.get()
+    if holder is not None:
+        holder.level = normalize_priority(level)
+
+
+def current_priority() -> str:
+    holder = priority_var.get()
+    return holder.level if holder is not None else DEFAULT_PRIORITY
+
+
+class _Waiter:
+    def __init__(self, level: str, seq: int, aging_s: float):
+        self.level = level
+        self.arrival = time.monotonic()
+        self.key = (virtual_time(self.arrival, level, aging_s), seq)
+
+
+class PriorityGate:
+    """
+    llm_client middleware admitting requests in priority order.
+
+    Args:
+        max_concurrent: LLM requests in flight in this process
+        reserved: Slots only critical requests may use
+        aging_s: Seconds of waiting that make up for one priority rank
+    """
+
+    def __init__(self, max_concurrent: int = 32, reserved: int = 4, aging_s: float = PRIORITY_AGING_S):
+        self.max_concurrent = max(1, max_concurrent)
+        self.reserved = min(max(0, reserved), self.max_concurrent - 1)
+        self.aging_s = aging_s
+        self._cond = threading.Condition()
+        self._waiting: List[_Waiter] = []
+        self._in_flight = 0
+        self._seq = 0
+        self._stats: Dict[str, Dict[str, float]] = defaultdict(lambda: {"requests": 0, "total_wait_s": 0.0})
+        self._waits: Dict[str, Deque[float]] = defaultdict(lambda: deque(maxlen=1000))
+
+    @classmethod
+    def from_env(cls) -> "PriorityGate":
+        return cls(
+            max_concurrent=int(os.getenv("LLM_MAX_CONCURRENCY", "32")),
+            reserved=int(os.getenv("LLM_CRITICAL_RESERVED", "4")),
+        )
+
+    def __call__(self, request: httpx.Request, call_next) -> httpx.Response:
+        self.acquire(current_priority())
+        try:
+            return call_next(request)
+        finally:
+            self.release()
+
+    def acquire(self, level: str = DEFAULT_PRIORITY) -> float:
+        """Block until a slot is free for `level` and no better waiter is ahead. Returns seconds waited."""
+        level = normalize_priority(level)
+        with self._cond:
+            self._seq += 1
+            waiter = _Waiter(level, self._seq, self.aging_s)
+            self._waiting.append(waiter)
+            while self._next() is not waiter:
+                self._cond.wait(1.0)
+            self._waiting.remove(waiter)
+            self._in_flight += 1
+            waited = time.monotonic() - waiter.arrival
+            self._stats[level]["requests"] += 1
+            self._stats[level]["total_wait_s"] += waited
+            self._waits[level].append(waited)
+            # The next waiter may fit as well
+            self._cond.notify_all()
+        if waited >= 1.0:
+            logger.info("%s priority LLM request waited %.1fs for a slot", level, waited)
+        return waited
+
+    def release(self) -> None:
+        with self._cond:
+            self._in_flight -= 1
+            self._cond.notify_all()
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._cond:
+            levels = {}
+            for level in PRIORITY_LEVELS:
+                waits = sorted(self._waits[level])
+                stats = self._stats[level]
+                levels[level] = {
+                    "requests": int(stats["requests"]),
+                    "waiting": sum(1 for w in self._waiting if w.level == level),
+                    "total_wait_s": round(stats["total_wait_s"], 3),
+                    "p95_wait_s": round(waits[min(len(waits) - 1, int(round(0.95 * (len(waits) - 1))))], 3)
+                                  if waits else 0.0,
+                }
+            return {"max_concurrent": self.max_concurrent, "reserved_critical": self.reserved,
+                    "in_flight": self._in_flight, "levels": levels}
+
+    def _next(self) -> Optional[_Waiter]:
+        """The waiter to admit now: the first in virtual-time order whose class has a free slot."""
+        free = self.max_concurrent - self._in_flight
+        for waiter in sorted(self._waiting, key=lambda w: w.key):
+            if free > (0 if waiter.level == "critical" else self.reserved):
+                return waiter
+        return None
+
+
+_gate: Optional[PriorityGate] = None
+_gate_lock = threading.Lock()
+
+
+def get_priority_gate() -> PriorityGate:
+    """The process-wide gate installed by create_openrouter_client."""
+    global _gate
+    if _gate is None:
+        with _gate_lock:
+            if _gate is None:
+                _gate = PriorityGate.from_env()
+    return _gate
@@ -0,0 +1,148 @@
+"""
+Investigation progress events
+=============================
+
+Agents publish what they have finished as it happens, so clients can show
+results while an investigation is still running instead of waiting for the
+whole blocking call. The API streams the events of an incident as
+Server-Sent Events (GET /api/v1/incidents/{incident_id}/events).
+
+Events are addressed by the incident id of the current log context
+(shared.log.log_context / incident_id_var), which the API middleware and
+the orchestrator already set and stage/branch threads inherit, so agents
+only call emit():
+
+    from shared.progress import emit
+    emit("branch_complete", branch=1, root_code="D4.2")
+
+Event types:
+    stage             {stage, status: started|completed|failed, error?}
+    immediate_cause   {index, code, title, cause}
+    branch_complete   {branch, immediate_code, root_code, root_title, root_cause, whys, resumed, revised}
+    report            {step: content_reused|content_requested|content_ready|rendered, path?}
+    control_measure   {measure, responsible, target_date, category, control_type, root_cause}
+
+Each incident keeps a bounded history with increasing ids, so a client
+that subscribes late (or reconnects with Last-Event-ID) gets what it missed.
+"""
+
+import contextlib
+import threading
+from collections import OrderedDict, deque
+from datetime import datetime
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional
+
+from .log import get_logger, incident_id_var
+
+logger = get_logger("progress")
+
+Subscriber = Callable[[Dict[str, Any]], None]
+
+
+class _Channel:
+    def __init__(self, history: int):
+        self.next_id = 1
+        self.events: Deque[Dict[str, Any]] = deque(maxlen=history)
+        self.subscribers: List[Subscriber] = []
+
+
+class ProgressBroker:
+    """
+    Per-incident event fan-out with replay.
+
+    Args:
+        history: Events kept per incident for late subscribers
+        max_incidents: Incidents kept (least recently active are dropped)
+    """
+
+    def __init__(self, history: int = 500, max_incidents: int = 256):
+        self.history = history
+        self.max_incidents = max_incidents
+        self._channels: "OrderedDict[str, _Channel]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _channel(self, incident_id: str) -> _Channel:
+        channel = self._channels.get(incident_id)
+        if channel is None:
+            channel = self._channels[incident_id] = _Channel(self.history)
+            while len(self._channels) > self.max_incidents:
+                oldest, dropped = next(iter(self._channels.items()))
+                if dropped.subscribers:
+                    break
+                del self._channels[oldest]
+        self._channels.move_to_end(incident_id)
+        return channel
+
+    def publish(self, incident_id: str, event: str, data: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Record an event and hand it to the incident's subscribers."""
+        with self._lock:
+            channel = self._channel(incident_id)
+            record = {
+                "id": channel.next_id,
+                "event": event,
+                "incident_id": incident_id,
+                "ts": datetime.now().isoformat(timespec="milliseconds"),
+                "data": data or {},
+            }
+            channel.next_id += 1
+            channel.events.append(record)
+            subscribers = list(channel.subscribers)
+        for subscriber in subscribers:
+            try:
+                subscriber(record)
+            except Exception as e:
+                logger.debug("Progress subscriber failed: %s", e)
+        return record
+
+    def subscribe(self, incident_id: str, subscriber: Subscriber,
+                  after: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Register `subscriber` for new events of the incident.
+
+        Returns the recorded events with id > `after` (all if None); no event
+        is lost or duplicated between this backlog and the live events.
+        """
+        with self._lock:
+            channel = self._channel(incident_id)
+            channel.subscribers.append(subscriber)
+            return [e for e in channel.events if after is None or e["id"] > after]
+
+    def unsubscribe(self, incident_id: str, subscriber: Subscriber) -> None:
+        with self._lock:
+            channel = self._channels.get(incident_id)
+            if channel is not None and subscriber in channel.subscribers:
+                channel.subscribers.remove(subscriber)
+
+    def events(self, incident_id: str, after: Optional[int] = None) -> List[Dict[str, Any]]:
+        with self._lock:
+            channel = self._channels.get(incident_id)
+            if channel is None:
+                return []
+            return [e for e in channel.events if after is None or e["id"] > after]
+
+
+_broker = ProgressBroker()
+
+
+def get_broker() -> ProgressBroker:
+    return _broker
+
+
+def emit(event: str, **data: Any) -> Optional[Dict[str, Any]]:
+    """Publish an event for the incident of the current log context (no-op outside one)."""
+    incident_id = incident_id_var.get()
+    if incident_id is None:
+        return None
+    return _broker.publish(incident_id, event, data)
+
+
+@contextlib.contextmanager
+def track_stage(stage: str) -> Iterator[None]:
+    """Emit stage started / completed (or failed, re-raising) around the block."""
+    emit("stage", stage=stage, status="started")
+    try:
+        yield
+    except Exception as e:
+        emit("stage", stage=stage, status="failed", error=str(e))
+        raise
+    emit("stage", stage=stage, status="completed")
@@ -0,0 +1,58 @@
+"""
+Cacheable prompt layout
+=======================
+
+Provider prompt caching (Anthropic models via OpenRouter) reuses the part
+of a request up to a cache_control breakpoint, and only when that part is
+byte-identical to an earlier request. Agents therefore lay prompts out as
+
+    system: role, rules, reference lists (taxonomy), output schema  ← breakpoint
+    user:   the incident text and any other per-call values
+
+so everything that is the same for every incident forms the prefix and
+the incident content follows it. Per-call values (dates, ref numbers,
+codes used by earlier 5-Why branches) must stay out of the stable blocks,
+otherwise the prefix never repeats. Prefixes shorter than the provider
+minimum (1024 tokens for Sonnet/Opus) are simply not cached.
+
+Cache reads/writes are counted by shared/llm_usage.UsageTracker.
+"""
+
+from typing import Any, Dict, List, Sequence
+
+CACHE_CONTROL = {"type": "ephemeral"}
+
+
+def cacheable_messages(stable: Sequence[str], variable: str) -> List[Dict[str, Any]]:
+    """
+    Chat messages with `stable` as a cached system prefix and `variable`
+    as the user message.
+
+    Args:
+        stable: Text blocks identical across calls (instructions, taxonomy, schema)
+        variable: Per-call content (incident report, branch-specific values)
+    """
+    blocks = [{"type": "text", "text": text} for text in stable if text]
+    if not blocks:
+        return [{"role": "user", "content": variable}]
+    blocks[-1]["cache_control"] = dict(CACHE_CONTROL)
+    return [
+        {"role": "system", "content": blocks},
+        {"role": "user", "content": variable},
+    ]
+
+
+def cacheable_prefix(body: Dict[str, Any]) -> str:
+    """Text of a chat request up to its last cache_control breakpoint ("" if none)."""
+    parts: List[str] = []
+    prefix = ""
+    for message in body.get("messages") or []:
+        content = message.get("content")
+        blocks = content if isinstance(content, list) else [{"text": content or ""}]
+        for block in blocks:
+            if not isinstance(block, dict):
+                continue
+            parts.append(f"{message.get('role', '')}:{block.get('text', '')}")
+            if block.get("cache_control"):
+                prefix = "\n".join(parts)
+    return prefix
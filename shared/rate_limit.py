@@ -0,0 +1,322 @@
+"""
+Per-model token-bucket rate limiting for LLM requests
+=====================================================
+
+Under bulk ingestion the agents outrun the OpenRouter limits, get 429s and
+fall back to degraded output. TokenBucketLimiter is an llm_client
+middleware that holds each request until the model's budgets allow it:
+
+    requests per minute   one token of the "requests" bucket per request
+    tokens per minute     estimated prompt + max_tokens, corrected with the
+                          response's actual usage once it arrives (for
+                          streams: the final usage chunk, sent when the
+                          request asks for stream_options.include_usage;
+                          otherwise the stream stays charged at the estimate)
+
+Buckets refill continuously and hold at most one period's budget. Waiting
+callers of a model are served strictly in order (a ticket queue), so a
+large request is not starved by a stream of small ones; the order is by
+arrival, adjusted for the investigation's priority (shared/priority.py). A 429 that
+still gets through pauses the model for its Retry-After and the request
+is queued again instead of failing.
+
+State lives in SQLite: in memory for a single process, or a file shared by
+every uvicorn / batch worker on the host (LLM_RATE_LIMIT_DB).
+
+Environment (the limiter is installed when any budget is set):
+    LLM_RPM / LLM_TPM      default budgets for every model
+    LLM_RATE_LIMITS        per-model overrides, "model=RPM/TPM,..." (0 or
+                           empty = unlimited), e.g.
+                           "anthropic/claude-sonnet-4.5=50/40000,anthropic/claude-haiku-4.5=100/"
+    LLM_RATE_LIMIT_DB      SQLite file (default outputs/llm_rate_limit.sqlite)
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import defaultdict, deque
+from pathlib import Path
+from typing import Any, Deque, Dict, Optional, Tuple
+
+import httpx
+
+from .llm_usage import StreamTee, normalize_usage, sse_usage
+from .log import get_logger
+from .priority import current_priority, virtual_time
+
+logger = get_logger("llm.rate_limit")
+
+# model -> (requests per period, tokens per period); "*" is the default
+Limits = Dict[str, Tuple[Optional[float], Optional[float]]]
+
+DEFAULT_MAX_TOKENS = 1024
+# Tickets of callers that stopped polling (crashed worker) are dropped after this
+_STALE_TICKET_S = 30.0
+
+
+def parse_limits(spec: str) -> Limits:
+    """ "model=RPM/TPM,..." → limits (a missing or 0 value means unlimited)."""
+    limits: Limits = {}
+    for entry in (spec or "").split(","):
+        if "=" not in entry:
+            continue
+        model, budget = entry.split("=", 1)
+        rpm, _, tpm = budget.partition("/")
+        limits[model.strip()] = (float(rpm) if rpm.strip() else None, float(tpm) if tpm.strip() else None)
+    return limits
+
+
+def estimate_tokens(body: Dict[str, Any]) -> int:
+    """Prompt (≈4 characters per token) plus the completion budget of a request body."""
+    prompt = len(json.dumps(body.get("messages") or [], ensure_ascii=False)) // 4
+    return prompt + int(body.get("max_tokens") or DEFAULT_MAX_TOKENS)
+
+
+class TokenBucketLimiter:
+    """
+    Args:
+        limits: Budgets per model ("*" for every other model)
+        db_path: SQLite file shared by the workers of the host (None: this process only)
+        period: Seconds the budgets are given for
+        max_retries: 429 responses absorbed per request before it is returned to the caller
+    """
+
+    def __init__(self, limits: Limits, db_path: Optional[str] = None,
+                 period: float = 60.0, max_retries: int = 3):
+        self.limits = {model: (rpm or None, tpm or None) for model, (rpm, tpm) in limits.items()}
+        self.db_path = db_path
+        self.period = period
+        self.max_retries = max_retries
+        self._lock = threading.Lock()
+        self._waits: Dict[str, Deque[float]] = defaultdict(lambda: deque(maxlen=1000))
+        self._stats: Dict[str, Dict[str, float]] = defaultdict(
+            lambda: {"requests": 0, "total_wait_s": 0.0, "max_wait_s": 0.0, "throttled": 0})
+
+        if db_path:
+            Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(db_path or ":memory:", timeout=10, isolation_level=None,
+                                   check_same_thread=False)
+        with self._lock:
+            if db_path:
+                self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("CREATE TABLE IF NOT EXISTS buckets "
+                             "(model TEXT, kind TEXT, level REAL, updated_at REAL, PRIMARY KEY (model, kind))")
+            self._db.execute("CREATE TABLE IF NOT EXISTS paused (model TEXT PRIMARY KEY, until REAL)")
+            self._db.execute("CREATE TABLE IF NOT EXISTS queue "
+                             "(ticket INTEGER PRIMARY KEY AUTOINCREMENT, model TEXT, seen_at REAL, rank_at REAL)")
+
+    @classmethod
+    def from_env(cls) -> Optional["TokenBucketLimiter"]:
+        """The limiter configured by the environment, None if no budget is set."""
+        limits: Limits = {}
+        rpm, tpm = os.getenv("LLM_RPM"), os.getenv("LLM_TPM")
+        if rpm or tpm:
+            limits["*"] = (float(rpm) if rpm else None, float(tpm) if tpm else None)
+        limits.update(parse_limits(os.getenv("LLM_RATE_LIMITS", "")))
+        if not any(rpm or tpm for rpm, tpm in limits.values()):
+            return None
+        return cls(limits, db_path=os.getenv("LLM_RATE_LIMIT_DB", "outputs/llm_rate_limit.sqlite"))
+
+    def limits_for(self, model: str) -> Tuple[Optional[float], Optional[float]]:
+        return self.limits.get(model) or self.limits.get("*") or (None, None)
+
+    def __call__(self, request: httpx.Request, call_next) -> httpx.Response:
+        try:
+            body = json.loads(request.content) if request.method == "POST" else None
+        except (ValueError, httpx.RequestNotRead):
+            body = None
+        if not isinstance(body, dict):
+            return call_next(request)
+        model = body.get("model") or "*"
+        if self.limits_for(model) == (None, None):
+            return call_next(request)
+
+        estimate = estimate_tokens(body)
+        for attempt in range(self.max_retries + 1):
+            self.acquire(model, estimate)
+            response = call_next(request)
+            if response.status_code != 429 or attempt == self.max_retries:
+                break
+            response.read()
+            response.close()
+            self._throttled(model, response.headers.get("retry-after"))
+
+        if response.status_code != 200:
+            return response
+        if body.get("stream"):
+            if not response.headers.get("content-encoding"):
+                def on_close(tail: str) -> None:
+                    chunk = sse_usage(tail)
+                    if chunk is not None:
+                        self._reconcile(model, estimate, chunk["usage"])
+                response.stream = StreamTee(response.stream, on_close)
+            return response
+        try:
+            usage = json.loads(response.read()).get("usage")
+        except (ValueError, AttributeError):
+            usage = None
+        if usage:
+            self._reconcile(model, estimate, usage)
+        return response
+
+    def acquire(self, model: str, tokens: int = 0, priority: Optional[str] = None) -> float:
+        """
+        Block until the model's budgets allow a request of `tokens` and no
+        request ahead of it (by priority-adjusted arrival) is waiting.
+        Returns seconds waited.
+        """
+        start = time.monotonic()
+        ticket = self._enqueue(model, priority or current_priority())
+        try:
+            while True:
+                wait = self._try_acquire(model, ticket, tokens)
+                if wait <= 0:
+                    ticket = None
+                    break
+                time.sleep(min(wait, 0.5))
+        finally:
+            if ticket is not None:
+                self._dequeue(ticket)
+
+        waited = time.monotonic() - start
+        with self._lock:
+            stats = self._stats[model]
+            stats["requests"] += 1
+            stats["total_wait_s"] += waited
+            stats["max_wait_s"] = max(stats["max_wait_s"], waited)
+            self._waits[model].append(waited)
+        if waited >= 1.0:
+            logger.info("Rate limit held a %s request for %.1fs", model, waited)
+        return waited
+
+    def stats(self) -> Dict[str, Any]:
+        """Wait-time metrics, in total and per model."""
+        with self._lock:
+            models = {}
+            for model, stats in self._stats.items():
+                waits = sorted(self._waits[model])
+                p95 = waits[min(len(waits) - 1, int(round(0.95 * (len(waits) - 1))))] if waits else 0.0
+                rpm, tpm = self.limits_for(model)
+                models[model] = {
+                    "requests": int(stats["requests"]),
+                    "throttled": int(stats["throttled"]),
+                    "total_wait_s": round(stats["total_wait_s"], 3),
+                    "max_wait_s": round(stats["max_wait_s"], 3),
+                    "p95_wait_s": round(p95, 3),
+                    "rpm_limit": rpm,
+                    "tpm_limit": tpm,
+                }
+        return {
+            "requests": sum(m["requests"] for m in models.values()),
+            "throttled": sum(m["throttled"] for m in models.values()),
+            "total_wait_s": round(sum(m["total_wait_s"] for m in models.values()), 3),
+            "max_wait_s": max((m["max_wait_s"] for m in models.values()), default=0.0),
+            "limits": {model: {"rpm": rpm, "tpm": tpm} for model, (rpm, tpm) in self.limits.items()},
+            "models": models,
+        }
+
+    # ── SQLite state ─────────────────────────────────────────────────────────
+
+    def _enqueue(self, model: str, priority: Optional[str] = None) -> int:
+        now = time.time()
+        with self._lock:
+            return self._db.execute("INSERT INTO queue (model, seen_at, rank_at) VALUES (?, ?, ?)",
+                                    (model, now, virtual_time(now, priority))).lastrowid
+
+    def _dequeue(self, ticket: int) -> None:
+        with self._lock:
+            self._db.execute("DELETE FROM queue WHERE ticket = ?", (ticket,))
+
+    def _try_acquire(self, model: str, ticket: int, tokens: int) -> float:
+        """
+        Take the request's budget if this ticket is first in line and the
+        buckets hold enough (returns 0; the ticket is removed), otherwise
+        the seconds to wait before trying again.
+        """
+        rpm, tpm = self.limits_for(model)
+        now = time.time()
+        with self._lock:
+            db = self._db
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                db.execute("UPDATE queue SET seen_at = ? WHERE ticket = ?", (now, ticket))
+                db.execute("DELETE FROM queue WHERE seen_at < ?", (now - _STALE_TICKET_S,))
+                head = db.execute("SELECT ticket FROM queue WHERE model = ? ORDER BY rank_at, ticket LIMIT 1",
+                                  (model,)).fetchone()
+                if head is None or head[0] != ticket:
+                    db.execute("COMMIT")
+                    return 0.05
+
+                row = db.execute("SELECT until FROM paused WHERE model = ?", (model,)).fetchone()
+                if row and row[0] > now:
+                    db.execute("COMMIT")
+                    return row[0] - now
+
+                wait, levels = 0.0, {}
+                for kind, limit, cost in (("requests", rpm, 1), ("tokens", tpm, tokens)):
+                    if not limit:
+                        continue
+                    cost = min(cost, limit)
+                    level = self._level(model, kind, limit, now)
+                    levels[kind] = level - cost
+                    if level < cost:
+                        wait = max(wait, (cost - level) * self.period / limit)
+                if wait > 0:
+                    db.execute("COMMIT")
+                    return wait
+
+                for kind, level in levels.items():
+                    db.execute("INSERT OR REPLACE INTO buckets (model, kind, level, updated_at) VALUES (?, ?, ?, ?)",
+                               (model, kind, level, now))
+                db.execute("DELETE FROM queue WHERE ticket = ?", (ticket,))
+                db.execute("COMMIT")
+                return 0.0
+            except Exception:
+                db.execute("ROLLBACK")
+                raise
+
+    def _level(self, model: str, kind: str, limit: float, now: float) -> float:
+        """Current bucket level, refilled for the time since it was last written."""
+        row = self._db.execute("SELECT level, updated_at FROM buckets WHERE model = ? AND kind = ?",
+                               (model, kind)).fetchone()
+        if row is None:
+            return limit
+        level, updated_at = row
+        return min(limit, level + max(0.0, now - updated_at) * limit / self.period)
+
+    def _reconcile(self, model: str, estimate: int, usage: Dict[str, Any]) -> None:
+        counts = normalize_usage(usage)
+        self._refund(model, estimate - counts["prompt_tokens"] - counts["completion_tokens"])
+
+    def _refund(self, model: str, tokens: int) -> None:
+        """Correct the token bucket by estimated - actual tokens (negative charges the difference)."""
+        tpm = self.limits_for(model)[1]
+        if not tpm or not tokens:
+            return
+        now = time.time()
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                level = self._level(model, "tokens", tpm, now)
+                self._db.execute("INSERT OR REPLACE INTO buckets (model, kind, level, updated_at) "
+                                 "VALUES (?, ?, ?, ?)", (model, "tokens", min(tpm, level + tokens), now))
+                self._db.execute("COMMIT")
+            except Exception:
+                self._db.execute("ROLLBACK")
+                raise
+
+    def _throttled(self, model: str, retry_after: Optional[str]) -> None:
+        """Pause the model for every worker after a 429."""
+        try:
+            pause = float(retry_after) if retry_after else 1.0
+        except ValueError:
+            pause = 1.0
+        with self._lock:
+            self._stats[model]["throttled"] += 1
+            self._db.execute("INSERT OR REPLACE INTO paused (model, until) "
+                             "VALUES (?, MAX(?, COALESCE((SELECT until FROM paused WHERE model = ?), 0)))",
+                             (model, time.time() + pause, model))
+        logger.warning("429 from provider for %s; pausing it for %.1fs and queueing the request again",
+                       model, pause)
@@ -0,0 +1,251 @@
+"""
+Single-flight coalescing of identical LLM requests
+==================================================
+
+When the admin panel double-submits, or two workers pick up the same
+incident, the same prompt (Part 1 extraction, DOCX content, ...) is sent
+to OpenRouter twice at the same time and paid for twice. SingleFlight is
+an llm_client middleware that lets only the first of a set of concurrent
+identical requests through; the duplicates wait for it and get a copy of
+its response.
+
+Requests are identified by path + the normalized body
+(shared.llm_recorder.request_key). Only requests that are in flight are
+coalesced - a finished response is kept just long enough for waiting
+duplicates to pick it up, this is not a response cache.
+
+    in-process     duplicates in other threads wait on the leader's flight
+    cross-process  with a store path (LLM_SINGLE_FLIGHT_DB), workers claim
+                   the request in a local SQLite file; other workers poll it
+                   for the leader's response
+
+Streamed requests pass through (a copy could only be handed out after
+the whole stream). Non-200 responses and leader failures are not shared:
+waiting duplicates send their own request instead.
+
+Environment:
+    LLM_SINGLE_FLIGHT      0 disables coalescing (on by default)
+    LLM_SINGLE_FLIGHT_DB   SQLite file shared by the workers of one host
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+import httpx
+
+from .llm_recorder import request_key
+from .log import get_logger
+
+logger = get_logger("llm.single_flight")
+
+# status, headers, body
+_Result = Tuple[int, Dict[str, str], bytes]
+
+# Headers that describe the wire encoding of the leader's response, not its (decoded) body
+_WIRE_HEADERS = ("content-encoding", "content-length", "transfer-encoding")
+
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Optional[_Result] = None
+
+
+class SingleFlight:
+    """
+    Args:
+        db_path: SQLite file for coalescing across processes (None: in-process only)
+        wait_timeout: Longest a duplicate waits before sending its own request;
+                      also the age after which another worker's claim is stale
+        poll_interval: Seconds between checks of the store for another worker's response
+        retention: Seconds a finished response stays in the store for waiting workers
+    """
+
+    def __init__(self, db_path: Optional[str] = None, wait_timeout: float = 300.0,
+                 poll_interval: float = 0.05, retention: float = 2.0):
+        self.db_path = db_path
+        self.wait_timeout = wait_timeout
+        self.poll_interval = poll_interval
+        self.retention = retention
+        self._owner = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self._flights: Dict[str, _Flight] = {}
+        self._lock = threading.Lock()
+        self._stats = {"requests": 0, "leaders": 0, "shared_in_process": 0,
+                       "shared_cross_process": 0, "fallbacks": 0}
+        if db_path:
+            Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+            db = self._connect()
+            try:
+                db.execute("PRAGMA journal_mode=WAL")
+                db.execute("CREATE TABLE IF NOT EXISTS inflight "
+                           "(key TEXT PRIMARY KEY, owner TEXT, started_at REAL)")
+                db.execute("CREATE TABLE IF NOT EXISTS results "
+                           "(key TEXT PRIMARY KEY, status INTEGER, headers TEXT, body BLOB, finished_at REAL)")
+            finally:
+                db.close()
+
+    @classmethod
+    def from_env(cls) -> "SingleFlight":
+        return cls(db_path=os.getenv("LLM_SINGLE_FLIGHT_DB") or None)
+
+    def __call__(self, request: httpx.Request, call_next) -> httpx.Response:
+        key = self._key(request)
+        if key is None:
+            return call_next(request)
+        self._count("requests")
+
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+
+        if not leader:
+            flight.done.wait(self.wait_timeout)
+            if flight.result is not None:
+                self._count("shared_in_process")
+                logger.debug("Identical request in flight in this process; sharing its response")
+                return self._response(request, flight.result)
+            self._count("fallbacks")
+            return call_next(request)
+
+        try:
+            response, flight.result = self._lead(key, request, call_next)
+            return response
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+        stats["coalesced"] = stats["shared_in_process"] + stats["shared_cross_process"]
+        return stats
+
+    # ─────────────────────────────────────────────────────────────────────────
+
+    def _count(self, key: str) -> None:
+        with self._lock:
+            self._stats[key] += 1
+
+    @staticmethod
+    def _key(request: httpx.Request) -> Optional[str]:
+        if request.method != "POST":
+            return None
+        try:
+            body = json.loads(request.content)
+        except (ValueError, httpx.RequestNotRead):
+            return None
+        if not isinstance(body, dict) or body.get("stream"):
+            return None
+        return hashlib.sha256(f"{request.url.path}\n{request_key(body)}".encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def _response(request: httpx.Request, result: _Result) -> httpx.Response:
+        status, headers, body = result
+        return httpx.Response(status, headers=headers, content=body, request=request)
+
+    def _send(self, request: httpx.Request, call_next) -> Tuple[httpx.Response, Optional[_Result]]:
+        self._count("leaders")
+        response = call_next(request)
+        body = response.read()
+        if response.status_code != 200:
+            return response, None
+        headers = {k: v for k, v in response.headers.items() if k.lower() not in _WIRE_HEADERS}
+        return response, (response.status_code, headers, body)
+
+    def _lead(self, key: str, request: httpx.Request, call_next) -> Tuple[httpx.Response, Optional[_Result]]:
+        """The request for this process: sent, or (cross-process) taken from another worker."""
+        if not self.db_path:
+            return self._send(request, call_next)
+
+        deadline = time.monotonic() + self.wait_timeout
+        while True:
+            claimed, result = self._claim(key)
+            if claimed:
+                try:
+                    response, result = self._send(request, call_next)
+                    if result is not None:
+                        self._store(key, result)
+                    return response, result
+                finally:
+                    self._release(key)
+
+            if result is not None:
+                self._count("shared_cross_process")
+                logger.debug("Identical request in flight in another worker; sharing its response")
+                return self._response(request, result), result
+            if time.monotonic() >= deadline:
+                self._count("fallbacks")
+                return self._send(request, call_next)
+            time.sleep(self.poll_interval)
+
+    # ── SQLite store ─────────────────────────────────────────────────────────
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.db_path, timeout=10, isolation_level=None)
+
+    def _claim(self, key: str) -> Tuple[bool, Optional[_Result]]:
+        """
+        (True, None) if this worker now owns the request, (False, response)
+        if another worker has finished it, (False, None) while one is on it.
+        Stale claims are taken over.
+        """
+        now = time.time()
+        db = self._connect()
+        try:
+            # One write transaction: a leader stores its response before
+            # releasing its claim, so we see one or the other
+            db.execute("BEGIN IMMEDIATE")
+            row = db.execute("SELECT status, headers, body FROM results WHERE key = ? AND finished_at >= ?",
+                             (key, now - self.retention)).fetchone()
+            if row is not None:
+                db.execute("COMMIT")
+                return False, (row[0], json.loads(row[1]), bytes(row[2]))
+            db.execute("DELETE FROM inflight WHERE key = ? AND started_at < ?", (key, now - self.wait_timeout))
+            cursor = db.execute("INSERT OR IGNORE INTO inflight (key, owner, started_at) VALUES (?, ?, ?)",
+                                (key, self._owner, now))
+            db.execute("COMMIT")
+            return cursor.rowcount == 1, None
+        finally:
+            db.close()
+
+    def _release(self, key: str) -> None:
+        db = self._connect()
+        try:
+            db.execute("DELETE FROM inflight WHERE key = ? AND owner = ?", (key, self._owner))
+        finally:
+            db.close()
+
+    def _store(self, key: str, result: _Result) -> None:
+        status, headers, body = result
+        now = time.time()
+        db = self._connect()
+        try:
+            db.execute("DELETE FROM results WHERE finished_at < ?", (now - self.retention,))
+            db.execute("INSERT OR REPLACE INTO results (key, status, headers, body, finished_at) "
+                       "VALUES (?, ?, ?, ?, ?)", (key, status, json.dumps(headers), body, now))
+        finally:
+            db.close()
+
+
+_single_flight: Optional[SingleFlight] = None
+_single_flight_lock = threading.Lock()
+
+
+def get_single_flight() -> SingleFlight:
+    """The process-wide middleware installed by create_openrouter_client."""
+    global _single_flight
+    if _single_flight is None:
+        with _single_flight_lock:
+            if _single_flight is None:
+                _single_flight = SingleFlight.from_env()
+    return _single_flight
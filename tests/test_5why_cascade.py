@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+"""
+TEST: 5-Why model kademesi (hızlı model → Opus)
+
+Hızlı modelin zinciri yerel doğrulamayı geçerse kabul edilir; geçemeyen
+dal Opus'a yükseltilir. Yükseltme oranı rca_data["cascade"] altında.
+"""
+
+import json
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from agents.rootcause_agent_v2 import FIVE_WHY_FAST_MODEL, FIVE_WHY_MODEL, RootCauseAgentV2, validate_5why_chain
+
+
+def chain(code, cause="Bakım planı üretim baskısıyla sürekli ertelenmiş ve takip edilmemiş", whys=4):
+    return {
+        "whys": [{"level": i, "question_tr": "Neden?", "answer_tr": f"Cevap {i}"} for i in range(1, whys + 1)],
+        "root_cause": {"code": code, "standard_title_tr": "", "cause_tr": cause},
+    }
+
+
+def test_validator_rules():
+    assert validate_5why_chain(chain("D4.2")) == []
+    assert validate_5why_chain(chain("D4.2", whys=3)) == ["whys"]
+    assert validate_5why_chain(chain("B2.1")) == ["root_code"]
+    assert validate_5why_chain(chain("D4.2"), used_root_codes=["D4.2"]) == ["banned_code"]
+    assert validate_5why_chain(chain("D2.1", cause="Eğitim eksikliği")) == ["generic_text"]
+
+
+class FakeCompletions:
+    def __init__(self):
+        self.models = []
+
+    def create(self, model, messages, **kwargs):
+        self.models.append(model)
+        branch_input = messages[-1]["content"]
+        if model == FIVE_WHY_FAST_MODEL:
+            # B1.4 dalında hızlı model jenerik bir kök neden üretir
+            result = chain("D2.1", cause="Eğitim yetersiz") if "[B1.4]" in branch_input else chain("D4.2")
+        else:
+            result = chain("D1.3")
+        return SimpleNamespace(choices=[SimpleNamespace(
+            message=SimpleNamespace(content=json.dumps(result, ensure_ascii=False)))])
+
+
+def test_only_failing_branches_escalate(monkeypatch):
+    monkeypatch.setenv("FIVE_WHY_MODE", "cascade")
+    agent = RootCauseAgentV2.__new__(RootCauseAgentV2)
+    agent.client = SimpleNamespace(chat=SimpleNamespace(completions=FakeCompletions()))
+
+    rca = agent.run_5why_branches("Vana patladı, alarm çalmadı", [
+        {"code": "A2.3", "cause_tr": "Arızalı vana kullanıldı"},
+        {"code": "B1.4", "cause_tr": "Alarm çalmadı"},
+    ])
+
+    assert agent.client.chat.completions.models == [FIVE_WHY_FAST_MODEL, FIVE_WHY_FAST_MODEL, FIVE_WHY_MODEL]
+    assert [b["cascade"]["model"] for b in rca["analysis_branches"]] == [FIVE_WHY_FAST_MODEL, FIVE_WHY_MODEL]
+    assert [r["code"] for r in rca["final_root_causes"]] == ["D4.2", "D1.3"]
+    summary = rca["cascade"]
+    assert (summary["branches"], summary["escalated"], summary["escalation_rate"]) == (2, 1, 0.5)
+    assert summary["escalation_reasons"] == {"generic_text": 1}
+    assert summary["estimated_saving_s"] is not None
+
+
+def test_cascade_is_opt_in(monkeypatch):
+    monkeypatch.delenv("FIVE_WHY_MODE", raising=False)
+    agent = RootCauseAgentV2.__new__(RootCauseAgentV2)
+    agent.client = SimpleNamespace(chat=SimpleNamespace(completions=FakeCompletions()))
+
+    rca = agent.run_5why_branches("Vana patladı", [{"code": "A2.3", "cause_tr": "Arızalı vana kullanıldı"}])
+
+    # Varsayılan: her dal doğrudan Opus ile, kademe özeti yok
+    assert agent.client.chat.completions.models == [FIVE_WHY_MODEL]
+    assert rca["cascade"] is None
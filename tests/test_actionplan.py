@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+"""
+TEST: Zaman ufku başına paralel aksiyon planı ve akışlı (streaming) üretim
+
+Sahte LLM istemcisi ile: kesilen (max_tokens) yanıtın tamamlanmış
+önlemleri korunur, bozuk ufuk yalnızca kendi varsayılanına düşer,
+akış modunda önlemler tamamlandıkça olay olarak gelir.
+"""
+
+import json
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from agents.actionplan_agent import ActionPlanAgent
+from agents.json_parser import JsonArrayStream
+
+INVESTIGATION = {
+    "root_causes": [{"cause": "Bakım ertelemeleri MOC kapsamında değil"}],
+    "underlying_causes": [],
+    "immediate_causes": [{"cause": "Arızalı vana kullanıldı"}],
+    "severity": "High level",
+}
+
+
+def measure(text, category, date="01/03/2027"):
+    return {"measure": text, "responsible": "Bakım Müdürü", "target_date": date,
+            "category": category, "control_type": "engineering"}
+
+
+# Ufuk → (model çıktısı, finish_reason)
+RESPONSES = {
+    "immediate": (
+        # max_tokens'ta kesilmiş: ilk iki önlem tam, üçüncüsü yarım
+        '{"control_measures": [' + json.dumps(measure("Vanayı değiştir", "immediate")) + ", "
+        + json.dumps(measure("Hattı kilitle", "immediate", date="yarın")) + ', {"measure": "Alarm',
+        "length",
+    ),
+    "short_term": (
+        json.dumps({"control_measures": [measure("MOC prosedürünü güncelle", "short_term"),
+                                         measure("Yanlış ufuk", "long_term")]}),
+        "stop",
+    ),
+    "long_term": ("Üzgünüm, yardımcı olamam.", "stop"),
+}
+
+
+class FakeCompletions:
+    def __init__(self):
+        self.calls = []
+
+    def create(self, messages, max_tokens, stream=False, **kwargs):
+        instructions = messages[0]["content"][-1]["text"]
+        horizon = next(h for h in RESPONSES if f'"category": "{h}"' in instructions)
+        self.calls.append((horizon, max_tokens, stream))
+        content, finish_reason = RESPONSES[horizon]
+        if stream:
+            chunks = [content[i:i + 7] for i in range(0, len(content), 7)]
+            return iter(
+                SimpleNamespace(choices=[SimpleNamespace(
+                    delta=SimpleNamespace(content=chunk),
+                    finish_reason=finish_reason if i == len(chunks) - 1 else None,
+                )])
+                for i, chunk in enumerate(chunks)
+            )
+        return SimpleNamespace(choices=[SimpleNamespace(
+            message=SimpleNamespace(content=content), finish_reason=finish_reason,
+        )])
+
+
+def make_agent():
+    agent = ActionPlanAgent.__new__(ActionPlanAgent)
+    agent.client = SimpleNamespace(chat=SimpleNamespace(completions=FakeCompletions()))
+    return agent
+
+
+def test_json_array_stream_any_chunking():
+    text = '```json\n{"control_measures": [{"measure": "a } [ \\" x"}, {"measure": "b"}], "x": [1]}'
+    for size in (1, 5, len(text)):
+        stream = JsonArrayStream("control_measures")
+        for i in range(0, len(text), size):
+            stream.feed(text[i:i + size])
+        assert stream.items == [{"measure": 'a } [ " x'}, {"measure": "b"}] and stream.done
+
+
+def test_parallel_horizons_validate_and_fall_back_independently():
+    agent = make_agent()
+    part4 = agent.generate_action_plan(INVESTIGATION, mode="parallel")
+
+    assert part4["immediate_actions"] == ["Vanayı değiştir", "Hattı kilitle"]
+    assert part4["short_term_actions"] == ["MOC prosedürünü güncelle"]
+    assert part4["long_term_actions"] == ["Review and update safety management system"]
+    assert part4["_fallback_horizons"] == ["long_term"]
+    assert [m["category"] for m in part4["control_measures"]] == [
+        "immediate", "immediate", "short_term", "long_term"]
+    # Geçersiz tarih ufkun varsayılan tarihine çevrilir
+    assert part4["target_dates"]["Hattı kilitle"] != "yarın"
+    # Kullanılamayan ufuk iki kat bütçeyle bir kez daha denenir
+    long_calls = [c for c in agent.client.chat.completions.calls if c[0] == "long_term"]
+    assert [c[1] for c in long_calls] == [1200, 2400]
+
+
+def test_stream_emits_measures_before_complete():
+    events = list(make_agent().stream_action_plan(INVESTIGATION))
+
+    assert events[-1]["event"] == "complete"
+    streamed = [e["data"]["measure"] for e in events[:-1]]
+    assert all(e["event"] == "measure" for e in events[:-1])
+    assert sorted(streamed) == sorted(m["measure"] for m in events[-1]["data"]["control_measures"])
+
+
+def test_stream_failure_keeps_published_measures_with_resolved_root_cause():
+    agent = make_agent()
+    completions = agent.client.chat.completions
+    create = completions.create
+
+    def broken_stream(messages, max_tokens, stream=False, **kwargs):
+        response = create(messages, max_tokens, stream=stream, **kwargs)
+        if not stream or completions.calls[-1][0] != "short_term":
+            return response
+
+        def chunks():
+            yield from response
+            raise ConnectionError("bağlantı koptu")
+        return chunks()
+
+    completions.create = broken_stream
+    events = list(agent.stream_action_plan(INVESTIGATION))
+
+    streamed = [e["data"] for e in events[:-1]]
+    short_term = [m["measure"] for m in streamed if m["category"] == "short_term"]
+    # Yayınlanmış önlem korunur, yeniden deneme ikinci bir set yayınlamaz
+    assert short_term == ["MOC prosedürünü güncelle"]
+    assert [c[0] for c in completions.calls].count("short_term") == 1
+    assert events[-1]["data"]["short_term_actions"] == ["MOC prosedürünü güncelle"]
+    # Kök neden yayından önce metne çevrilir
+    assert {m["root_cause"] for m in streamed} == {INVESTIGATION["root_causes"][0]["cause"]}
@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+"""
+TEST: Event-loop lag probe ve yavaş çağrı dedektörü (api/monitoring.py)
+"""
+
+import sys
+import time
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from api.monitoring import LoopMonitor, SlowCallMiddleware
+
+
+def _slow_agent_call():
+    """Senkron LLM çağrısı yapan bir ajan gibi event loop'u bloklar"""
+    time.sleep(0.3)
+    return "ok"
+
+
+def make_app(monitor: LoopMonitor) -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(SlowCallMiddleware, monitor=monitor)
+
+    @app.on_event("startup")
+    async def startup():
+        monitor.register_routes(app)
+        monitor.start()
+
+    @app.on_event("shutdown")
+    async def shutdown():
+        await monitor.stop()
+
+    @app.post("/incidents/{incident_id}/investigate")
+    async def investigate(incident_id: str):
+        return {"result": _slow_agent_call()}
+
+    @app.get("/health")
+    async def health():
+        return {"status": "healthy"}
+
+    return app
+
+
+def test_blocking_handler_is_reported_with_its_stack():
+    monitor = LoopMonitor(interval=0.01, slow_threshold=0.1)
+
+    with TestClient(make_app(monitor)) as client:
+        assert client.post("/incidents/INC-1/investigate").status_code == 200
+        client.get("/health")
+        deadline = time.monotonic() + 2
+        while monitor.slow_calls == 0 and time.monotonic() < deadline:
+            time.sleep(0.02)
+
+    assert monitor.slow_calls == 1
+    event = monitor.events[-1]
+    assert event["route"] == "POST /incidents/{incident_id}/investigate"
+    assert event["entry_point"].endswith("_slow_agent_call")
+    assert event["blocked_s"] >= 0.2
+    assert any("_slow_agent_call" in line for line in event["stack"])
+
+    snapshot = monitor.snapshot()
+    route = snapshot["routes"]["POST /incidents/{incident_id}/investigate"]
+    assert route["requests"] == 1 and route["slow_calls"] == 1
+    assert snapshot["routes"]["GET /health"]["slow_calls"] == 0
+    assert snapshot["event_loop"]["lag_s"]["max"] >= 0.2
@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+"""
+TEST: Toplu olay işleme CLI'ı ve global LLM hız sınırı (ağ erişimi yok)
+"""
+
+import json
+import sys
+import time
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from shared.rate_limit import TokenBucketLimiter
+from test_orchestrator import TEXT, make_orchestrator
+from tools.batch_ingest import collect_incidents, run_batch
+
+
+def test_reads_jsonl_and_csv_with_json_cells(tmp_path):
+    (tmp_path / "a.jsonl").write_text(
+        json.dumps({"ref_no": "INC-1", "description": TEXT}) + "\n\n", encoding="utf-8"
+    )
+    (tmp_path / "b.csv").write_text(
+        'ref_no,description,investigation_details\n'
+        'INC-2,kısa,"{""incident_description"": ""uzun metin""}"\n',
+        encoding="utf-8",
+    )
+
+    incidents = collect_incidents([str(tmp_path)])
+
+    assert [i["ref_no"] for i in incidents] == ["INC-1", "INC-2"]
+    assert incidents[1]["investigation_details"] == {"incident_description": "uzun metin"}
+
+
+def test_results_are_incremental_and_completed_refs_are_skipped(tmp_path):
+    output = tmp_path / "results.jsonl"
+    incidents = [{"ref_no": f"INC-{i}", "description": TEXT} for i in range(4)]
+    incidents[1]["fail"] = True
+
+    orchestrator, _ = make_orchestrator()
+    first = run_batch(incidents, output, workers=2, orchestrator=orchestrator)
+
+    lines = [json.loads(l) for l in output.read_text(encoding="utf-8").splitlines()]
+    assert len(first) == len(lines) == 4
+    assert {l["key"]: l["status"] for l in lines}["INC-1"] == "error"
+
+    # Tekrar çalıştırınca yalnızca hatalı olay yeniden denenir
+    incidents[1].pop("fail")
+    second = run_batch(incidents, output, workers=2, orchestrator=orchestrator)
+
+    assert [r["key"] for r in second] == ["INC-1"]
+    assert second[0]["status"] == "investigation_complete_no_docx"
+
+
+def test_rate_limiter_blocks_when_bucket_is_empty():
+    limiter = TokenBucketLimiter({"*": (2, None)}, period=0.2)
+
+    start = time.monotonic()
+    for _ in range(4):
+        limiter.acquire("anthropic/claude-sonnet-4.5")
+
+    assert time.monotonic() - start >= 0.15
+    assert limiter.stats()["requests"] == 4
+    assert limiter.stats()["max_wait_s"] > 0
@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+"""
+TEST: Benchmark paketi (yerel sahte LLM ile, ağ erişimi yok)
+"""
+
+import asyncio
+import os
+import sys
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from benchmarks.api_load import run_load
+from benchmarks.llm_fixtures import mock_llm
+from benchmarks.run import bench_pipeline, compare, load_fixtures, serve_api
+
+
+def test_pipeline_benchmark_runs_every_stage_offline(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    fixtures = load_fixtures(["chemical_spill"])
+
+    with mock_llm(latency="none") as server:
+        result = bench_pipeline(fixtures, repeats=1)
+
+    chemical = result["chemical_spill"]
+    assert chemical["branches"] == 3
+    assert {"part1", "part2", "incident_summary", "part3", "docx", "part4"} <= set(chemical["stages_s"])
+    assert server.stats["synthetic"] == 0 and server.stats["errors"] == 0
+    assert os.environ.get("OPENROUTER_BASE_URL") != server.base_url
+
+
+def test_compare_flags_slower_metrics():
+    baseline = {"results": {"render": {"docx_s": {"median": 1.0, "p95": 1.0, "n": 3}}}}
+    current = {"results": {"render": {"docx_s": {"median": 1.5, "p95": 0.5, "n": 3}}}}
+    assert compare(current, baseline, threshold=0.10) == ["render.docx_s.median"]
+
+
+def test_api_load_reports_per_endpoint_percentiles(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    fixtures = load_fixtures(["chemical_spill"])
+
+    with mock_llm(latency="none"), serve_api() as base_url:
+        summary = asyncio.run(run_load(base_url, fixtures, rate=4, duration=1.0,
+                                       steps=["create", "assessment"], probe_interval=0.1))
+
+    assert summary["flows"]["started"] > 0
+    assert set(summary["endpoints"]) == {"create", "assessment"}
+    create = summary["endpoints"]["create"]
+    assert create["requests"] == summary["flows"]["started"]
+    assert create["latency_s"]["p50"] <= create["latency_s"]["p99"]
+    assert summary["event_loop_lag_s"]["n"] > 0
+    assert summary["server"]["routes"]["POST /api/v1/incidents/create"]["requests"] == create["requests"]
@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+"""
+TEST: Olay kaydında yakın-kopya tespiti
+
+Aynı olayın farklı tanıklarca yazılmış/yeniden gönderilmiş bildirimleri
+yakın-kopya olarak işaretlenir ve ilk olaya bağlanır; istenirse yeni olay
+LLM çağrısı yapılmadan mevcut analizi kopyalar. Farklı olaylar eşleşmez.
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import pytest
+from fastapi import HTTPException
+
+import api.main
+from shared.dedup import DuplicateDetector
+
+FORKLIFT = ("Depoda forklift operatörü geri manevra yaparken rafa çarptı, üst raftan koli "
+            "düşerek yanındaki çalışanın omzuna isabet etti.")
+FORKLIFT_WITNESS = ("DEPODA forklift operatörü geri manevra yaparken rafa çarptı. Üst raftan düşen "
+                    "koli yanındaki çalışanın omzuna isabet etti!")
+VALVE = "Bakım ekibi pompayı sökerken vana açık kalmış, sıcak su sızıntısı nedeniyle teknisyenin eli haşlandı."
+
+
+def test_near_duplicates_match_and_different_events_do_not():
+    detector = DuplicateDetector(threshold=0.7)
+    detector.add("INC-1", FORKLIFT)
+    detector.add("INC-2", VALVE)
+
+    matches = detector.find(FORKLIFT_WITNESS)
+    assert [m[0] for m in matches] == ["INC-1"] and matches[0][1] >= 0.7
+    assert detector.find("Forklift rafa çarptı") == []
+    assert detector.find(VALVE, exclude=("INC-2",)) == []
+
+    detector.remove("INC-1")
+    assert detector.find(FORKLIFT_WITNESS) == [] and len(detector) == 1
+
+
+class CountingOverview:
+    def __init__(self):
+        self.calls = 0
+
+    def process_initial_report(self, incident_data):
+        self.calls += 1
+        return {"ref_no": f"INC-{self.calls}", "reported_by": incident_data["reported_by"],
+                "brief_details": {"what": incident_data["description"][:40]}}
+
+
+class FakeRegistry:
+    def __init__(self):
+        self.overview = CountingOverview()
+
+    def get(self, name):
+        return self.overview if name == "overview" else None
+
+
+@pytest.fixture
+def api_state(monkeypatch):
+    registry = FakeRegistry()
+    detector = DuplicateDetector(threshold=0.7)
+    monkeypatch.setattr(api.main, "agent_registry", registry)
+    monkeypatch.setattr(api.main, "incidents_db", {})
+    monkeypatch.setattr(api.main, "get_duplicate_detector", lambda: detector)
+    return registry
+
+
+def create(description, reported_by="Tanık", clone=False):
+    incident = api.main.IncidentCreate(reported_by=reported_by, description=description, clone_duplicate=clone)
+    return asyncio.run(api.main.create_incident(incident)).data
+
+
+def test_duplicate_is_linked_and_can_clone_analysis(api_state):
+    first = create(FORKLIFT)
+    api.main.incidents_db[first["incident_id"]].update(
+        part2={"investigation_level": "Low level"}, part3_rca={"final_root_causes": []}, status="investigated")
+
+    linked = create(FORKLIFT_WITNESS, reported_by="İkinci tanık")
+    other = create(VALVE)
+
+    assert linked["duplicates"][0]["incident_id"] == first["incident_id"]
+    assert api.main.incidents_db[linked["incident_id"]]["duplicate_of"] == first["incident_id"]
+    assert other["duplicates"] == []
+    assert api_state.overview.calls == 3
+
+    cloned = asyncio.run(api.main.clone_analysis(linked["incident_id"]))["data"]
+    assert cloned["cloned_parts"] == ["part2", "part3_rca"] and cloned["status"] == "investigated"
+    with pytest.raises(HTTPException) as missing:
+        asyncio.run(api.main.clone_analysis(other["incident_id"]))
+    assert missing.value.status_code == 400
+
+
+def test_clone_duplicate_at_creation_skips_the_agents(api_state):
+    first = create(FORKLIFT)
+    api.main.incidents_db[first["incident_id"]]["part2"] = {"investigation_level": "Low level"}
+
+    copy = create(FORKLIFT_WITNESS, reported_by="Vardiya amiri", clone=True)
+
+    assert api_state.overview.calls == 1
+    assert copy["cloned_from"] == first["incident_id"] and copy["cloned_parts"] == ["part2"]
+    assert copy["part1"]["ref_no"] == copy["incident_id"] != first["incident_id"]
+    assert copy["part1"]["reported_by"] == "Vardiya amiri"
+    assert api.main.incidents_db[copy["incident_id"]]["status"] == "assessed"
+
+
+def test_clone_duplicate_without_analysis_creates_normally(api_state):
+    first = create(FORKLIFT)
+
+    copy = create(FORKLIFT_WITNESS, reported_by="Vardiya amiri", clone=True)
+
+    # Kopyalanacak analiz yok: Part 1 ajanla üretilir, olay yalnızca bağlanır
+    assert api_state.overview.calls == 2
+    assert "cloned_from" not in copy and copy["duplicates"][0]["incident_id"] == first["incident_id"]
+    assert copy["part1"]["reported_by"] == "Vardiya amiri"
+    assert api.main.incidents_db[copy["incident_id"]]["status"] != "assessed"
@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+"""
+TEST: Olay/vaka tipi için yerel hızlı sınıflandırıcı
+
+LLM'in verdiği etiketler kaydedilir, bu geçmişten eğitilen yerel model
+emin olduğu raporlarda LLM çağrısını atlar, emin olmadıklarını LLM'e
+bırakır; LLM ile uyumu ölçülür ve uyum düşerse hızlı yol kendini kapatır.
+"""
+
+import random
+import sys
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from shared.fast_classifier import MIN_AUDITED, FastPath, LinearClassifier, match_label
+from tools.train_classifiers import main as train_main
+
+LABELS = ["Ill health", "Minor injury", "Serious injury", "Major injury"]
+PHRASES = {
+    "Ill health": ["solvent buharına maruz kaldı, baş ağrısı ve mide bulantısı", "toz solunumu sonrası öksürük, astım"],
+    "Minor injury": ["parmağında küçük kesik, ilk yardım yapıldı, işe döndü", "elinde sıyrık oluştu, yara bandı yapıldı"],
+    "Serious injury": ["bileği kırıldı, hastaneye kaldırıldı, alçıya alındı", "ikinci derece yanık, acil serviste tedavi edildi"],
+    "Major injury": ["parmak ampute oldu, ameliyata alındı", "yüksekten düştü, kafa travması, yoğun bakıma alındı"],
+}
+PLACES = ["depoda", "üretim hattında", "atölyede", "şantiyede", "laboratuvarda", "yükleme rampasında"]
+
+
+def reports(n, seed=1):
+    rng = random.Random(seed)
+    for _ in range(n):
+        label = rng.choice(LABELS)
+        yield f"Operatör {rng.choice(PLACES)} çalışırken {rng.choice(PHRASES[label])}.", label
+
+
+def test_model_learns_and_calibrates_threshold():
+    data = list(reports(300))
+    model = LinearClassifier(LABELS).fit(data[:240])
+    metrics = model.calibrate(data[240:], target_accuracy=0.95)
+
+    assert metrics["accuracy_all"] >= 0.95 and metrics["coverage"] > 0.8
+    assert model.predict("Depoda parmağında küçük kesik oldu, ilk yardım yapıldı")[0] == "Minor injury"
+    assert LinearClassifier.from_dict(model.to_dict()).predict("bileği kırıldı")[0] == "Serious injury"
+    assert match_label('"minor injury"', LABELS) == "Minor injury" and match_label("Unclear", LABELS) is None
+
+
+def test_logged_llm_labels_train_a_fast_path(tmp_path):
+    llm_calls = []
+
+    def llm_for(label):
+        return lambda: llm_calls.append(label) or f'"{label}"'
+
+    # Model yok: her rapor LLM'e gider, etiketleri eğitim geçmişi olarak kaydedilir
+    collecting = FastPath("incident_type", LABELS, directory=str(tmp_path))
+    for text, label in reports(200):
+        assert collecting.classify(text, llm_for(label)) == label
+    assert len(llm_calls) == 200
+
+    assert train_main(["--dir", str(tmp_path), "--target-accuracy", "0.95"]) == 0
+    assert not (tmp_path / "event_type.model.json").exists()  # event_type için etiket yok
+    fast = FastPath("incident_type", LABELS, directory=str(tmp_path), audit_rate=0)
+    llm_calls.clear()
+    for text, label in reports(50, seed=2):
+        assert fast.classify(text, llm_for(label)) == label
+    stats = fast.snapshot()
+
+    assert stats["local"] >= 40 and len(llm_calls) == stats["llm"] <= 10
+    assert stats["model"]["accuracy_confident"] >= 0.95
+    # Modelin hiç görmediği rapor LLM'e düşer
+    assert fast.classify("Vardiya değişiminde form eksik dolduruldu", llm_for("Minor injury")) == "Minor injury"
+    # Etiket adlandırmayan yanıt olduğu gibi döner
+    assert fast.classify("Vardiya değişiminde form eksik dolduruldu", lambda: "Belirsiz") == "Belirsiz"
+
+
+def test_fast_path_suspends_itself_when_llm_disagrees():
+    fast = FastPath("incident_type", LABELS, audit_rate=1.0)
+    fast.model = LinearClassifier(LABELS).fit(list(reports(200)))
+    fast.model.threshold = 0.5
+    llm_calls = []
+
+    def contradicting_llm(label):
+        def llm():
+            llm_calls.append(label)
+            return "Ill health" if label == "Major injury" else "Major injury"
+        return llm
+
+    # Denetlenen her tahmin LLM ile çelişiyor (ör. etiketleme kuralı değişti)
+    for text, label in reports(MIN_AUDITED, seed=3):
+        fast.classify(text, contradicting_llm(label))
+    assert fast.snapshot()["suspended"]
+
+    # Askıdayken denetim oranı sıfır olsa da emin tahminler LLM'e gider
+    fast.audit_rate = 0
+    for text, label in reports(5, seed=4):
+        fast.classify(text, contradicting_llm(label))
+
+    stats = fast.snapshot()
+    assert stats["audited_accuracy"] < 0.9
+    assert stats["local"] == 0 and len(llm_calls) == MIN_AUDITED + 5
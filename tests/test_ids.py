@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+"""
+TEST: Çakışmasız, sıralanabilir referans numaraları
+
+Aynı saniyede (ve aynı milisaniyede) üretilen numaralar farklıdır ve
+üretim sırasıyla sıralanır; aynı numarayla ikinci olay oluşturulmak
+istenirse API mevcut olayın üzerine yazmaz, 409 döner.
+"""
+
+import asyncio
+import os
+import re
+import sys
+import threading
+import time
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import pytest
+from fastapi import HTTPException
+
+import api.main
+import shared.ids
+from agents.overview_agent import OverviewAgent
+from shared.ids import new_id
+
+
+def test_ids_are_unique_readable_and_sorted():
+    ids = [new_id() for _ in range(10000)]
+
+    assert len(set(ids)) == len(ids)
+    assert ids == sorted(ids)
+    assert re.fullmatch(r"INC-\d{8}-\d{6}-[0-9A-HJKMNP-TV-Z]{9}", ids[0])
+    assert OverviewAgent._generate_ref_no(None).startswith("INC-")
+
+
+def test_concurrent_ids_do_not_collide():
+    ids, lock = [], threading.Lock()
+
+    def make():
+        batch = [new_id("AB") for _ in range(2000)]
+        with lock:
+            ids.extend(batch)
+
+    threads = [threading.Thread(target=make) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(set(ids)) == len(ids) == 16000
+
+
+def test_ids_stay_sorted_across_dst_fall_back(monkeypatch):
+    # Yaz saati bitişi: yerel saat 01:59'dan 01:00'e geri döner
+    monkeypatch.setenv("TZ", "America/New_York")
+    time.tzset()
+    before = 1793511000 * 10**9  # 2026-11-01 05:30 UTC = 01:30 EDT
+    after = before + 40 * 60 * 10**9  # 06:10 UTC = 01:10 EST
+    clock = iter([before, after])
+    monkeypatch.setattr(shared.ids.time, "time_ns", lambda: next(clock))
+    monkeypatch.setattr(shared.ids, "_pid", os.getpid())
+    monkeypatch.setattr(shared.ids, "_last_ms", 0)
+    try:
+        ids = [new_id(), new_id()]
+    finally:
+        monkeypatch.undo()
+        time.tzset()
+
+    assert [i[4:19] for i in ids] == ["20261101-053000", "20261101-061000"]
+    assert ids == sorted(ids)
+
+
+class FixedRefOverview:
+    def process_initial_report(self, incident_data):
+        return {"ref_no": "INC-20260101-120000-000000000", "brief_details": {}}
+
+
+class FakeRegistry:
+    def get(self, name):
+        return FixedRefOverview() if name == "overview" else None
+
+
+def test_create_does_not_overwrite_existing_incident(monkeypatch):
+    monkeypatch.setattr(api.main, "agent_registry", FakeRegistry())
+    monkeypatch.setattr(api.main, "incidents_db", {})
+    incident = api.main.IncidentCreate(reported_by="Vardiya amiri", description="Forklift rafa çarptı")
+
+    first = asyncio.run(api.main.create_incident(incident))
+    with pytest.raises(HTTPException) as conflict:
+        asyncio.run(api.main.create_incident(incident))
+
+    assert first.success
+    assert conflict.value.status_code == 409
+    assert len(api.main.incidents_db) == 1
@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+"""
+TEST: API soğuk başlangıç bütçesi
+
+api.main import'u ve ilk /health yanıtı ağır modülleri (OpenAI istemcisi,
+python-docx, pandas/numpy) yüklememeli; ajanlar ilk kullanımda oluşturulur.
+Ölçüm temiz bir alt süreçte yapılır (pytest'in yüklediği modüller etkilemez).
+"""
+
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+# Railway sağlık kontrolü için bütçe (saniye); yavaş CI makinelerinde artırılabilir
+IMPORT_BUDGET_S = float(os.getenv("API_IMPORT_BUDGET_S", "1.0"))
+
+HEAVY_MODULES = ["openai", "docx", "lxml", "pandas", "numpy", "agents.skillbased_docx_agent"]
+
+PROFILE_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+import api.main
+import_s = time.perf_counter() - start
+
+from fastapi.testclient import TestClient
+with TestClient(api.main.app) as client:
+    start = time.perf_counter()
+    health = client.get("/api/v1/health").json()
+    health_s = time.perf_counter() - start
+    loaded_before_use = [m for m in {heavy!r} if m in sys.modules]
+    created = client.post("/api/v1/incidents/create", json={{"reported_by": "test", "description": "x"}})
+
+print(json.dumps({{
+    "import_s": import_s, "health_s": health_s, "health": health,
+    "loaded_before_use": loaded_before_use,
+    "overview_loaded_after_use": "agents.overview_agent" in sys.modules,
+}}))
+"""
+
+
+def test_api_cold_start_stays_within_budget():
+    env = {**os.environ, "OPENROUTER_API_KEY": "test-key", "API_PRELOAD_AGENTS": "0",
+           "OPENROUTER_BASE_URL": "http://127.0.0.1:9/api/v1"}
+    proc = subprocess.run(
+        [sys.executable, "-c", PROFILE_SCRIPT.format(heavy=HEAVY_MODULES)],
+        cwd=project_root, env=env, capture_output=True, text=True, timeout=120,
+    )
+    assert proc.returncode == 0, proc.stderr
+    profile = json.loads(proc.stdout.strip().splitlines()[-1])
+
+    assert profile["loaded_before_use"] == []
+    assert profile["import_s"] < IMPORT_BUDGET_S, profile["import_s"]
+    assert profile["health_s"] < 0.5
+    assert profile["health"]["agents"]["overview"] == "lazy"
+    assert profile["health"]["agents"]["pdf_generator"] == "lazy"
+    assert profile["health"]["status"] == "healthy"
+    # İlk istek ajanı oluşturur (LLM'e ulaşamasa da)
+    assert profile["overview_loaded_after_use"]
@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+"""
+TEST: Geçmiş soruşturmalar üzerinde benzer olay indeksi
+
+Benzer olaylar metin ve HSG245 kodlarıyla sıralanır, aynı olay yeniden
+eklenince eski kaydın yerini alır; indeks dosyası yeniden yüklenir ve
+başka bir worker'ın eklediği olaylar aramadan önce okunur.
+"""
+
+import json
+import sys
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from shared.incident_index import IncidentIndex, investigation_document
+from tools.build_incident_index import build_index
+
+
+def rca(summary, immediate=(), roots=()):
+    return {
+        "incident_summary": summary,
+        "analysis_branches": [{"immediate_cause": {"code": code}} for code in immediate],
+        "final_root_causes": [{"code": code, "standard_title_tr": "Başlık", "cause_tr": "Neden"} for code in roots],
+    }
+
+
+PAST = {
+    "INC-1": rca("Forklift depoda rafa çarptı, yük operatörün üzerine düştü", ["A1.2"], ["C2.1"]),
+    "INC-2": rca("Bakım sırasında vana açık bırakıldı, buhar kaçağı oldu", ["B2.1"], ["D1.3"]),
+    "INC-3": rca("Forklift rampada devrildi, operatör yaralandı", ["A1.2"], ["C3.4"]),
+    "INC-4": rca("Ofiste ıslak zeminde kayma, bilek burkuldu", ["B4.1"], ["D2.2"]),
+}
+
+
+def filled_index(path=None):
+    index = IncidentIndex(path)
+    for doc_id, data in PAST.items():
+        index.add_investigation(data, doc_id=doc_id)
+    return index
+
+
+def test_ranks_by_text_and_codes():
+    index = filled_index()
+
+    by_text = index.search("Forklift operatörü yükü rafa çarptırdı", k=2)
+    assert [m["id"] for m in by_text] == ["INC-1", "INC-3"]
+    # Kodlar metinden ağır basar: C3.4 kök nedeni INC-3'ü öne çıkarır
+    assert index.search("Forklift operatörü yükü rafa çarptırdı", codes=["C3.4"], k=1)[0]["id"] == "INC-3"
+    assert index.search("Vana açık kaldı", k=1)[0]["id"] == "INC-2"
+    assert index.search("Vana açık kaldı", exclude=["INC-2"]) == []
+    assert index.search("", codes=["D2.2"], k=1)[0]["root_codes"] == ["D2.2"]
+
+
+def test_readding_an_incident_replaces_it():
+    index = filled_index()
+    index.add_investigation(rca("Kimyasal tankında taşma", ["B3.1"], ["D4.1"]), doc_id="INC-1")
+
+    assert len(index) == 4
+    assert "INC-1" not in [m["id"] for m in index.search("Forklift rafa çarptı")]
+    assert index.search("kimyasal taşma", k=1)[0]["id"] == "INC-1"
+
+
+def test_index_file_is_reloaded_and_shared_between_workers(tmp_path):
+    path = str(tmp_path / "index.jsonl")
+    worker_a = filled_index(path)
+    worker_b = IncidentIndex(path)
+    assert len(worker_b) == 4
+
+    worker_a.add_investigation(rca("İskeleden düşme, emniyet kemeri takılmamıştı", ["A4.1"], ["C1.1"]), doc_id="INC-5")
+    assert worker_b.search("iskeleden düştü", k=1)[0]["id"] == "INC-5"
+
+    worker_a.add_investigation(PAST["INC-4"], doc_id="INC-4")
+    worker_a.compact()
+    assert len(Path(path).read_text(encoding="utf-8").splitlines()) == 5
+    assert len(IncidentIndex(path)) == 5
+
+
+def test_investigation_document_and_build_tool(tmp_path):
+    full = {"part1": {"ref_no": "INC-9", "incident_type": "Near Miss"},
+            "part2": {"investigation_level": "Low level"}, "part3_rca": PAST["INC-2"]}
+    doc = investigation_document(full)
+    assert doc["meta"]["ref_no"] == "INC-9" and doc["immediate_codes"] == ["B2.1"]
+    assert investigation_document({"part1": {"ref_no": "INC-0"}}) is None
+
+    (tmp_path / "inc9.json").write_text(json.dumps(full), encoding="utf-8")
+    (tmp_path / "rca.json").write_text(json.dumps(PAST["INC-4"]), encoding="utf-8")
+    (tmp_path / "batch.jsonl").write_text(json.dumps({"ref_no": "INC-7", "result": {"part3_rca": PAST["INC-1"]}}) + "\n",
+                                          encoding="utf-8")
+    index = IncidentIndex()
+
+    assert build_index([str(tmp_path)], index) == 3
+    assert sorted(index._docs) == ["INC-7", "INC-9", "rca"]
+
+
+def test_compaction_by_another_worker_loses_no_lines(tmp_path):
+    path = str(tmp_path / "index.jsonl")
+    worker_a = filled_index(path)
+    for _ in range(3):
+        worker_a.add_investigation(PAST["INC-1"], doc_id="INC-1")
+    worker_b = IncidentIndex(path)
+
+    # A dosyayı küçültür; B'nin konumu eski dosyaya göre kalmıştır
+    worker_a.compact()
+    worker_a.add_investigation(rca("İskeleden düşme, emniyet kemeri takılmamıştı", ["A4.1"], ["C1.1"]), doc_id="INC-5")
+    assert worker_b.search("iskeleden düştü", k=1)[0]["id"] == "INC-5"
+
+    # B'nin eklediği satır A'nın bir sonraki sıkıştırmasında da kalır
+    worker_b.add_investigation(rca("Kaynak sırasında yangın çıktı", ["A3.1"], ["D2.1"]), doc_id="INC-6")
+    worker_a.compact()
+    assert len(IncidentIndex(path)) == 6
+    assert worker_b.search("kaynak yangın", k=1)[0]["id"] == "INC-6"
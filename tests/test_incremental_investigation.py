@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+"""
+TEST: Artımlı yeniden inceleme (değişiklik farkındalıklı)
+
+Olay özeti değişmezse hiç LLM çağrısı yapılmaz; değişirse doğrudan
+nedenler yeniden belirlenir ama yalnızca yeni doğrudan nedenlerin 5-Why
+dalı çalışır. Aksiyon planı yalnızca yeni kök nedenler için üretilir.
+"""
+
+import json
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from agents.rootcause_agent_v2 import RootCauseAgentV2
+from test_actionplan import make_agent, measure
+
+
+class CountingRootCause(RootCauseAgentV2):
+    def __init__(self, codes):
+        self.codes = codes
+        self.identify_calls = 0
+        self.chains = []
+
+    def _identify_immediate_causes_with_codes(self, incident_summary):
+        self.identify_calls += 1
+        return [{"code": code, "cause_tr": f"{code} / {len(incident_summary)}"} for code in self.codes]
+
+    def _stream_immediate_causes(self, incident_summary):
+        yield from self._identify_immediate_causes_with_codes(incident_summary)
+
+    def _perform_5why_chain(self, immediate_cause, incident_summary, used_root_codes=None):
+        self.chains.append((immediate_cause["code"], list(used_root_codes or [])))
+        code = {"A2.3": "D4.2", "B1.4": "D1.1", "B3.2": "C2.1"}[immediate_cause["code"]]
+        return {"whys": [{"level": 1}], "root_cause": {"code": code, "cause_tr": code}}
+
+
+def test_unchanged_branches_are_reused():
+    agent = CountingRootCause(["A2.3", "B1.4"])
+    first = agent.analyze_root_causes({}, {}, {"how_happened": "Vana patladı"})
+    assert first["reused_branches"] == []
+
+    # Aynı özet (boşluk farkı önemsiz): LLM çağrısı yok
+    same = agent.analyze_root_causes({}, {}, {"how_happened": "Vana  patladı "}, previous=first)
+    assert agent.identify_calls == 1 and len(agent.chains) == 2
+    assert same["reused_branches"] == [1, 2]
+
+    # Özet değişti, B1.4 yerine B3.2: yalnızca yeni dal çalışır
+    agent.codes = ["A2.3", "B3.2"]
+    edited = agent.analyze_root_causes({}, {}, {"how_happened": "Vana patladı; alarm kapalıydı"},
+                                       previous=first)
+    assert agent.identify_calls == 2
+    assert edited["reused_branches"] == [1]
+    assert agent.chains[-1] == ("B3.2", ["D4.2"])
+    assert [r["code"] for r in edited["final_root_causes"]] == ["D4.2", "C2.1"]
+
+
+class AttributedCompletions:
+    """Her kök neden için ufuk başına bir önlem; önlem kök neden numarasını taşır."""
+
+    def __init__(self):
+        self.calls = []
+
+    def create(self, messages, max_tokens, stream=False, **kwargs):
+        causes = messages[-1]["content"]
+        horizon = next(h for h in ("immediate", "short_term", "long_term")
+                       if f'"category": "{h}"' in messages[0]["content"][-1]["text"])
+        self.calls.append((horizon, causes))
+        roots = causes.split("ROOT CAUSES IDENTIFIED:\n")[1].split("\n\n")[0].splitlines()
+        items = [dict(measure(f"{horizon}: {line[3:]}", horizon), root_cause=int(line[0]))
+                 for line in roots]
+        return SimpleNamespace(choices=[SimpleNamespace(
+            message=SimpleNamespace(content=json.dumps({"control_measures": items})),
+            finish_reason="stop",
+        )])
+
+
+def test_action_plan_regenerates_only_new_root_causes():
+    agent = make_agent()
+    agent.client.chat.completions = AttributedCompletions()
+    data = {"root_causes": [{"cause": "MOC yok"}, {"cause": "Bakım ertelendi"}],
+            "underlying_causes": [], "immediate_causes": [], "severity": "High level"}
+    first = agent.generate_action_plan(data, mode="parallel")
+    assert first["_root_causes"] == ["MOC yok", "Bakım ertelendi"]
+    assert {m["root_cause"] for m in first["control_measures"]} == {"MOC yok", "Bakım ertelendi"}
+
+    calls = agent.client.chat.completions.calls
+    calls.clear()
+    data["root_causes"] = [{"cause": "MOC yok"}, {"cause": "Eğitim eksik"}]
+    updated = agent.generate_action_plan(data, mode="parallel", previous=first)
+
+    # Yalnızca yeni kök neden için üç ufuk çağrısı
+    assert len(calls) == 3 and all("Eğitim eksik" in c[1] and "MOC yok" not in c[1] for c in calls)
+    assert sorted(updated["immediate_actions"]) == ["immediate: Eğitim eksik", "immediate: MOC yok"]
+    assert "Bakım ertelendi" not in json.dumps(updated["control_measures"], ensure_ascii=False)
+
+    calls.clear()
+    agent.generate_action_plan(data, mode="parallel", previous=updated)
+    assert calls == []
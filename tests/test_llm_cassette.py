@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+"""
+TEST: LLM kayıt (cassette) ve çevrimdışı yerel LLM sunucusu
+"""
+
+import json
+import sys
+import time
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import httpx
+
+from shared.llm_client import create_openrouter_client
+from shared.llm_recorder import CassetteRecorder, read_cassette, start_recording, stop_recording
+from tools.mock_llm_server import CassetteLibrary, LatencyModel, MockLLMServer
+
+
+def ask(prompt, model="anthropic/claude-sonnet-4.5"):
+    client = create_openrouter_client(api_key="test-key")
+    response = client.chat.completions.create(
+        model=model, max_tokens=50, messages=[{"role": "user", "content": prompt}],
+    )
+    return response.choices[0].message.content
+
+
+def recorded_interaction(prompt, content, model="anthropic/claude-sonnet-4.5"):
+    return {
+        "request": {"model": model, "max_tokens": 50,
+                    "messages": [{"role": "user", "content": prompt}]},
+        "status": 200,
+        "duration_s": 0.2,
+        "response": {
+            "id": "gen-1", "object": "chat.completion", "created": 0, "model": model,
+            "choices": [{"index": 0, "finish_reason": "stop",
+                         "message": {"role": "assistant", "content": content}}],
+            "usage": {"prompt_tokens": 10, "completion_tokens": 2, "total_tokens": 12},
+        },
+    }
+
+
+def test_recorded_cassette_replays_exactly(tmp_path, monkeypatch):
+    cassette = tmp_path / "run.jsonl"
+    library = CassetteLibrary([recorded_interaction("Classify: fall from ladder", "Accident")])
+
+    with MockLLMServer(library, on_miss="error") as server:
+        monkeypatch.setenv("OPENROUTER_BASE_URL", server.base_url)
+        recorder = start_recording(str(cassette))
+        try:
+            assert ask("Classify: fall from ladder") == "Accident"
+        finally:
+            stop_recording(recorder)
+
+    [interaction] = read_cassette(str(cassette))
+    assert interaction["response"]["choices"][0]["message"]["content"] == "Accident"
+    assert "test-key" not in cassette.read_text(encoding="utf-8")
+
+    # Kaydedilen cassette tek başına yeterli
+    with MockLLMServer(CassetteLibrary([interaction]), on_miss="error") as server:
+        monkeypatch.setenv("OPENROUTER_BASE_URL", server.base_url)
+        assert ask("Classify: fall from ladder") == "Accident"
+        assert server.stats["exact"] == 1
+
+
+def test_unmatched_prompt_uses_nearest_recording(monkeypatch):
+    library = CassetteLibrary([
+        recorded_interaction("Assess severity: worker fell from ladder on 01.02.25", "Serious"),
+        recorded_interaction("RIDDOR assessment JSON: chemical spill in warehouse", '{"reportable": "N"}'),
+    ])
+    with MockLLMServer(library) as server:
+        monkeypatch.setenv("OPENROUTER_BASE_URL", server.base_url)
+        assert ask("Assess severity: worker fell from ladder on 19.10.26") == "Serious"
+        assert server.stats["nearest"] == 1
+
+
+def test_latency_is_seeded_and_applied(monkeypatch):
+    first = LatencyModel("lognormal:0.0,0.5", seed=3)
+    second = LatencyModel("lognormal:0.0,0.5", seed=3)
+    assert [first.sample() for _ in range(5)] == [second.sample() for _ in range(5)]
+    assert LatencyModel("recorded", scale=0.5).sample({"duration_s": 2.0}) == 1.0
+
+    library = CassetteLibrary([recorded_interaction("ping", "pong")])
+    with MockLLMServer(library, latency=LatencyModel("fixed:0.2")) as server:
+        monkeypatch.setenv("OPENROUTER_BASE_URL", server.base_url)
+        start = time.perf_counter()
+        assert ask("ping") == "pong"
+        assert time.perf_counter() - start >= 0.2
+
+
+class ChunkStream(httpx.SyncByteStream):
+    def __init__(self, chunks):
+        self.chunks = chunks
+
+    def __iter__(self):
+        yield from self.chunks
+
+
+def test_streamed_response_is_passed_through_and_recorded_on_close(tmp_path):
+    recorder = CassetteRecorder(str(tmp_path / "stream.jsonl"))
+    events = [b'data: {"choices": [{"delta": {"content": "Kayma"}}]}\n\n', b"data: [DONE]\n\n"]
+
+    def upstream(request):
+        return httpx.Response(200, headers={"content-type": "text/event-stream"},
+                              stream=ChunkStream(events), request=request)
+
+    request = httpx.Request("POST", "https://openrouter.ai/api/v1/chat/completions",
+                            content=json.dumps({"model": "m", "stream": True}).encode("utf-8"))
+    response = recorder(request, upstream)
+    chunks = response.iter_bytes()
+
+    # İlk parça kayıt yazılmadan istemciye ulaşır
+    assert next(chunks) == events[0] and recorder.recorded == 0
+    assert list(chunks) == events[1:]
+    response.close()
+
+    [interaction] = read_cassette(recorder.path)
+    assert interaction["response_text"] == b"".join(events).decode("utf-8")
+    assert interaction["content_type"] == "text/event-stream"
@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+"""
+TEST: Yapılandırılmış loglama (shared/log.py) — korelasyon kimlikleri ve
+yalnızca DEBUG seviyesinde üretilen konsol ağaçları
+"""
+
+import io
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from agents.pipeline import PipelineScheduler, StageNode
+from agents.rootcause_agent_v2 import RootCauseAgentV2
+from shared.log import configure_logging, get_logger, log_context, shutdown_logging
+
+BRANCH = {
+    "branch_number": 1,
+    "immediate_cause": {"code": "A1.1", "cause_tr": "Prosedür uygulanmadı"},
+    "why_chain": [{"question_tr": "Neden?", "answer_tr": "Eğitim eksik"}],
+    "root_cause": {"code": "C1.1", "cause_tr": "Eğitim programı yok"},
+}
+
+
+@pytest.fixture
+def log_output():
+    """JSON logları bir tampona yazar; test sonunda varsayılan yapılandırmaya döner."""
+    buffer = io.StringIO()
+
+    def records(level="INFO"):
+        configure_logging(level=level, fmt="json", stream=buffer, force=True)
+        return read
+
+    def read():
+        shutdown_logging()  # kuyruktaki kayıtları boşalt
+        return [json.loads(line) for line in buffer.getvalue().splitlines()]
+
+    yield records
+    shutdown_logging()
+    configure_logging(force=True)
+
+
+def test_records_carry_incident_and_branch_ids_across_stage_threads(log_output):
+    read = log_output()
+    logger = get_logger("tests.logging")
+
+    def stage(incident):
+        logger.info("stage çalıştı")
+        return {"done": True}
+
+    with log_context(incident_id="INC-1"):
+        with log_context(branch_id="1-A1.1"):
+            logger.info("dal", extra={"stage": "part3"})
+        PipelineScheduler([StageNode("s", stage, ["incident"], ["done"])]).run({"incident": {}})
+    logger.info("bağlam dışı")
+
+    records = read()
+    by_msg = {r["msg"]: r for r in records}
+    assert by_msg["dal"]["incident_id"] == "INC-1"
+    assert by_msg["dal"]["branch_id"] == "1-A1.1"
+    assert by_msg["dal"]["stage"] == "part3"
+    assert by_msg["stage çalıştı"]["incident_id"] == "INC-1"
+    assert "branch_id" not in by_msg["stage çalıştı"]
+    assert "incident_id" not in by_msg["bağlam dışı"]
+
+
+def test_branch_tree_is_only_built_in_debug_mode(log_output):
+    agent = RootCauseAgentV2.__new__(RootCauseAgentV2)
+
+    read = log_output("INFO")
+    agent._print_branch_tree(BRANCH)
+    assert read() == []
+
+    read = log_output("DEBUG")
+    agent._print_branch_tree(BRANCH)
+    records = read()
+    assert len(records) == 1
+    assert "DAL AĞACI #1" in records[0]["msg"] and "C1.1" in records[0]["msg"]
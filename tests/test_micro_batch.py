@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+"""
+TEST: Olaylar arası küçük sınıflandırma çağrılarının mikro-gruplanması
+
+Aynı pencerede gelen eşzamanlı çağrılar tek istekte gider, her çağıran
+kendi cevabını alır; yanıtta eksik olan öğe tekil çağrıya düşer.
+"""
+
+import json
+import re
+import sys
+import threading
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from shared.log import incident_id_var, log_context
+from shared.micro_batch import BATCH_INCIDENT_ID, BATCH_PREAMBLE, MicroBatcher
+from shared.priority import current_priority, priority_context
+
+
+class FakeCompletions:
+    """Öğe metnini büyük harfe çevirir; gruplu yanıtta 'kayıp' öğesini atlar."""
+
+    def __init__(self):
+        self.requests = []
+        self.lock = threading.Lock()
+
+    def create(self, model, messages, max_tokens, **kwargs):
+        system = "".join(block["text"] for block in messages[0]["content"])
+        user = messages[-1]["content"]
+        with self.lock:
+            self.requests.append((system.startswith(BATCH_PREAMBLE), max_tokens))
+        if system.startswith(BATCH_PREAMBLE):
+            items = re.findall(r"ITEM (\d+):\n(.*)", user)
+            content = json.dumps({"results": [{"id": int(i), "answer": text.upper()}
+                                              for i, text in items if text != "kayıp"]})
+        else:
+            content = user.upper()
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+
+def test_concurrent_calls_share_one_request_with_per_item_fallback():
+    completions = FakeCompletions()
+    client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+    batcher = MicroBatcher(window_ms=300, max_batch=16)
+    items = ["vana", "alarm", "kayıp", "forklift", "merdiven"]
+    results = {}
+
+    def call(item):
+        results[item] = batcher.complete(client, "Classify", item, model="m", max_tokens=50)
+
+    threads = [threading.Thread(target=call, args=(item,)) for item in items]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == {item: item.upper() for item in items}
+    # Bir gruplu istek + eksik öğe için bir tekil istek
+    assert sorted(completions.requests) == [(False, 50), (True, 5 * 70)]
+    stats = batcher.snapshot()
+    assert (stats["calls"], stats["requests"], stats["batched_items"], stats["fallbacks"]) == (5, 2, 4, 1)
+
+
+def test_lone_call_is_sent_unbatched():
+    completions = FakeCompletions()
+    client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+    assert MicroBatcher(window_ms=1).complete(client, "Classify", "vana", model="m") == "VANA"
+    assert completions.requests == [(False, 50)]
+
+
+def test_batch_is_sent_at_the_most_urgent_priority_without_leader_tags():
+    seen = []
+
+    class RecordingCompletions(FakeCompletions):
+        def create(self, model, messages, max_tokens, **kwargs):
+            seen.append((current_priority(), incident_id_var.get()))
+            return super().create(model, messages, max_tokens, **kwargs)
+
+    client = SimpleNamespace(chat=SimpleNamespace(completions=RecordingCompletions()))
+    batcher = MicroBatcher(window_ms=300, max_batch=2)
+    leader_waiting = threading.Event()
+
+    def call(item, level, incident_id, started=None):
+        with log_context(incident_id=incident_id), priority_context(level):
+            if started:
+                started.set()
+            batcher.complete(client, "Classify", item, model="m")
+
+    # Toplu içe aktarma çağrısı grubu açar, kritik olayın çağrısı gruba katılır
+    leader = threading.Thread(target=call, args=("vana", "low", "INC-TOPLU", leader_waiting))
+    leader.start()
+    leader_waiting.wait()
+    time.sleep(0.05)
+    call("alarm", "critical", "INC-KRITIK")
+    leader.join()
+
+    assert seen == [("critical", BATCH_INCIDENT_ID)]
@@ -0,0 +1,214 @@
+# -*- coding: utf-8 -*-
+"""
+TEST: Durumsuz RootCauseOrchestrator (sahte ajanlarla, ağ erişimi yok)
+"""
+
+import sys
+import threading
+import time
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import pytest
+
+from agents.orchestrator import InvestigationContext, RootCauseOrchestrator
+from agents.rootcause_agent_v2 import RootCauseAgentV2
+
+
+class FakeOverview:
+    def process_initial_report(self, incident_data):
+        time.sleep(0.05)
+        if incident_data.get("fail"):
+            raise RuntimeError("overview failed")
+        return {"ref_no": incident_data["ref_no"], "incident_type": "Minor injury",
+                "brief_details": {"what": "kısa özet"}}
+
+
+class FakeAssessment:
+    def assess_incident(self, part1, incident_data):
+        return {"investigation_level": "Low level", "ref": part1["ref_no"]}
+
+
+class FakeRootCause(RootCauseAgentV2):
+    """Gerçek adım mantığı, LLM çağrıları sahte."""
+
+    def __init__(self):
+        self.active = 0
+        self.max_active = 0
+        self.lock = threading.Lock()
+
+    def _identify_immediate_causes_with_codes(self, incident_summary):
+        time.sleep(0.05)
+        return [{"code": "B2.1", "cause_tr": incident_summary[:20]}]
+
+    def _stream_immediate_causes(self, incident_summary):
+        yield from self._identify_immediate_causes_with_codes(incident_summary)
+
+    def _perform_5why_chain(self, immediate_cause, incident_summary, used_root_codes=None):
+        with self.lock:
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        time.sleep(0.05)
+        with self.lock:
+            self.active -= 1
+        return {"whys": [], "root_cause": {"code": "D3.1", "cause_tr": incident_summary[:20]}}
+
+
+TEXT = "Bakım sırasında vana açık bırakıldı ve basınçlı hat operatörün üzerine boşaldı."
+
+
+def make_orchestrator(checkpoint_dir=None, rootcause=None, overview=None):
+    rootcause = rootcause or FakeRootCause()
+    orchestrator = RootCauseOrchestrator(agents={
+        "overview": overview or FakeOverview(),
+        "assessment": FakeAssessment(),
+        "rootcause": rootcause,
+        "docx": None,
+    }, checkpoint_dir=checkpoint_dir)
+    return orchestrator, rootcause
+
+
+def test_each_run_returns_independent_context():
+    orchestrator, _ = make_orchestrator()
+    first = orchestrator.run_investigation({"ref_no": "INC-1", "description": TEXT})
+    second = orchestrator.run_investigation({"ref_no": "INC-2", "description": "kısa"})
+
+    assert isinstance(first, InvestigationContext)
+    assert first.ref_no == "INC-1" and second.ref_no == "INC-2"
+    assert first["part1"]["ref_no"] == "INC-1"
+    assert first.status == "investigation_complete_no_docx"
+    assert not hasattr(orchestrator, "investigation_data")
+
+
+def test_legacy_accessors_use_last_context(tmp_path):
+    orchestrator, _ = make_orchestrator()
+    with pytest.raises(ValueError):
+        orchestrator.export_to_json(str(tmp_path / "yok.json"))
+
+    ctx = orchestrator.run_investigation({"ref_no": "INC-L1", "description": TEXT})
+    orchestrator.export_to_json(str(tmp_path / "son.json"))
+
+    assert orchestrator.get_investigation_data() is ctx
+    assert '"INC-L1"' in (tmp_path / "son.json").read_text(encoding="utf-8")
+
+
+def test_failed_run_raises_with_context_attached():
+    orchestrator, _ = make_orchestrator()
+    with pytest.raises(RuntimeError) as exc:
+        orchestrator.run_investigation({"ref_no": "INC-X", "fail": True})
+    assert exc.value.investigation_context.failed
+    assert exc.value.investigation_context["error"] == "overview failed"
+
+
+def test_run_many_is_concurrent_ordered_and_isolates_errors():
+    orchestrator, rootcause = make_orchestrator()
+    incidents = [{"ref_no": f"INC-{i}", "description": TEXT} for i in range(6)]
+    incidents[2]["fail"] = True
+
+    results = orchestrator.run_many(incidents, concurrency=3)
+
+    assert [ctx.incident_data["ref_no"] for ctx in results] == [f"INC-{i}" for i in range(6)]
+    assert results[2].failed
+    assert all(not ctx.failed for i, ctx in enumerate(results) if i != 2)
+    assert rootcause.max_active > 1
+
+
+@pytest.mark.parametrize("mode, first_rca_stage", [("pipelined", "part3"), ("sequential", "immediate_causes")])
+def test_immediate_causes_run_alongside_part1_when_text_available(monkeypatch, mode, first_rca_stage):
+    monkeypatch.setenv("ROOTCAUSE_MODE", mode)
+    orchestrator, _ = make_orchestrator()
+    ctx = orchestrator.run_investigation({"ref_no": "INC-1", "description": TEXT})
+
+    stages = ctx["pipeline"]["stages"]
+    # Doğrudan nedenler Part 1 bitmeden başlar; akışlı modda ayrı aşama yoktur
+    assert stages[first_rca_stage]["start"] < stages["part1"]["end"]
+    assert ("immediate_causes" in stages) == (mode == "sequential")
+    assert ctx["part3_rca"]["incident_summary"] == TEXT
+    assert ctx["pipeline"]["wall_time"] < ctx["pipeline"]["sum_of_stages"]
+
+
+def test_summary_waits_for_part1_without_incident_text():
+    orchestrator, _ = make_orchestrator()
+    ctx = orchestrator.run_investigation({"ref_no": "INC-2", "description": "kısa"})
+
+    stages = ctx["pipeline"]["stages"]
+    assert stages["incident_summary"]["start"] >= stages["part2"]["end"]
+    assert "kısa özet" in ctx["part3_rca"]["incident_summary"]
+
+
+class FlakyRootCause(FakeRootCause):
+    """Üç dal üretir; ilk çalıştırmada 3. dalda hata verir."""
+
+    def __init__(self):
+        super().__init__()
+        self.fail_branch = "B3.3"
+        self.calls = []
+
+    def _identify_immediate_causes_with_codes(self, incident_summary):
+        self.calls.append("immediate")
+        return [{"code": c, "cause_tr": c} for c in ("A1.1", "B2.1", "B3.3")]
+
+    def _perform_5why_chain(self, immediate_cause, incident_summary, used_root_codes=None):
+        code = immediate_cause["code"]
+        self.calls.append(code)
+        if code == self.fail_branch:
+            raise ConnectionError("geçici hata")
+        return {"whys": [], "root_cause": {"code": f"D{len(used_root_codes) + 1}.1"}}
+
+
+class CountingOverview(FakeOverview):
+    def __init__(self):
+        self.calls = 0
+
+    def process_initial_report(self, incident_data):
+        self.calls += 1
+        return super().process_initial_report(incident_data)
+
+
+@pytest.mark.parametrize("mode, resumed_calls", [
+    ("pipelined", ["immediate", "B3.3"]),  # nedenler yeniden akıtılır, tamamlanan dallar yüklenir
+    ("sequential", ["B3.3"]),
+])
+def test_failed_investigation_resumes_from_last_completed_branch(tmp_path, monkeypatch, mode, resumed_calls):
+    monkeypatch.setenv("ROOTCAUSE_MODE", mode)
+    monkeypatch.setenv("ROOTCAUSE_BRANCH_WORKERS", "1")
+    rootcause, overview = FlakyRootCause(), CountingOverview()
+    orchestrator, _ = make_orchestrator(str(tmp_path), rootcause, overview)
+    incident = {"ref_no": "INC-R1", "description": TEXT}
+
+    with pytest.raises(ConnectionError):
+        orchestrator.run_investigation(incident)
+    assert rootcause.calls == ["immediate", "A1.1", "B2.1", "B3.3"]
+
+    rootcause.fail_branch = None
+    rootcause.calls.clear()
+    ctx = orchestrator.run_investigation(incident)
+
+    # Part 1/2 ve ilk iki dal tekrar çalıştırılmaz
+    assert rootcause.calls == resumed_calls
+    assert overview.calls == 1
+    assert "part1" in ctx["pipeline"]["skipped"]
+    assert [b["root_cause"]["code"] for b in ctx["part3_rca"]["analysis_branches"]] == \
+        ["D1.1", "D2.1", "D3.1"]
+
+    # Tamamlanan soruşturmanın checkpoint'i silinir; tekrar çalıştırma baştan başlar
+    assert not (tmp_path / "INC-R1").exists()
+    rootcause.calls.clear()
+    orchestrator.run_investigation(incident)
+    assert rootcause.calls == ["immediate", "A1.1", "B2.1", "B3.3"] and overview.calls == 2
+
+
+def test_changed_payload_or_resume_false_starts_fresh(tmp_path):
+    rootcause, overview = FlakyRootCause(), CountingOverview()
+    rootcause.fail_branch = None
+    orchestrator, _ = make_orchestrator(str(tmp_path), rootcause, overview)
+
+    orchestrator.run_investigation({"ref_no": "INC-R2", "description": TEXT})
+    orchestrator.run_investigation({"ref_no": "INC-R2", "description": TEXT + " Ek bilgi."})
+    assert overview.calls == 2
+
+    orchestrator.run_investigation({"ref_no": "INC-R2", "description": TEXT + " Ek bilgi."},
+                                   resume=False)
+    assert overview.calls == 3
@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+"""
+TEST: DAG zamanlayıcısı (agents/pipeline.py)
+"""
+
+import sys
+import time
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import pytest
+
+from agents.pipeline import PipelineError, PipelineScheduler, StageNode
+
+
+def sleeper(seconds, output, value=None):
+    def _run(**kwargs):
+        time.sleep(seconds)
+        return {output: value if value is not None else sorted(kwargs)}
+    return _run
+
+
+def diamond():
+    return [
+        StageNode("a", sleeper(0.05, "x"), ["seed"], ["x"]),
+        StageNode("b", sleeper(0.10, "y"), ["x"], ["y"]),
+        StageNode("c", sleeper(0.02, "z"), ["x"], ["z"]),
+        StageNode("d", sleeper(0.01, "out"), ["y", "z"], ["out"]),
+    ]
+
+
+def test_independent_nodes_run_concurrently_and_critical_path_is_reported():
+    run = PipelineScheduler(diamond()).run({"seed": 1})
+
+    assert run.results["out"] == ["y", "z"]
+    assert run.timings["c"]["start"] < run.timings["b"]["end"]
+    assert run.critical_path == ["a", "b", "d"]
+    assert run.wall_time < run.sum_of_stages
+    assert run.critical_path_time == pytest.approx(
+        sum(run.timings[n]["duration"] for n in ["a", "b", "d"])
+    )
+
+
+def test_nodes_with_supplied_outputs_are_skipped():
+    run = PipelineScheduler(diamond()).run({"seed": 1, "x": "cached", "y": "cached"})
+    assert run.skipped == ["a", "b"]
+    assert set(run.timings) == {"c", "d"}
+
+
+def test_failure_stops_new_stages_and_keeps_partial_results():
+    def boom(x):
+        raise ValueError("boom")
+
+    nodes = diamond()
+    nodes[1] = StageNode("b", boom, ["x"], ["y"])
+    with pytest.raises(PipelineError) as exc:
+        PipelineScheduler(nodes).run({"seed": 1})
+
+    assert exc.value.node == "b"
+    assert isinstance(exc.value.error, ValueError)
+    assert "x" in exc.value.run.results
+    assert "d" not in exc.value.run.timings
+
+
+def test_invalid_graphs_are_rejected():
+    with pytest.raises(ValueError):
+        PipelineScheduler([
+            StageNode("a", sleeper(0, "x"), ["y"], ["x"]),
+            StageNode("b", sleeper(0, "y"), ["x"], ["y"]),
+        ])
+    with pytest.raises(ValueError):
+        PipelineScheduler(diamond()).run({})
@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+"""
+TEST: Olay ciddiyetine göre LLM kapasitesinde öncelik
+
+Kritik (High level) soruşturmalar sırada bekleyen düşük öncelikli
+isteklerin önüne geçer, ayrılmış kapasiteyi yalnızca onlar kullanır;
+uzun bekleyen düşük öncelikli istek yaşlanarak sırasını alır. Part 2
+değerlendirmesi soruşturmanın kalan LLM isteklerinin önceliğini belirler.
+"""
+
+import sys
+import threading
+import time
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from agents.orchestrator import RootCauseOrchestrator
+from shared.priority import PriorityGate, current_priority, priority_context, priority_from_assessment
+from test_orchestrator import FakeOverview, FakeRootCause
+
+
+def test_priority_from_assessment():
+    assert priority_from_assessment({"investigation_level": "High level", "priority": "High"}) == "critical"
+    assert priority_from_assessment({"investigation_level": "Medium level"}) == "high"
+    assert priority_from_assessment({"investigation_level": "Basic", "priority": "Low"}) == "low"
+    assert priority_from_assessment(None) == "normal"
+
+
+def queue_behind_held_slot(gate, arrivals):
+    """Tek slot doluyken sırayla gelen istekler; slot bırakılınca geçiş sırası."""
+    gate.acquire("normal")
+    order = []
+
+    def take(level):
+        gate.acquire(level)
+        order.append(level)
+        gate.release()
+
+    threads = []
+    for level, delay in arrivals:
+        thread = threading.Thread(target=take, args=(level,))
+        thread.start()
+        threads.append(thread)
+        time.sleep(delay)
+    gate.release()
+    for thread in threads:
+        thread.join()
+    return order
+
+
+def test_critical_overtakes_queued_low_requests_until_they_age():
+    assert queue_behind_held_slot(PriorityGate(max_concurrent=1, reserved=0, aging_s=30),
+                                  [("low", 0.02), ("low", 0.02), ("critical", 0.02)]) == ["critical", "low", "low"]
+    # 2 sıra farkı × 0.05s yaşlanma: 0.2s bekleyen düşük öncelikli istek önce geçer
+    assert queue_behind_held_slot(PriorityGate(max_concurrent=1, reserved=0, aging_s=0.05),
+                                  [("low", 0.2), ("critical", 0.02)]) == ["low", "critical"]
+
+
+def test_reserved_slots_are_for_critical_only():
+    gate = PriorityGate(max_concurrent=2, reserved=1)
+    gate.acquire("low")
+    admitted = []
+    low = threading.Thread(target=lambda: admitted.append(("low", gate.acquire("low"))))
+    low.start()
+    time.sleep(0.05)
+
+    assert gate.acquire("critical") < 0.05
+    assert admitted == [] and gate.snapshot()["levels"]["low"]["waiting"] == 1
+
+    gate.release()
+    gate.release()
+    low.join()
+    assert admitted[0][0] == "low"
+
+
+class CriticalAssessment:
+    def assess_incident(self, part1, incident_data):
+        return {"investigation_level": "High level", "priority": "High"}
+
+
+class RecordingRootCause(FakeRootCause):
+    def _perform_5why_chain(self, immediate_cause, incident_summary, used_root_codes=None):
+        self.priority = current_priority()
+        return super()._perform_5why_chain(immediate_cause, incident_summary, used_root_codes)
+
+
+def test_part2_assessment_sets_priority_of_remaining_stages():
+    rootcause = RecordingRootCause()
+    orchestrator = RootCauseOrchestrator(agents={
+        "overview": FakeOverview(), "assessment": CriticalAssessment(),
+        "rootcause": rootcause, "docx": None,
+    }, checkpoint_dir=None)
+
+    # Metin yok: 5-Why, Part 2'den sonra çalışır
+    ctx = orchestrator.run_investigation({"ref_no": "INC-P1"}, priority="low")
+
+    assert rootcause.priority == "critical"
+    assert ctx["priority"] == "critical"
+    with priority_context("low"):
+        assert current_priority() == "low"
+    assert current_priority() == "normal"
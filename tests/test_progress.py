@@ -0,0 +1,153 @@
+# -*- coding: utf-8 -*-
+"""
+TEST: İnceleme ilerleme olayları (Server-Sent Events)
+
+Ajanların yayınladığı olaylar olay (incident) bazında sıralı id ile
+saklanır; geç bağlanan istemci kaçırdıklarını alır, Last-Event-ID ile
+yeniden bağlanan yalnızca sonrasını alır. Arka planda başlatılan
+inceleme, bitmeden önce dallarını akış olarak gönderir.
+"""
+
+import json
+import threading
+import sys
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from fastapi.testclient import TestClient
+
+import api.main
+from shared.dedup import DuplicateDetector
+from shared.log import log_context
+from shared.progress import ProgressBroker, emit, track_stage
+
+
+def parse_sse(text):
+    events = []
+    for block in text.strip().split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in block.splitlines() if not line.startswith(":"))
+        if fields:
+            events.append((int(fields["id"]), fields["event"], json.loads(fields["data"])["data"]))
+    return events
+
+
+def test_broker_replays_backlog_after_last_event_id():
+    broker = ProgressBroker(history=3)
+    for i in range(4):
+        broker.publish("INC-1", "branch_complete", {"branch": i})
+
+    live = []
+    backlog = broker.subscribe("INC-1", live.append, after=2)
+    broker.publish("INC-1", "stage", {"stage": "part3", "status": "completed"})
+    broker.publish("INC-2", "stage", {"stage": "part1", "status": "completed"})
+
+    assert [e["id"] for e in backlog] == [3, 4]
+    assert [e["id"] for e in broker.events("INC-1")] == [3, 4, 5]  # history=3
+    assert [(e["id"], e["event"]) for e in live] == [(5, "stage")]
+    # Olay bağlamı dışında emit yapılmaz
+    assert emit("stage", stage="x") is None
+
+
+class FakeRootCauseAgent:
+    def analyze_root_causes(self, part1, part2, investigation, previous=None):
+        emit("immediate_cause", index=1, code="A2.3", title="Arızalı ekipman", cause="Vana arızalı")
+        emit("branch_complete", branch=1, immediate_code="A2.3", root_code="D4.2",
+             root_title="Bakım planlaması", root_cause="Bakım ertelendi", whys=5, resumed=False)
+        return {"analysis_branches": [], "final_root_causes": []}
+
+
+class FakeRegistry:
+    def get(self, name):
+        return FakeRootCauseAgent() if name == "rootcause" else None
+
+
+def test_background_investigation_streams_events(monkeypatch):
+    monkeypatch.setattr(api.main, "agent_registry", FakeRegistry())
+    incident_id = "INC-TEST-PROGRESS"
+    monkeypatch.setitem(api.main.incidents_db, incident_id, {"status": "submitted"})
+
+    with TestClient(api.main.app) as client:
+        response = client.post(f"/api/v1/incidents/{incident_id}/investigate?background=true",
+                               json={"how_happened": "Vana patladı"})
+        assert response.status_code == 202
+
+        stream = client.get(f"/api/v1/incidents/{incident_id}/events?until=part3")
+        events = parse_sse(stream.text)
+
+        assert [e[1] for e in events] == ["stage", "immediate_cause", "branch_complete", "stage"]
+        assert events[2][2]["root_code"] == "D4.2"
+        assert events[-1][2] == {"stage": "part3", "status": "completed"}
+        assert api.main.incidents_db[incident_id]["status"] == "investigated"
+
+        # Yeniden bağlanma: yalnızca Last-Event-ID sonrası
+        with log_context(incident_id=incident_id):
+            with track_stage("part4"):
+                pass
+        resumed = client.get(f"/api/v1/incidents/{incident_id}/events?until=part4",
+                             headers={"Last-Event-ID": str(events[-1][0])})
+        assert [e[2]["status"] for e in parse_sse(resumed.text)] == ["started", "completed"]
+
+
+class ThreadRecordingAgent:
+    """Her ajan çağrısının ve ajan kurulumunun (registry.get) iş parçacığını kaydeder."""
+
+    def __init__(self, report_path=None):
+        self.threads = []
+        self.report_path = report_path
+
+    def get(self, name):
+        self.threads.append(threading.get_ident())
+        return self
+
+    def generate_action_plan(self, data, previous=None):
+        self.threads.append(threading.get_ident())
+        emit("control_measure", measure="Vanayı değiştir", category="immediate")
+        return {"control_measures": [{"measure": "Vanayı değiştir", "category": "immediate"}]}
+
+    def process_initial_report(self, incident_data):
+        self.threads.append(threading.get_ident())
+        return {"ref_no": "INC-TEST-PART1", "reported_by": incident_data["reported_by"]}
+
+    def generate_report(self, rca_data, output_filename=None):
+        self.threads.append(threading.get_ident())
+        self.report_path.write_bytes(b"%PDF-1.4")
+        return str(self.report_path)
+
+
+def test_action_plan_runs_off_the_event_loop(monkeypatch):
+    agent = ThreadRecordingAgent()
+    monkeypatch.setattr(api.main, "agent_registry", agent)
+    incident_id = "INC-TEST-PART4"
+    monkeypatch.setitem(api.main.incidents_db, incident_id, {
+        "status": "investigated", "part2": {"investigation_level": "Medium level"},
+        "part3": {"root_causes": ["Bakım ertelendi"], "underlying_causes": [], "immediate_causes": []}})
+
+    with TestClient(api.main.app) as client:
+        loop_thread = client.portal.call(threading.get_ident)
+        assert client.post(f"/api/v1/incidents/{incident_id}/actionplan").status_code == 200
+        events = parse_sse(client.get(f"/api/v1/incidents/{incident_id}/events?until=part4").text)
+
+    # Ajan iş parçacığında kurulur ve çalışır, olay döngüsü akışları beslemeye devam eder
+    assert len(agent.threads) == 2 and loop_thread not in agent.threads
+    assert [e[1] for e in events] == ["stage", "control_measure", "stage"]
+
+
+def test_part1_and_pdf_run_off_the_event_loop(monkeypatch, tmp_path):
+    agent = ThreadRecordingAgent(report_path=tmp_path / "rapor.pdf")
+    monkeypatch.setattr(api.main, "agent_registry", agent)
+    monkeypatch.setattr(api.main, "get_duplicate_detector", lambda: DuplicateDetector(threshold=0))
+    monkeypatch.setattr(api.main, "incidents_db", {})
+    monkeypatch.setattr(api.main.loop_monitor, "routes", {})  # istek sayaçları diğer testlere taşmasın
+
+    with TestClient(api.main.app) as client:
+        loop_thread = client.portal.call(threading.get_ident)
+        created = client.post("/api/v1/incidents/create", json={"reported_by": "Tanık", "description": "Vana patladı"})
+        assert created.status_code == 200
+        api.main.incidents_db["INC-TEST-PART1"]["status"] = "completed"
+        report = client.post("/api/v1/reports/generate", json={"incident_id": "INC-TEST-PART1"})
+        assert report.status_code == 200 and report.content == b"%PDF-1.4"
+
+    # registry.get + Part 1, registry.get + PDF
+    assert len(agent.threads) == 4 and loop_thread not in agent.threads
@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+"""
+TEST: Önbelleğe alınabilir prompt önekleri ve token/önbellek kullanımı
+
+Taksonomi, kurallar ve şema her olayda aynı sistem önekinde olmalı; olay
+metni ve dala özgü değerler önekten sonra gelmeli. Yerel LLM sunucusu
+sağlayıcı önbelleğini taklit eder, UsageTracker okunan önbellek
+tokenlarını raporlar.
+"""
+
+import json
+import sys
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from agents.rootcause_agent_v2 import RootCauseAgentV2
+from shared.llm_client import add_middleware, remove_middleware
+from shared.llm_usage import get_usage_tracker, normalize_usage
+from shared.prompt_cache import cacheable_prefix
+from tools.mock_llm_server import CassetteLibrary, MockLLMServer
+
+
+def test_5why_prefix_is_shared_across_incidents_and_cached(monkeypatch):
+    bodies = []
+
+    def capture(request, call_next):
+        bodies.append(json.loads(request.content))
+        return call_next(request)
+
+    with MockLLMServer(CassetteLibrary([]), on_miss="synthetic") as server:
+        monkeypatch.setenv("OPENROUTER_BASE_URL", server.base_url)
+        monkeypatch.setenv("OPENROUTER_API_KEY", "test-key")
+        monkeypatch.setenv("FIVE_WHY_MODE", "direct")
+        agent = RootCauseAgentV2()
+        tracker = get_usage_tracker()
+        tracker.reset()
+        add_middleware(capture)
+        try:
+            agent._perform_5why_chain({"code": "A2.3", "cause_tr": "Arızalı vana kullanıldı"},
+                                      "Reaktörde basınç artışı ve patlama")
+            agent._perform_5why_chain({"code": "B1.4", "cause_tr": "Alarm çalmadı"},
+                                      "R-17 deposunda devrilme", used_root_codes=["D4.2"])
+        finally:
+            remove_middleware(capture)
+
+    first, second = (cacheable_prefix(body) for body in bodies)
+    assert first and first == second
+    assert "R-17" not in first and "Farklı, daha spesifik bir kod bul" not in first
+    assert "R-17" in bodies[1]["messages"][-1]["content"]
+
+    usage = tracker.snapshot()["models"]["anthropic/claude-opus-4.6"]
+    assert usage["requests"] == 2
+    assert usage["cache_write_tokens"] > 0 and usage["cached_tokens"] > 0
+    assert 0 < usage["cache_hit_ratio"] < 1
+
+
+def test_usage_formats_are_normalized():
+    openrouter = {"prompt_tokens": 2000, "completion_tokens": 50,
+                  "prompt_tokens_details": {"cached_tokens": 1500, "cache_write_tokens": 0}}
+    anthropic = {"input_tokens": 500, "output_tokens": 50,
+                 "cache_read_input_tokens": 1500, "cache_creation_input_tokens": 0}
+    expected = {"prompt_tokens": 2000, "completion_tokens": 50,
+                "cached_tokens": 1500, "cache_write_tokens": 0}
+    assert normalize_usage(openrouter) == expected
+    assert normalize_usage(anthropic) == expected
@@ -0,0 +1,181 @@
+# -*- coding: utf-8 -*-
+"""
+TEST: Model bazında token-kovası hız sınırı
+
+İstek ve token bütçeleri modele göre ayrı tutulur, bekleyenler geliş
+sırasıyla geçer, sağlayıcının 429'u çağırana hata olarak dönmez ve
+bütçe aynı SQLite dosyasını kullanan worker'lar arasında paylaşılır.
+"""
+
+import json
+import sys
+import threading
+import time
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import httpx
+import pytest
+
+from shared import llm_client
+from shared.llm_usage import get_usage_tracker
+from shared.priority import get_priority_gate
+from shared.rate_limit import TokenBucketLimiter, parse_limits
+from shared.single_flight import get_single_flight
+
+URL = "https://openrouter.ai/api/v1/chat/completions"
+SONNET = "anthropic/claude-sonnet-4.5"
+HAIKU = "anthropic/claude-haiku-4.5"
+
+
+def chat_request(model=SONNET, max_tokens=100):
+    body = {"model": model, "max_tokens": max_tokens, "messages": [{"role": "user", "content": "Özetle"}]}
+    return httpx.Request("POST", URL, content=json.dumps(body).encode("utf-8"))
+
+
+def completion(request, total_tokens=20):
+    return httpx.Response(200, json={"choices": [{"message": {"content": "tamam"}}],
+                                     "usage": {"prompt_tokens": total_tokens - 5, "completion_tokens": 5}},
+                          request=request)
+
+
+def test_parse_limits():
+    assert parse_limits(f"{SONNET}=50/40000, {HAIKU}=100/") == {SONNET: (50.0, 40000.0), HAIKU: (100.0, None)}
+
+
+def test_budgets_are_per_model_and_tokens_are_reconciled():
+    limiter = TokenBucketLimiter({SONNET: (1, None), "*": (None, 1000)}, period=60)
+    limiter(chat_request(), completion)
+    limiter(chat_request(HAIKU, max_tokens=500), completion)
+
+    # Sonnet'in istek kovası boş, Haiku yalnızca token ile sınırlı
+    assert limiter._try_acquire(SONNET, limiter._enqueue(SONNET), 0) > 30
+    # Tahmin (~500+) yerine gerçek kullanım (20 token) düşülür
+    assert limiter._try_acquire(HAIKU, limiter._enqueue(HAIKU), 900) == 0
+
+
+def test_streamed_usage_is_reconciled_when_the_stream_closes():
+    limiter = TokenBucketLimiter({"*": (None, 1000)}, period=60)
+    request = chat_request(HAIKU, max_tokens=500)
+    body = json.loads(request.content)
+    request = httpx.Request("POST", URL, content=json.dumps(dict(body, stream=True)).encode("utf-8"))
+    events = [{"choices": [{"delta": {"content": "tamam"}}]},
+              {"choices": [], "usage": {"prompt_tokens": 15, "completion_tokens": 5}}]
+    sse = "".join(f"data: {json.dumps(e)}\n\n" for e in events) + "data: [DONE]\n\n"
+
+    class SSEStream(httpx.SyncByteStream):
+        def __iter__(self):
+            yield sse.encode("utf-8")
+
+    response = limiter(request, lambda r: httpx.Response(
+        200, headers={"content-type": "text/event-stream"}, stream=SSEStream(), request=r))
+    # Akış okunup kapanana kadar tahmin (~500+) düşülmüş durur
+    ticket = limiter._enqueue(HAIKU)
+    assert limiter._try_acquire(HAIKU, ticket, 900) > 0
+    limiter._dequeue(ticket)
+    response.read()
+    response.close()
+    assert limiter._try_acquire(HAIKU, limiter._enqueue(HAIKU), 900) == 0
+
+
+def test_waiting_requests_are_served_in_arrival_order():
+    limiter = TokenBucketLimiter({"*": (None, 100)}, period=0.3)
+    limiter.acquire(SONNET, 100)
+    order = []
+
+    def take(name, tokens):
+        limiter.acquire(SONNET, tokens)
+        order.append(name)
+
+    big = threading.Thread(target=take, args=("büyük", 100))
+    big.start()
+    time.sleep(0.05)
+    small = threading.Thread(target=take, args=("küçük", 10))
+    small.start()
+    big.join()
+    small.join()
+
+    assert order == ["büyük", "küçük"]
+    assert limiter.stats()["models"][SONNET]["p95_wait_s"] > 0.2
+
+
+def test_429_pauses_model_and_retries():
+    limiter = TokenBucketLimiter({"*": (100, None)})
+    calls = []
+
+    def provider(request):
+        calls.append(time.monotonic())
+        if len(calls) == 1:
+            return httpx.Response(429, headers={"retry-after": "0.2"}, request=request)
+        return completion(request)
+
+    response = limiter(chat_request(), provider)
+
+    assert response.status_code == 200
+    assert calls[1] - calls[0] >= 0.15
+    assert limiter.stats()["throttled"] == 1
+
+
+def test_workers_share_budget_through_store(tmp_path):
+    db = str(tmp_path / "limits.sqlite")
+    worker_a = TokenBucketLimiter({"*": (2, None)}, db_path=db, period=0.4)
+    worker_b = TokenBucketLimiter({"*": (2, None)}, db_path=db, period=0.4)
+
+    worker_a.acquire(SONNET)
+    worker_a.acquire(SONNET)
+    start = time.monotonic()
+    worker_b.acquire(SONNET)
+
+    assert time.monotonic() - start >= 0.15
+
+
+def test_critical_request_is_served_before_waiting_low_ones():
+    limiter = TokenBucketLimiter({"*": (1, None)}, period=0.2)
+    limiter.acquire(SONNET)
+    order = []
+
+    def take(priority):
+        limiter.acquire(SONNET, priority=priority)
+        order.append(priority)
+
+    threads = [threading.Thread(target=take, args=(p,)) for p in ("low", "low", "critical")]
+    for thread in threads:
+        thread.start()
+        time.sleep(0.02)
+    for thread in threads:
+        thread.join()
+
+    assert order == ["critical", "low", "low"]
+
+
+@pytest.fixture
+def fresh_chain(monkeypatch):
+    monkeypatch.setattr(llm_client, "_middlewares", [])
+    monkeypatch.setattr(llm_client, "_outer_middlewares", [])
+    monkeypatch.setattr(llm_client, "_env_middlewares_installed", False)
+    monkeypatch.setattr(llm_client, "_rate_limiter", None)
+    for name in ("LLM_RPM", "LLM_TPM", "LLM_RATE_LIMITS", "LLM_RECORD_CASSETTE"):
+        monkeypatch.delenv(name, raising=False)
+    monkeypatch.setenv("LLM_RATE_LIMIT_DB", ":memory:")
+    expected = [get_single_flight(), get_usage_tracker(), get_priority_gate()]
+    return lambda: expected + [llm_client.get_global_rate_limiter()]
+
+
+def test_limiter_sits_inside_priority_gate_when_set_before_first_client(fresh_chain):
+    # Toplu içe aktarma: sınır, istemci (ortam ara katmanları) oluşmadan önce kurulur
+    llm_client.set_global_rate_limit(requests_per_minute=60)
+    llm_client.create_openrouter_client(api_key="test")
+    assert llm_client._middlewares == fresh_chain()
+
+    # Yeniden kurulum aynı yere gelir
+    llm_client.set_global_rate_limit(tokens_per_minute=1000)
+    assert llm_client._middlewares == fresh_chain()
+
+
+def test_limiter_from_env_sits_inside_priority_gate(fresh_chain, monkeypatch):
+    monkeypatch.setenv("LLM_RPM", "60")
+    llm_client.create_openrouter_client(api_key="test")
+    assert isinstance(llm_client.get_global_rate_limiter(), TokenBucketLimiter)
+    assert llm_client._middlewares == fresh_chain()
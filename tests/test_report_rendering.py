@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+"""
+TEST: İçerik sidecar'ı ve LLM'siz yeniden render
+Ağ erişimi gerektirmez.
+"""
+
+import json
+import sys
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import pytest
+
+from agents.skillbased_docx_agent import (
+    SkillBasedDocxAgent,
+    compute_payload_hash,
+    content_sidecar_path,
+    load_content_sidecar,
+)
+from tools.rerender_reports import find_sidecars, main as rerender_main
+
+CONTENT = {
+    "cover": {"title": "KÖK NEDEN ANALİZİ RAPORU", "ref_no": "INC-TEST-1"},
+    "executive_summary": {"what_happened": "Test olayı", "key_findings": ["Bulgu 1"]},
+    "root_causes": [{"code": "D1.1", "title": "Risk değerlendirmesi", "description": "Açıklama"}],
+}
+
+INVESTIGATION = {
+    "part1": {"ref_no": "INC-TEST-1"},
+    "part2": {"investigation_level": "High level"},
+    "part3_rca": {"analysis_branches": [], "final_root_causes": []},
+}
+
+
+def test_payload_hash_is_key_order_independent():
+    a = {"part1": {"x": 1, "y": 2}, "part2": {}}
+    b = {"part2": {}, "part1": {"y": 2, "x": 1}}
+    assert compute_payload_hash(a) == compute_payload_hash(b)
+    assert compute_payload_hash(a) != compute_payload_hash({"part1": {"x": 2}})
+
+
+def test_generate_report_saves_and_reuses_sidecar(tmp_path, monkeypatch):
+    agent = SkillBasedDocxAgent(api_key="test-key")
+    calls = []
+
+    def fake_generate(raw_data, timeout_seconds=600):
+        calls.append(raw_data)
+        return CONTENT
+
+    monkeypatch.setattr(agent, "_generate_content_with_claude", fake_generate)
+    output = tmp_path / "INC-TEST-1_hse_report.docx"
+
+    agent.generate_report(INVESTIGATION, output_path=str(output))
+    sidecar = load_content_sidecar(str(content_sidecar_path(str(output))))
+    assert sidecar["content"] == CONTENT
+    assert sidecar["payload_hash"] == compute_payload_hash(agent._build_raw_payload(INVESTIGATION))
+    assert output.exists() and output.with_suffix(".html").exists()
+
+    # Aynı payload → Claude tekrar çağrılmaz
+    agent.generate_report(INVESTIGATION, output_path=str(output))
+    assert len(calls) == 1
+
+    # Payload değişti → yeniden üretilir
+    changed = dict(INVESTIGATION, part2={"investigation_level": "Low level"})
+    agent.generate_report(changed, output_path=str(output))
+    assert len(calls) == 2
+
+
+def test_minimal_fallback_content_is_not_persisted(tmp_path, monkeypatch):
+    agent = SkillBasedDocxAgent(api_key="test-key")
+    monkeypatch.setattr(
+        agent, "_generate_content_with_claude",
+        lambda raw, timeout_seconds=600: {"cover": {"title": "KÖK NEDEN ANALİZİ RAPORU"}},
+    )
+    output = tmp_path / "fallback.docx"
+    agent.generate_report(INVESTIGATION, output_path=str(output))
+    assert output.exists()
+    assert not content_sidecar_path(str(output)).exists()
+
+
+def test_offline_agent_renders_without_api_key(tmp_path, monkeypatch):
+    monkeypatch.delenv("OPENROUTER_API_KEY", raising=False)
+    sidecar = tmp_path / "report.content.json"
+    sidecar.write_text(json.dumps({"payload_hash": "x", "content": CONTENT}), encoding="utf-8")
+
+    agent = SkillBasedDocxAgent(offline=True)
+    path = agent.render_from_content(str(sidecar))
+    assert Path(path) == (tmp_path / "report.docx").resolve()
+    assert (tmp_path / "report.html").exists()
+
+    with pytest.raises(RuntimeError):
+        agent.generate_report({"part1": {"ref_no": "NEW"}}, output_path=str(tmp_path / "new.docx"))
+
+
+def test_rerender_cli_renders_all_sidecars(tmp_path, monkeypatch):
+    monkeypatch.delenv("OPENROUTER_API_KEY", raising=False)
+    for name in ("a", "b"):
+        (tmp_path / f"{name}.content.json").write_text(
+            json.dumps({"payload_hash": name, "content": CONTENT}), encoding="utf-8"
+        )
+    assert len(find_sidecars(str(tmp_path))) == 2
+
+    assert rerender_main(["--outputs-dir", str(tmp_path), "--workers", "2"]) == 0
+    assert (tmp_path / "a.docx").exists() and (tmp_path / "b.html").exists()
@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+"""
+TEST: Boru hattı (pipelined) 5-Why dalları
+
+Doğrudan neden yanıtı akarken ilk 5-Why dalı başlamalı; eşzamanlı dallar
+aynı kök nedeni seçerse sonraki dal yasak kodlarla yeniden çalışmalı.
+"""
+
+import json
+import sys
+import threading
+from pathlib import Path
+from types import SimpleNamespace
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from agents.rootcause_agent_v2 import RootCauseAgentV2
+
+CAUSES = [
+    {"code": "A2.3", "cause_tr": "Arızalı vana kullanıldı"},
+    {"code": "B1.4", "cause_tr": "Alarm çalmadı"},
+]
+
+
+class StreamingAgent(RootCauseAgentV2):
+    """Doğrudan neden akışı, ilk dal başlamadan ikinci nedeni göndermez."""
+
+    def __init__(self):
+        self.first_branch_started = threading.Event()
+        self.chains = []
+        text = json.dumps({"causes": CAUSES}, ensure_ascii=False)
+        split = text.index('{"code": "B1.4"')
+
+        def stream(**kwargs):
+            assert kwargs.get("stream") is True
+            yield self._chunk(text[:split])
+            # İlk neden kapandı; dal akış bitmeden başlamış olmalı
+            assert self.first_branch_started.wait(5), "5-Why dalı akış sırasında başlamadı"
+            yield self._chunk(text[split:])
+
+        self.client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=stream)))
+
+    @staticmethod
+    def _chunk(content):
+        return SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=content))])
+
+    def _perform_5why_chain(self, immediate_cause, incident_summary, used_root_codes=None):
+        self.first_branch_started.set()
+        banned = list(used_root_codes or [])
+        self.chains.append((immediate_cause["code"], banned))
+        code = "D1.1" if "D4.2" in banned else "D4.2"
+        return {"whys": [{"level": 1}], "root_cause": {"code": code, "cause_tr": code}}
+
+
+def test_branches_start_while_causes_stream_and_duplicates_are_revised():
+    agent = StreamingAgent()
+    rca = agent.analyze_root_causes({}, {}, {"how_happened": "Vana patladı, alarm çalmadı"},
+                                    mode="pipelined")
+
+    assert [b["immediate_cause"]["code"] for b in rca["analysis_branches"]] == ["A2.3", "B1.4"]
+    # Her iki dal da farklı kök nedene ulaşır; tekrar eden dal bir kez yeniden çalışır
+    assert [r["code"] for r in rca["final_root_causes"]] == ["D4.2", "D1.1"]
+    assert len(agent.chains) in (2, 3)
+    assert agent.chains[-1][0] == "B1.4"
+
+
+class ClosableStream:
+    """Doğrudan neden başına bir parça; kapatılınca kaç parça okunduğunu kaydeder."""
+
+    def __init__(self, causes):
+        self.parts = ['{"causes": ['] + [json.dumps(c, ensure_ascii=False) + ", " for c in causes]
+        self.read = 0
+        self.closed = False
+
+    def __iter__(self):
+        for part in self.parts:
+            self.read += 1
+            yield StreamingAgent._chunk(part)
+
+    def close(self):
+        self.closed = True
+
+
+def test_stream_stops_after_three_causes_and_closes_the_response():
+    causes = [{"code": f"A1.{i}", "cause_tr": f"Neden {i}"} for i in range(1, 6)]
+    stream = ClosableStream(causes)
+    agent = RootCauseAgentV2.__new__(RootCauseAgentV2)
+    agent.client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(
+        create=lambda **kwargs: stream)))
+
+    received = list(agent._stream_immediate_causes("Vana patladı"))
+
+    assert [c["code"] for c in received] == ["A1.1", "A1.2", "A1.3"]
+    # Üçüncü nedenden sonra akış okunmaz, bağlantı kapatılır
+    assert stream.read == 4 and stream.closed
@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+"""
+TEST: Eşzamanlı aynı LLM isteklerinin tek uçuşta birleştirilmesi
+
+Aynı anda gönderilen aynı istekten yalnızca biri sağlayıcıya gider,
+diğerleri onun yanıtının kopyasını alır - aynı süreçte iş parçacıkları
+arasında ve ortak SQLite deposu üzerinden iki worker arasında.
+"""
+
+import json
+import sys
+import threading
+import time
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import httpx
+
+from shared.single_flight import SingleFlight
+
+URL = "https://openrouter.ai/api/v1/chat/completions"
+
+
+class SlowProvider:
+    """Yanıtı gecikmeli dönen sahte sağlayıcı; gelen istekleri sayar."""
+
+    def __init__(self, delay=0.2, status=200):
+        self.delay = delay
+        self.status = status
+        self.calls = 0
+        self.lock = threading.Lock()
+
+    def __call__(self, request):
+        with self.lock:
+            self.calls += 1
+            n = self.calls
+        time.sleep(self.delay)
+        return httpx.Response(self.status, json={"choices": [{"message": {"content": f"yanıt {n}"}}]},
+                              request=request)
+
+
+def chat_request(content="Olayı özetle", **extra):
+    body = {"model": "anthropic/claude-sonnet-4.5", "messages": [{"role": "user", "content": content}], **extra}
+    return httpx.Request("POST", URL, content=json.dumps(body).encode("utf-8"))
+
+
+def run_concurrently(calls):
+    results = [None] * len(calls)
+
+    def run(i):
+        results[i] = calls[i]()
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(len(calls))]
+    for thread in threads:
+        thread.start()
+        time.sleep(0.01)
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def test_identical_requests_share_one_call():
+    flight, provider = SingleFlight(), SlowProvider()
+    calls = [lambda: flight(chat_request(), provider) for _ in range(4)]
+    calls.append(lambda: flight(chat_request("Başka bir olay"), provider))
+
+    responses = run_concurrently(calls)
+
+    assert provider.calls == 2
+    assert len({r.json()["choices"][0]["message"]["content"] for r in responses[:4]}) == 1
+    assert flight.snapshot()["shared_in_process"] == 3
+
+    # Uçuş bittikten sonra gelen aynı istek yeniden gönderilir (önbellek değil)
+    flight(chat_request(), provider)
+    assert provider.calls == 3
+
+
+def test_failed_and_streamed_requests_are_not_shared():
+    flight, provider = SingleFlight(), SlowProvider(status=429)
+    responses = run_concurrently([lambda: flight(chat_request(), provider) for _ in range(3)])
+    assert provider.calls == 3
+    assert all(r.status_code == 429 for r in responses)
+
+    provider = SlowProvider(delay=0.05)
+    run_concurrently([lambda: flight(chat_request(stream=True), provider) for _ in range(2)])
+    assert provider.calls == 2
+
+
+def test_workers_share_response_through_store(tmp_path):
+    db = str(tmp_path / "inflight.sqlite")
+    worker_a, worker_b = SingleFlight(db_path=db), SingleFlight(db_path=db)
+    provider = SlowProvider()
+
+    responses = run_concurrently([lambda: worker_a(chat_request(), provider),
+                                  lambda: worker_b(chat_request(), provider)])
+
+    assert provider.calls == 1
+    assert responses[0].json() == responses[1].json()
+    assert worker_b.snapshot()["shared_cross_process"] == 1
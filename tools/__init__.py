@@ -0,0 +1,4 @@
+"""
+Command-line tools for the HSE investigation system
+Run as modules, e.g. `python -m tools.rerender_reports`
+"""
@@ -0,0 +1,270 @@
+"""
+Bulk incident ingestion
+=======================
+
+Runs a backlog of incidents (JSON/JSONL exports or CSV spreadsheets)
+through RootCauseOrchestrator with several investigations in flight and
+per-model LLM request / token budgets (shared/rate_limit.py).
+
+Each finished investigation is appended to the results JSONL immediately,
+so an interrupted run keeps everything completed so far. Re-running with
+the same --output skips incidents whose ref_no already finished, and the
+orchestrator checkpoints resume the partially done ones.
+
+Input formats:
+    *.jsonl   one incident object per line
+    *.json    a single incident object or a list of them
+    *.csv     one incident per row; column names are incident keys and
+              cells holding JSON objects/lists are decoded
+
+Usage:
+    python -m tools.batch_ingest incidents.jsonl
+    python -m tools.batch_ingest exports/ --workers 8 --rpm 120 --tpm 400000
+    python -m tools.batch_ingest backlog.csv --output outputs/batch.jsonl --no-docx
+"""
+
+import argparse
+import csv
+import json
+import statistics
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from agents.checkpoint import incident_key
+from agents.orchestrator import InvestigationContext, RootCauseOrchestrator, get_shared_agents
+from shared.incident_index import IncidentIndex, get_incident_index
+from shared.llm_client import get_global_rate_limiter, set_global_rate_limit
+from shared.priority import PRIORITY_LEVELS
+
+INPUT_SUFFIXES = (".jsonl", ".json", ".csv")
+COMPLETE_PREFIX = "investigation_complete"
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Input
+# ─────────────────────────────────────────────────────────────────────────────
+
+def _decode_cell(value: str):
+    text = (value or "").strip()
+    if text[:1] in ("{", "["):
+        try:
+            return json.loads(text)
+        except json.JSONDecodeError:
+            pass
+    return value
+
+
+def read_incidents(path: Path) -> List[Dict]:
+    """Read incidents from one .jsonl, .json or .csv file."""
+    suffix = path.suffix.lower()
+    if suffix == ".jsonl":
+        with open(path, encoding="utf-8") as f:
+            return [json.loads(line) for line in f if line.strip()]
+    if suffix == ".json":
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        return data if isinstance(data, list) else [data]
+    if suffix == ".csv":
+        with open(path, encoding="utf-8-sig", newline="") as f:
+            return [
+                {k: _decode_cell(v) for k, v in row.items() if k and v not in (None, "")}
+                for row in csv.DictReader(f)
+            ]
+    raise ValueError(f"Unsupported input format: {path}")
+
+
+def collect_incidents(inputs: Iterable[str]) -> List[Dict]:
+    """Incidents from files and directories (searched recursively), in order."""
+    incidents = []
+    for item in inputs:
+        path = Path(item)
+        files = (
+            sorted(p for p in path.rglob("*") if p.suffix.lower() in INPUT_SUFFIXES)
+            if path.is_dir() else [path]
+        )
+        for file in files:
+            incidents.extend(read_incidents(file))
+    return incidents
+
+
+def completed_keys(results_path: Path) -> Set[str]:
+    """Keys of incidents already completed in an existing results JSONL."""
+    done = set()
+    if not results_path.exists():
+        return done
+    with open(results_path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # partially written last line
+            if str(record.get("status", "")).startswith(COMPLETE_PREFIX):
+                done.add(record.get("key"))
+    return done
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Output
+# ─────────────────────────────────────────────────────────────────────────────
+
+class ResultWriter:
+    """Appends one JSON line per finished investigation (thread-safe)."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self.records: List[Dict] = []
+
+    def write(self, ctx: InvestigationContext) -> Dict:
+        record = {
+            "key": incident_key(ctx.incident_data),
+            "ref_no": ctx.ref_no,
+            "status": ctx.status,
+            "error": ctx.get("error"),
+            "elapsed_s": (ctx.get("pipeline") or {}).get("wall_time"),
+            "result": dict(ctx),
+        }
+        line = json.dumps(record, ensure_ascii=False, default=str)
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+            self.records.append(record)
+        return record
+
+
+def print_throughput(records: List[Dict], skipped: int, wall_time: float,
+                     limiter_stats: Optional[Dict] = None) -> None:
+    ok = [r for r in records if str(r["status"]).startswith(COMPLETE_PREFIX)]
+    latencies = sorted(r["elapsed_s"] for r in records if r["elapsed_s"] is not None)
+
+    print("\n" + "=" * 80)
+    print("📊 BATCH SUMMARY")
+    print("=" * 80)
+    print(f"Processed:     {len(records)}  (✅ {len(ok)}  ❌ {len(records) - len(ok)})")
+    print(f"Skipped:       {skipped} (already completed or duplicate)")
+    print(f"Wall time:     {wall_time:.1f}s")
+    if records and wall_time > 0:
+        print(f"Throughput:    {len(records) / wall_time * 60:.2f} incidents/min")
+    if latencies:
+        p95 = latencies[min(len(latencies) - 1, int(round(0.95 * (len(latencies) - 1))))]
+        print(f"Latency:       p50 {statistics.median(latencies):.1f}s · p95 {p95:.1f}s")
+    if limiter_stats:
+        print(f"LLM requests:  {limiter_stats['requests']} "
+              f"(waited {limiter_stats['total_wait_s']:.1f}s total, "
+              f"max {limiter_stats['max_wait_s']:.1f}s, {limiter_stats['throttled']} × 429)")
+        for model, stats in limiter_stats["models"].items():
+            limits = " · ".join(f"{v:g} {k}" for k, v in (("rpm", stats["rpm_limit"]), ("tpm", stats["tpm_limit"])) if v)
+            print(f"  {model}: {stats['requests']} requests ({limits}), "
+                  f"wait p95 {stats['p95_wait_s']:.1f}s")
+    print("=" * 80)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Run
+# ─────────────────────────────────────────────────────────────────────────────
+
+def run_batch(
+    incidents: List[Dict],
+    output: Path,
+    workers: int = 4,
+    orchestrator: Optional[RootCauseOrchestrator] = None,
+    docx: bool = True,
+    priority: str = "low",
+    index: Optional[IncidentIndex] = None,
+) -> List[Dict]:
+    """
+    Investigate incidents not yet completed in `output`, appending results.
+
+    Incidents queue for LLM capacity at `priority` until their Part 2
+    assessment sets their own, so an import does not delay urgent
+    investigations running alongside it (shared/priority.py). Completed
+    investigations are added to `index` (shared/incident_index.py) if given.
+
+    Returns the records written in this run.
+    """
+    done = completed_keys(output)
+    todo, seen = [], set(done)
+    for incident in incidents:
+        key = incident_key(incident)
+        if key not in seen:
+            seen.add(key)
+            todo.append(incident)
+    skipped = len(incidents) - len(todo)
+
+    if orchestrator is None:
+        agents = dict(get_shared_agents())
+        if not docx:
+            agents["docx"] = None
+        orchestrator = RootCauseOrchestrator(agents=agents)
+
+    writer = ResultWriter(output)
+
+    def _on_result(ctx: InvestigationContext) -> None:
+        record = writer.write(ctx)
+        if index is not None and str(record["status"]).startswith(COMPLETE_PREFIX):
+            try:
+                index.add_investigation(dict(ctx), doc_id=ctx.ref_no)
+            except Exception as e:
+                print(f"⚠️  {record['key']}: not indexed ({e})")
+        icon = "✅" if str(record["status"]).startswith(COMPLETE_PREFIX) else "❌"
+        elapsed = f" ({record['elapsed_s']:.1f}s)" if record["elapsed_s"] is not None else ""
+        print(f"{icon} {record['key']}: {record['status']}{elapsed}")
+
+    start = time.perf_counter()
+    orchestrator.run_many(todo, concurrency=workers, on_result=_on_result, priority=priority)
+    wall_time = time.perf_counter() - start
+
+    limiter = get_global_rate_limiter()
+    print_throughput(writer.records, skipped, wall_time, limiter.stats() if limiter else None)
+    return writer.records
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Run a backlog of incidents (JSONL/JSON/CSV) through the HSG245 pipeline."
+    )
+    parser.add_argument("inputs", nargs="+", help="Incident files or directories")
+    parser.add_argument(
+        "--output", default="outputs/batch_results.jsonl",
+        help="Results JSONL, appended to and used to skip completed incidents "
+             "(default: outputs/batch_results.jsonl)",
+    )
+    parser.add_argument("--workers", type=int, default=4,
+                        help="Investigations in flight (default: 4)")
+    parser.add_argument("--rpm", type=float, default=None,
+                        help="LLM requests-per-minute budget per model across all workers")
+    parser.add_argument("--tpm", type=float, default=None,
+                        help="LLM tokens-per-minute budget per model across all workers")
+    parser.add_argument("--rate-limit-db", default=None,
+                        help="SQLite file to share the budgets with other running workers")
+    parser.add_argument("--priority", default="low", choices=PRIORITY_LEVELS,
+                        help="LLM priority of incidents until Part 2 assesses them (default: low)")
+    parser.add_argument("--no-docx", action="store_true", help="Skip DOCX report generation")
+    parser.add_argument("--no-index", action="store_true",
+                        help="Do not add results to the similar-incident index")
+    args = parser.parse_args(argv)
+
+    incidents = collect_incidents(args.inputs)
+    if not incidents:
+        print("⚠️  No incidents found")
+        return 0
+
+    if args.rpm or args.tpm:
+        set_global_rate_limit(args.rpm, args.tpm, db_path=args.rate_limit_db)
+    print(f"📥 {len(incidents)} incident(s) loaded")
+
+    records = run_batch(incidents, Path(args.output), workers=max(1, args.workers),
+                        docx=not args.no_docx, priority=args.priority,
+                        index=None if args.no_index else get_incident_index())
+    failed = sum(1 for r in records if not str(r["status"]).startswith(COMPLETE_PREFIX))
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,103 @@
+"""
+Build the similar-incident index from past investigations
+==========================================================
+
+Adds every completed investigation found in saved results to the index
+used by GET /api/v1/incidents/{id}/similar and the RCA prompt
+(shared/incident_index.py). Re-running is safe: an incident already in
+the index is replaced, and --compact drops the replaced versions.
+
+Recognised inputs:
+    *.json    an investigation result ({"part1", "part2", "part3_rca"}),
+              a bare RCA ({"incident_summary", "analysis_branches", ...})
+              or a list of them
+    *.jsonl   one of the above per line, or tools.batch_ingest records
+              ({"ref_no", "result": {...}})
+
+The id is the incident ref_no, or the file name when there is none.
+
+Usage:
+    python -m tools.build_incident_index                       # outputs/
+    python -m tools.build_incident_index outputs/ archive/ --compact
+    python -m tools.build_incident_index results.jsonl --index /data/incident_index.jsonl
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from shared.incident_index import DEFAULT_INDEX_PATH, IncidentIndex, investigation_document
+
+
+def _records(path: Path) -> Iterator[Dict]:
+    if path.suffix == ".jsonl":
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        return
+    data = json.loads(path.read_text(encoding="utf-8"))
+    yield from data if isinstance(data, list) else [data]
+
+
+def find_investigations(inputs: Iterable[str], skip: Optional[Path] = None) -> Iterator[Tuple[str, Dict]]:
+    """(fallback id, investigation) for every record in the input files/directories."""
+    for name in inputs:
+        root = Path(name)
+        files = sorted(root.rglob("*.json*")) if root.is_dir() else [root]
+        for path in files:
+            if path.suffix not in (".json", ".jsonl") or (skip and path.resolve() == skip):
+                continue
+            try:
+                for n, record in enumerate(_records(path)):
+                    if isinstance(record, dict) and isinstance(record.get("result"), dict):
+                        record = dict(record["result"], ref_no=record.get("ref_no"))
+                    yield (path.stem if n == 0 else f"{path.stem}-{n}"), record
+            except (OSError, ValueError) as e:
+                print(f"⚠️  {path}: {e}")
+
+
+def build_index(inputs: Iterable[str], index: IncidentIndex) -> int:
+    """Add the investigations in `inputs` to `index`; returns how many were indexed."""
+    skip = index.path.resolve() if index.path else None
+    added = 0
+    for fallback_id, data in find_investigations(inputs, skip=skip):
+        doc = investigation_document(data)
+        if doc and index.add_investigation(data, doc_id=doc["meta"]["ref_no"] or fallback_id):
+            added += 1
+    return added
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Index past investigations for similar-incident lookup.")
+    parser.add_argument("inputs", nargs="*", default=["outputs"],
+                        help="Result files or directories (default: outputs)")
+    parser.add_argument("--index", default=os.getenv("INCIDENT_INDEX_PATH", DEFAULT_INDEX_PATH),
+                        help=f"Index file (default: INCIDENT_INDEX_PATH or {DEFAULT_INDEX_PATH})")
+    parser.add_argument("--compact", action="store_true", help="Rewrite the index without replaced versions")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    index = IncidentIndex(args.index)
+    added = build_index(args.inputs, index)
+    if args.compact:
+        index.compact()
+    print(f"📚 {added} investigation(s) indexed · {len(index)} in {args.index} "
+          f"({time.perf_counter() - start:.1f}s)")
+
+    if len(index):
+        sample = next(iter(index._docs.values()))
+        start = time.perf_counter()
+        index.search(sample["summary"], codes=sample["root_codes"])
+        print(f"🔎 Lookup: {(time.perf_counter() - start) * 1000:.1f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
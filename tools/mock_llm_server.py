@@ -0,0 +1,426 @@
+"""
+Offline LLM stand-in server
+===========================
+
+An OpenAI-compatible /chat/completions endpoint that replays cassettes
+recorded by shared/llm_recorder.CassetteRecorder. Point the agents at it
+with OPENROUTER_BASE_URL and the whole pipeline runs without network
+access or spend, with response latency drawn from a configurable,
+seeded distribution so throughput/latency measurements are reproducible.
+
+Request matching:
+    exact      same request body hash as a recorded request (repeated
+               identical requests cycle through the recordings in order)
+    nearest    otherwise the recorded request for the same model whose
+               prompt template best matches (prompts embed dates, ref_nos,
+               incident text...); see CassetteLibrary
+    synthetic  placeholder completion ("{}" for JSON prompts) when no
+               cassette matches, so agents fall back to their defaults
+
+Prompt cache:
+    Like the provider, requests whose messages carry a cache_control
+    breakpoint are reported with prompt_tokens_details.cached_tokens when
+    the same prefix (same model) was seen within the cache TTL, and with
+    cache_write_tokens the first time (prefixes under 1024 tokens are not
+    cached). Disable with --no-prompt-cache.
+
+Latency specs (seconds):
+    none | fixed:0.8 | uniform:0.2,1.5 | normal:1.0,0.3 | lognormal:0.0,0.5
+    recorded   the duration measured when the cassette was recorded
+    --latency-scale multiplies every sample (e.g. 0.01 for fast CI runs)
+
+Usage:
+    python -m tools.mock_llm_server cassettes/ --port 8765 --latency lognormal:0.0,0.5 --seed 7
+    export OPENROUTER_BASE_URL=http://127.0.0.1:8765/api/v1
+    python tests/test_kmco_patlama.py
+"""
+
+import argparse
+import hashlib
+import itertools
+import json
+import math
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from shared.llm_recorder import iter_cassettes, request_key, request_text
+from shared.prompt_cache import cacheable_prefix
+
+ON_MISS_CHOICES = ("nearest", "synthetic", "error")
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Latency
+# ─────────────────────────────────────────────────────────────────────────────
+
+class LatencyModel:
+    """Seeded latency distribution parsed from a spec such as 'uniform:0.2,1.5'."""
+
+    def __init__(self, spec: str = "none", seed: Optional[int] = None, scale: float = 1.0):
+        name, _, args = spec.partition(":")
+        self.name = name.strip().lower()
+        self.params = [float(a) for a in args.split(",") if a.strip()]
+        expected = {"none": 0, "recorded": 0, "fixed": 1, "uniform": 2, "normal": 2, "lognormal": 2}
+        if self.name not in expected:
+            raise ValueError(f"Unknown latency distribution: {spec}")
+        if len(self.params) != expected[self.name]:
+            raise ValueError(f"'{self.name}' takes {expected[self.name]} parameter(s): {spec}")
+        self.spec = spec
+        self.scale = scale
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def sample(self, interaction: Optional[Dict[str, Any]] = None) -> float:
+        with self._lock:
+            if self.name == "none":
+                value = 0.0
+            elif self.name == "recorded":
+                value = float((interaction or {}).get("duration_s") or 0.0)
+            elif self.name == "fixed":
+                value = self.params[0]
+            elif self.name == "uniform":
+                value = self._rng.uniform(*self.params)
+            elif self.name == "normal":
+                value = self._rng.gauss(*self.params)
+            else:
+                value = self._rng.lognormvariate(*self.params)
+        return max(0.0, value * self.scale)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Cassette lookup
+# ─────────────────────────────────────────────────────────────────────────────
+
+def _words(text: str) -> set:
+    return set(re.findall(r"\w+", text.lower()))
+
+
+class CassetteLibrary:
+    """
+    Recorded interactions indexed by request hash and by model.
+
+    Nearest matching scores each recorded prompt by the share of its words
+    found in the new prompt, weighted by word rarity across the recordings
+    of that model. Words every recording shares (e.g. the incident text of
+    the recorded run) count little; the prompt template decides the match.
+    """
+
+    def __init__(self, interactions: List[Dict[str, Any]]):
+        self.interactions = [i for i in interactions if "request" in i]
+        by_key = defaultdict(list)
+        self._by_model = defaultdict(list)
+        for interaction in self.interactions:
+            by_key[interaction.get("key") or request_key(interaction["request"])].append(interaction)
+            self._by_model[interaction["request"].get("model")].append(
+                (interaction, _words(request_text(interaction["request"])))
+            )
+        self._idf = {model: self._word_weights(items) for model, items in self._by_model.items()}
+        self._all = [c for items in self._by_model.values() for c in items]
+        self._all_idf = self._word_weights(self._all)
+        self._cycles = {key: itertools.cycle(items) for key, items in by_key.items()}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _word_weights(candidates) -> Dict[str, float]:
+        df = defaultdict(int)
+        for _, words in candidates:
+            for word in words:
+                df[word] += 1
+        n = len(candidates)
+        return {word: math.log((n + 1) / count) for word, count in df.items()}
+
+    @classmethod
+    def from_paths(cls, paths: List[str]) -> "CassetteLibrary":
+        return cls(list(iter_cassettes(paths)))
+
+    def __len__(self) -> int:
+        return len(self.interactions)
+
+    def lookup(self, body: Dict[str, Any], nearest: bool = True) -> Tuple[Optional[Dict], str]:
+        """Returns (interaction, "exact" | "nearest" | "miss")."""
+        key = request_key(body)
+        with self._lock:
+            cycle = self._cycles.get(key)
+            if cycle is not None:
+                return next(cycle), "exact"
+        if not nearest:
+            return None, "miss"
+
+        model = body.get("model")
+        candidates, idf = (
+            (self._by_model[model], self._idf[model]) if model in self._by_model
+            else (self._all, self._all_idf)
+        )
+        if not candidates:
+            return None, "miss"
+        words = _words(request_text(body))
+
+        def score(candidate) -> Tuple[float, float]:
+            other = candidate[1]
+            total = sum(idf[w] for w in other)
+            contained = sum(idf[w] for w in other & words)
+            union = len(words | other)
+            return (contained / total if total else 0.0,
+                    len(words & other) / union if union else 0.0)
+
+        return max(candidates, key=score)[0], "nearest"
+
+
+def synthetic_completion(body: Dict[str, Any]) -> Dict[str, Any]:
+    """Placeholder chat.completion for prompts no cassette covers."""
+    text = request_text(body)
+    content = "{}" if "json" in text.lower() else "N/A"
+    prompt_tokens = max(1, len(text) // 4)
+    return {
+        "id": f"gen-synthetic-{uuid.uuid4().hex[:12]}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": body.get("model", "synthetic"),
+        "choices": [{
+            "index": 0,
+            "finish_reason": "stop",
+            "message": {"role": "assistant", "content": content},
+        }],
+        "usage": {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": 1,
+            "total_tokens": prompt_tokens + 1,
+        },
+    }
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Prompt cache
+# ─────────────────────────────────────────────────────────────────────────────
+
+def estimate_tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+
+class PromptCacheSimulator:
+    """
+    Provider prompt cache stand-in: tracks cacheable prefixes per model and
+    rewrites the usage block of each response accordingly.
+
+    Args:
+        ttl: Seconds a prefix stays cached after its last use
+        min_tokens: Shorter prefixes are never cached
+    """
+
+    def __init__(self, ttl: float = 300.0, min_tokens: int = 1024):
+        self.ttl = ttl
+        self.min_tokens = min_tokens
+        self._seen: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def usage(self, body: Dict[str, Any], completion: Dict[str, Any]) -> Dict[str, Any]:
+        """The completion's usage as the provider would report it for `body`."""
+        usage = dict(completion.get("usage") or {})
+        prompt_tokens = estimate_tokens(request_text(body))
+        completion_tokens = usage.get("completion_tokens") or 0
+        usage.update(prompt_tokens=prompt_tokens, total_tokens=prompt_tokens + completion_tokens)
+
+        prefix = cacheable_prefix(body)
+        prefix_tokens = estimate_tokens(prefix) if prefix else 0
+        cached = written = 0
+        if prefix_tokens >= self.min_tokens:
+            key = hashlib.sha256(f"{body.get('model')}\n{prefix}".encode("utf-8")).hexdigest()
+            now = time.monotonic()
+            with self._lock:
+                hit = now - self._seen.get(key, float("-inf")) < self.ttl
+                self._seen[key] = now
+            cached, written = (min(prefix_tokens, prompt_tokens), 0) if hit else (0, prefix_tokens)
+        usage["prompt_tokens_details"] = {"cached_tokens": cached, "cache_write_tokens": written}
+        return usage
+
+
+def completion_to_sse(completion: Dict[str, Any]) -> str:
+    """Re-encode a recorded chat.completion as a server-sent event stream."""
+    message = (completion.get("choices") or [{}])[0].get("message") or {}
+    base = {k: completion.get(k) for k in ("id", "created", "model")}
+    chunks = [
+        {**base, "object": "chat.completion.chunk",
+         "choices": [{"index": 0, "delta": {"role": "assistant", "content": message.get("content", "")},
+                      "finish_reason": None}]},
+        {**base, "object": "chat.completion.chunk",
+         "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}],
+         "usage": completion.get("usage")},
+    ]
+    return "".join(f"data: {json.dumps(c, ensure_ascii=False)}\n\n" for c in chunks) + "data: [DONE]\n\n"
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Server
+# ─────────────────────────────────────────────────────────────────────────────
+
+class MockLLMServer:
+    """
+    Threaded OpenAI-compatible stand-in.
+
+    Args:
+        library: Recorded interactions to replay
+        latency: Per-request latency model
+        on_miss: "nearest", "synthetic" or "error" for unrecorded requests
+        host, port: Bind address (port 0 picks a free port)
+        prompt_cache: Report cache reads/writes in usage (default: on)
+    """
+
+    def __init__(self, library: CassetteLibrary, latency: Optional[LatencyModel] = None,
+                 on_miss: str = "nearest", host: str = "127.0.0.1", port: int = 0,
+                 prompt_cache: bool = True):
+        if on_miss not in ON_MISS_CHOICES:
+            raise ValueError(f"on_miss must be one of {ON_MISS_CHOICES}")
+        self.library = library
+        self.latency = latency or LatencyModel()
+        self.on_miss = on_miss
+        self.prompt_cache = PromptCacheSimulator() if prompt_cache else None
+        self.stats = {"requests": 0, "exact": 0, "nearest": 0, "synthetic": 0, "errors": 0}
+        self._stats_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self.httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self.httpd.daemon_threads = True
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/api/v1"
+
+    def _count(self, name: str) -> None:
+        with self._stats_lock:
+            self.stats[name] += 1
+
+    def respond(self, body: Dict[str, Any]) -> Tuple[int, str, str, float]:
+        """Returns (status, content_type, payload, latency_s) for a request body."""
+        self._count("requests")
+        interaction, match = self.library.lookup(body, nearest=self.on_miss == "nearest")
+        if interaction is None:
+            if self.on_miss == "error":
+                self._count("errors")
+                error = {"error": {"message": "No cassette matches this request", "code": 404}}
+                return 404, "application/json", json.dumps(error), 0.0
+            self._count("synthetic")
+            interaction = {"status": 200, "response": synthetic_completion(body)}
+        else:
+            self._count(match)
+
+        delay = self.latency.sample(interaction)
+        status = interaction.get("status", 200)
+        if "response" in interaction:
+            completion = interaction["response"]
+            if self.prompt_cache is not None and status == 200 and isinstance(completion, dict):
+                completion = {**completion, "usage": self.prompt_cache.usage(body, completion)}
+            if body.get("stream"):
+                return status, "text/event-stream", completion_to_sse(completion), delay
+            return status, "application/json", json.dumps(completion, ensure_ascii=False), delay
+        return (status, interaction.get("content_type") or "text/event-stream",
+                interaction.get("response_text", ""), delay)
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def _send(self, status: int, content_type: str, payload: str) -> None:
+                data = payload.encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                if self.path.rstrip("/").endswith("/stats"):
+                    with server._stats_lock:
+                        stats = dict(server.stats)
+                    self._send(200, "application/json", json.dumps(stats))
+                else:
+                    self._send(200, "application/json", json.dumps({"status": "ok"}))
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                raw = self.rfile.read(length)
+                if not self.path.rstrip("/").endswith("/chat/completions"):
+                    self._send(404, "application/json", json.dumps({"error": {"message": "Not found"}}))
+                    return
+                try:
+                    body = json.loads(raw or b"{}")
+                except ValueError:
+                    self._send(400, "application/json", json.dumps({"error": {"message": "Invalid JSON"}}))
+                    return
+                status, content_type, payload, delay = server.respond(body)
+                if delay:
+                    time.sleep(delay)
+                self._send(status, content_type, payload)
+
+        return Handler
+
+    def start(self) -> "MockLLMServer":
+        """Serve in a background daemon thread."""
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        if self._thread:
+            self._thread.join(timeout=5)
+
+    def __enter__(self) -> "MockLLMServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Replay recorded LLM cassettes over an OpenAI-compatible API.")
+    parser.add_argument("cassettes", nargs="*", help="Cassette files or directories of *.jsonl")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", default="recorded",
+                        help="none | recorded | fixed:S | uniform:A,B | normal:MU,SD | lognormal:MU,SIGMA")
+    parser.add_argument("--latency-scale", type=float, default=1.0, help="Multiply every latency sample")
+    parser.add_argument("--seed", type=int, default=None, help="Seed for reproducible latency samples")
+    parser.add_argument("--on-miss", choices=ON_MISS_CHOICES, default="nearest",
+                        help="What to answer when no cassette matches exactly (default: nearest)")
+    parser.add_argument("--no-prompt-cache", action="store_true",
+                        help="Do not simulate provider prompt caching in usage")
+    args = parser.parse_args(argv)
+
+    library = CassetteLibrary.from_paths(args.cassettes)
+    server = MockLLMServer(
+        library,
+        latency=LatencyModel(args.latency, seed=args.seed, scale=args.latency_scale),
+        on_miss=args.on_miss, host=args.host, port=args.port,
+        prompt_cache=not args.no_prompt_cache,
+    )
+    print(f"🎞️  {len(library)} recorded interaction(s) loaded")
+    print(f"🚀 Mock LLM server on {server.base_url} (latency: {args.latency}, on miss: {args.on_miss})")
+    print(f"   export OPENROUTER_BASE_URL={server.base_url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+        print(f"\n📊 {server.stats}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
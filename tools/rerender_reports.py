@@ -0,0 +1,95 @@
+"""
+Re-render DOCX/HTML reports from saved content sidecars
+========================================================
+
+Every report produced by SkillBasedDocxAgent.generate_report() has a
+`<report>.content.json` sidecar next to it holding the Claude-generated
+content. This tool rebuilds the DOCX and HTML files from those sidecars
+without any network access, e.g. after a font or layout fix.
+
+Usage:
+    python -m tools.rerender_reports                  # all sidecars under outputs/
+    python -m tools.rerender_reports --workers 8
+    python -m tools.rerender_reports outputs/INC-20260224-002833_hse_report.content.json
+"""
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from agents.skillbased_docx_agent import (
+    CONTENT_SIDECAR_SUFFIX,
+    SkillBasedDocxAgent,
+)
+
+
+def find_sidecars(outputs_dir: str) -> List[Path]:
+    """Find all content sidecars under outputs_dir (recursive)."""
+    return sorted(Path(outputs_dir).rglob(f"*{CONTENT_SIDECAR_SUFFIX}"))
+
+
+def _render_one(sidecar_path: str) -> Tuple[str, Optional[str], Optional[str], float]:
+    """Worker: render one sidecar. Returns (sidecar, report_path, error, seconds)."""
+    start = time.perf_counter()
+    try:
+        agent = SkillBasedDocxAgent(offline=True)
+        report_path = agent.render_from_content(sidecar_path)
+        return sidecar_path, report_path, None, time.perf_counter() - start
+    except Exception as e:
+        return sidecar_path, None, str(e), time.perf_counter() - start
+
+
+def rerender_all(sidecars: List[Path], workers: int) -> int:
+    """Render sidecars in parallel processes. Returns number of failures."""
+    failures = 0
+    start = time.perf_counter()
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(_render_one, str(p)) for p in sidecars]
+        for future in as_completed(futures):
+            sidecar, report_path, error, seconds = future.result()
+            if error:
+                failures += 1
+                print(f"❌ {sidecar}: {error}")
+            else:
+                print(f"✅ {report_path} ({seconds:.2f}s)")
+
+    elapsed = time.perf_counter() - start
+    print(f"\n📊 {len(sidecars) - failures}/{len(sidecars)} reports re-rendered "
+          f"in {elapsed:.1f}s with {workers} workers")
+    return failures
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Re-render DOCX/HTML reports from saved content sidecars (no network)."
+    )
+    parser.add_argument(
+        "sidecars", nargs="*",
+        help=f"Specific *{CONTENT_SIDECAR_SUFFIX} files (default: all under --outputs-dir)",
+    )
+    parser.add_argument("--outputs-dir", default="outputs", help="Directory to scan (default: outputs)")
+    parser.add_argument(
+        "--workers", type=int, default=os.cpu_count() or 1,
+        help="Parallel render processes (default: CPU count)",
+    )
+    args = parser.parse_args(argv)
+
+    sidecars = [Path(p) for p in args.sidecars] or find_sidecars(args.outputs_dir)
+    if not sidecars:
+        print(f"⚠️  No *{CONTENT_SIDECAR_SUFFIX} files found under {args.outputs_dir}/")
+        return 0
+
+    print(f"🔁 Re-rendering {len(sidecars)} report(s)...")
+    failures = rerender_all(sidecars, max(1, args.workers))
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
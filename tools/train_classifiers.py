@@ -0,0 +1,111 @@
+"""
+Train the local incident-type / event-type classifiers
+======================================================
+
+Fits the fast-path models of shared/fast_classifier.py from the LLM labels
+logged in FAST_CLASSIFIER_DIR (<name>.labels.jsonl), holds out a share of
+them to pick the confidence threshold that reaches --target-accuracy, and
+writes <name>.model.json next to the labels. Running API workers pick the
+new model up on restart.
+
+Before any labels are logged, --from-results bootstraps the history from
+saved investigations (part1.incident_type / part2.type_of_event), using the
+Part 1 brief details as the text. That text is shorter than the raw report
+the agents classify, so prefer logged labels once there are enough.
+
+Usage:
+    FAST_CLASSIFIER_DIR=outputs/classifiers python -m tools.train_classifiers
+    python -m tools.train_classifiers --dir outputs/classifiers --from-results outputs/
+    python -m tools.train_classifiers --target-accuracy 0.97 --holdout 0.25
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from shared.config import Config
+from shared.fast_classifier import LinearClassifier, read_labels
+from tools.build_incident_index import find_investigations
+
+CLASSIFIERS = {
+    "incident_type": Config.INCIDENT_TYPES,
+    "event_type": Config.EVENT_TYPES,
+}
+MIN_EXAMPLES = 20
+
+
+def bootstrap_examples(inputs: Iterable[str]) -> Dict[str, List[Tuple[str, str]]]:
+    """(text, label) examples per classifier from saved investigation results."""
+    examples: Dict[str, List[Tuple[str, str]]] = {name: [] for name in CLASSIFIERS}
+    for _, data in find_investigations(inputs):
+        part1 = data.get("part1") if isinstance(data, dict) else None
+        if not isinstance(part1, dict):
+            continue
+        brief = part1.get("brief_details") or {}
+        text = ". ".join(str(brief[key]) for key in ("what", "where", "who") if brief.get(key))
+        if not text:
+            continue
+        if part1.get("incident_type"):
+            examples["incident_type"].append((text, part1["incident_type"]))
+        part2 = data.get("part2") or {}
+        if part2.get("type_of_event"):
+            type_text = f"{text}. Type: {part1['incident_type']}" if part1.get("incident_type") else text
+            examples["event_type"].append((type_text, part2["type_of_event"]))
+    return examples
+
+
+def train(name: str, labels: List[str], examples: List[Tuple[str, str]],
+          target_accuracy: float, holdout: float) -> Optional[LinearClassifier]:
+    """Model fitted on the training split and calibrated on the held-out split."""
+    examples = [(text, label) for text, label in examples if label in labels]
+    if len(examples) < MIN_EXAMPLES:
+        print(f"⚠️  {name}: {len(examples)} labelled example(s), need {MIN_EXAMPLES}; skipped")
+        return None
+    random.Random(0).shuffle(examples)
+    cut = max(1, int(len(examples) * holdout))
+    model = LinearClassifier(labels).fit(examples[cut:])
+    metrics = model.calibrate(examples[:cut], target_accuracy)
+    print(f"🧠 {name}: {len(examples) - cut} train / {metrics['holdout']} held out · "
+          f"accuracy {metrics['accuracy_all']} · threshold {metrics['threshold']} → "
+          f"{metrics['coverage']:.0%} answered locally at {metrics['accuracy_confident']} accuracy")
+    return model
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Train the local incident/event type classifiers.")
+    parser.add_argument("--dir", default=os.getenv("FAST_CLASSIFIER_DIR") or "outputs/classifiers",
+                        help="Labels/model directory (default: FAST_CLASSIFIER_DIR or outputs/classifiers)")
+    parser.add_argument("--from-results", nargs="*", default=[],
+                        help="Also learn from saved investigation results (files or directories)")
+    parser.add_argument("--target-accuracy", type=float, default=0.95,
+                        help="Held-out accuracy the local answers must reach (default: 0.95)")
+    parser.add_argument("--holdout", type=float, default=0.2,
+                        help="Share of examples held out for calibration (default: 0.2)")
+    args = parser.parse_args(argv)
+
+    directory = Path(args.dir)
+    bootstrap = bootstrap_examples(args.from_results) if args.from_results else {}
+    trained = 0
+    for name, labels in CLASSIFIERS.items():
+        start = time.perf_counter()
+        examples = read_labels(directory / f"{name}.labels.jsonl") + bootstrap.get(name, [])
+        model = train(name, labels, examples, args.target_accuracy, args.holdout)
+        if model is None:
+            continue
+        directory.mkdir(parents=True, exist_ok=True)
+        path = directory / f"{name}.model.json"
+        path.write_text(json.dumps(model.to_dict(), ensure_ascii=False), encoding="utf-8")
+        print(f"💾 {path} ({time.perf_counter() - start:.1f}s)")
+        trained += 1
+    return 0 if trained else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())